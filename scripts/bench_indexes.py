@@ -0,0 +1,923 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+"""Micro-benchmarks for the reference indexes on synthetic corpora.
+
+Usage:
+    python scripts/bench_indexes.py bm25-pruning --chunks 50000 --queries 200
+    python scripts/bench_indexes.py chunk-store --chunks 200000
+    python scripts/bench_indexes.py ivf --chunks 200000 --dim 128
+    python scripts/bench_indexes.py hnsw --chunks 20000 --dim 128
+    python scripts/bench_indexes.py pq --chunks 200000 --dim 128
+    python scripts/bench_indexes.py scalar --chunks 200000 --dim 128
+    python scripts/bench_indexes.py binary --chunks 200000 --dim 256
+    python scripts/bench_indexes.py truncated --chunks 200000 --dim 256 --coarse-dim 32
+    python scripts/bench_indexes.py batch --chunks 200000 --queries 500
+    python scripts/bench_indexes.py blocked --rows 1000000 10000000 --dim 128
+    python scripts/bench_indexes.py segments --chunks 100000 --delta 1000 --segments 4
+    python scripts/bench_indexes.py shards --chunks 200000 --shards 4 --processes 4
+    python scripts/bench_indexes.py hybrid --chunks 100000 --queries 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass, replace
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from bijux_rag.core.rag_types import Chunk, EmbeddingSpec
+from bijux_rag.rag.chunk_store import ChunkTable
+from bijux_rag.rag.embedders import HashEmbedder
+from bijux_rag.rag.index_format import IndexReader
+from bijux_rag.rag.indexes import (
+    _sharded_top_k,
+    _stream_top_k,
+    build_bm25_index,
+    build_hnsw_cosine_index,
+    build_hybrid_index,
+    build_ivf_cosine_index,
+    build_numpy_cosine_index,
+    load_index,
+)
+from bijux_rag.rag.quantization import ProductQuantizer
+from bijux_rag.rag.segments import SegmentedIndex, compact
+from bijux_rag.rag.shards import ShardedIndex, build_sharded_index
+
+
+def _zipf_corpus(*, chunks: int, vocab: int, mean_len: int, seed: int) -> list[Chunk]:
+    rng = np.random.default_rng(seed)
+    words = [f"w{i}" for i in range(vocab)]
+    out: list[Chunk] = []
+    for i in range(chunks):
+        n = max(1, int(rng.poisson(mean_len)))
+        ranks = np.minimum(rng.zipf(1.2, size=n), vocab) - 1
+        text = " ".join(words[r] for r in ranks.tolist())
+        out.append(Chunk(doc_id=f"doc{i}", text=text, start=0, end=len(text)))
+    return out
+
+
+@dataclass(frozen=True)
+class _TableEmbedder:
+    """Embedder over precomputed vectors: text ``"v<i>"`` embeds to row ``i``."""
+
+    table: NDArray[np.float32]
+
+    @property
+    def spec(self) -> EmbeddingSpec:
+        return EmbeddingSpec(
+            model="bench-table", dim=int(self.table.shape[1]), metric="cosine", normalized=True
+        )
+
+    def embed_texts(self, texts: Sequence[str]) -> NDArray[np.float32]:
+        return self.table[[int(t[1:]) for t in texts]]
+
+
+def _clustered_vectors(
+    *, rows: int, dim: int, clusters: int, noise: float, seed: int
+) -> NDArray[np.float32]:
+    """Gaussian blobs around random centres: a stand-in for real embedding distributions."""
+
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=rows)
+    noise_v = noise * rng.standard_normal((rows, dim)).astype(np.float32)
+    return (centres[labels] + noise_v).astype(np.float32)
+
+
+def _dense_setup(args: argparse.Namespace) -> tuple[list[Chunk], list[str], _TableEmbedder]:
+    """Chunks ``v0..v<n-1>`` plus held-out queries drawn from the same distribution."""
+
+    table = _clustered_vectors(
+        rows=args.chunks + args.queries,
+        dim=args.dim,
+        clusters=args.clusters,
+        noise=args.noise,
+        seed=0,
+    )
+    corpus = [
+        Chunk(doc_id=f"doc{i}", text=f"v{i}", start=0, end=0, metadata={"shard": str(i % 4)})
+        for i in range(args.chunks)
+    ]
+    queries = [f"v{args.chunks + j}" for j in range(args.queries)]
+    return corpus, queries, _TableEmbedder(table)
+
+
+def _recall(truth: list[set[str]], got: list[list[str]]) -> float:
+    hits = sum(len(t & set(g)) for t, g in zip(truth, got, strict=True))
+    return hits / max(1, sum(len(t) for t in truth))
+
+
+def _traced(fn: Callable[..., Any], *args: Any) -> tuple[Any, int]:
+    tracemalloc.start()
+    try:
+        out = fn(*args)
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return out, size
+
+
+def _zipf_queries(*, queries: int, vocab: int, terms: int, seed: int) -> list[str]:
+    rng = np.random.default_rng(seed + 1)
+    out: list[str] = []
+    for _ in range(queries):
+        ranks = np.minimum(rng.zipf(1.2, size=terms), vocab) - 1
+        out.append(" ".join(f"w{r}" for r in ranks.tolist()))
+    return out
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def bench_bm25_pruning(args: argparse.Namespace) -> dict[str, Any]:
+    corpus = _zipf_corpus(chunks=args.chunks, vocab=args.vocab, mean_len=args.mean_len, seed=0)
+    queries = _zipf_queries(queries=args.queries, vocab=args.vocab, terms=args.terms, seed=0)
+    idx, build_s = _timed(lambda: build_bm25_index(chunks=corpus, buckets=args.buckets))
+    _ = idx.block_max  # exclude the one-off table build from query timings
+
+    exhaustive_s = 0.0
+    pruned_s = 0.0
+    total = scored = blocks = mismatches = 0
+    for q in queries:
+        buckets = idx._query_buckets(q)
+        if not buckets:
+            continue
+        (ids_e, _), dt = _timed(idx._top_k_exhaustive, buckets, args.k, None)
+        exhaustive_s += dt
+        (ids_p, _, stats), dt = _timed(idx._top_k_maxscore, buckets, args.k, None)
+        pruned_s += dt
+        mismatches += int(not np.array_equal(ids_e, ids_p))
+        total += stats.postings_total
+        scored += stats.postings_scored
+        blocks += stats.blocks_skipped
+
+    n_q = max(1, len(queries))
+    return {
+        "bench": "bm25-pruning",
+        "chunks": args.chunks,
+        "buckets": args.buckets,
+        "k": args.k,
+        "build_s": round(build_s, 3),
+        "exhaustive_ms_per_query": round(1000 * exhaustive_s / n_q, 3),
+        "maxscore_ms_per_query": round(1000 * pruned_s / n_q, 3),
+        "postings_total": total,
+        "postings_scored": scored,
+        "postings_skipped_ratio": round(1.0 - scored / total, 4) if total else 0.0,
+        "blocks_skipped": blocks,
+        "topk_mismatches": mismatches,
+    }
+
+
+def bench_chunk_store(args: argparse.Namespace) -> dict[str, Any]:
+    corpus = _zipf_corpus(chunks=args.chunks, vocab=args.vocab, mean_len=args.mean_len, seed=0)
+    records = [
+        {"doc_id": c.doc_id, "text": c.text, "start": c.start, "end": c.end, "category": i % 7}
+        for i, c in enumerate(corpus)
+    ]
+    del corpus
+
+    def as_objects() -> tuple[Chunk, ...]:
+        return tuple(
+            Chunk(
+                doc_id=r["doc_id"],
+                text=r["text"].encode("utf-8").decode("utf-8"),  # a private copy, as on load
+                start=r["start"],
+                end=r["end"],
+                metadata={"category": str(r["category"])},
+            )
+            for r in records
+        )
+
+    objects, objects_bytes = _traced(as_objects)
+    table, table_bytes = _traced(ChunkTable.from_chunks, objects)
+    idx = build_bm25_index(chunks=objects, buckets=args.buckets)
+    del objects
+
+    out: dict[str, Any] = {
+        "bench": "chunk-store",
+        "chunks": args.chunks,
+        "tuple_of_chunks_mb": round(objects_bytes / 2**20, 2),
+        "chunk_table_mb": round(table_bytes / 2**20, 2),
+        "chunk_table_array_mb": round(table.nbytes / 2**20, 2),
+    }
+    fd, path = tempfile.mkstemp(suffix=".idx")
+    os.close(fd)
+    try:
+        idx.save(path)
+        for mode in ("full", "blocks", "none"):
+            loaded, load_s = _timed(lambda m=mode: load_index(path, verify=m))
+            out[f"load_{mode}_s"] = round(load_s, 3)
+        _, top_s = _timed(lambda: loaded.retrieve(query="w1 w2 w3", top_k=10))
+        out["first_query_ms_incl_block_max"] = round(1000 * top_s, 3)
+    finally:
+        os.unlink(path)
+    return out
+
+
+def _exact_truth(
+    corpus: list[Chunk], queries: list[str], emb: _TableEmbedder, k: int
+) -> tuple[list[set[str]], dict[str, Any]]:
+    exact, build_s = _timed(lambda: build_numpy_cosine_index(chunks=corpus, embedder=emb))
+    t0 = time.perf_counter()
+    truth = [{c.chunk_id for c in exact.retrieve(query=q, top_k=k, embedder=emb)} for q in queries]
+    ms = 1000 * (time.perf_counter() - t0) / max(1, len(queries))
+    return truth, {"exact_build_s": round(build_s, 3), "exact_ms_per_query": round(ms, 3)}
+
+
+def _sweep(
+    index: Any,
+    queries: list[str],
+    emb: _TableEmbedder,
+    truth: list[set[str]],
+    *,
+    k: int,
+    exact_ms: float,
+    knob: str,
+    values: list[int],
+) -> list[dict[str, Any]]:
+    """Recall@k and latency of ``index.retrieve`` for each value of a query-time knob."""
+
+    out: list[dict[str, Any]] = []
+    for value in values:
+        got: list[list[str]] = []
+        t0 = time.perf_counter()
+        for q in queries:
+            cands = index.retrieve(query=q, top_k=k, embedder=emb, **{knob: value})
+            got.append([c.chunk_id for c in cands])
+        ms = 1000 * (time.perf_counter() - t0) / max(1, len(queries))
+        out.append(
+            {
+                knob: value,
+                "ms_per_query": round(ms, 3),
+                "recall_at_k": round(_recall(truth, got), 4),
+                "speedup": round(exact_ms / ms, 2) if ms else None,
+            }
+        )
+    return out
+
+
+def bench_ivf(args: argparse.Namespace) -> dict[str, Any]:
+    corpus, queries, emb = _dense_setup(args)
+    truth, exact = _exact_truth(corpus, queries, emb, args.k)
+    ivf, build_s = _timed(
+        lambda: build_ivf_cosine_index(chunks=corpus, embedder=emb, nlist=args.nlist)
+    )
+    return {
+        "bench": "ivf",
+        "chunks": args.chunks,
+        "dim": args.dim,
+        "nlist": ivf.nlist,
+        "k": args.k,
+        **exact,
+        "ivf_build_s": round(build_s, 3),
+        "sweep": _sweep(
+            ivf,
+            queries,
+            emb,
+            truth,
+            k=args.k,
+            exact_ms=exact["exact_ms_per_query"],
+            knob="nprobe",
+            values=args.nprobe,
+        ),
+    }
+
+
+def bench_hnsw(args: argparse.Namespace) -> dict[str, Any]:
+    corpus, queries, emb = _dense_setup(args)
+    truth, exact = _exact_truth(corpus, queries, emb, args.k)
+    hnsw, build_s = _timed(
+        lambda: build_hnsw_cosine_index(
+            chunks=corpus, embedder=emb, m=args.m, ef_construction=args.ef_construction
+        )
+    )
+    return {
+        "bench": "hnsw",
+        "chunks": args.chunks,
+        "dim": args.dim,
+        "m": args.m,
+        "ef_construction": args.ef_construction,
+        "k": args.k,
+        **exact,
+        "hnsw_build_s": round(build_s, 3),
+        "sweep": _sweep(
+            hnsw,
+            queries,
+            emb,
+            truth,
+            k=args.k,
+            exact_ms=exact["exact_ms_per_query"],
+            knob="ef",
+            values=args.ef,
+        ),
+    }
+
+
+def bench_pq(args: argparse.Namespace) -> dict[str, Any]:
+    corpus, queries, emb = _dense_setup(args)
+    truth, exact = _exact_truth(corpus, queries, emb, args.k)
+    pq, build_s = _timed(
+        lambda: build_numpy_cosine_index(
+            chunks=corpus, embedder=emb, pq_subvectors=args.subvectors or args.dim // 8
+        )
+    )
+    assert isinstance(pq.codec, ProductQuantizer)
+    return {
+        "bench": "pq",
+        "chunks": args.chunks,
+        "dim": args.dim,
+        "subvectors": pq.codec.m,
+        "k": args.k,
+        "float32_bytes_per_vector": 4 * args.dim,
+        "pq_bytes_per_vector": pq.codec.m,
+        **exact,
+        "pq_build_s": round(build_s, 3),
+        "sweep": _sweep(
+            pq,
+            queries,
+            emb,
+            truth,
+            k=args.k,
+            exact_ms=exact["exact_ms_per_query"],
+            knob="oversample",
+            values=args.oversample,
+        ),
+    }
+
+
+def bench_scalar(args: argparse.Namespace) -> dict[str, Any]:
+    corpus, queries, emb = _dense_setup(args)
+    truth, exact = _exact_truth(corpus, queries, emb, args.k)
+    out: dict[str, Any] = {
+        "bench": "scalar",
+        "chunks": args.chunks,
+        "dim": args.dim,
+        "k": args.k,
+        "float32_bytes_per_vector": 4 * args.dim,
+        **exact,
+    }
+    for dtype in ("float16", "int8"):
+        idx, build_s = _timed(
+            lambda dtype=dtype: build_numpy_cosine_index(
+                chunks=corpus, embedder=emb, storage_dtype=dtype
+            )
+        )
+        out[dtype] = {
+            "bytes_per_vector": idx.codes.nbytes // max(1, args.chunks),
+            "build_s": round(build_s, 3),
+            "sweep": _sweep(
+                idx,
+                queries,
+                emb,
+                truth,
+                k=args.k,
+                exact_ms=exact["exact_ms_per_query"],
+                knob="oversample",
+                values=args.oversample,
+            ),
+        }
+    return out
+
+
+def bench_binary(args: argparse.Namespace) -> dict[str, Any]:
+    corpus, queries, emb = _dense_setup(args)
+    truth, exact = _exact_truth(corpus, queries, emb, args.k)
+    idx, build_s = _timed(
+        lambda: build_numpy_cosine_index(chunks=corpus, embedder=emb, binary=True)
+    )
+    assert idx.bits is not None
+    return {
+        "bench": "binary",
+        "chunks": args.chunks,
+        "dim": args.dim,
+        "k": args.k,
+        "float32_bytes_per_vector": 4 * args.dim,
+        "bits_bytes_per_vector": int(idx.bits.shape[1]),
+        **exact,
+        "binary_build_s": round(build_s, 3),
+        "sweep": _sweep(
+            idx,
+            queries,
+            emb,
+            truth,
+            k=args.k,
+            exact_ms=exact["exact_ms_per_query"],
+            knob="oversample",
+            values=args.oversample,
+        ),
+    }
+
+
+def bench_truncated(args: argparse.Namespace) -> dict[str, Any]:
+    corpus, queries, emb = _dense_setup(args)
+    # Matryoshka-like spectrum: leading dimensions carry most of the variance.
+    emb = _TableEmbedder(emb.table * (1.0 + np.arange(args.dim, dtype=np.float32)) ** -args.decay)
+    truth, exact = _exact_truth(corpus, queries, emb, args.k)
+    idx, build_s = _timed(
+        lambda: build_numpy_cosine_index(chunks=corpus, embedder=emb, coarse_dim=args.coarse_dim)
+    )
+    return {
+        "bench": "truncated",
+        "chunks": args.chunks,
+        "dim": args.dim,
+        "coarse_dim": args.coarse_dim,
+        "decay": args.decay,
+        "k": args.k,
+        **exact,
+        "truncated_build_s": round(build_s, 3),
+        "sweep": _sweep(
+            idx,
+            queries,
+            emb,
+            truth,
+            k=args.k,
+            exact_ms=exact["exact_ms_per_query"],
+            knob="oversample",
+            values=args.oversample,
+        ),
+    }
+
+
+def bench_batch(args: argparse.Namespace) -> dict[str, Any]:
+    corpus, queries, emb = _dense_setup(args)
+    idx = build_numpy_cosine_index(chunks=corpus, embedder=emb)
+    single, single_s = _timed(
+        lambda: [idx.retrieve(query=q, top_k=args.k, embedder=emb) for q in queries]
+    )
+    batched, batch_s = _timed(
+        lambda: idx.retrieve_many(queries=queries, top_k=args.k, embedder=emb)
+    )
+    same = all(
+        [c.chunk_id for c in a] == [c.chunk_id for c in b]
+        for a, b in zip(single, batched, strict=True)
+    )
+    return {
+        "bench": "batch",
+        "chunks": args.chunks,
+        "dim": args.dim,
+        "queries": args.queries,
+        "k": args.k,
+        "single_qps": round(args.queries / single_s, 1),
+        "batched_qps": round(args.queries / batch_s, 1),
+        "speedup": round(single_s / batch_s, 2),
+        "same_results": same,
+    }
+
+
+def _unit_rows(x: NDArray[np.float32]) -> NDArray[np.float32]:
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def _peak_traced(fn: Callable[[], Any]) -> tuple[Any, int]:
+    tracemalloc.start()
+    try:
+        out = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return out, peak
+
+
+def bench_blocked(args: argparse.Namespace) -> dict[str, Any]:
+    """Full scan vs the blocked (and sharded) streaming top-k kernel over a memory-mapped matrix."""
+
+    rng = np.random.default_rng(0)
+    queries = _unit_rows(rng.standard_normal((args.queries, args.dim), np.float32))
+    out: dict[str, Any] = {"bench": "blocked", "dim": args.dim, "k": args.k, "runs": []}
+    tmp = tempfile.mkdtemp()
+    try:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"vectors_{rows}.npy")
+            mm = np.lib.format.open_memmap(
+                path, mode="w+", dtype=np.float32, shape=(rows, args.dim)
+            )
+            for lo in range(0, rows, 1 << 20):
+                n = min(1 << 20, rows - lo)
+                mm[lo : lo + n] = _unit_rows(rng.standard_normal((n, args.dim), np.float32))
+            mm.flush()
+            del mm
+            vectors = np.load(path, mmap_mode="r")
+            run: dict[str, Any] = {"rows": rows, "matrix_mb": round(vectors.nbytes / 2**20, 1)}
+
+            def full_scan(vectors: NDArray[np.float32] = vectors) -> None:
+                for q in queries:
+                    scores = vectors @ q
+                    np.argpartition(-scores, kth=args.k - 1)[: args.k]
+
+            _, full_s = _timed(full_scan)
+            _, full_peak = _peak_traced(lambda: full_scan())
+            run["full_scan"] = {
+                "ms_per_query": round(1000 * full_s / args.queries, 2),
+                "peak_mb": round(full_peak / 2**20, 1),
+            }
+            for block in args.block_rows:
+
+                def blocked(block: int = block, vectors: NDArray[np.float32] = vectors) -> None:
+                    for q in queries:
+                        _stream_top_k(vectors, q[None, :], None, args.k, block=block)
+
+                _, block_s = _timed(blocked)
+                _, block_peak = _peak_traced(lambda: blocked())
+                run[f"block_{block}"] = {
+                    "ms_per_query": round(1000 * block_s / args.queries, 2),
+                    "peak_mb": round(block_peak / 2**20, 1),
+                }
+            for workers in args.workers:
+
+                def sharded(workers: int = workers, vectors: NDArray[np.float32] = vectors) -> None:
+                    for q in queries:
+                        _sharded_top_k(
+                            vectors, q[None, :], None, args.k, block=65_536, workers=workers
+                        )
+
+                _, shard_s = _timed(sharded)
+                run[f"workers_{workers}"] = {
+                    "ms_per_query": round(1000 * shard_s / args.queries, 2)
+                }
+            out["runs"].append(run)
+            del vectors
+            os.remove(path)
+    finally:
+        os.rmdir(tmp)
+    return out
+
+
+def bench_segments(args: argparse.Namespace) -> dict[str, Any]:
+    corpus = _zipf_corpus(
+        chunks=args.chunks + args.delta, vocab=args.vocab, mean_len=args.mean_len, seed=0
+    )
+    queries = _zipf_queries(queries=args.queries, vocab=args.vocab, terms=args.terms, seed=0)
+    base, delta = corpus[: args.chunks], corpus[args.chunks :]
+    step = -(-args.chunks // args.segments)
+    seg = SegmentedIndex.from_index(build_bm25_index(chunks=base[:step]))
+    for lo in range(step, args.chunks, step):
+        seg = seg.add_docs(chunks=base[lo : lo + step])
+    deleted = {c.doc_id for c in base[:: max(1, round(1 / args.delete_ratio))]}
+    live = [c for c in corpus if c.doc_id not in deleted]
+
+    whole, rebuild_s = _timed(lambda: build_bm25_index(chunks=live))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "seg")
+        seg.save(path)
+        t0 = time.perf_counter()
+        grown = SegmentedIndex.load(path, verify="none").add_docs(chunks=delta)
+        grown.save(path)
+        append_s = time.perf_counter() - t0
+        grown = grown.delete_doc_ids(deleted)
+        grown.save(path)
+        merge = compact(path, force=True)
+        compacted = SegmentedIndex.load(path, verify="none")
+
+    def per_query(index: Any) -> tuple[float, int]:
+        total = 0.0
+        mismatches = 0
+        for q in queries:
+            want = whole.retrieve(query=q, top_k=args.k)
+            got, dt = _timed(lambda q=q: index.retrieve(query=q, top_k=args.k))
+            total += dt
+            mismatches += int([c.chunk_id for c in want] != [c.chunk_id for c in got])
+        return round(1000 * total / max(1, len(queries)), 3), mismatches
+
+    mono_ms, _ = per_query(whole)
+    seg_ms, seg_mismatches = per_query(grown)
+    compact_ms, compact_mismatches = per_query(compacted)
+    return {
+        "bench": "segments",
+        "chunks": args.chunks,
+        "delta": args.delta,
+        "deleted_docs": len(deleted),
+        "rebuild_s": round(rebuild_s, 3),
+        "append_s": round(append_s, 3),
+        "monolithic_ms_per_query": mono_ms,
+        "segmented_ms_per_query": seg_ms,
+        "compacted_ms_per_query": compact_ms,
+        "compact": {**asdict(merge), "seconds": round(merge.seconds, 3)},
+        "topk_mismatches": seg_mismatches + compact_mismatches,
+    }
+
+
+def bench_bm25_build(args: argparse.Namespace) -> dict[str, Any]:
+    corpus = _zipf_corpus(chunks=args.chunks, vocab=args.vocab, mean_len=args.mean_len, seed=0)
+    serial, serial_s = _timed(lambda: build_bm25_index(chunks=corpus))
+    parallel, parallel_s = _timed(lambda: build_bm25_index(chunks=corpus, workers=args.workers))
+    return {
+        "bench": "bm25-build",
+        "chunks": args.chunks,
+        "workers": args.workers,
+        "cpus": os.cpu_count(),
+        "serial_s": round(serial_s, 3),
+        "parallel_s": round(parallel_s, 3),
+        "fingerprints_equal": serial.fingerprint == parallel.fingerprint,
+    }
+
+
+def bench_bm25_vocab(args: argparse.Namespace) -> dict[str, Any]:
+    corpus = _zipf_corpus(chunks=args.chunks, vocab=args.vocab, mean_len=args.mean_len, seed=0)
+    queries = _zipf_queries(queries=args.queries, vocab=args.vocab, terms=args.terms, seed=0)
+    out: dict[str, Any] = {"bench": "bm25-vocab", "chunks": args.chunks, "vocab": args.vocab}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("hashed", "exact"):
+            built, build_s = _timed(
+                lambda mode=mode: build_bm25_index(chunks=corpus, buckets=args.buckets, vocab=mode)
+            )
+            path = os.path.join(tmp, f"{mode}.idx")
+            built.save(path)
+            idx = load_index(path, verify="none")
+            postings = idx.postings
+            idx.retrieve(query=queries[0], top_k=args.k)  # warm-up (block-max table)
+            scanned = 0
+            t0 = time.perf_counter()
+            for q in queries:
+                scanned += idx.retrieve_with_stats(query=q, top_k=args.k)[1].postings_total
+            query_s = time.perf_counter() - t0
+            out[mode] = {
+                "buckets": idx.buckets,
+                "build_s": round(build_s, 3),
+                "file_bytes": os.path.getsize(path),
+                "postings_bytes": int(
+                    postings.indptr.nbytes + postings.doc_ids.nbytes + postings.tfs.nbytes
+                ),
+                "dictionary_bytes": 0 if idx.vocab is None else idx.vocab.nbytes,
+                "postings_per_query": round(scanned / max(1, len(queries)), 1),
+                "ms_per_query": round(1000 * query_s / max(1, len(queries)), 3),
+            }
+    return out
+
+
+def bench_postings(args: argparse.Namespace) -> dict[str, Any]:
+    corpus = _zipf_corpus(chunks=args.chunks, vocab=args.vocab, mean_len=args.mean_len, seed=0)
+    queries = _zipf_queries(queries=args.queries, vocab=args.vocab, terms=args.terms, seed=0)
+    built = build_bm25_index(chunks=corpus, buckets=args.buckets, vocab=args.bm25_vocab)
+    out: dict[str, Any] = {
+        "bench": "postings",
+        "chunks": args.chunks,
+        "bm25_vocab": args.bm25_vocab,
+        "postings": int(built.postings.doc_ids.size),
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for codec in ("raw", "packed"):
+            path = os.path.join(tmp, f"{codec}.idx")
+            _, save_s = _timed(replace(built, postings_codec=codec).save, path)
+            idx, load_s = _timed(lambda p=path: load_index(p, verify="none"))
+            reader = IndexReader.open(path)
+            idx.retrieve(query=queries[0], top_k=args.k)  # warm-up (block-max table)
+            got, query_s = _timed(
+                lambda i=idx: [i.retrieve(query=q, top_k=args.k) for q in queries]
+            )
+            results[codec] = [[(c.chunk_id, c.score) for c in r] for r in got]
+            out[codec] = {
+                "file_bytes": os.path.getsize(path),
+                "postings_bytes": sum(
+                    sec.length
+                    for name, sec in reader.header.sections.items()
+                    if name.startswith("postings.")
+                ),
+                "save_s": round(save_s, 3),
+                "load_s": round(load_s, 3),
+                "ms_per_query": round(1000 * query_s / max(1, len(queries)), 3),
+            }
+    out["postings_ratio"] = round(out["raw"]["postings_bytes"] / out["packed"]["postings_bytes"], 2)
+    out["file_ratio"] = round(out["raw"]["file_bytes"] / out["packed"]["file_bytes"], 2)
+    out["topk_mismatches"] = sum(a != b for a, b in zip(results["raw"], results["packed"]))
+    return out
+
+
+def bench_shards(args: argparse.Namespace) -> dict[str, Any]:
+    corpus = _zipf_corpus(chunks=args.chunks, vocab=args.vocab, mean_len=args.mean_len, seed=0)
+    queries = _zipf_queries(queries=args.queries, vocab=args.vocab, terms=args.terms, seed=0)
+    whole = build_bm25_index(chunks=corpus)
+    sharded = build_sharded_index(
+        chunks=corpus, shards=args.shards, build=lambda cs: build_bm25_index(chunks=cs)
+    )
+    want, mono_s = _timed(lambda: [whole.retrieve(query=q, top_k=args.k) for q in queries])
+
+    def run(index: Any) -> tuple[float, int]:
+        index.retrieve_many(queries=queries[:1], top_k=args.k)  # warm-up (starts workers)
+        got, dt = _timed(lambda: index.retrieve_many(queries=queries, top_k=args.k))
+        mismatches = sum(
+            [(c.chunk_id, c.score) for c in a] != [(c.chunk_id, c.score) for c in b]
+            for a, b in zip(want, got, strict=True)
+        )
+        return round(1000 * dt / max(1, len(queries)), 3), mismatches
+
+    threads_ms, thread_mismatches = run(sharded)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sharded")
+        sharded.save(path)
+        with ShardedIndex.load(path, verify="none", processes=args.processes) as served:
+            procs_ms, proc_mismatches = run(served)
+    return {
+        "bench": "shards",
+        "chunks": args.chunks,
+        "shards": args.shards,
+        "processes": args.processes,
+        "cpus": os.cpu_count(),
+        "monolithic_ms_per_query": round(1000 * mono_s / max(1, len(queries)), 3),
+        "threads_ms_per_query": threads_ms,
+        "processes_ms_per_query": procs_ms,
+        "topk_mismatches": thread_mismatches + proc_mismatches,
+    }
+
+
+def bench_hybrid(args: argparse.Namespace) -> dict[str, Any]:
+    emb = HashEmbedder()
+    corpus = _zipf_corpus(chunks=args.chunks, vocab=args.vocab, mean_len=args.mean_len, seed=0)
+    queries = _zipf_queries(queries=args.queries, vocab=args.vocab, terms=args.terms, seed=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {name: os.path.join(tmp, f"{name}.idx") for name in ("bm25", "dense", "hybrid")}
+        build_bm25_index(chunks=corpus).save(paths["bm25"])
+        build_numpy_cosine_index(chunks=corpus, embedder=emb).save(paths["dense"])
+        build_hybrid_index(
+            chunks=corpus, embedder=emb, lexical_k=args.depth, dense_k=args.depth
+        ).save(paths["hybrid"])
+        sizes = {name: os.path.getsize(path) for name, path in paths.items()}
+        (lexical, dense), two_load_s = _timed(
+            lambda: (load_index(paths["bm25"]), load_index(paths["dense"]))
+        )
+        hybrid, one_load_s = _timed(load_index, paths["hybrid"])
+
+        def separate() -> None:
+            lexical.retrieve_many(queries=queries, top_k=args.depth)
+            dense.retrieve_many(queries=queries, top_k=args.depth, embedder=emb)
+
+        _, separate_s = _timed(separate)
+        _, hybrid_s = _timed(
+            lambda: hybrid.retrieve_many(queries=queries, top_k=args.k, embedder=emb)
+        )
+    per_query = 1000 / max(1, len(queries))
+    return {
+        "bench": "hybrid",
+        "chunks": args.chunks,
+        "depth": args.depth,
+        "bytes_separate": sizes["bm25"] + sizes["dense"],
+        "bytes_hybrid": sizes["hybrid"],
+        "load_separate_s": round(two_load_s, 3),
+        "load_hybrid_s": round(one_load_s, 3),
+        "separate_arms_ms_per_query": round(separate_s * per_query, 3),
+        "hybrid_fused_ms_per_query": round(hybrid_s * per_query, 3),
+    }
+
+
+def _dense_args(p: argparse.ArgumentParser, *, chunks: int) -> None:
+    p.add_argument("--chunks", type=int, default=chunks)
+    p.add_argument("--dim", type=int, default=128)
+    p.add_argument("--clusters", type=int, default=256)
+    p.add_argument("--noise", type=float, default=1.5)
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--k", type=int, default=10)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark bijux-rag reference indexes.")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p_prune = sub.add_parser("bm25-pruning", help="Exhaustive vs block-max MaxScore BM25 top-k")
+    p_prune.add_argument("--chunks", type=int, default=50_000)
+    p_prune.add_argument("--vocab", type=int, default=50_000)
+    p_prune.add_argument("--mean-len", type=int, default=60)
+    p_prune.add_argument("--buckets", type=int, default=2048)
+    p_prune.add_argument("--queries", type=int, default=200)
+    p_prune.add_argument("--terms", type=int, default=4)
+    p_prune.add_argument("--k", type=int, default=10)
+
+    p_store = sub.add_parser("chunk-store", help="Tuple-of-Chunk vs columnar chunk table")
+    p_store.add_argument("--chunks", type=int, default=200_000)
+    p_store.add_argument("--vocab", type=int, default=50_000)
+    p_store.add_argument("--mean-len", type=int, default=60)
+    p_store.add_argument("--buckets", type=int, default=2048)
+
+    p_ivf = sub.add_parser("ivf", help="Recall/latency of ivf-cosine vs exact numpy-cosine")
+    _dense_args(p_ivf, chunks=200_000)
+    p_ivf.add_argument("--nlist", type=int, default=None)
+    p_ivf.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+
+    p_hnsw = sub.add_parser("hnsw", help="Recall/latency of hnsw-cosine vs exact numpy-cosine")
+    _dense_args(p_hnsw, chunks=20_000)
+    p_hnsw.add_argument("--m", type=int, default=16)
+    p_hnsw.add_argument("--ef-construction", type=int, default=100)
+    p_hnsw.add_argument("--ef", type=int, nargs="+", default=[10, 20, 40, 80, 160])
+
+    p_pq = sub.add_parser("pq", help="Recall/latency of PQ ADC + exact re-scoring vs exact")
+    _dense_args(p_pq, chunks=200_000)
+    p_pq.add_argument("--subvectors", type=int, default=None, help="Default: dim / 8")
+    p_pq.add_argument("--oversample", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+
+    p_bin = sub.add_parser("binary", help="Recall/latency of sign-bit Hamming pool + re-scoring")
+    _dense_args(p_bin, chunks=200_000)
+    p_bin.add_argument("--oversample", type=int, nargs="+", default=[4, 10, 20, 50])
+
+    p_trunc = sub.add_parser("truncated", help="Recall/latency of leading-dimension two-pass")
+    _dense_args(p_trunc, chunks=200_000)
+    p_trunc.add_argument("--coarse-dim", type=int, default=32)
+    p_trunc.add_argument("--decay", type=float, default=0.5, help="Per-dimension scale exponent")
+    p_trunc.add_argument("--oversample", type=int, nargs="+", default=[4, 10, 20, 50])
+
+    p_batch = sub.add_parser("batch", help="Per-query retrieve vs batched retrieve_many (GEMM)")
+    _dense_args(p_batch, chunks=200_000)
+
+    p_blk = sub.add_parser("blocked", help="Full scan vs blocked streaming top-k on a memmap")
+    p_blk.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    p_blk.add_argument("--dim", type=int, default=128)
+    p_blk.add_argument("--queries", type=int, default=20)
+    p_blk.add_argument("--k", type=int, default=10)
+    p_blk.add_argument("--block-rows", type=int, nargs="+", default=[16_384, 65_536, 262_144])
+    p_blk.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+
+    p_sq = sub.add_parser("scalar", help="Recall/latency of float16/int8 storage vs float32")
+    _dense_args(p_sq, chunks=200_000)
+    p_sq.add_argument("--oversample", type=int, nargs="+", default=[1, 2, 4])
+
+    p_seg = sub.add_parser("segments", help="BM25 rebuild vs append a segment, then compact")
+    p_seg.add_argument("--chunks", type=int, default=100_000)
+    p_seg.add_argument("--delta", type=int, default=1_000)
+    p_seg.add_argument("--segments", type=int, default=4)
+    p_seg.add_argument("--delete-ratio", type=float, default=0.05)
+    p_seg.add_argument("--vocab", type=int, default=50_000)
+    p_seg.add_argument("--mean-len", type=int, default=60)
+    p_seg.add_argument("--queries", type=int, default=200)
+    p_seg.add_argument("--terms", type=int, default=4)
+    p_seg.add_argument("--k", type=int, default=10)
+
+    p_build = sub.add_parser("bm25-build", help="Serial vs multi-process BM25 build")
+    p_build.add_argument("--chunks", type=int, default=200_000)
+    p_build.add_argument("--workers", type=int, default=4)
+    p_build.add_argument("--vocab", type=int, default=50_000)
+    p_build.add_argument("--mean-len", type=int, default=60)
+
+    p_vocab = sub.add_parser("bm25-vocab", help="Hashed-bucket vs exact-vocabulary BM25")
+    p_vocab.add_argument("--chunks", type=int, default=100_000)
+    p_vocab.add_argument("--buckets", type=int, default=2048)
+    p_vocab.add_argument("--vocab", type=int, default=50_000)
+    p_vocab.add_argument("--mean-len", type=int, default=60)
+    p_vocab.add_argument("--queries", type=int, default=200)
+    p_vocab.add_argument("--terms", type=int, default=4)
+    p_vocab.add_argument("--k", type=int, default=10)
+
+    p_post = sub.add_parser("postings", help="Raw vs delta + bit-packed BM25 postings on disk")
+    p_post.add_argument("--chunks", type=int, default=100_000)
+    p_post.add_argument("--buckets", type=int, default=2048)
+    p_post.add_argument("--bm25-vocab", choices=["hashed", "exact"], default="hashed")
+    p_post.add_argument("--vocab", type=int, default=50_000)
+    p_post.add_argument("--mean-len", type=int, default=60)
+    p_post.add_argument("--queries", type=int, default=200)
+    p_post.add_argument("--terms", type=int, default=4)
+    p_post.add_argument("--k", type=int, default=10)
+
+    p_shard = sub.add_parser("shards", help="BM25 single index vs doc_id shards (threads, procs)")
+    p_shard.add_argument("--chunks", type=int, default=200_000)
+    p_shard.add_argument("--shards", type=int, default=4)
+    p_shard.add_argument("--processes", type=int, default=4)
+    p_shard.add_argument("--vocab", type=int, default=50_000)
+    p_shard.add_argument("--mean-len", type=int, default=60)
+    p_shard.add_argument("--queries", type=int, default=200)
+    p_shard.add_argument("--terms", type=int, default=4)
+    p_shard.add_argument("--k", type=int, default=10)
+
+    p_hyb = sub.add_parser("hybrid", help="Two indexes queried in turn vs one fused hybrid index")
+    p_hyb.add_argument("--chunks", type=int, default=100_000)
+    p_hyb.add_argument("--depth", type=int, default=50, help="Per-arm fetch depth")
+    p_hyb.add_argument("--vocab", type=int, default=50_000)
+    p_hyb.add_argument("--mean-len", type=int, default=60)
+    p_hyb.add_argument("--queries", type=int, default=200)
+    p_hyb.add_argument("--terms", type=int, default=4)
+    p_hyb.add_argument("--k", type=int, default=10)
+
+    args = parser.parse_args()
+    benches: dict[str, Callable[[argparse.Namespace], dict[str, Any]]] = {
+        "bm25-pruning": bench_bm25_pruning,
+        "chunk-store": bench_chunk_store,
+        "ivf": bench_ivf,
+        "hnsw": bench_hnsw,
+        "pq": bench_pq,
+        "scalar": bench_scalar,
+        "binary": bench_binary,
+        "truncated": bench_truncated,
+        "batch": bench_batch,
+        "blocked": bench_blocked,
+        "segments": bench_segments,
+        "bm25-build": bench_bm25_build,
+        "bm25-vocab": bench_bm25_vocab,
+        "postings": bench_postings,
+        "shards": bench_shards,
+        "hybrid": bench_hybrid,
+    }
+    print(json.dumps(benches[args.bench](args), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,6 +17,7 @@ from __future__ import annotations
 import argparse
 import json
 import sys
+from dataclasses import asdict, replace
 from pathlib import Path
 from typing import Any, cast
 
@@ -24,9 +25,20 @@ from bijux_rag.core.rag_types import RagEnv, RawDoc
 from bijux_rag.infra.adapters.file_storage import FileStorage
 from bijux_rag.pipelines.cli import deep_merge, parse_override
 from bijux_rag.pipelines.configured import PipelineConfig, StepConfig, build_rag_pipeline
-from bijux_rag.rag.app import RagBuildConfig, build_index_from_csv, parse_filters
+from bijux_rag.rag.app import (
+    RagBuildConfig,
+    add_csv_to_index,
+    build_index_from_csv,
+    delete_docs_from_index,
+    parse_filters,
+)
 from bijux_rag.rag.app import ask as rag_ask
 from bijux_rag.rag.app import retrieve as rag_retrieve
+from bijux_rag.rag.app import retrieve_many as rag_retrieve_many
+from bijux_rag.rag.index_format import VERIFY_MODES
+from bijux_rag.rag.indexes import BM25_VOCABS, FUSION_MODES, POSTINGS_CODECS
+from bijux_rag.rag.segments import MergePolicy
+from bijux_rag.rag.segments import compact as compact_index
 from bijux_rag.result.types import Err, ErrInfo, Ok, Result
 
 
@@ -139,6 +151,112 @@ def _main_legacy(argv: list[str]) -> int:
     return 0
 
 
+def _add_build_args(p: argparse.ArgumentParser) -> None:
+    """Index build options shared by ``index build`` and ``index add``."""
+
+    p.add_argument(
+        "--backend",
+        choices=["bm25", "numpy-cosine", "ivf-cosine", "hnsw-cosine", "hybrid"],
+        default="bm25",
+    )
+    p.add_argument("--embedder", choices=["hash16", "sbert"], default="hash16")
+    p.add_argument("--sbert-model", default="all-MiniLM-L6-v2")
+    p.add_argument("--bm25-buckets", type=int, default=2048)
+    p.add_argument(
+        "--bm25-vocab",
+        choices=list(BM25_VOCABS),
+        default="hashed",
+        help="BM25 terms: hashed into --bm25-buckets, or an exact sorted term dictionary",
+    )
+    p.add_argument(
+        "--postings-codec",
+        choices=list(POSTINGS_CODECS),
+        default="raw",
+        help="BM25 postings on disk: raw int32 arrays, or delta-encoded and bit-packed",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Tokenize and count BM25 chunks in this many processes (bm25, hybrid)",
+    )
+    p.add_argument(
+        "--ivf-nlist", type=int, default=None, help="IVF lists (default: sqrt of chunk count)"
+    )
+    p.add_argument("--ivf-nprobe", type=int, default=8, help="IVF lists probed per query")
+    p.add_argument(
+        "--pq-subvectors",
+        type=int,
+        default=None,
+        help="Product-quantize vectors into this many 1-byte codes (numpy-cosine, ivf-cosine)",
+    )
+    p.add_argument(
+        "--storage-dtype",
+        choices=["float32", "float16", "int8"],
+        default="float32",
+        help="Score over a compressed copy of the vectors (numpy-cosine, ivf-cosine)",
+    )
+    p.add_argument(
+        "--binary",
+        action="store_true",
+        help="Pool candidates by sign-bit Hamming distance before re-scoring (numpy-cosine)",
+    )
+    p.add_argument(
+        "--coarse-dim",
+        type=int,
+        default=None,
+        help="Pool candidates over this many leading dimensions first (numpy-cosine)",
+    )
+    p.add_argument(
+        "--oversample", type=int, default=4, help="Shortlist factor for exact re-scoring"
+    )
+    p.add_argument("--hnsw-m", type=int, default=16, help="HNSW links per node")
+    p.add_argument("--hnsw-ef-construction", type=int, default=100)
+    p.add_argument(
+        "--hnsw-ef", type=int, default=64, help="Default HNSW search width at query time"
+    )
+    p.add_argument(
+        "--fusion",
+        choices=list(FUSION_MODES),
+        default="rrf",
+        help="Hybrid fusion: reciprocal rank or min-max normalized scores",
+    )
+    p.add_argument("--rrf-k", type=int, default=60, help="Hybrid RRF rank offset")
+    p.add_argument("--lexical-k", type=int, default=50, help="Hybrid BM25 arm fetch depth")
+    p.add_argument("--dense-k", type=int, default=50, help="Hybrid dense arm fetch depth")
+    p.add_argument("--chunk-size", type=int, default=128)
+    p.add_argument("--overlap", type=int, default=0)
+    p.add_argument("--tail-policy", default="emit_short")
+
+
+def _build_config(args: argparse.Namespace) -> RagBuildConfig:
+    env = RagEnv(chunk_size=args.chunk_size, overlap=args.overlap, tail_policy=args.tail_policy)
+    return RagBuildConfig(
+        chunk_env=env,
+        backend=args.backend,
+        embedder=args.embedder,
+        sbert_model=args.sbert_model,
+        bm25_buckets=int(args.bm25_buckets),
+        bm25_vocab=args.bm25_vocab,
+        postings_codec=args.postings_codec,
+        workers=int(args.workers),
+        ivf_nlist=args.ivf_nlist,
+        ivf_nprobe=int(args.ivf_nprobe),
+        hnsw_m=int(args.hnsw_m),
+        hnsw_ef_construction=int(args.hnsw_ef_construction),
+        hnsw_ef=int(args.hnsw_ef),
+        pq_subvectors=args.pq_subvectors,
+        storage_dtype=args.storage_dtype,
+        binary=bool(args.binary),
+        coarse_dim=args.coarse_dim,
+        oversample=int(args.oversample),
+        fusion=args.fusion,
+        rrf_k=int(args.rrf_k),
+        lexical_k=int(args.lexical_k),
+        dense_k=int(args.dense_k),
+    )
+
+
 def _main_rag(argv: list[str]) -> int:
     """RAG-capable CLI: index, retrieve, ask, eval."""
 
@@ -150,13 +268,43 @@ def _main_rag(argv: list[str]) -> int:
     p_build = sub_index.add_parser("build", help="Build an index from CSV")
     p_build.add_argument("--input", type=Path, required=True)
     p_build.add_argument("--out", type=Path, required=True)
-    p_build.add_argument("--backend", choices=["bm25", "numpy-cosine"], default="bm25")
-    p_build.add_argument("--embedder", choices=["hash16", "sbert"], default="hash16")
-    p_build.add_argument("--sbert-model", default="all-MiniLM-L6-v2")
-    p_build.add_argument("--bm25-buckets", type=int, default=2048)
-    p_build.add_argument("--chunk-size", type=int, default=128)
-    p_build.add_argument("--overlap", type=int, default=0)
-    p_build.add_argument("--tail-policy", default="emit_short")
+    _add_build_args(p_build)
+    p_build.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Partition documents by doc_id hash into this many shards (--out becomes a directory)",
+    )
+    p_add = sub_index.add_parser(
+        "add", help="Append CSV documents to a segmented index directory (created if missing)"
+    )
+    p_add.add_argument("--index", type=Path, required=True)
+    p_add.add_argument("--input", type=Path, required=True)
+    _add_build_args(p_add)
+    p_delete = sub_index.add_parser(
+        "delete", help="Tombstone documents in a segmented index directory"
+    )
+    p_delete.add_argument("--index", type=Path, required=True)
+    p_delete.add_argument(
+        "--doc-id", action="append", required=True, help="Document id to delete (repeatable)"
+    )
+    p_compact = sub_index.add_parser(
+        "compact", help="Merge segments of a segmented index directory (tiered policy)"
+    )
+    p_compact.add_argument("--index", type=Path, required=True)
+    p_compact.add_argument("--force", action="store_true", help="Merge every segment into one")
+    p_compact.add_argument(
+        "--merge-factor", type=int, default=4, help="Segments per tier that trigger a merge"
+    )
+    p_compact.add_argument(
+        "--floor-rows", type=int, default=1000, help="Live rows below which segments share tier 0"
+    )
+    p_compact.add_argument(
+        "--max-deleted-ratio",
+        type=float,
+        default=0.25,
+        help="Rewrite a segment alone once this fraction of its rows is deleted",
+    )
 
     p_retrieve = sub.add_parser("retrieve", help="Retrieve top-k chunks")
     p_retrieve.add_argument("--index", type=Path, required=True)
@@ -164,6 +312,21 @@ def _main_rag(argv: list[str]) -> int:
     p_retrieve.add_argument("--top-k", type=int, default=5)
     p_retrieve.add_argument("--filter", action="append", default=[], help="Filter k=v (repeatable)")
     p_retrieve.add_argument("--out", type=Path, default=None)
+    p_retrieve.add_argument(
+        "--ef", type=int, default=None, help="HNSW search width (hnsw-cosine indexes only)"
+    )
+    p_retrieve.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Concurrent scoring shards (numpy-cosine exact search only)",
+    )
+    p_retrieve.add_argument(
+        "--verify",
+        choices=list(VERIFY_MODES),
+        default="full",
+        help="Index load check: full (checksums + chunk ids), blocks (checksums), none",
+    )
 
     p_ask = sub.add_parser("ask", help="Answer with citations (extractive)")
     p_ask.add_argument("--index", type=Path, required=True)
@@ -173,6 +336,21 @@ def _main_rag(argv: list[str]) -> int:
     p_ask.add_argument("--no-rerank", action="store_true")
     p_ask.add_argument("--format", choices=["json", "yaml"], default="json")
     p_ask.add_argument("--out", type=Path, default=None)
+    p_ask.add_argument(
+        "--ef", type=int, default=None, help="HNSW search width (hnsw-cosine indexes only)"
+    )
+    p_ask.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Concurrent scoring shards (numpy-cosine exact search only)",
+    )
+    p_ask.add_argument(
+        "--verify",
+        choices=list(VERIFY_MODES),
+        default="full",
+        help="Index load check: full (checksums + chunk ids), blocks (checksums), none",
+    )
 
     p_eval = sub.add_parser("eval", help="Evaluate retrieval vs a query suite")
     p_eval.add_argument("--index", type=Path, required=True)
@@ -184,18 +362,29 @@ def _main_rag(argv: list[str]) -> int:
         "--baseline", type=Path, default=None, help="Optional baseline metrics JSON"
     )
     p_eval.add_argument("--tolerance", type=float, default=0.0)
+    p_eval.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Concurrent scoring shards (numpy-cosine exact search only)",
+    )
+    p_eval.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Serve a sharded index from this many worker processes",
+    )
+    p_eval.add_argument(
+        "--verify",
+        choices=list(VERIFY_MODES),
+        default="full",
+        help="Index load check: full (checksums + chunk ids), blocks (checksums), none",
+    )
 
     args = p.parse_args(argv)
 
     if args.cmd == "index" and args.index_cmd == "build":
-        env = RagEnv(chunk_size=args.chunk_size, overlap=args.overlap, tail_policy=args.tail_policy)
-        cfg = RagBuildConfig(
-            chunk_env=env,
-            backend=args.backend,
-            embedder=args.embedder,
-            sbert_model=args.sbert_model,
-            bm25_buckets=int(args.bm25_buckets),
-        )
+        cfg = replace(_build_config(args), shards=int(args.shards))
         args.out.parent.mkdir(parents=True, exist_ok=True)
         fp = build_index_from_csv(csv_path=args.input, out_path=args.out, cfg=cfg)
         print(
@@ -206,10 +395,48 @@ def _main_rag(argv: list[str]) -> int:
         )
         return 0
 
+    if args.cmd == "index" and args.index_cmd in ("add", "delete"):
+        if args.index_cmd == "add":
+            args.index.parent.mkdir(parents=True, exist_ok=True)
+            seg = add_csv_to_index(
+                csv_path=args.input, index_path=args.index, cfg=_build_config(args)
+            )
+        else:
+            seg = delete_docs_from_index(index_path=args.index, doc_ids=list(args.doc_id))
+        print(
+            json.dumps(
+                {
+                    "index": str(args.index),
+                    "fingerprint": seg.fingerprint,
+                    "backend": seg.backend,
+                    "segments": len(seg.segments),
+                    "live_chunks": seg.num_live,
+                },
+                ensure_ascii=False,
+            )
+        )
+        return 0
+
+    if args.cmd == "index" and args.index_cmd == "compact":
+        policy = MergePolicy(
+            factor=int(args.merge_factor),
+            floor_rows=int(args.floor_rows),
+            max_deleted_ratio=float(args.max_deleted_ratio),
+        )
+        stats = compact_index(str(args.index), policy, force=bool(args.force))
+        print(json.dumps({"index": str(args.index), **asdict(stats)}, ensure_ascii=False))
+        return 0
+
     if args.cmd == "retrieve":
         filt = parse_filters(list(args.filter))
         cands = rag_retrieve(
-            index_path=args.index, query=args.query, top_k=args.top_k, filters=filt
+            index_path=args.index,
+            query=args.query,
+            top_k=args.top_k,
+            filters=filt,
+            verify=args.verify,
+            ef=args.ef,
+            workers=args.workers,
         )
         payload = {
             "candidates": [
@@ -241,6 +468,9 @@ def _main_rag(argv: list[str]) -> int:
             top_k=args.top_k,
             filters=filt,
             rerank=not args.no_rerank,
+            verify=args.verify,
+            ef=args.ef,
+            workers=args.workers,
         )
         ask_payload: dict[str, object] = {
             "text": ans.text,
@@ -283,14 +513,22 @@ def _main_rag(argv: list[str]) -> int:
             queries.append(json.loads(line))
 
         k = max(1, int(args.k))
+        judged = [
+            (str(q.get("query", "")), set(map(str, q.get("relevant_doc_ids", [])))) for q in queries
+        ]
+        judged = [(query, rel) for query, rel in judged if query and rel]
+        # One index load and one batched scoring pass for the whole suite.
+        results = rag_retrieve_many(
+            index_path=args.index,
+            queries=[query for query, _ in judged],
+            top_k=k,
+            verify=args.verify,
+            workers=args.workers,
+            processes=args.processes,
+        )
         hits = 0
         total = 0
-        for q in queries:
-            query = str(q.get("query", ""))
-            rel = set(map(str, q.get("relevant_doc_ids", [])))
-            if not query or not rel:
-                continue
-            cands = rag_retrieve(index_path=args.index, query=query, top_k=k)
+        for (_, rel), cands in zip(judged, results):
             got = {c.chunk.doc_id for c in cands}
             hits += int(len(got & rel) > 0)
             total += 1
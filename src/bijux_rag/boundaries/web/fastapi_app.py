@@ -59,7 +59,7 @@ class PChunkRequest(BaseModel):
 
 class IndexBuildRequest(BaseModel):
     docs: list[DocIn] = Field(..., min_length=1)
-    backend: str = Field(..., pattern="^(bm25|numpy-cosine)$")
+    backend: str = Field(..., pattern="^(bm25|numpy-cosine|ivf-cosine|hnsw-cosine|hybrid)$")
     chunk_size: int = Field(512, ge=1)
     overlap: int = Field(50, ge=0)
 
@@ -81,6 +81,7 @@ class RetrieveRequest(BaseModel):
     query: str = Field(..., min_length=1)
     top_k: int = Field(5, ge=1)
     filters: dict[str, str] = Field(default_factory=dict)
+    ef: int | None = Field(None, ge=1)
 
 
 class PCandidate(BaseModel):
@@ -122,6 +123,12 @@ def _backend_from_str(s: str) -> IndexBackend:
     # Schema enforces allowed values; keep mapping tight and explicit.
     if s == "bm25":
         return IndexBackend.BM25
+    if s == "ivf-cosine":
+        return IndexBackend.IVF_COSINE
+    if s == "hnsw-cosine":
+        return IndexBackend.HNSW_COSINE
+    if s == "hybrid":
+        return IndexBackend.HYBRID
     return IndexBackend.NUMPY_COSINE
 
 
@@ -210,7 +217,9 @@ def create_app() -> FastAPI:
         if idx is None:
             raise HTTPException(status_code=404, detail="Unknown index_id")
 
-        res = _APP.retrieve(index=idx, query=req.query, top_k=req.top_k, filters=req.filters)
+        res = _APP.retrieve(
+            index=idx, query=req.query, top_k=req.top_k, filters=req.filters, ef=req.ef
+        )
         if isinstance(res, Err):
             raise HTTPException(status_code=400, detail=res.error)
 
@@ -23,6 +23,7 @@ TailPolicy = str
 
 # NOTE: keep the core domain model dependency-free.
 EmbeddingMetric = Literal["cosine", "dot", "l2"]
+StorageDtype = Literal["float32", "float16", "int8"]
 
 
 @dataclass(frozen=True, slots=True)
@@ -34,12 +35,18 @@ class EmbeddingSpec:
         dim: Embedding dimensionality.
         metric: Similarity metric used by the index.
         normalized: Whether vectors are L2-normalized before indexing.
+        storage_dtype: Element type an index scores in ("float32", or a compressed "float16" /
+            "int8" copy re-ranked against float32 vectors).
+        coarse_dim: If set, the leading dimensions (Matryoshka-style embeddings) that indexes
+            keep as a separate renormalized matrix for a cheap first pass.
     """
 
     model: str
     dim: int
     metric: EmbeddingMetric = "cosine"
     normalized: bool = True
+    storage_dtype: StorageDtype = "float32"
+    coarse_dim: int | None = None
 
     def __post_init__(self) -> None:
         if not isinstance(self.model, str) or not self.model.strip():
@@ -50,6 +57,12 @@ class EmbeddingSpec:
             raise ValueError("EmbeddingSpec.metric must be one of: cosine, dot, l2")
         if not isinstance(self.normalized, bool):
             raise ValueError("EmbeddingSpec.normalized must be a bool")
+        if self.storage_dtype not in {"float32", "float16", "int8"}:
+            raise ValueError("EmbeddingSpec.storage_dtype must be one of: float32, float16, int8")
+        if self.coarse_dim is not None and (
+            not isinstance(self.coarse_dim, int) or not 0 < self.coarse_dim < self.dim
+        ):
+            raise ValueError("EmbeddingSpec.coarse_dim must be an int in [1, dim)")
 
     @classmethod
     def hash16(cls) -> "EmbeddingSpec":
@@ -260,6 +273,7 @@ class TreeDoc:
 __all__ = [
     "EmbeddingMetric",
     "EmbeddingSpec",
+    "StorageDtype",
     "stable_chunk_id",
     "RawDoc",
     "DocRule",
@@ -13,26 +13,34 @@ Both CLI and FastAPI boundary call into this layer to avoid drift.
 from __future__ import annotations
 
 import hashlib
-from collections.abc import Iterable, Iterator, Mapping
+from collections.abc import Iterable, Iterator, Mapping, Sequence
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 
-import msgpack
-
 from bijux_rag.core.rag_types import Chunk, ChunkWithoutEmbedding, CleanDoc, RagEnv, RawDoc
 from bijux_rag.infra.adapters.file_storage import FileStorage
 from bijux_rag.rag.embedders import HashEmbedder, SentenceTransformersEmbedder
 from bijux_rag.rag.generators import ExtractiveGenerator
+from bijux_rag.rag.index_format import VerifyMode
 from bijux_rag.rag.indexes import (
     BM25Index,
+    HnswCosineIndex,
+    HybridIndex,
+    IvfCosineIndex,
     NumpyCosineIndex,
     build_bm25_index,
+    build_hnsw_cosine_index,
+    build_hybrid_index,
+    build_ivf_cosine_index,
     build_numpy_cosine_index,
     load_index,
+    load_index_bytes,
 )
 from bijux_rag.rag.ports import Answer, Candidate, Embedder
 from bijux_rag.rag.rerankers import LexicalOverlapReranker
+from bijux_rag.rag.segments import MANIFEST, SEGMENT_BACKENDS, SegmentedIndex, writer_lock
+from bijux_rag.rag.shards import ShardedIndex, build_sharded_index, is_sharded
 from bijux_rag.rag.stages import (
     clean_doc,
     iter_chunk_doc,
@@ -49,6 +57,24 @@ class RagBuildConfig:
     embedder: str = "hash16"
     sbert_model: str = "all-MiniLM-L6-v2"
     bm25_buckets: int = 2048
+    bm25_vocab: str = "hashed"
+    postings_codec: str = "raw"
+    ivf_nlist: int | None = None
+    ivf_nprobe: int = 8
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 100
+    hnsw_ef: int = 64
+    pq_subvectors: int | None = None
+    storage_dtype: str = "float32"
+    binary: bool = False
+    coarse_dim: int | None = None
+    oversample: int = 4
+    shards: int = 1
+    workers: int = 1
+    fusion: str = "rrf"
+    rrf_k: int = 60
+    lexical_k: int = 50
+    dense_k: int = 50
 
 
 def _iter_clean_docs(docs: Iterable[RawDoc]) -> Iterator[CleanDoc]:
@@ -69,6 +95,46 @@ def _make_embedder(cfg: RagBuildConfig) -> Embedder:
     raise ValueError(f"unknown embedder backend: {cfg.embedder}")
 
 
+def _query_embedder(idx: object) -> Embedder | None:
+    """Default query embedder for a dense index, derived from its embedding spec."""
+
+    dense = (
+        NumpyCosineIndex,
+        IvfCosineIndex,
+        HnswCosineIndex,
+        HybridIndex,
+        SegmentedIndex,
+        ShardedIndex,
+    )
+    if not isinstance(idx, dense):
+        return None
+    spec = idx.spec
+    if spec is None:
+        return None
+    if isinstance(spec.model, str) and spec.model.startswith("sbert:"):
+        return SentenceTransformersEmbedder(model_name=spec.model.split(":", 1)[1])
+    return HashEmbedder()
+
+
+def _search_kwargs(idx: object, *, ef: int | None, workers: int | None = None) -> dict[str, int]:
+    """Backend-specific query-time knobs, passed only to indexes that understand them."""
+
+    if ef is not None and (
+        isinstance(idx, HnswCosineIndex)
+        or (isinstance(idx, ShardedIndex) and idx.backend == "hnsw-cosine")
+    ):
+        return {"ef": int(ef)}
+    if workers is not None and (
+        isinstance(idx, (NumpyCosineIndex, HybridIndex))
+        or (
+            isinstance(idx, (SegmentedIndex, ShardedIndex))
+            and idx.backend in ("numpy-cosine", "hybrid")
+        )
+    ):
+        return {"workers": int(workers)}
+    return {}
+
+
 def ingest_csv_to_chunks(*, csv_path: Path, env: RagEnv) -> list[Chunk]:
     """Ingest a CSV and return chunks.
 
@@ -131,21 +197,125 @@ def ingest_docs_to_chunks(*, docs: Iterable[RawDoc], env: RagEnv) -> list[Chunk]
 def build_index_from_csv(*, csv_path: Path, out_path: Path, cfg: RagBuildConfig) -> str:
     """Build and persist an index.
 
+    With ``cfg.shards`` > 1, ``out_path`` becomes a directory of shards partitioned by
+    ``doc_id`` (see `bijux_rag.rag.shards`).
+
     Returns:
         The index fingerprint.
     """
 
     chunks = ingest_csv_to_chunks(csv_path=csv_path, env=cfg.chunk_env)
+    if cfg.shards > 1:
+        idx = build_sharded_index(
+            chunks=chunks, shards=cfg.shards, build=lambda part: _build_index(part, cfg)
+        )
+    else:
+        idx = _build_index(chunks, cfg)
+    idx.save(str(out_path))
+    return idx.fingerprint
+
+
+def add_csv_to_index(
+    *, csv_path: Path, index_path: Path, cfg: RagBuildConfig, verify: VerifyMode = "none"
+) -> SegmentedIndex:
+    """Append the chunks of ``csv_path`` to a segmented index directory as one new segment.
+
+    A missing directory is created with a first segment built from ``cfg`` (``bm25`` or
+    ``numpy-cosine``); otherwise the existing segments' options apply and only the new chunks
+    are indexed. Documents already present are replaced. Existing segment files are never
+    rewritten, so they are loaded with ``verify="none"`` by default (the manifest fingerprint
+    is still checked).
+    """
+
+    chunks = ingest_csv_to_chunks(csv_path=csv_path, env=cfg.chunk_env)
+    if not (index_path / MANIFEST).exists() and cfg.backend not in SEGMENT_BACKENDS:
+        raise ValueError(f"backend cannot be segmented: {cfg.backend}")
+    with writer_lock(str(index_path)):
+        if (index_path / MANIFEST).exists():
+            idx = SegmentedIndex.load(str(index_path), verify=verify)
+            idx = idx.add_docs(chunks=chunks, embedder=_query_embedder(idx))
+        else:
+            idx = SegmentedIndex.from_index(_build_index(chunks, cfg))
+        idx.save(str(index_path))
+    return idx
+
+
+def delete_docs_from_index(
+    *, index_path: Path, doc_ids: Iterable[str], verify: VerifyMode = "none"
+) -> SegmentedIndex:
+    """Tombstone every chunk of ``doc_ids`` in a segmented index directory."""
+
+    with writer_lock(str(index_path)):
+        idx = SegmentedIndex.load(str(index_path), verify=verify).delete_doc_ids(doc_ids)
+        idx.save(str(index_path))
+    return idx
+
+
+def _build_index(
+    chunks: Sequence[Chunk], cfg: RagBuildConfig
+) -> BM25Index | NumpyCosineIndex | IvfCosineIndex | HnswCosineIndex | HybridIndex:
     if cfg.backend == "bm25":
-        idx = build_bm25_index(chunks=chunks, buckets=cfg.bm25_buckets)
-        idx.save(str(out_path))
-        return idx.fingerprint
+        return build_bm25_index(
+            chunks=chunks,
+            buckets=cfg.bm25_buckets,
+            workers=cfg.workers,
+            vocab=cfg.bm25_vocab,
+            postings_codec=cfg.postings_codec,
+        )
 
     if cfg.backend == "numpy-cosine":
         emb = _make_embedder(cfg)
-        idx = build_numpy_cosine_index(chunks=chunks, embedder=emb)
-        idx.save(str(out_path))
-        return idx.fingerprint
+        return build_numpy_cosine_index(
+            chunks=chunks,
+            embedder=emb,
+            pq_subvectors=cfg.pq_subvectors,
+            storage_dtype=cfg.storage_dtype,
+            binary=cfg.binary,
+            coarse_dim=cfg.coarse_dim,
+            oversample=cfg.oversample,
+        )
+
+    if cfg.backend == "ivf-cosine":
+        emb = _make_embedder(cfg)
+        return build_ivf_cosine_index(
+            chunks=chunks,
+            embedder=emb,
+            nlist=cfg.ivf_nlist,
+            nprobe=cfg.ivf_nprobe,
+            pq_subvectors=cfg.pq_subvectors,
+            storage_dtype=cfg.storage_dtype,
+            oversample=cfg.oversample,
+        )
+
+    if cfg.backend == "hnsw-cosine":
+        emb = _make_embedder(cfg)
+        return build_hnsw_cosine_index(
+            chunks=chunks,
+            embedder=emb,
+            m=cfg.hnsw_m,
+            ef_construction=cfg.hnsw_ef_construction,
+            ef=cfg.hnsw_ef,
+        )
+
+    if cfg.backend == "hybrid":
+        emb = _make_embedder(cfg)
+        return build_hybrid_index(
+            chunks=chunks,
+            embedder=emb,
+            buckets=cfg.bm25_buckets,
+            workers=cfg.workers,
+            vocab=cfg.bm25_vocab,
+            postings_codec=cfg.postings_codec,
+            fusion=cfg.fusion,
+            rrf_k=cfg.rrf_k,
+            lexical_k=cfg.lexical_k,
+            dense_k=cfg.dense_k,
+            pq_subvectors=cfg.pq_subvectors,
+            storage_dtype=cfg.storage_dtype,
+            binary=cfg.binary,
+            coarse_dim=cfg.coarse_dim,
+            oversample=cfg.oversample,
+        )
 
     raise ValueError(f"unknown index backend: {cfg.backend}")
 
@@ -157,19 +327,66 @@ def retrieve(
     top_k: int = 5,
     filters: Mapping[str, str] | None = None,
     embedder: Embedder | None = None,
+    verify: VerifyMode = "full",
+    ef: int | None = None,
+    workers: int | None = None,
 ) -> list[Candidate]:
-    """Retrieve candidates from a persisted index."""
+    """Retrieve candidates from a persisted index.
 
-    idx = load_index(str(index_path))
+    ``ef`` overrides the HNSW search width for this query and ``workers`` the number of
+    concurrent scoring shards for numpy-cosine; other backends ignore them.
+    """
+
+    idx = load_index(str(index_path), verify=verify)
 
-    if isinstance(idx, NumpyCosineIndex) and embedder is None:
+    if embedder is None:
         # Default embedder based on index spec.
-        if idx.spec.model.startswith("sbert:"):
-            embedder = SentenceTransformersEmbedder(model_name=idx.spec.model.split(":", 1)[1])
-        else:
-            embedder = HashEmbedder()
+        embedder = _query_embedder(idx)
 
-    return idx.retrieve(query=query, top_k=int(top_k), filters=filters, embedder=embedder)
+    return idx.retrieve(
+        query=query,
+        top_k=int(top_k),
+        filters=filters,
+        embedder=embedder,
+        **_search_kwargs(idx, ef=ef, workers=workers),
+    )
+
+
+def retrieve_many(
+    *,
+    index_path: Path,
+    queries: Sequence[str],
+    top_k: int = 5,
+    filters: Mapping[str, str] | None = None,
+    embedder: Embedder | None = None,
+    verify: VerifyMode = "full",
+    ef: int | None = None,
+    workers: int | None = None,
+    processes: int | None = None,
+) -> list[list[Candidate]]:
+    """Retrieve candidates for a batch of queries from one load of a persisted index.
+
+    Queries are embedded in a single call; see the indexes' ``retrieve_many``. ``processes``
+    serves a sharded index from that many worker processes for this batch.
+    """
+
+    if processes and is_sharded(str(index_path)):
+        idx = ShardedIndex.load(str(index_path), verify=verify, processes=int(processes))
+    else:
+        idx = load_index(str(index_path), verify=verify)
+    if embedder is None:
+        embedder = _query_embedder(idx)
+    try:
+        return idx.retrieve_many(
+            queries=list(queries),
+            top_k=int(top_k),
+            filters=filters,
+            embedder=embedder,
+            **_search_kwargs(idx, ef=ef, workers=workers),
+        )
+    finally:
+        if isinstance(idx, ShardedIndex):
+            idx.close()
 
 
 def ask(
@@ -180,6 +397,9 @@ def ask(
     filters: Mapping[str, str] | None = None,
     embedder: Embedder | None = None,
     rerank: bool = True,
+    verify: VerifyMode = "full",
+    ef: int | None = None,
+    workers: int | None = None,
 ) -> Answer:
     """Retrieve and answer with citations."""
 
@@ -189,6 +409,9 @@ def ask(
         top_k=max(20, int(top_k)),
         filters=filters,
         embedder=embedder,
+        verify=verify,
+        ef=ef,
+        workers=workers,
     )
     if rerank:
         cands = LexicalOverlapReranker().rerank(query=query, candidates=cands, top_k=int(top_k))
@@ -221,12 +444,15 @@ __all__ = [
     "IndexBackend",
     "RagBuildConfig",
     "RagIndex",
+    "add_csv_to_index",
     "ask",
     "build_index_from_csv",
+    "delete_docs_from_index",
     "ingest_docs_to_chunks",
     "ingest_csv_to_chunks",
     "parse_filters",
     "retrieve",
+    "retrieve_many",
     "RagApp",
 ]
 
@@ -239,6 +465,9 @@ __all__ = [
 class IndexBackend(str, Enum):
     BM25 = "bm25"
     NUMPY_COSINE = "numpy-cosine"
+    IVF_COSINE = "ivf-cosine"
+    HNSW_COSINE = "hnsw-cosine"
+    HYBRID = "hybrid"
 
 
 def _fingerprint_bytes(b: bytes) -> str:
@@ -250,7 +479,15 @@ class RagIndex:
     """In-memory index wrapper for deterministic CI profile."""
 
     backend: str
-    index: BM25Index | NumpyCosineIndex
+    index: (
+        BM25Index
+        | NumpyCosineIndex
+        | IvfCosineIndex
+        | HnswCosineIndex
+        | HybridIndex
+        | SegmentedIndex
+        | ShardedIndex
+    )
     fingerprint: str
     schema_version: int = 1
 
@@ -319,6 +556,8 @@ class RagApp:
         chunk_size: int = 4096,
         overlap: int = 0,
         tail_policy: str = "emit_short",
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 100,
     ) -> Result[RagIndex, str]:
         chunk_res = self._raw_docs_to_chunks(
             docs, chunk_size=chunk_size, overlap=overlap, tail_policy=tail_policy
@@ -327,7 +566,7 @@ class RagApp:
             return chunk_res
         chunks = chunk_res.value
 
-        if backend not in ("bm25", "numpy-cosine"):
+        if backend not in ("bm25", "numpy-cosine", "ivf-cosine", "hnsw-cosine", "hybrid"):
             return Err(f"unsupported backend: {backend}")
 
         if backend == "bm25":
@@ -335,6 +574,17 @@ class RagApp:
             return Ok(RagIndex(backend="bm25", index=idx, fingerprint=idx.fingerprint))
 
         emb = HashEmbedder()
+        if backend == "ivf-cosine":
+            idx = build_ivf_cosine_index(chunks=chunks, embedder=emb)
+            return Ok(RagIndex(backend="ivf-cosine", index=idx, fingerprint=idx.fingerprint))
+        if backend == "hnsw-cosine":
+            idx = build_hnsw_cosine_index(
+                chunks=chunks, embedder=emb, m=hnsw_m, ef_construction=hnsw_ef_construction
+            )
+            return Ok(RagIndex(backend="hnsw-cosine", index=idx, fingerprint=idx.fingerprint))
+        if backend == "hybrid":
+            idx = build_hybrid_index(chunks=chunks, embedder=emb)
+            return Ok(RagIndex(backend="hybrid", index=idx, fingerprint=idx.fingerprint))
         idx = build_numpy_cosine_index(chunks=chunks, embedder=emb)
         return Ok(RagIndex(backend="numpy-cosine", index=idx, fingerprint=idx.fingerprint))
 
@@ -345,32 +595,44 @@ class RagApp:
         except Exception as exc:  # pragma: no cover
             return Err(str(exc))
 
-    def load_index(self, path: Path) -> Result[RagIndex, str]:
+    def load_index(self, path: Path, *, verify: VerifyMode = "full") -> Result[RagIndex, str]:
         try:
-            idx = load_index(str(path))
+            idx = load_index(str(path), verify=verify)
             if isinstance(idx, BM25Index):
                 return Ok(RagIndex(backend="bm25", index=idx, fingerprint=idx.fingerprint))
             if isinstance(idx, NumpyCosineIndex):
                 return Ok(RagIndex(backend="numpy-cosine", index=idx, fingerprint=idx.fingerprint))
+            if isinstance(idx, IvfCosineIndex):
+                return Ok(RagIndex(backend="ivf-cosine", index=idx, fingerprint=idx.fingerprint))
+            if isinstance(idx, HnswCosineIndex):
+                return Ok(RagIndex(backend="hnsw-cosine", index=idx, fingerprint=idx.fingerprint))
+            if isinstance(idx, HybridIndex):
+                return Ok(RagIndex(backend="hybrid", index=idx, fingerprint=idx.fingerprint))
+            if isinstance(idx, (SegmentedIndex, ShardedIndex)):
+                return Ok(RagIndex(backend=idx.backend, index=idx, fingerprint=idx.fingerprint))
             return Err("unknown index backend")
         except Exception as exc:  # pragma: no cover
             return Err(str(exc))
 
     # ------------- Retrieve / Ask -------------
     def retrieve(
-        self, index: RagIndex, query: str, top_k: int, filters: dict[str, str] | None = None
+        self,
+        index: RagIndex,
+        query: str,
+        top_k: int,
+        filters: dict[str, str] | None = None,
+        ef: int | None = None,
+        workers: int | None = None,
     ) -> Result[list[Candidate], str]:
         try:
-            embedder = None
-            if isinstance(index.index, NumpyCosineIndex):
-                spec = index.index.spec
-                if isinstance(spec.model, str) and spec.model.startswith("sbert:"):
-                    embedder = SentenceTransformersEmbedder(model_name=spec.model.split(":", 1)[1])
-                else:
-                    embedder = HashEmbedder()
+            embedder = _query_embedder(index.index)
             fetch_k = max(int(top_k) * 3, 20)
             cands = index.index.retrieve(
-                query=query, top_k=fetch_k, filters=filters or {}, embedder=embedder
+                query=query,
+                top_k=fetch_k,
+                filters=filters or {},
+                embedder=embedder,
+                **_search_kwargs(index.index, ef=ef, workers=workers),
             )
             # Apply deterministic lexical rerank for CI to stabilise ordering and promote exact matches.
             cands = self.reranker.rerank(query=query, candidates=cands, top_k=top_k)
@@ -378,6 +640,35 @@ class RagApp:
         except Exception as exc:  # pragma: no cover
             return Err(str(exc))
 
+    def retrieve_many(
+        self,
+        index: RagIndex,
+        queries: Sequence[str],
+        top_k: int,
+        filters: dict[str, str] | None = None,
+        ef: int | None = None,
+        workers: int | None = None,
+    ) -> Result[list[list[Candidate]], str]:
+        """Batched `retrieve`: one embedding call and one scoring pass for all queries."""
+
+        try:
+            embedder = _query_embedder(index.index)
+            fetch_k = max(int(top_k) * 3, 20)
+            batches = index.index.retrieve_many(
+                queries=list(queries),
+                top_k=fetch_k,
+                filters=filters or {},
+                embedder=embedder,
+                **_search_kwargs(index.index, ef=ef, workers=workers),
+            )
+            out = [
+                self.reranker.rerank(query=q, candidates=cands, top_k=top_k)[: max(0, int(top_k))]
+                for q, cands in zip(queries, batches)
+            ]
+            return Ok(out)
+        except Exception as exc:  # pragma: no cover
+            return Err(str(exc))
+
     def ask(
         self,
         index: RagIndex,
@@ -439,21 +730,14 @@ class RagApp:
     def retrieve_blob(
         self, blob: bytes, query: str, top_k: int, filters: dict[str, str]
     ) -> Result[list[Candidate], str]:
-        payload = msgpack.unpackb(blob, raw=False)
-        backend = payload.get("backend")
-        if backend == "bm25":
-            idx = BM25Index.load_bytes(blob)
+        try:
+            idx = load_index_bytes(blob)
+        except ValueError as exc:
+            return Err(str(exc))
+        if isinstance(idx, BM25Index):
             return Ok(idx.retrieve(query=query, top_k=top_k, filters=filters))
-
-        if backend == "numpy-cosine":
-            idx = NumpyCosineIndex.load_bytes(blob)
-            spec = idx.spec
-            if isinstance(spec.model, str) and spec.model.startswith("sbert:"):
-                emb = SentenceTransformersEmbedder(model_name=spec.model.split(":", 1)[1])
-            else:
-                emb = HashEmbedder()
-            return Ok(idx.retrieve(query=query, top_k=top_k, filters=filters, embedder=emb))
-        return Err("unknown index backend")
+        emb = _query_embedder(idx)
+        return Ok(idx.retrieve(query=query, top_k=top_k, filters=filters, embedder=emb))
 
     def ask_blob(
         self, blob: bytes, query: str, top_k: int, filters: dict[str, str], rerank: bool = True
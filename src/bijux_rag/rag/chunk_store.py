@@ -0,0 +1,406 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+"""Columnar chunk table backing the reference indexes.
+
+Indexes score rows by position and only ever need a handful of `Chunk` objects per query, so
+chunks are stored column-wise instead of as one Python object per row:
+
+* ``doc_id``: a dictionary of distinct ids plus an int32 code per row;
+* ``start``/``end``: int64 offset arrays;
+* ``text``: one concatenated UTF-8 buffer with an int64 offsets array (``n + 1`` entries);
+* ``chunk_id``: raw sha256 digests, ``(n, 32)`` uint8;
+* metadata: one int32 code column per key (``-1`` = key absent) into a per-key value
+  dictionary; materialized mappings list keys in table order;
+* an inverted index over every code column (``doc_id`` and each metadata key): code -> sorted
+  row ids, so ``key=value`` filters resolve to id-list unions and intersections without
+  touching per-row values.
+
+Every array column is a plain buffer, so a table loaded from a v2 container is a set of
+memory-mapped views plus two small decoded dictionaries. `Chunk` objects are materialized on
+access (``table[i]``) — in practice only for the final top-k.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Any, overload
+
+import msgpack
+import numpy as np
+from numpy.typing import NDArray
+
+from bijux_rag.core.rag_types import Chunk, EmbeddingSpec, stable_chunk_id
+from bijux_rag.rag.index_format import IndexReader
+
+_DIGEST = 32
+
+
+def _value_key(value: Any) -> tuple[type, Any]:
+    # Keep 1, 1.0 and True apart; unhashable values (lists, dicts) are keyed by their encoding.
+    try:
+        hash(value)
+    except TypeError:
+        return type(value), msgpack.packb(value, use_bin_type=True)
+    return type(value), value
+
+
+@dataclass(frozen=True, slots=True)
+class CodePostings:
+    """Rows grouped by dictionary code: rows of code ``c`` are ``rows[ptr[c]:ptr[c + 1]]``.
+
+    Row ids ascend within each code; rows with code ``-1`` (value absent) are not listed.
+    """
+
+    ptr: NDArray[np.int64]
+    rows: NDArray[np.int32]
+
+    @classmethod
+    def build(cls, codes: NDArray[np.int32], *, n_codes: int) -> "CodePostings":
+        present = codes >= 0
+        order = np.argsort(codes, kind="stable")
+        ptr = np.zeros((n_codes + 1,), dtype=np.int64)
+        np.cumsum(np.bincount(codes[present], minlength=n_codes), out=ptr[1:])
+        absent = int(codes.size - ptr[-1])
+        return cls(ptr=ptr, rows=order[absent:].astype(np.int32))
+
+    def lookup(self, codes: Sequence[int]) -> NDArray[np.int32]:
+        """Sorted rows holding any of ``codes``."""
+
+        parts = [self.rows[self.ptr[c] : self.ptr[c + 1]] for c in codes]
+        if not parts:
+            return np.zeros((0,), dtype=np.int32)
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts))
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class ChunkTable(Sequence[Chunk]):
+    """Read-only, columnar sequence of chunks (see module docstring for the layout)."""
+
+    doc_dict: tuple[str, ...]
+    doc_codes: NDArray[np.int32]
+    starts: NDArray[np.int64]
+    ends: NDArray[np.int64]
+    text: NDArray[np.uint8]
+    text_offsets: NDArray[np.int64]
+    digests: NDArray[np.uint8]
+    meta_keys: tuple[str, ...] = ()
+    meta_values: tuple[tuple[Any, ...], ...] = ()
+    meta_codes: NDArray[np.int32] = field(default_factory=lambda: np.zeros((0, 0), np.int32))
+    embedding_spec: EmbeddingSpec | None = None
+    # Inverted filter index; derived from the code columns when not supplied (e.g. by a loader).
+    doc_index: CodePostings | None = None
+    meta_index: tuple[CodePostings, ...] | None = None
+    _lookup: tuple[dict[str, list[int]], ...] | None = field(init=False, default=None, repr=False)
+    _doc_lookup: dict[str, int] | None = field(init=False, default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.doc_index is None:
+            index = CodePostings.build(self.doc_codes, n_codes=len(self.doc_dict))
+            object.__setattr__(self, "doc_index", index)
+        if self.meta_index is None:
+            meta_index = tuple(
+                CodePostings.build(self.meta_codes[k], n_codes=len(values))
+                for k, values in enumerate(self.meta_values)
+            )
+            object.__setattr__(self, "meta_index", meta_index)
+
+    @classmethod
+    def from_chunks(
+        cls, chunks: Sequence[Chunk], *, embedding_spec: EmbeddingSpec | None = None
+    ) -> "ChunkTable":
+        n = len(chunks)
+        doc_index: dict[str, int] = {}
+        doc_codes = np.empty((n,), dtype=np.int32)
+        starts = np.empty((n,), dtype=np.int64)
+        ends = np.empty((n,), dtype=np.int64)
+        lengths = np.zeros((n + 1,), dtype=np.int64)
+        texts: list[bytes] = []
+        digests: list[bytes] = []
+        key_index: dict[str, int] = {}
+        value_index: list[dict[tuple[type, Any], int]] = []
+        values: list[list[Any]] = []
+        cells: list[tuple[int, int, int]] = []
+        for i, c in enumerate(chunks):
+            doc_codes[i] = doc_index.setdefault(c.doc_id, len(doc_index))
+            starts[i] = c.start
+            ends[i] = c.end
+            raw = c.text.encode("utf-8")
+            texts.append(raw)
+            lengths[i + 1] = len(raw)
+            digests.append(bytes.fromhex(c.chunk_id))
+            for key, value in c.metadata.items():
+                k = key_index.setdefault(key, len(key_index))
+                if k == len(values):
+                    value_index.append({})
+                    values.append([])
+                code = value_index[k].setdefault(_value_key(value), len(values[k]))
+                if code == len(values[k]):
+                    values[k].append(value)
+                cells.append((k, i, code))
+
+        meta_codes = np.full((len(key_index), n), -1, dtype=np.int32)
+        if cells:
+            ks, rows, codes = np.asarray(cells, dtype=np.int64).T
+            meta_codes[ks, rows] = codes
+        return cls(
+            doc_dict=tuple(doc_index),
+            doc_codes=doc_codes,
+            starts=starts,
+            ends=ends,
+            text=np.frombuffer(b"".join(texts), dtype=np.uint8),
+            text_offsets=np.cumsum(lengths),
+            digests=np.frombuffer(b"".join(digests), dtype=np.uint8).reshape(n, _DIGEST),
+            meta_keys=tuple(key_index),
+            meta_values=tuple(tuple(v) for v in values),
+            meta_codes=meta_codes,
+            embedding_spec=embedding_spec,
+        )
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Sequence[Mapping[str, Any]],
+        *,
+        embedding_spec: EmbeddingSpec | None = None,
+        verify_ids: bool = False,
+    ) -> "ChunkTable":
+        """Build from v1 chunk records (``doc_id``/``text``/``start``/``end``/``metadata``)."""
+
+        chunks = [
+            Chunk(
+                doc_id=r["doc_id"],
+                text=r["text"],
+                start=int(r["start"]),
+                end=int(r["end"]),
+                metadata=r.get("metadata", {}),
+            )
+            for r in records
+        ]
+        if verify_ids:
+            for chk, r in zip(chunks, records, strict=True):
+                stored = r.get("chunk_id")
+                if stored is not None and chk.chunk_id != stored:
+                    raise ValueError("chunk_id mismatch on load (possible corruption)")
+        return cls.from_chunks(chunks, embedding_spec=embedding_spec)
+
+    @property
+    def indexes(self) -> tuple[CodePostings, tuple[CodePostings, ...]]:
+        """The ``doc_id`` and per-metadata-key inverted indexes."""
+
+        assert self.doc_index is not None and self.meta_index is not None
+        return self.doc_index, self.meta_index
+
+    # ------------- Sequence protocol -------------
+    def __len__(self) -> int:
+        return int(self.doc_codes.shape[0])
+
+    @overload
+    def __getitem__(self, i: int) -> Chunk: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> tuple[Chunk, ...]: ...
+
+    def __getitem__(self, i: int | slice) -> Chunk | tuple[Chunk, ...]:
+        if isinstance(i, slice):
+            return tuple(self.chunk(j) for j in range(*i.indices(len(self))))
+        return self.chunk(i)
+
+    def __iter__(self) -> Iterator[Chunk]:
+        for i in range(len(self)):
+            yield self.chunk(i)
+
+    # ------------- Row access -------------
+    def _row(self, i: int) -> int:
+        n = len(self)
+        j = int(i) + n if int(i) < 0 else int(i)
+        if not 0 <= j < n:
+            raise IndexError("chunk index out of range")
+        return j
+
+    def doc_id(self, i: int) -> str:
+        return self.doc_dict[int(self.doc_codes[self._row(i)])]
+
+    def chunk_text(self, i: int) -> str:
+        j = self._row(i)
+        lo, hi = int(self.text_offsets[j]), int(self.text_offsets[j + 1])
+        return self.text[lo:hi].tobytes().decode("utf-8")
+
+    def chunk_id(self, i: int) -> str:
+        return str(self.digests[self._row(i)].tobytes().hex())
+
+    def metadata(self, i: int) -> dict[str, Any]:
+        j = self._row(i)
+        return {
+            key: self.meta_values[k][code]
+            for k, key in enumerate(self.meta_keys)
+            if (code := int(self.meta_codes[k, j])) >= 0
+        }
+
+    def chunk(self, i: int, *, embedding: tuple[float, ...] = ()) -> Chunk:
+        """Materialize row ``i`` as a `Chunk`."""
+
+        j = self._row(i)
+        return Chunk(
+            doc_id=self.doc_id(j),
+            text=self.chunk_text(j),
+            start=int(self.starts[j]),
+            end=int(self.ends[j]),
+            metadata=self.metadata(j),
+            embedding=embedding,
+            embedding_spec=self.embedding_spec,
+        )
+
+    def chunk_ids(self) -> list[str]:
+        """All chunk ids (hex) in row order."""
+
+        flat = self.digests.tobytes().hex()
+        width = 2 * _DIGEST
+        return [flat[i : i + width] for i in range(0, len(flat), width)]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the array columns (dictionaries excluded)."""
+
+        doc_index, meta_index = self.indexes
+        arrays: list[NDArray[Any]] = [self.doc_codes, self.starts, self.ends, self.text]
+        arrays += [self.text_offsets, self.digests, self.meta_codes]
+        for index in (doc_index, *meta_index):
+            arrays += [index.ptr, index.rows]
+        return sum(int(a.nbytes) for a in arrays)
+
+    # ------------- Filters -------------
+    def _doc_code(self, doc_id: str) -> int | None:
+        """Dictionary code of ``doc_id``; the reverse map is built on first use."""
+
+        lookup = self._doc_lookup
+        if lookup is None:
+            lookup = {d: c for c, d in enumerate(self.doc_dict)}
+            object.__setattr__(self, "_doc_lookup", lookup)
+        return lookup.get(doc_id)
+
+    def filter_ids(self, filters: Mapping[str, str]) -> NDArray[np.int32]:
+        """Sorted rows whose metadata matches every ``key=value`` filter (compared as ``str``).
+
+        ``doc_id`` additionally requires the chunk's own doc id to match. Each filter resolves
+        to a sorted id list through the inverted index; lists are intersected smallest first.
+        """
+
+        doc_index, meta_index = self.indexes
+        lookup = self._lookup
+        if lookup is None:
+            by_str: list[dict[str, list[int]]] = [{} for _ in self.meta_values]
+            for k, values in enumerate(self.meta_values):
+                for code, value in enumerate(values):
+                    by_str[k].setdefault(str(value), []).append(code)
+            lookup = tuple(by_str)
+            object.__setattr__(self, "_lookup", lookup)
+        key_index = {key: k for k, key in enumerate(self.meta_keys)}
+        lists: list[NDArray[np.int32]] = []
+        for key, want in filters.items():
+            if key == "doc_id":
+                doc_code = self._doc_code(want)
+                lists.append(doc_index.lookup([] if doc_code is None else [doc_code]))
+            pos = key_index.get(key)
+            if pos is None:
+                return np.zeros((0,), dtype=np.int32)
+            lists.append(meta_index[pos].lookup(lookup[pos].get(want, [])))
+        if not lists:
+            return np.arange(len(self), dtype=np.int32)
+        lists.sort(key=len)
+        out = lists[0]
+        for other in lists[1:]:
+            if out.size == 0:
+                break
+            out = np.intersect1d(out, other, assume_unique=True)
+        return out
+
+    def doc_rows(self, doc_ids: Iterable[str]) -> NDArray[np.int32]:
+        """Sorted rows of the chunks of any of ``doc_ids`` (metadata is not consulted)."""
+
+        codes = {self._doc_code(d) for d in doc_ids}
+        return self.indexes[0].lookup(sorted(c for c in codes if c is not None))
+
+    def filter_mask(self, filters: Mapping[str, str]) -> NDArray[np.bool_]:
+        """Boolean row mask for `filter_ids`."""
+
+        mask = np.zeros((len(self),), dtype=bool)
+        mask[self.filter_ids(filters)] = True
+        return mask
+
+    # ------------- Integrity -------------
+    def verify_ids(self) -> None:
+        """Recompute every chunk id from the columns and compare with the stored digests."""
+
+        for i in range(len(self)):
+            expected = stable_chunk_id(
+                doc_id=self.doc_id(i),
+                start=int(self.starts[i]),
+                end=int(self.ends[i]),
+                text=self.chunk_text(i),
+            )
+            if expected != self.chunk_id(i):
+                raise ValueError("chunk_id mismatch on load (possible corruption)")
+
+    # ------------- Persistence -------------
+    def to_sections(self) -> dict[str, Any]:
+        doc_index, meta_index = self.indexes
+        index: dict[str, Any] = {
+            "chunks.doc_index.ptr": doc_index.ptr,
+            "chunks.doc_index.rows": doc_index.rows,
+        }
+        for k, postings in enumerate(meta_index):
+            index[f"chunks.meta_index.{k}.ptr"] = postings.ptr
+            index[f"chunks.meta_index.{k}.rows"] = postings.rows
+        return {
+            "chunks.doc_dict": msgpack.packb(list(self.doc_dict), use_bin_type=True),
+            "chunks.doc_codes": self.doc_codes,
+            "chunks.start": self.starts,
+            "chunks.end": self.ends,
+            "chunks.text": self.text,
+            "chunks.text_offsets": self.text_offsets,
+            "chunks.chunk_id": self.digests,
+            "chunks.meta": msgpack.packb(
+                {"keys": list(self.meta_keys), "values": [list(v) for v in self.meta_values]},
+                use_bin_type=True,
+            ),
+            "chunks.meta_codes": self.meta_codes,
+            **index,
+        }
+
+    @classmethod
+    def from_reader(
+        cls, reader: IndexReader, *, embedding_spec: EmbeddingSpec | None = None
+    ) -> "ChunkTable":
+        meta = reader.unpack("chunks.meta")
+        keys = tuple(meta["keys"])
+        return cls(
+            doc_dict=tuple(reader.unpack("chunks.doc_dict")),
+            doc_codes=reader.array("chunks.doc_codes"),
+            starts=reader.array("chunks.start"),
+            ends=reader.array("chunks.end"),
+            text=reader.array("chunks.text"),
+            text_offsets=reader.array("chunks.text_offsets"),
+            digests=reader.array("chunks.chunk_id"),
+            meta_keys=keys,
+            meta_values=tuple(tuple(v) for v in meta["values"]),
+            meta_codes=reader.array("chunks.meta_codes"),
+            embedding_spec=embedding_spec,
+            doc_index=CodePostings(
+                ptr=reader.array("chunks.doc_index.ptr"),
+                rows=reader.array("chunks.doc_index.rows"),
+            ),
+            meta_index=tuple(
+                CodePostings(
+                    ptr=reader.array(f"chunks.meta_index.{k}.ptr"),
+                    rows=reader.array(f"chunks.meta_index.{k}.rows"),
+                )
+                for k in range(len(keys))
+            ),
+        )
+
+
+__all__ = ["ChunkTable", "CodePostings"]
@@ -0,0 +1,380 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+"""Sectioned on-disk container for persisted indexes (format v2).
+
+Layout::
+
+    [0:8)    magic  b"BJXRAGv2"
+    [8:12)   u32 LE header length H
+    [12:16)  u32 LE CRC32 of the header bytes
+    [16:16+H) msgpack header: backend, schema version, meta, section table
+    padding to ALIGNMENT
+    sections, each starting at an ALIGNMENT-aligned offset
+
+Section offsets in the header are relative to the (aligned) end of the header, so the header
+never depends on its own length. Array sections are raw little-endian C-order buffers that can
+be `np.memmap`-ed directly: loading an index costs O(header), and processes mapping the same
+file share the page cache instead of each holding a private copy.
+
+Every section carries one CRC32 per CHECKSUM_BLOCK bytes. `IndexReader.verify` checks them in
+a single sequential pass, which is what lets loaders skip re-hashing every chunk id
+(``verify="blocks"``). CRC32 detects corruption and truncation; it is not a defence against a
+deliberately forged file.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import struct
+import tempfile
+import zlib
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Literal
+
+import msgpack
+import numpy as np
+from numpy.typing import NDArray
+
+MAGIC = b"BJXRAGv2"
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+CHECKSUM_BLOCK = 1 << 20
+_PREFIX = struct.Struct("<8sII")
+
+VerifyMode = Literal["full", "blocks", "none"]
+VERIFY_MODES: tuple[VerifyMode, ...] = ("full", "blocks", "none")
+
+
+def check_verify_mode(verify: str) -> VerifyMode:
+    """Validate a ``verify=`` argument.
+
+    * ``"full"``: check section checksums and recompute every chunk id (the default).
+    * ``"blocks"``: check section checksums only.
+    * ``"none"``: trust the file as-is.
+    """
+
+    if verify not in VERIFY_MODES:
+        raise ValueError(f"verify must be one of: {', '.join(VERIFY_MODES)}")
+    return verify
+
+
+def _align(n: int) -> int:
+    return (n + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+@dataclass(frozen=True, slots=True)
+class Section:
+    """One entry of the section table."""
+
+    name: str
+    offset: int
+    length: int
+    dtype: str | None = None
+    shape: tuple[int, ...] | None = None
+    crc32: tuple[int, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class IndexHeader:
+    """Decoded container header; cheap to read without touching section bodies."""
+
+    format_version: int
+    schema_version: int
+    backend: str
+    meta: Mapping[str, Any]
+    sections: Mapping[str, Section]
+    data_offset: int
+
+    def span(self, name: str) -> tuple[int, int]:
+        """Absolute ``(start, end)`` byte range of a section."""
+
+        sec = self.sections[name]
+        start = self.data_offset + sec.offset
+        return start, start + sec.length
+
+
+def is_container(prefix: bytes) -> bool:
+    """Whether a byte prefix starts with the v2 container magic."""
+
+    return prefix[: len(MAGIC)] == MAGIC
+
+
+def _block_crcs(body: bytes | memoryview) -> list[int]:
+    view = memoryview(body)
+    return [zlib.crc32(view[i : i + CHECKSUM_BLOCK]) for i in range(0, len(view), CHECKSUM_BLOCK)]
+
+
+def _layout(
+    *, backend: str, schema_version: int, meta: Mapping[str, Any], sections: Mapping[str, Any]
+) -> tuple[bytes, list[tuple[int, bytes | memoryview]]]:
+    table: dict[str, dict[str, Any]] = {}
+    bodies: list[tuple[int, bytes | memoryview]] = []
+    offset = 0
+    for name, data in sections.items():
+        if isinstance(data, np.ndarray):
+            arr = np.ascontiguousarray(data)
+            if arr.dtype.byteorder == ">":
+                arr = arr.astype(arr.dtype.newbyteorder("<"))
+            body: bytes | memoryview = arr.reshape(-1).view(np.uint8).data
+            entry: dict[str, Any] = {
+                "offset": offset,
+                "length": arr.nbytes,
+                "dtype": arr.dtype.str,
+                "shape": list(arr.shape),
+            }
+        else:
+            body = bytes(data)
+            entry = {"offset": offset, "length": len(body)}
+        entry["crc32"] = _block_crcs(body)
+        table[name] = entry
+        bodies.append((offset, body))
+        offset = _align(offset + len(body))
+    header = msgpack.packb(
+        {
+            "format_version": FORMAT_VERSION,
+            "schema_version": int(schema_version),
+            "backend": backend,
+            "meta": dict(meta),
+            "sections": table,
+        },
+        use_bin_type=True,
+    )
+    return header, bodies
+
+
+def _write(f: BinaryIO, header: bytes, bodies: list[tuple[int, bytes | memoryview]]) -> None:
+    f.write(_PREFIX.pack(MAGIC, len(header), zlib.crc32(header)))
+    f.write(header)
+    data_offset = _align(_PREFIX.size + len(header))
+    pos = _PREFIX.size + len(header)
+    for rel, body in bodies:
+        target = data_offset + rel
+        f.write(b"\0" * (target - pos))
+        f.write(body)
+        pos = target + len(body)
+
+
+def encode_index(
+    *, backend: str, schema_version: int, meta: Mapping[str, Any], sections: Mapping[str, Any]
+) -> bytes:
+    """Serialize a container to bytes."""
+
+    header, bodies = _layout(
+        backend=backend, schema_version=schema_version, meta=meta, sections=sections
+    )
+    buf = io.BytesIO()
+    _write(buf, header, bodies)
+    return buf.getvalue()
+
+
+def write_index(
+    path: str,
+    *,
+    backend: str,
+    schema_version: int,
+    meta: Mapping[str, Any],
+    sections: Mapping[str, Any],
+) -> None:
+    """Write a container atomically.
+
+    The file is written next to ``path`` and renamed into place, so readers that still map the
+    previous file keep a consistent view of it.
+    """
+
+    header, bodies = _layout(
+        backend=backend, schema_version=schema_version, meta=meta, sections=sections
+    )
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-index-", dir=directory)
+    try:
+        _chmod_default(fd)
+        with os.fdopen(fd, "wb") as f:
+            _write(f, header, bodies)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _chmod_default(fd: int) -> None:
+    """Give a ``mkstemp`` file the mode ``open()`` would have (``0o666`` minus the umask).
+
+    ``mkstemp`` creates files as ``0o600``; renamed into place they would be unreadable to
+    server workers running as another user. Platforms without ``fchmod`` are left alone.
+    """
+
+    if not hasattr(os, "fchmod"):
+        return
+    umask = os.umask(0)
+    os.umask(umask)
+    os.fchmod(fd, 0o666 & ~umask)
+
+
+def parse_header(prefix: bytes) -> IndexHeader:
+    """Decode a header from the first bytes of a container.
+
+    ``prefix`` must cover the fixed 16-byte prefix and the msgpack header that follows it.
+    """
+
+    magic, length, crc = _PREFIX.unpack_from(prefix, 0)
+    if magic != MAGIC:
+        raise ValueError("not a bijux-rag v2 index container")
+    if len(prefix) < _PREFIX.size + length:
+        raise ValueError("truncated index header")
+    body = bytes(prefix[_PREFIX.size : _PREFIX.size + length])
+    if zlib.crc32(body) != crc:
+        raise ValueError("index header checksum mismatch")
+    raw = msgpack.unpackb(body, raw=False)
+    if int(raw.get("format_version", -1)) != FORMAT_VERSION:
+        raise ValueError("unsupported index container version")
+    sections = {
+        name: Section(
+            name=name,
+            offset=int(s["offset"]),
+            length=int(s["length"]),
+            dtype=s.get("dtype"),
+            shape=tuple(int(x) for x in s["shape"]) if s.get("shape") is not None else None,
+            crc32=tuple(int(x) for x in s.get("crc32", ())),
+        )
+        for name, s in raw["sections"].items()
+    }
+    return IndexHeader(
+        format_version=int(raw["format_version"]),
+        schema_version=int(raw["schema_version"]),
+        backend=str(raw["backend"]),
+        meta=raw.get("meta", {}),
+        sections=sections,
+        data_offset=_align(_PREFIX.size + length),
+    )
+
+
+def read_header(f: BinaryIO) -> IndexHeader:
+    """Read only the header of a container from an open binary file."""
+
+    prefix = f.read(_PREFIX.size)
+    if len(prefix) < _PREFIX.size:
+        raise ValueError("truncated index header")
+    _, length, _ = _PREFIX.unpack(prefix)
+    return parse_header(prefix + f.read(length))
+
+
+@dataclass(frozen=True, slots=True)
+class IndexReader:
+    """Section accessor over a file path (memory-mapped) or an in-memory blob (zero-copy)."""
+
+    header: IndexHeader
+    path: str | None = None
+    blob: bytes | memoryview | None = None
+
+    @classmethod
+    def open(cls, path: str) -> "IndexReader":
+        with open(path, "rb") as f:
+            header = read_header(f)
+        return cls(header=header, path=path)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes | memoryview) -> "IndexReader":
+        return cls(header=parse_header(bytes(blob[: _header_end(blob)])), blob=blob)
+
+    def has(self, name: str) -> bool:
+        return name in self.header.sections
+
+    def array(self, name: str) -> NDArray[Any]:
+        """A read-only view of an array section (``np.memmap`` for files)."""
+
+        sec = self.header.sections[name]
+        if sec.dtype is None or sec.shape is None:
+            raise ValueError(f"section {name!r} is not an array")
+        dtype = np.dtype(sec.dtype)
+        start, _ = self.header.span(name)
+        count = int(np.prod(sec.shape, dtype=np.int64))
+        if count == 0:
+            return np.zeros(sec.shape, dtype=dtype)
+        if self.blob is not None:
+            return np.frombuffer(self.blob, dtype=dtype, count=count, offset=start).reshape(
+                sec.shape
+            )
+        assert self.path is not None
+        return np.memmap(self.path, dtype=dtype, mode="r", offset=start, shape=sec.shape)
+
+    def bytes(self, name: str) -> bytes:
+        """Raw bytes of a section."""
+
+        start, end = self.header.span(name)
+        if self.blob is not None:
+            return bytes(self.blob[start:end])
+        assert self.path is not None
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    def unpack(self, name: str) -> Any:
+        """Decode a msgpack section."""
+
+        return msgpack.unpackb(self.bytes(name), raw=False)
+
+    def verify(self, *names: str) -> None:
+        """Check the per-block CRC32s of the given sections (all sections by default).
+
+        Raises:
+            ValueError: if a section is truncated or a block checksum does not match.
+        """
+
+        for name in names or tuple(self.header.sections):
+            sec = self.header.sections[name]
+            expected = -(-sec.length // CHECKSUM_BLOCK)
+            if len(sec.crc32) != expected:
+                raise ValueError(f"section {name!r} has no usable checksums")
+            seen = 0
+            for i, block in enumerate(self._blocks(name)):
+                if i >= expected or zlib.crc32(block) != sec.crc32[i]:
+                    raise ValueError(f"index section {name!r} is corrupt (block {i})")
+                seen += 1
+            if seen != expected:
+                raise ValueError(f"index section {name!r} is truncated")
+
+    def _blocks(self, name: str) -> Iterator[memoryview]:
+        start, end = self.header.span(name)
+        if self.blob is not None:
+            view = memoryview(self.blob)[start:end]
+            for i in range(0, len(view), CHECKSUM_BLOCK):
+                yield view[i : i + CHECKSUM_BLOCK]
+            return
+        assert self.path is not None
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            pos = start
+            while pos < end:
+                block = f.read(min(CHECKSUM_BLOCK, end - pos))
+                if not block:
+                    return
+                yield memoryview(block)
+                pos += len(block)
+
+
+def _header_end(blob: bytes | memoryview) -> int:
+    _, length, _ = _PREFIX.unpack_from(blob, 0)
+    return _PREFIX.size + int(length)
+
+
+__all__ = [
+    "ALIGNMENT",
+    "CHECKSUM_BLOCK",
+    "FORMAT_VERSION",
+    "IndexHeader",
+    "IndexReader",
+    "MAGIC",
+    "Section",
+    "VERIFY_MODES",
+    "VerifyMode",
+    "check_verify_mode",
+    "encode_index",
+    "is_container",
+    "parse_header",
+    "read_header",
+    "write_index",
+]
@@ -4,18 +4,37 @@
 # mypy: ignore-errors
 """Reference indexes.
 
-Two backends are provided out of the box:
+Backends provided out of the box:
 * NumpyCosineIndex: small/medium corpora, deterministic, dependency-free.
-* BM25Index: CI-friendly lexical retrieval without model downloads.
-
-Persistence format: msgpack (schema_versioned).
+* IvfCosineIndex: approximate dense search over k-means lists for large corpora.
+* HnswCosineIndex: approximate dense search over a navigable small-world graph (low latency).
+* BM25Index: CI-friendly lexical retrieval without model downloads, served from
+  CSR-style postings (bucket -> chunk ids + term frequencies).
+* HybridIndex: a BM25 and a NumpyCosineIndex arm over one chunk table, queried concurrently
+  and fused by reciprocal rank or normalized score.
+
+Persistence formats (both schema_versioned):
+* v2 (written): the sectioned container in `bijux_rag.rag.index_format`. Its fixed header names
+  the backend and section offsets, so loaders dispatch without decoding the body and map array
+  sections (vectors, postings) straight from the page cache.
+* v1 (read-only): a single msgpack document, decoded exactly once.
+
+Chunks live in a columnar `ChunkTable`; `Chunk` objects are only materialized for the rows a
+query returns.
 """
 
 from __future__ import annotations
 
+import heapq
 import json
 import math
-from dataclasses import dataclass
+import os
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
 from hashlib import sha256
 from typing import Any, Mapping, Sequence
 
@@ -23,10 +42,42 @@ import msgpack
 import numpy as np
 from numpy.typing import NDArray
 
-from bijux_rag.core.rag_types import Chunk, EmbeddingSpec
+from bijux_rag.core.rag_types import Chunk, EmbeddingSpec, StorageDtype
+from bijux_rag.rag.chunk_store import ChunkTable, CodePostings
+from bijux_rag.rag.index_format import (
+    MAGIC,
+    IndexReader,
+    VerifyMode,
+    check_verify_mode,
+    encode_index,
+    is_container,
+    read_header,
+    write_index,
+)
 from bijux_rag.rag.ports import Candidate, Embedder
+from bijux_rag.rag.postings import PACKED_BLOCK_SIZE, PackedPostings, _concat_ranges
+from bijux_rag.rag.quantization import (
+    BinaryQuantizer,
+    Codec,
+    ProductQuantizer,
+    ScalarQuantizer,
+    assign,
+    kmeans,
+)
+from bijux_rag.rag.vocab import TermDictionary
 
 SCHEMA_VERSION = 1
+BM25_BLOCK_SIZE = 128
+# Exact dense search scores this many vector rows at a time (32 MiB of float32 at dim 128).
+DENSE_BLOCK_ROWS = 65536
+# Scores materialized per block of queries in the batched exact path.
+QUERY_BLOCK_BYTES = 64 << 20
+DENSE_MODES = ("exact", "compressed", "binary-rescore", "truncated")
+FUSION_MODES = ("rrf", "normalized")
+BM25_VOCABS = ("hashed", "exact")
+POSTINGS_CODECS = ("raw", "packed")
+# Distinct tokens whose hash `_token_hash` keeps (bounded; hot query and corpus terms).
+TOKEN_HASH_CACHE = 1 << 18
 
 
 def _fingerprint_bytes(*parts: bytes) -> str:
@@ -48,37 +99,815 @@ def _l2_normalize(x: NDArray[np.float32]) -> NDArray[np.float32]:
     return x / denom
 
 
+@lru_cache(maxsize=TOKEN_HASH_CACHE)
+def _token_hash(token: str) -> int:
+    # Deterministic across platforms: the first 8 bytes of SHA-256, big-endian.
+    return int.from_bytes(sha256(token.encode("utf-8")).digest()[:8], "big", signed=False)
+
+
 def _stable_token_bucket(token: str, *, buckets: int) -> int:
-    # Deterministic across platforms.
-    d = sha256(token.encode("utf-8")).digest()
-    n = int.from_bytes(d[:8], "big", signed=False)
-    return int(n % buckets)
+    return _token_hash(token) % buckets
+
+
+# A token is a maximal run of characters for which `str.isalnum` holds: `\w` minus `_`.
+_TOKEN_RE = re.compile(r"[^\W_]+")
 
 
 def _tokenize(text: str) -> list[str]:
     # Minimal, deterministic tokenizer.
     # Production: replace with proper tokenization if needed.
-    out: list[str] = []
-    cur: list[str] = []
-    for ch in text.lower():
-        if ch.isalnum():
-            cur.append(ch)
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _isin_sorted(values: NDArray[Any], sorted_ids: NDArray[Any]) -> NDArray[np.bool_]:
+    """``np.isin(values, sorted_ids)`` for an ascending ``sorted_ids``, by binary search."""
+
+    if sorted_ids.size == 0:
+        return np.zeros(values.shape, dtype=bool)
+    at = np.minimum(np.searchsorted(sorted_ids, values), sorted_ids.size - 1)
+    return np.asarray(sorted_ids[at] == values)
+
+
+def _top_k_desc(scores: NDArray[Any], k: int) -> NDArray[np.int64]:
+    """Positions of the ``k`` largest scores ordered by (score desc, position asc).
+
+    ``argpartition`` finds the k-th best score; every tie at that boundary is kept so the final
+    ordering matches a stable descending sort.
+    """
+
+    n = int(scores.size)
+    k = min(int(k), n)
+    if k <= 0:
+        return np.zeros((0,), dtype=np.int64)
+    if k < n:
+        kth = scores[np.argpartition(-scores, kth=k - 1)[:k]].min()
+        cand = np.flatnonzero(scores >= kth)
+    else:
+        cand = np.arange(n, dtype=np.int64)
+    order = np.lexsort((cand, -scores[cand]))
+    return cand[order[:k]]
+
+
+def _top_k_desc_rows(scores: NDArray[Any], k: int) -> NDArray[np.int64]:
+    """Per-row top-k columns of a 2-D score matrix, ordered by (score desc, column asc).
+
+    One partition per batch finds each row's k-th best score; every column above it is kept
+    and ties at it are filled in column order, so rows match a stable descending sort.
+    """
+
+    n = int(scores.shape[1])
+    k = min(int(k), n)
+    if k <= 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-scores, kth=k - 1, axis=1)[:, :k]
+        kth = np.take_along_axis(scores, part, axis=1).min(axis=1, keepdims=True)
+        above = scores > kth
+        tie = scores == kth
+        room = k - above.sum(axis=1, keepdims=True)
+        keep = above | (tie & (np.cumsum(tie, axis=1) <= room))
+        cols = np.nonzero(keep)[1].reshape(scores.shape[0], k)
+    else:
+        cols = np.broadcast_to(np.arange(n, dtype=np.int64), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, cols, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(cols, order, axis=1).astype(np.int64)
+
+
+def _stream_top_k(
+    matrix: NDArray[np.float32],
+    qs: NDArray[np.float32],
+    rows: NDArray[Any] | None,
+    top_k: int,
+    *,
+    block: int,
+) -> tuple[NDArray[np.int64], NDArray[np.float32]]:
+    """Exact per-query top-k of ``qs @ matrix[rows].T``, scanning ``block`` rows at a time.
+
+    Only one ``(len(qs), block)`` score block and a running ``(len(qs), top_k)`` best list are
+    live, and rows are read in order, so a memory-mapped matrix streams through the page cache
+    with bounded memory. Rows (and ``rows``) ascend, so ties keep the lower row id.
+    """
+
+    total = int(matrix.shape[0]) if rows is None else int(rows.size)
+    best_ids = np.zeros((qs.shape[0], 0), dtype=np.int64)
+    best = np.zeros((qs.shape[0], 0), dtype=np.float32)
+    for lo in range(0, total, max(1, int(block))):
+        if rows is None:
+            part = matrix[lo : lo + block]
+            ids = np.arange(lo, lo + part.shape[0], dtype=np.int64)
         else:
-            if cur:
-                out.append("".join(cur))
-                cur = []
-    if cur:
-        out.append("".join(cur))
-    return out
+            ids = np.asarray(rows[lo : lo + block], dtype=np.int64)
+            part = matrix[ids]
+        scores = (qs @ part.T).astype(np.float32, copy=False)
+        local = _top_k_desc_rows(scores, top_k)
+        cand_ids = np.concatenate([best_ids, ids[local]], axis=1)
+        cand = np.concatenate([best, np.take_along_axis(scores, local, axis=1)], axis=1)
+        top = _top_k_desc_rows(cand, top_k)
+        best_ids = np.take_along_axis(cand_ids, top, axis=1)
+        best = np.take_along_axis(cand, top, axis=1)
+    return best_ids, best
+
+
+_POOLS_LOCK = threading.Lock()
+_POOLS: dict[str, ThreadPoolExecutor] = {}
+# Threads start on demand, so a generous fixed size costs nothing until it is used.
+_POOL_THREADS = max(32, os.cpu_count() or 1)
+
+
+def _forget_pools() -> None:
+    # A forked child inherits the executors but none of their threads; start afresh.
+    global _POOLS_LOCK
+    _POOLS_LOCK = threading.Lock()
+    _POOLS.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_pools)
+
+
+def _shared_pool(name: str) -> ThreadPoolExecutor:
+    """Process-wide thread pool ``name``, created on first use and never shut down.
+
+    Callers keep the executor they were handed, so a pool is sized once rather than replaced
+    by a bigger one; asking for more concurrent tasks than it has threads only queues them.
+    """
+
+    with _POOLS_LOCK:
+        pool = _POOLS.get(name)
+        if pool is None:
+            pool = ThreadPoolExecutor(
+                max_workers=_POOL_THREADS, thread_name_prefix=f"bijux-rag-{name}"
+            )
+            _POOLS[name] = pool
+        return pool
+
+
+def _sharded_top_k(
+    matrix: NDArray[np.float32],
+    qs: NDArray[np.float32],
+    rows: NDArray[Any] | None,
+    top_k: int,
+    *,
+    block: int,
+    workers: int,
+) -> tuple[NDArray[np.int64], NDArray[np.float32]]:
+    """`_stream_top_k` over ``workers`` contiguous row shards scored on the shared pool.
+
+    NumPy releases the GIL inside matrix products, so shards scan concurrently; the per-shard
+    top-k lists are merged in shard order, which keeps ties on the lower row id.
+    """
+
+    total = int(matrix.shape[0]) if rows is None else int(rows.size)
+    shards = max(1, min(int(workers), total))
+    if shards == 1:
+        return _stream_top_k(matrix, qs, rows, top_k, block=block)
+    bounds = np.linspace(0, total, shards + 1).astype(np.int64).tolist()
+    pool = _shared_pool("score")
+    futures = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        if rows is None:
+            futures.append(
+                (lo, pool.submit(_stream_top_k, matrix[lo:hi], qs, None, top_k, block=block))
+            )
+        else:
+            futures.append(
+                (0, pool.submit(_stream_top_k, matrix, qs, rows[lo:hi], top_k, block=block))
+            )
+    parts = [(fut.result(), offset) for offset, fut in futures]
+    cand_ids = np.concatenate([ids + offset for (ids, _), offset in parts], axis=1)
+    cand = np.concatenate([scores for (_, scores), _ in parts], axis=1)
+    top = _top_k_desc_rows(cand, top_k)
+    return np.take_along_axis(cand_ids, top, axis=1), np.take_along_axis(cand, top, axis=1)
+
+
+def _embed_query(spec: EmbeddingSpec, embedder: Embedder | None, query: str) -> NDArray[Any]:
+    return _embed_queries(spec, embedder, [query])[0]
+
+
+def _embed_queries(
+    spec: EmbeddingSpec, embedder: Embedder | None, queries: Sequence[str]
+) -> NDArray[Any]:
+    if embedder is None:
+        raise ValueError("embedder is required for dense retrieval")
+    if embedder.spec.model != spec.model:
+        raise ValueError(f"embedder model mismatch: {embedder.spec.model} != {spec.model}")
+    if not queries:
+        return np.zeros((0, spec.dim), dtype=np.float32)
+    q = np.asarray(embedder.embed_texts(list(queries)), dtype=np.float32)
+    if spec.normalized:
+        return _l2_normalize(q)
+    return q
+
+
+def _spec_payload(spec: EmbeddingSpec) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "model": spec.model,
+        "dim": spec.dim,
+        "metric": spec.metric,
+        "normalized": spec.normalized,
+    }
+    # Omitted for float32 so indexes written before compressed storage keep their fingerprints.
+    if spec.storage_dtype != "float32":
+        payload["storage_dtype"] = spec.storage_dtype
+    if spec.coarse_dim is not None:
+        payload["coarse_dim"] = spec.coarse_dim
+    return payload
+
+
+def _spec_from_payload(raw: Mapping[str, Any]) -> EmbeddingSpec:
+    return EmbeddingSpec(
+        model=raw["model"],
+        dim=int(raw["dim"]),
+        metric=raw.get("metric", "cosine"),
+        normalized=bool(raw.get("normalized", True)),
+        storage_dtype=raw.get("storage_dtype", "float32"),
+        coarse_dim=None if raw.get("coarse_dim") is None else int(raw["coarse_dim"]),
+    )
+
+
+def _tfs_from_payload(
+    raw: Sequence[Sequence[Sequence[int]]],
+) -> tuple[tuple[tuple[int, int], ...], ...]:
+    return tuple(tuple((int(a), int(b)) for a, b in row) for row in raw)
+
+
+def _read_source(path: str) -> IndexReader | dict[str, Any]:
+    """Open a persisted index with a single read of what is needed.
+
+    v2 containers are opened by header only (sections are mapped on demand); v1 files are a
+    single msgpack document and are decoded exactly once.
+    """
+
+    with open(path, "rb") as f:
+        prefix = f.read(len(MAGIC))
+        if is_container(prefix):
+            f.seek(0)
+            return IndexReader(header=read_header(f), path=path)
+        return msgpack.unpackb(prefix + f.read(), raw=False)
+
+
+def _read_blob(blob: bytes) -> IndexReader | dict[str, Any]:
+    if is_container(blob):
+        return IndexReader.from_bytes(blob)
+    return msgpack.unpackb(blob, raw=False)
+
+
+def _verify_source(source: IndexReader | Mapping[str, Any], verify: str) -> bool:
+    """Apply ``verify`` to an opened source; return whether chunk ids must still be re-hashed.
+
+    v1 documents carry no section checksums, so ``"blocks"`` falls back to full verification
+    for them.
+    """
+
+    mode = check_verify_mode(verify)
+    if not isinstance(source, IndexReader):
+        return mode != "none"
+    if mode != "none":
+        source.verify()
+    return mode == "full"
+
+
+def _adopt_fingerprint(
+    index: NumpyCosineIndex | BM25Index, source: IndexReader | Mapping[str, Any], verify_ids: bool
+) -> None:
+    # v2 files record the fingerprint at save time; recompute it only under full verification.
+    stored = source.header.meta.get("fingerprint") if isinstance(source, IndexReader) else None
+    if stored is None:
+        return
+    if verify_ids and index.fingerprint != stored:
+        raise ValueError("index fingerprint mismatch on load (possible corruption)")
+    object.__setattr__(index, "_fingerprint", stored)
+
+
+def _source_backend(source: IndexReader | Mapping[str, Any]) -> str | None:
+    if isinstance(source, IndexReader):
+        return source.header.backend
+    return source.get("backend")
+
+
+@dataclass(frozen=True, slots=True)
+class BM25Postings:
+    """Inverted postings in CSR layout.
+
+    Postings for bucket ``t`` live in ``doc_ids[indptr[t]:indptr[t + 1]]`` (ascending chunk
+    ids) with matching term frequencies in ``tfs``.
+    """
+
+    indptr: NDArray[np.int64]
+    doc_ids: NDArray[np.int32]
+    tfs: NDArray[np.int32]
+
+    def bucket(self, bucket: int) -> tuple[NDArray[np.int32], NDArray[np.int32]]:
+        lo = int(self.indptr[bucket])
+        hi = int(self.indptr[bucket + 1])
+        return self.doc_ids[lo:hi], self.tfs[lo:hi]
+
+    def take(
+        self, starts: NDArray[np.int64], ends: NDArray[np.int64]
+    ) -> tuple[NDArray[np.int32], NDArray[np.int32]]:
+        """Postings ``[starts[i], ends[i])`` concatenated (see `PackedPostings.take`)."""
+
+        sel = _concat_ranges(starts, ends)
+        return self.doc_ids[sel], self.tfs[sel]
+
+    def probe(
+        self, bucket: int, ids: NDArray[np.int64]
+    ) -> tuple[NDArray[np.int32], NDArray[np.int32]]:
+        """All postings of ``bucket``: raw ones are mapped, so there is nothing to skip."""
+
+        return self.bucket(bucket)
+
+    @classmethod
+    def from_tfs(cls, tfs: Sequence[Sequence[tuple[int, int]]], *, buckets: int) -> "BM25Postings":
+        """Invert per-chunk sparse ``(bucket, count)`` rows into bucket-major postings."""
+
+        lengths = np.fromiter((len(row) for row in tfs), dtype=np.int64, count=len(tfs))
+        total = int(lengths.sum())
+        flat = np.fromiter(
+            (x for row in tfs for pair in row for x in pair), dtype=np.int64, count=2 * total
+        ).reshape(total, 2)
+        rows = np.repeat(np.arange(len(tfs), dtype=np.int32), lengths)
+        # Stable sort keeps chunk ids ascending within each bucket.
+        order = np.argsort(flat[:, 0], kind="stable")
+        counts = np.bincount(flat[:, 0], minlength=buckets)
+        indptr = np.zeros((buckets + 1,), dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return cls(
+            indptr=indptr,
+            doc_ids=rows[order],
+            tfs=flat[order, 1].astype(np.int32),
+        )
+
+    @classmethod
+    def concat(
+        cls,
+        parts: Sequence["BM25Postings"],
+        *,
+        rows: Sequence[int],
+        remap: Sequence[NDArray[np.int64]] | None = None,
+        buckets: int | None = None,
+    ) -> "BM25Postings":
+        """Stack postings of consecutive row runs, each numbering its rows from 0.
+
+        ``parts[i]`` covers ``rows[i]`` chunks and its rows are shifted past those of the earlier
+        parts; the result equals `from_tfs` over the concatenated per-chunk rows. Parts with
+        their own term vocabularies pass ``remap[i]`` (local bucket -> one of ``buckets``).
+        """
+
+        if remap is None:
+            buckets = parts[0].indptr.size - 1
+        offset = 0
+        parts_bucket, parts_row = [], []
+        for i, (part, n) in enumerate(zip(parts, rows, strict=True)):
+            local = np.repeat(np.arange(part.indptr.size - 1), np.diff(part.indptr))
+            parts_bucket.append(local if remap is None else remap[i][local])
+            parts_row.append(part.doc_ids.astype(np.int64) + offset)
+            offset += int(n)
+        bucket = np.concatenate(parts_bucket).astype(np.int64)
+        # Stable sort keeps earlier runs, hence ascending chunk ids, first within each bucket.
+        order = np.argsort(bucket, kind="stable")
+        indptr = np.zeros((buckets + 1,), dtype=np.int64)
+        np.cumsum(np.bincount(bucket, minlength=buckets), out=indptr[1:])
+        return cls(
+            indptr=indptr,
+            doc_ids=np.concatenate(parts_row)[order].astype(np.int32),
+            tfs=np.concatenate([part.tfs for part in parts])[order].astype(np.int32),
+        )
+
+    def to_tfs(self, n: int) -> tuple[tuple[tuple[int, int], ...], ...]:
+        """Transpose back to per-chunk sparse ``(bucket, count)`` rows (inverse of `from_tfs`)."""
+
+        buckets = np.repeat(np.arange(self.indptr.size - 1), np.diff(self.indptr))
+        order = np.argsort(self.doc_ids, kind="stable")
+        bounds = np.zeros((n + 1,), dtype=np.int64)
+        np.cumsum(np.bincount(self.doc_ids, minlength=n), out=bounds[1:])
+        pairs = list(zip(buckets[order].tolist(), self.tfs[order].tolist(), strict=True))
+        edges = bounds.tolist()
+        return tuple(tuple(pairs[edges[i] : edges[i + 1]]) for i in range(n))
+
+    def to_sections(self) -> dict[str, NDArray[Any]]:
+        return {
+            "postings.indptr": self.indptr,
+            "postings.doc_ids": self.doc_ids,
+            "postings.tfs": self.tfs,
+        }
+
+    @classmethod
+    def from_reader(cls, reader: IndexReader) -> "BM25Postings":
+        return cls(
+            indptr=reader.array("postings.indptr"),
+            doc_ids=reader.array("postings.doc_ids"),
+            tfs=reader.array("postings.tfs"),
+        )
+
+    def to_payload(self) -> dict[str, bytes]:
+        return {
+            "indptr": self.indptr.tobytes(),
+            "doc_ids": self.doc_ids.tobytes(),
+            "tfs": self.tfs.tobytes(),
+        }
+
+    @classmethod
+    def from_payload(cls, raw: Mapping[str, bytes], *, buckets: int) -> "BM25Postings":
+        indptr = np.frombuffer(raw["indptr"], dtype=np.int64, count=buckets + 1)
+        nnz = int(indptr[-1])
+        return cls(
+            indptr=indptr,
+            doc_ids=np.frombuffer(raw["doc_ids"], dtype=np.int32, count=nnz),
+            tfs=np.frombuffer(raw["tfs"], dtype=np.int32, count=nnz),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class BM25BlockMax:
+    """Impact upper bounds used for dynamic pruning.
+
+    Each bucket's postings are cut into fixed-size blocks. ``block_ptr`` is a CSR pointer from
+    bucket to its blocks; every block records its posting range, first/last chunk id and the
+    maximum BM25 impact of its postings. ``bucket_max`` is the per-bucket maximum impact.
+
+    Packed postings already carry each block's chunk-id range and its largest term frequency
+    and smallest chunk length, so for them the table is the packed blocks themselves and
+    ``block_max`` bounds every impact from those two values without decoding anything.
+    """
+
+    block_size: int
+    block_ptr: NDArray[np.int64]
+    block_start: NDArray[np.int64]
+    block_end: NDArray[np.int64]
+    block_first: NDArray[np.int32]
+    block_last: NDArray[np.int32]
+    block_max: NDArray[np.float64]
+    bucket_max: NDArray[np.float64]
+
+    @classmethod
+    def build(cls, index: "BM25Index", *, block_size: int = BM25_BLOCK_SIZE) -> "BM25BlockMax":
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        if isinstance(index.postings, PackedPostings) and block_size == index.postings.block_size:
+            return cls._from_packed(index, index.postings)
+        postings = index._csr_postings()
+        indptr = postings.indptr
+        lens = np.diff(indptr)
+        bucket_of = np.repeat(np.arange(index.buckets, dtype=np.int64), lens)
+        tf = postings.tfs.astype(np.float64)
+        impacts = (
+            index.idf[bucket_of] * (tf * (index.k1 + 1.0)) / (tf + index.len_norm[postings.doc_ids])
+        )
+
+        nblocks = (lens + block_size - 1) // block_size
+        block_ptr = np.zeros((index.buckets + 1,), dtype=np.int64)
+        np.cumsum(nblocks, out=block_ptr[1:])
+        block_bucket = np.repeat(np.arange(index.buckets, dtype=np.int64), nblocks)
+        rank = np.arange(int(block_ptr[-1]), dtype=np.int64) - block_ptr[block_bucket]
+        block_start = indptr[block_bucket] + rank * block_size
+        block_end = np.minimum(block_start + block_size, indptr[block_bucket + 1])
+
+        block_max = np.zeros((block_start.size,), dtype=np.float64)
+        if block_start.size:
+            block_max = np.maximum.reduceat(impacts, block_start)
+        return cls(
+            block_size=int(block_size),
+            block_ptr=block_ptr,
+            block_start=block_start,
+            block_end=block_end,
+            block_first=postings.doc_ids[block_start],
+            block_last=postings.doc_ids[block_end - 1],
+            block_max=block_max,
+            bucket_max=cls._bucket_max(block_ptr, block_max),
+        )
+
+    @classmethod
+    def _from_packed(cls, index: "BM25Index", postings: PackedPostings) -> "BM25BlockMax":
+        block_ptr, block_start, block_end = postings.block_layout()
+        block_bucket = np.repeat(np.arange(index.buckets, dtype=np.int64), np.diff(block_ptr))
+        # Impact grows with tf and shrinks with chunk length, so (max tf, min length) bounds
+        # every posting of the block; rounding is monotone too, so the bound holds in floats.
+        tf = postings.bound[:, 0].astype(np.float64)
+        len_norm = index._length_norm(postings.bound[:, 1])
+        block_max = index.idf[block_bucket] * (tf * (index.k1 + 1.0)) / (tf + len_norm)
+        return cls(
+            block_size=postings.block_size,
+            block_ptr=block_ptr,
+            block_start=block_start,
+            block_end=block_end,
+            block_first=postings.first,
+            block_last=postings.last,
+            block_max=block_max,
+            bucket_max=cls._bucket_max(block_ptr, block_max),
+        )
+
+    @staticmethod
+    def _bucket_max(
+        block_ptr: NDArray[np.int64], block_max: NDArray[np.float64]
+    ) -> NDArray[np.float64]:
+        bucket_max = np.zeros((block_ptr.size - 1,), dtype=np.float64)
+        has_blocks = np.diff(block_ptr) > 0
+        if has_blocks.any():
+            bucket_max[has_blocks] = np.maximum.reduceat(block_max, block_ptr[:-1][has_blocks])
+        return bucket_max
+
+
+def _term_remap(terms: Sequence[str], local: Sequence[Sequence[str]]) -> list[NDArray[np.int64]]:
+    """Position in ``terms`` of every term of each ``local`` vocabulary."""
+
+    pos = {t: i for i, t in enumerate(terms)}
+    return [np.fromiter((pos[t] for t in run), dtype=np.int64, count=len(run)) for run in local]
+
+
+def _bm25_idf(n: int, df: NDArray[Any]) -> NDArray[np.float64]:
+    # math.log keeps scores bit-identical with the scalar reference formula.
+    return np.fromiter(
+        (math.log((n - d + 0.5) / (d + 0.5) + 1.0) for d in df.tolist()),
+        dtype=np.float64,
+        count=int(df.size),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class BM25Stats:
+    """Corpus statistics BM25 scores against: chunk count, per-bucket ``df`` and ``avg_dl``.
+
+    An index normally scores against its own statistics. A segment of a larger corpus is given
+    the corpus-wide ones (`BM25Index.with_stats`) so its scores equal those of a single index
+    built over the whole corpus. Exact-vocabulary indexes each number their own terms, so
+    their combined statistics carry the sorted union of ``terms`` that ``df`` is indexed by.
+    """
+
+    n: int
+    df: NDArray[np.int64]
+    avg_dl: float
+    terms: tuple[str, ...] | None = None
+    idf: NDArray[np.float64] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "idf", _bm25_idf(self.n, self.df))
+
+    def project(self, vocab: TermDictionary) -> "BM25Stats":
+        """These statistics indexed by the term ids of ``vocab`` (a subset of ``terms``)."""
+
+        if self.terms is None:
+            raise ValueError("hashed BM25 statistics cannot be projected onto a vocabulary")
+        (ids,) = _term_remap(self.terms, [vocab.terms()])
+        return BM25Stats(n=self.n, df=self.df[ids], avg_dl=self.avg_dl)
+
+    @classmethod
+    def of(
+        cls, indexes: Sequence["BM25Index"], *, deleted: Sequence[NDArray[np.bool_] | None] = ()
+    ) -> "BM25Stats":
+        """Combined statistics of ``indexes``, skipping rows flagged in the matching ``deleted``."""
+
+        if not indexes:
+            raise ValueError("BM25Stats.of needs at least one index")
+        exact = {index.vocab is not None for index in indexes}
+        if len(exact) > 1:
+            raise ValueError("cannot combine hashed and exact-vocabulary BM25 indexes")
+        terms = remap = None
+        if exact.pop():
+            local = [index.vocab.terms() for index in indexes]
+            terms = tuple(sorted(set().union(*local)))
+            remap = _term_remap(terms, local)
+        buckets = indexes[0].buckets if terms is None else len(terms)
+        df = np.zeros((buckets,), dtype=np.int64)
+        n = 0
+        total_len = 0
+        for i, index in enumerate(indexes):
+            if terms is None and index.buckets != buckets:
+                raise ValueError("cannot combine BM25 indexes with different bucket counts")
+            ids = np.arange(buckets, dtype=np.int64) if remap is None else remap[i]
+            mask = deleted[i] if i < len(deleted) else None
+            df[ids] += index.df
+            if mask is None or not mask.any():
+                n += len(index.chunks)
+                total_len += int(index.doc_len.sum(dtype=np.int64))
+                continue
+            live = ~mask
+            n += int(live.sum())
+            total_len += int(index.doc_len[live].sum(dtype=np.int64))
+            # Each posting of a deleted row contributed one document to its bucket's df.
+            postings = index._csr_postings()
+            bucket_of = np.repeat(ids, np.diff(postings.indptr))
+            df -= np.bincount(bucket_of[mask[postings.doc_ids]], minlength=buckets)
+        return cls(n=n, df=df, avg_dl=total_len / n if n else 0.0, terms=terms)
+
+
+@dataclass(frozen=True, slots=True)
+class BM25PruningStats:
+    """Work accounting for one pruned BM25 query."""
+
+    postings_total: int
+    postings_scored: int
+    postings_skipped: int
+    blocks_skipped: int
+    essential_buckets: int
+
+
+def _check_codec(codec: Codec | None, codes: Any, spec: EmbeddingSpec, n: int, dim: int) -> None:
+    if (codec is None) != (codes is None):
+        raise ValueError("codec and codes must be given together")
+    expected = codec.dtype if isinstance(codec, ScalarQuantizer) else "float32"
+    if spec.storage_dtype != expected:
+        raise ValueError(f"spec storage_dtype {spec.storage_dtype!r} does not match the codec")
+    if codec is None:
+        return
+    if codec.dim != dim:
+        raise ValueError("codec does not match the vector dimension")
+    if codes.shape != (n, codec.code_width) or codes.dtype != codec.code_dtype:
+        raise ValueError(f"codes must be {codec.code_dtype} with shape (n, {codec.code_width})")
+
+
+def _train_codec(
+    vectors: NDArray[np.float32],
+    *,
+    pq_subvectors: int | None,
+    pq_ksub: int,
+    storage_dtype: str,
+    seed: int,
+) -> tuple[Codec | None, Any]:
+    if pq_subvectors is not None and storage_dtype != "float32":
+        raise ValueError("choose either pq_subvectors or a compressed storage_dtype, not both")
+    if pq_subvectors is not None:
+        codec: Codec = ProductQuantizer.train(
+            vectors, m=int(pq_subvectors), ksub=int(pq_ksub), seed=int(seed)
+        )
+    elif storage_dtype != "float32":
+        codec = ScalarQuantizer.train(vectors, dtype=storage_dtype)
+    else:
+        return None, None
+    return codec, codec.encode(vectors)
+
+
+def _codec_top_k(
+    vectors: NDArray[np.float32],
+    codec: Codec,
+    codes: NDArray[Any],
+    qv: NDArray[np.float32],
+    rows: NDArray[Any] | None,
+    top_k: int,
+    *,
+    oversample: int,
+    rescore: bool,
+) -> tuple[NDArray[np.int64], NDArray[np.float32]]:
+    """Rank ``rows`` (all rows if None) in the codec's compressed domain.
+
+    With ``rescore``, the best ``top_k * oversample`` rows are re-scored exactly from the float32
+    vectors, visited in row order so a memory-mapped matrix is read sequentially.
+    """
+
+    approx = codec.scores(codes if rows is None else codes[rows], codec.prepare(qv))
+    width = int(top_k) * max(1, int(oversample)) if rescore else int(top_k)
+    short = _top_k_desc(approx, width)
+    ids = short if rows is None else np.asarray(rows, dtype=np.int64)[short]
+    if not rescore:
+        return ids, approx[short]
+    return _rescore(vectors, ids, qv, top_k)
+
+
+def _rescore(
+    vectors: NDArray[np.float32], ids: NDArray[np.int64], qv: NDArray[np.float32], top_k: int
+) -> tuple[NDArray[np.int64], NDArray[np.float32]]:
+    ids = np.sort(ids)
+    exact = (vectors[ids] @ qv).astype(np.float32)
+    top = _top_k_desc(exact, int(top_k))
+    return ids[top], exact[top]
+
+
+def _binary_top_k(
+    vectors: NDArray[np.float32],
+    binary: BinaryQuantizer,
+    bits: NDArray[np.uint8],
+    qv: NDArray[np.float32],
+    rows: NDArray[Any] | None,
+    top_k: int,
+    *,
+    oversample: int,
+) -> tuple[NDArray[np.int64], NDArray[np.float32]]:
+    """Pool the ``top_k * oversample`` rows nearest in Hamming space, then re-score exactly."""
+
+    dist = binary.distances(bits if rows is None else bits[rows], qv)
+    pool = _top_k_desc(-dist, int(top_k) * max(1, int(oversample)))
+    ids = pool if rows is None else np.asarray(rows, dtype=np.int64)[pool]
+    return _rescore(vectors, ids, qv, top_k)
+
+
+def _truncated_top_k(
+    vectors: NDArray[np.float32],
+    coarse: NDArray[np.float32] | None,
+    qv: NDArray[np.float32],
+    rows: NDArray[Any] | None,
+    top_k: int,
+    *,
+    dim: int,
+    oversample: int,
+) -> tuple[NDArray[np.int64], NDArray[np.float32]]:
+    """Pool rows by cosine over the leading ``dim`` dimensions, then re-score in full.
+
+    The stored ``coarse`` matrix is read as is when it has exactly ``dim`` columns. Any other
+    prefix is sliced from the narrowest stored matrix and renormalized per query.
+    """
+
+    if coarse is not None and dim == coarse.shape[1]:
+        scores = (coarse if rows is None else coarse[rows]) @ qv[:dim]
+    else:
+        source = coarse if coarse is not None and dim < coarse.shape[1] else vectors
+        sub = source[:, :dim] if rows is None else source[rows, :dim]
+        norms = np.maximum(np.linalg.norm(sub, axis=1), np.float32(1e-12))
+        scores = (sub @ qv[:dim]) / norms
+    pool = _top_k_desc(scores.astype(np.float32), int(top_k) * max(1, int(oversample)))
+    ids = pool if rows is None else np.asarray(rows, dtype=np.int64)[pool]
+    return _rescore(vectors, ids, qv, top_k)
+
+
+def _codec_arrays(codec: Codec | None) -> dict[str, NDArray[Any]]:
+    if isinstance(codec, ProductQuantizer):
+        return {"pq.codebooks": np.asarray(codec.codebooks, dtype=np.float32)}
+    if isinstance(codec, ScalarQuantizer):
+        return {
+            "sq.scale": np.asarray(codec.scale, dtype=np.float32),
+            "sq.offset": np.asarray(codec.offset, dtype=np.float32),
+        }
+    return {}
+
+
+def _codec_fingerprint_parts(
+    codec: Codec | None, codes: Any, oversample: int
+) -> tuple[dict[str, Any], tuple[bytes, ...]]:
+    if codec is None:
+        return {}, ()
+    if isinstance(codec, ProductQuantizer):
+        meta = {"pq": {"m": codec.m, "ksub": codec.ksub, "oversample": int(oversample)}}
+    else:
+        meta = {"sq": {"dtype": codec.dtype, "oversample": int(oversample)}}
+    arrays = [a.tobytes() for a in _codec_arrays(codec).values()]
+    return meta, (*arrays, np.ascontiguousarray(codes).tobytes())
+
+
+def _codec_sections(codec: Codec | None, codes: Any) -> dict[str, Any]:
+    if codec is None:
+        return {}
+    prefix = "pq" if isinstance(codec, ProductQuantizer) else "sq"
+    return {**_codec_arrays(codec), f"{prefix}.codes": codes}
+
+
+def _codec_from_reader(reader: IndexReader, spec: EmbeddingSpec) -> tuple[Codec | None, Any]:
+    if reader.has("pq.codebooks"):
+        return ProductQuantizer(codebooks=reader.array("pq.codebooks")), reader.array("pq.codes")
+    if reader.has("sq.scale"):
+        codec = ScalarQuantizer(
+            dtype=spec.storage_dtype,
+            scale=reader.array("sq.scale"),
+            offset=reader.array("sq.offset"),
+        )
+        return codec, reader.array("sq.codes")
+    return None, None
 
 
 @dataclass(frozen=True, slots=True)
 class NumpyCosineIndex:
-    """Dense vector index using cosine similarity."""
+    """Dense vector index using cosine similarity.
+
+    With an optional ``codec`` (product quantizer, or the float16/int8 scalar codec named by
+    ``spec.storage_dtype``) plus its ``codes``, queries rank rows in the compressed domain and
+    re-score only a ``top_k * oversample`` shortlist from the float32 vectors, which can stay on
+    disk when the index is memory-mapped. An optional ``binary`` quantizer plus its packed sign
+    ``bits`` enable the ``binary-rescore`` mode: a Hamming-distance pool re-scored the same way.
+    With ``spec.coarse_dim`` set, ``coarse`` holds the renormalized leading dimensions for the
+    ``truncated`` mode, which reads ``coarse_dim / dim`` of the float32 bytes per query.
+    """
 
-    chunks: tuple[Chunk, ...]
+    chunks: ChunkTable
     vectors: NDArray[np.float32]
     spec: EmbeddingSpec
+    codec: Codec | None = None
+    codes: NDArray[Any] | None = None
+    oversample: int = 4
+    binary: BinaryQuantizer | None = None
+    bits: NDArray[np.uint8] | None = None
+    coarse: NDArray[np.float32] | None = None
+    _fingerprint: str | None = field(init=False, default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.chunks, ChunkTable):
+            table = ChunkTable.from_chunks(self.chunks, embedding_spec=self.spec)
+            object.__setattr__(self, "chunks", table)
+        if (self.coarse is None) != (self.spec.coarse_dim is None):
+            raise ValueError("coarse vectors must be given exactly when spec.coarse_dim is set")
+        if self.coarse is not None and self.coarse.shape != (
+            len(self.chunks),
+            self.spec.coarse_dim,
+        ):
+            raise ValueError("coarse vectors must have shape (n, spec.coarse_dim)")
+        _check_codec(
+            self.codec, self.codes, self.spec, len(self.chunks), int(self.vectors.shape[1])
+        )
+        if (self.binary is None) != (self.bits is None):
+            raise ValueError("binary and bits must be given together")
+        if self.binary is not None:
+            width = self.binary.code_width
+            if self.binary.dim != int(self.vectors.shape[1]):
+                raise ValueError("binary quantizer does not match the vector dimension")
+            if self.bits.dtype != np.uint8 or self.bits.shape != (len(self.chunks), width):
+                raise ValueError(f"bits must be uint8 with shape (n, {width})")
 
     @property
     def backend(self) -> str:
@@ -86,20 +915,793 @@ class NumpyCosineIndex:
 
     @property
     def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            object.__setattr__(self, "_fingerprint", self._compute_fingerprint())
+        return self._fingerprint
+
+    def _compute_fingerprint(self) -> str:
         # Deterministic fingerprint. Order by chunk_id to be robust to ingestion order.
-        ids = [c.chunk_id for c in self.chunks]
+        ids = self.chunks.chunk_ids()
         meta = {
             "schema": SCHEMA_VERSION,
             "backend": self.backend,
-            "spec": {
-                "model": self.spec.model,
-                "dim": self.spec.dim,
-                "metric": self.spec.metric,
-                "normalized": self.spec.normalized,
-            },
+            "spec": _spec_payload(self.spec),
             "chunk_ids": ids,
         }
-        return _fingerprint_bytes(_json_dumps(meta), self.vectors.tobytes())
+        codec_meta, codec_bytes = _codec_fingerprint_parts(self.codec, self.codes, self.oversample)
+        meta.update(codec_meta)
+        if self.binary is not None:
+            meta["binary"] = {"oversample": int(self.oversample)}
+            codec_bytes = (
+                *codec_bytes,
+                self.binary.center.tobytes(),
+                np.ascontiguousarray(self.bits).tobytes(),
+            )
+        if self.coarse is not None:
+            codec_bytes = (*codec_bytes, np.ascontiguousarray(self.coarse).tobytes())
+        return _fingerprint_bytes(_json_dumps(meta), self.vectors.tobytes(), *codec_bytes)
+
+    def retrieve(
+        self,
+        *,
+        query: str,
+        top_k: int,
+        filters: Mapping[str, str] | None = None,
+        embedder: Embedder | None = None,
+        oversample: int | None = None,
+        rescore: bool = True,
+        mode: str | None = None,
+        coarse_dim: int | None = None,
+        block_rows: int | None = None,
+        workers: int | None = None,
+    ) -> list[Candidate]:
+        """Top-k chunks by cosine similarity.
+
+        ``mode`` picks the search path: ``"exact"`` scores every float32 vector, ``"compressed"``
+        ranks rows through the codec, ``"binary-rescore"`` pools the rows nearest in Hamming
+        space over ``bits``, and ``"truncated"`` pools rows by cosine over the leading
+        ``coarse_dim`` dimensions (default ``spec.coarse_dim``). ``None`` uses the cheapest path
+        the index was built with, or ``truncated`` when ``coarse_dim`` is passed. The
+        approximate paths re-score a ``top_k * oversample`` shortlist exactly; ``rescore=False``
+        returns the codec's approximate scores instead. Exact search streams ``block_rows``
+        vectors at a time (default `DENSE_BLOCK_ROWS`) through a running top-k, split across
+        ``workers`` row shards scored concurrently on a shared thread pool (default 1).
+
+        Raises:
+            ValueError: if ``mode`` is unknown or needs data the index was built without, or
+                ``block_rows`` or ``workers`` is below 1.
+        """
+
+        if block_rows is not None and block_rows < 1:
+            raise ValueError("block_rows must be >= 1")
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be >= 1")
+        mode, coarse_dim = self._resolve_mode(mode, coarse_dim)
+        qv = _embed_query(self.spec, embedder, query)
+        return self._search(
+            qv,
+            top_k=int(top_k),
+            filters=filters,
+            mode=mode,
+            coarse_dim=coarse_dim,
+            oversample=oversample,
+            rescore=rescore,
+            block_rows=block_rows,
+            workers=workers,
+        )
+
+    def retrieve_many(
+        self,
+        *,
+        queries: Sequence[str],
+        top_k: int,
+        filters: Mapping[str, str] | None = None,
+        embedder: Embedder | None = None,
+        oversample: int | None = None,
+        rescore: bool = True,
+        mode: str | None = None,
+        coarse_dim: int | None = None,
+        block_rows: int | None = None,
+        workers: int | None = None,
+    ) -> list[list[Candidate]]:
+        """`retrieve` for a batch of queries, embedded in one call.
+
+        Exact search streams ``block_rows`` vectors at a time, scoring each against a block of
+        queries with one matrix-matrix product (query blocks bounded by `QUERY_BLOCK_BYTES` of
+        scores) and selecting every query's top-k at once, over ``workers`` concurrent row
+        shards. The other modes run per query on the batch embeddings.
+        """
+
+        if block_rows is not None and block_rows < 1:
+            raise ValueError("block_rows must be >= 1")
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be >= 1")
+        mode, coarse_dim = self._resolve_mode(mode, coarse_dim)
+        qs = _embed_queries(self.spec, embedder, queries)
+        if mode != "exact":
+            return [
+                self._search(
+                    qv,
+                    top_k=int(top_k),
+                    filters=filters,
+                    mode=mode,
+                    coarse_dim=coarse_dim,
+                    oversample=oversample,
+                    rescore=rescore,
+                    block_rows=block_rows,
+                    workers=workers,
+                )
+                for qv in qs
+            ]
+        idxs = self.chunks.filter_ids(filters) if filters else None
+        if idxs is not None and idxs.size == 0:
+            return [[] for _ in queries]
+        block = int(block_rows or DENSE_BLOCK_ROWS)
+        out: list[list[Candidate]] = []
+        step = max(1, QUERY_BLOCK_BYTES // (4 * block))
+        for lo in range(0, qs.shape[0], step):
+            top_idxs, top_scores = _sharded_top_k(
+                self.vectors,
+                qs[lo : lo + step],
+                idxs,
+                int(top_k),
+                block=block,
+                workers=int(workers or 1),
+            )
+            for row_ids, row_scores in zip(top_idxs.tolist(), top_scores.tolist()):
+                out.append(
+                    [
+                        Candidate(
+                            chunk=self._chunk(i), score=float(s), metadata={"backend": self.backend}
+                        )
+                        for i, s in zip(row_ids, row_scores)
+                    ]
+                )
+        return out
+
+    def _resolve_mode(self, mode: str | None, coarse_dim: int | None) -> tuple[str, int | None]:
+        if mode is None:
+            mode = (
+                "truncated"
+                if coarse_dim is not None
+                else "binary-rescore"
+                if self.binary is not None
+                else "compressed"
+                if self.codec is not None
+                else "truncated"
+                if self.coarse is not None
+                else "exact"
+            )
+        if mode not in DENSE_MODES:
+            raise ValueError(f"mode must be one of: {', '.join(DENSE_MODES)}")
+        if mode == "compressed" and self.codec is None:
+            raise ValueError("compressed mode needs an index built with a codec")
+        if mode == "binary-rescore" and self.binary is None:
+            raise ValueError("binary-rescore mode needs an index built with binary=True")
+        if mode == "truncated":
+            coarse_dim = self.spec.coarse_dim if coarse_dim is None else int(coarse_dim)
+            if coarse_dim is None or not 0 < coarse_dim < self.spec.dim:
+                raise ValueError("truncated mode needs coarse_dim in [1, dim)")
+        return mode, coarse_dim
+
+    def _search(
+        self,
+        qv: NDArray[np.float32],
+        *,
+        top_k: int,
+        filters: Mapping[str, str] | None,
+        mode: str,
+        coarse_dim: int | None,
+        oversample: int | None,
+        rescore: bool,
+        block_rows: int | None = None,
+        workers: int | None = None,
+    ) -> list[Candidate]:
+        if mode != "exact":
+            rows = self.chunks.filter_ids(filters) if filters else None
+            if rows is not None and rows.size == 0:
+                return []
+            shortlist = self.oversample if oversample is None else int(oversample)
+            if mode == "truncated":
+                ids, scores = _truncated_top_k(
+                    self.vectors,
+                    self.coarse,
+                    qv,
+                    rows,
+                    top_k,
+                    dim=coarse_dim,
+                    oversample=shortlist,
+                )
+            elif mode == "binary-rescore":
+                ids, scores = _binary_top_k(
+                    self.vectors,
+                    self.binary,
+                    self.bits,
+                    qv,
+                    rows,
+                    top_k,
+                    oversample=shortlist,
+                )
+            else:
+                ids, scores = _codec_top_k(
+                    self.vectors,
+                    self.codec,
+                    self.codes,
+                    qv,
+                    rows,
+                    top_k,
+                    oversample=shortlist,
+                    rescore=rescore,
+                )
+            return [
+                Candidate(chunk=self._chunk(i), score=float(s), metadata={"backend": self.backend})
+                for i, s in zip(ids.tolist(), scores.tolist())
+            ]
+        # Resolve filters through the inverted metadata index and score only surviving rows.
+        # Vectors are already normalized when built.
+        idxs = self.chunks.filter_ids(filters) if filters else None
+        if idxs is not None and idxs.size == 0:
+            return []
+        top_idxs, top_scores = _sharded_top_k(
+            self.vectors,
+            qv[None, :],
+            idxs,
+            top_k,
+            block=int(block_rows or DENSE_BLOCK_ROWS),
+            workers=int(workers or 1),
+        )
+
+        out: list[Candidate] = []
+        for i, s in zip(top_idxs[0].tolist(), top_scores[0].tolist()):
+            out.append(
+                Candidate(chunk=self._chunk(i), score=float(s), metadata={"backend": self.backend})
+            )
+        return out
+
+    def _chunk(self, i: int) -> Chunk:
+        embedding = tuple(self.vectors[i].tolist())
+        return self.chunks.chunk(i, embedding=embedding)
+
+    def _container(self) -> dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "schema_version": SCHEMA_VERSION,
+            "meta": {**self._meta(), "fingerprint": self.fingerprint},
+            "sections": {**self._sections(), **self.chunks.to_sections()},
+        }
+
+    def _meta(self) -> dict[str, Any]:
+        return {"spec": _spec_payload(self.spec), "oversample": self.oversample}
+
+    def _sections(self) -> dict[str, Any]:
+        """Persisted arrays other than the chunk table."""
+
+        return {
+            "vectors": np.asarray(self.vectors, dtype=np.float32),
+            **_codec_sections(self.codec, self.codes),
+            **(
+                {}
+                if self.binary is None
+                else {"binary.center": self.binary.center, "binary.bits": self.bits}
+            ),
+            **({} if self.coarse is None else {"coarse.vectors": self.coarse}),
+        }
+
+    def save(self, path: str) -> None:
+        write_index(path, **self._container())
+
+    def to_bytes(self) -> bytes:
+        return encode_index(**self._container())
+
+    @staticmethod
+    def load(path: str, *, verify: VerifyMode = "full") -> "NumpyCosineIndex":
+        return NumpyCosineIndex._from_source(_read_source(path), verify=verify)
+
+    @classmethod
+    def load_bytes(cls, blob: bytes, *, verify: VerifyMode = "none") -> "NumpyCosineIndex":
+        return cls._from_source(_read_blob(blob), verify=verify)
+
+    @classmethod
+    def _from_source(
+        cls, source: IndexReader | Mapping[str, Any], *, verify: VerifyMode
+    ) -> "NumpyCosineIndex":
+        verify_ids = _verify_source(source, verify)
+        if isinstance(source, IndexReader):
+            index = cls._from_reader(source, verify_ids=verify_ids)
+        else:
+            index = cls._from_payload(source, verify_ids=verify_ids)
+        _adopt_fingerprint(index, source, verify_ids)
+        return index
+
+    @classmethod
+    def _from_reader(cls, reader: IndexReader, *, verify_ids: bool) -> "NumpyCosineIndex":
+        header = reader.header
+        if header.schema_version != SCHEMA_VERSION:
+            raise ValueError("unsupported index schema version")
+        if header.backend != "numpy-cosine":
+            raise ValueError("not a numpy-cosine index")
+        spec = _spec_from_payload(header.meta["spec"])
+        chunks = ChunkTable.from_reader(reader, embedding_spec=spec)
+        if verify_ids:
+            chunks.verify_ids()
+        return cls._from_sections(reader, chunks, spec)
+
+    @classmethod
+    def _from_sections(
+        cls, reader: IndexReader, chunks: ChunkTable, spec: EmbeddingSpec
+    ) -> "NumpyCosineIndex":
+        codec, codes = _codec_from_reader(reader, spec)
+        return cls(
+            chunks=chunks,
+            vectors=reader.array("vectors"),
+            spec=spec,
+            codec=codec,
+            codes=codes,
+            oversample=int(reader.header.meta.get("oversample", 4)),
+            binary=(
+                BinaryQuantizer(center=reader.array("binary.center"))
+                if reader.has("binary.center")
+                else None
+            ),
+            bits=reader.array("binary.bits") if reader.has("binary.bits") else None,
+            coarse=reader.array("coarse.vectors") if reader.has("coarse.vectors") else None,
+        )
+
+    @classmethod
+    def _from_payload(cls, payload: Mapping[str, Any], *, verify_ids: bool) -> "NumpyCosineIndex":
+        # Format v1: a single msgpack document.
+        if payload.get("schema_version") != SCHEMA_VERSION:
+            raise ValueError("unsupported index schema version")
+        if payload.get("backend") != "numpy-cosine":
+            raise ValueError("not a numpy-cosine index")
+        spec = _spec_from_payload(payload["spec"])
+        chunks = ChunkTable.from_records(
+            payload["chunks"], embedding_spec=spec, verify_ids=verify_ids
+        )
+        vec = payload["vectors"]
+        shape = tuple(int(x) for x in vec["shape"])
+        arr = np.frombuffer(vec["data"], dtype=np.float32).reshape(shape)
+        return cls(chunks=chunks, vectors=arr, spec=spec)
+
+
+@dataclass(frozen=True, slots=True)
+class IvfCosineIndex:
+    """Inverted-file dense index: cosine over the rows of the ``nprobe`` closest k-means lists.
+
+    Vectors are partitioned by spherical k-means at build time; a query ranks the centroids,
+    gathers the rows of the best ``nprobe`` lists and scores only those exactly. With
+    ``nprobe == nlist`` results match `NumpyCosineIndex`.
+    """
+
+    chunks: ChunkTable
+    vectors: NDArray[np.float32]
+    spec: EmbeddingSpec
+    centroids: NDArray[np.float32]
+    lists: CodePostings
+    nprobe: int = 8
+    codec: Codec | None = None
+    codes: NDArray[Any] | None = None
+    oversample: int = 4
+    _fingerprint: str | None = field(init=False, default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.chunks, ChunkTable):
+            table = ChunkTable.from_chunks(self.chunks, embedding_spec=self.spec)
+            object.__setattr__(self, "chunks", table)
+        if self.nprobe < 1:
+            raise ValueError("nprobe must be >= 1")
+        _check_codec(
+            self.codec, self.codes, self.spec, len(self.chunks), int(self.vectors.shape[1])
+        )
+
+    @property
+    def backend(self) -> str:
+        return "ivf-cosine"
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            object.__setattr__(self, "_fingerprint", self._compute_fingerprint())
+        return self._fingerprint
+
+    def _compute_fingerprint(self) -> str:
+        meta = {
+            "schema": SCHEMA_VERSION,
+            "backend": self.backend,
+            "spec": _spec_payload(self.spec),
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "chunk_ids": self.chunks.chunk_ids(),
+        }
+        codec_meta, codec_bytes = _codec_fingerprint_parts(self.codec, self.codes, self.oversample)
+        meta.update(codec_meta)
+        return _fingerprint_bytes(
+            _json_dumps(meta),
+            self.vectors.tobytes(),
+            self.centroids.tobytes(),
+            self.lists.ptr.tobytes(),
+            self.lists.rows.tobytes(),
+            *codec_bytes,
+        )
+
+    def retrieve(
+        self,
+        *,
+        query: str,
+        top_k: int,
+        filters: Mapping[str, str] | None = None,
+        embedder: Embedder | None = None,
+        nprobe: int | None = None,
+        oversample: int | None = None,
+        rescore: bool = True,
+    ) -> list[Candidate]:
+        """Top-k chunks among the rows of the ``nprobe`` closest lists.
+
+        With a codec, probed rows are ranked in the compressed domain and a
+        ``top_k * oversample`` shortlist is re-scored exactly (``rescore=False`` keeps the
+        approximate scores).
+        """
+
+        qv = _embed_query(self.spec, embedder, query)
+        return self._search(
+            qv, top_k=top_k, filters=filters, nprobe=nprobe, oversample=oversample, rescore=rescore
+        )
+
+    def retrieve_many(
+        self,
+        *,
+        queries: Sequence[str],
+        top_k: int,
+        filters: Mapping[str, str] | None = None,
+        embedder: Embedder | None = None,
+        nprobe: int | None = None,
+        oversample: int | None = None,
+        rescore: bool = True,
+    ) -> list[list[Candidate]]:
+        """`retrieve` for a batch of queries, embedded in one call."""
+
+        qs = _embed_queries(self.spec, embedder, queries)
+        return [
+            self._search(
+                qv,
+                top_k=top_k,
+                filters=filters,
+                nprobe=nprobe,
+                oversample=oversample,
+                rescore=rescore,
+            )
+            for qv in qs
+        ]
+
+    def _search(
+        self,
+        qv: NDArray[np.float32],
+        *,
+        top_k: int,
+        filters: Mapping[str, str] | None,
+        nprobe: int | None,
+        oversample: int | None,
+        rescore: bool,
+    ) -> list[Candidate]:
+        probe = min(self.nlist, int(nprobe if nprobe is not None else self.nprobe))
+        lists = _top_k_desc((self.centroids @ qv).astype(np.float32), probe)
+        rows = self.lists.lookup(np.sort(lists).tolist())
+        if filters:
+            rows = np.intersect1d(rows, self.chunks.filter_ids(filters), assume_unique=True)
+        if rows.size == 0:
+            return []
+        if self.codec is not None:
+            ids, top_scores = _codec_top_k(
+                self.vectors,
+                self.codec,
+                self.codes,
+                qv,
+                rows,
+                int(top_k),
+                oversample=self.oversample if oversample is None else int(oversample),
+                rescore=rescore,
+            )
+        else:
+            scores = (self.vectors[rows] @ qv).astype(np.float32)
+            top = _top_k_desc(scores, int(top_k))
+            ids, top_scores = rows[top], scores[top]
+        return [
+            Candidate(chunk=self._chunk(i), score=float(s), metadata={"backend": self.backend})
+            for i, s in zip(ids.tolist(), top_scores.tolist())
+        ]
+
+    def _chunk(self, i: int) -> Chunk:
+        embedding = tuple(self.vectors[i].tolist())
+        return self.chunks.chunk(i, embedding=embedding)
+
+    def _container(self) -> dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "schema_version": SCHEMA_VERSION,
+            "meta": {
+                "spec": _spec_payload(self.spec),
+                "nprobe": self.nprobe,
+                "oversample": self.oversample,
+                "fingerprint": self.fingerprint,
+            },
+            "sections": {
+                "vectors": np.asarray(self.vectors, dtype=np.float32),
+                "centroids": np.asarray(self.centroids, dtype=np.float32),
+                "ivf.ptr": self.lists.ptr,
+                "ivf.rows": self.lists.rows,
+                **_codec_sections(self.codec, self.codes),
+                **self.chunks.to_sections(),
+            },
+        }
+
+    def save(self, path: str) -> None:
+        write_index(path, **self._container())
+
+    def to_bytes(self) -> bytes:
+        return encode_index(**self._container())
+
+    @staticmethod
+    def load(path: str, *, verify: VerifyMode = "full") -> "IvfCosineIndex":
+        return IvfCosineIndex._from_source(_read_source(path), verify=verify)
+
+    @classmethod
+    def load_bytes(cls, blob: bytes, *, verify: VerifyMode = "none") -> "IvfCosineIndex":
+        return cls._from_source(_read_blob(blob), verify=verify)
+
+    @classmethod
+    def _from_source(
+        cls, source: IndexReader | Mapping[str, Any], *, verify: VerifyMode
+    ) -> "IvfCosineIndex":
+        verify_ids = _verify_source(source, verify)
+        if not isinstance(source, IndexReader):
+            raise ValueError("ivf-cosine indexes are only stored in the v2 container format")
+        header = source.header
+        if header.schema_version != SCHEMA_VERSION:
+            raise ValueError("unsupported index schema version")
+        if header.backend != "ivf-cosine":
+            raise ValueError("not an ivf-cosine index")
+        spec = _spec_from_payload(header.meta["spec"])
+        chunks = ChunkTable.from_reader(source, embedding_spec=spec)
+        if verify_ids:
+            chunks.verify_ids()
+        codec, codes = _codec_from_reader(source, spec)
+        index = cls(
+            chunks=chunks,
+            vectors=source.array("vectors"),
+            spec=spec,
+            centroids=source.array("centroids"),
+            lists=CodePostings(ptr=source.array("ivf.ptr"), rows=source.array("ivf.rows")),
+            nprobe=int(header.meta["nprobe"]),
+            codec=codec,
+            codes=codes,
+            oversample=int(header.meta.get("oversample", 4)),
+        )
+        _adopt_fingerprint(index, source, verify_ids)
+        return index
+
+
+def _hnsw_upper_start(levels: NDArray[Any]) -> NDArray[np.int64]:
+    """Row of each node's layer-1 links in the packed upper-layer array (-1: level 0 only)."""
+
+    levels = np.asarray(levels, dtype=np.int64)
+    start = np.cumsum(levels) - levels
+    return np.where(levels > 0, start, -1)
+
+
+def _hnsw_links(
+    layer0: NDArray[np.int32],
+    upper: NDArray[np.int32],
+    upper_start: NDArray[np.int64],
+    node: int,
+    layer: int,
+) -> NDArray[np.int32]:
+    if layer == 0:
+        return layer0[node]
+    return upper[upper_start[node] + layer - 1]
+
+
+def _hnsw_search_layer(
+    vectors: NDArray[np.float32],
+    links: Any,
+    qv: NDArray[np.float32],
+    entries: list[tuple[float, int]],
+    ef: int,
+    layer: int,
+    visited: NDArray[np.int32],
+    stamp: int,
+    allowed: NDArray[np.bool_] | None = None,
+) -> list[tuple[float, int]]:
+    """Best-first search of one layer; returns up to ``ef`` ``(similarity, node)`` pairs.
+
+    Neighbours of each expanded node are scored in one gather + GEMV. With ``allowed``, the
+    traversal still walks every node but only allowed ones enter the result set.
+    """
+
+    candidates = [(-s, i) for s, i in entries]
+    heapq.heapify(candidates)
+    results = [(s, i) for s, i in entries if allowed is None or allowed[i]]
+    heapq.heapify(results)
+    for _, i in entries:
+        visited[i] = stamp
+    while candidates:
+        neg, node = heapq.heappop(candidates)
+        if len(results) >= ef and -neg < results[0][0]:
+            break
+        nbrs = links(node, layer)
+        nbrs = nbrs[nbrs >= 0]
+        nbrs = nbrs[visited[nbrs] != stamp]
+        if nbrs.size == 0:
+            continue
+        visited[nbrs] = stamp
+        sims = vectors[nbrs] @ qv
+        if len(results) >= ef:
+            # The admission bar only rises, so rows below it now can never get in.
+            keep = sims > results[0][0]
+            nbrs, sims = nbrs[keep], sims[keep]
+        for s, e in zip(sims.tolist(), nbrs.tolist()):
+            full = len(results) >= ef
+            if full and s <= results[0][0]:
+                continue
+            heapq.heappush(candidates, (-s, e))
+            if allowed is None or allowed[e]:
+                if full:
+                    heapq.heapreplace(results, (s, e))
+                else:
+                    heapq.heappush(results, (s, e))
+    return results
+
+
+def _hnsw_select(
+    vectors: NDArray[np.float32], candidates: list[tuple[float, int]], m: int
+) -> list[int]:
+    """Neighbour-selection heuristic: keep a candidate only if it is closer to the base node
+    than to every neighbour already kept, which spreads links across clusters."""
+
+    ordered = sorted(candidates, key=lambda t: (-t[0], t[1]))
+    ids = np.array([i for _, i in ordered], dtype=np.int64)
+    gram = vectors[ids] @ vectors[ids].T
+    kept: list[int] = []
+    for j, (s, _) in enumerate(ordered):
+        if len(kept) >= m:
+            break
+        if kept and float(gram[j, kept].max()) >= s:
+            continue
+        kept.append(j)
+    return [int(ids[j]) for j in kept]
+
+
+def _hnsw_build(
+    vectors: NDArray[np.float32], *, m: int, ef_construction: int, seed: int
+) -> tuple[NDArray[np.int32], NDArray[np.int32], NDArray[np.int32], int]:
+    """Insert every row in order; returns ``(levels, layer0, upper, entry_point)``."""
+
+    n = int(vectors.shape[0])
+    rng = np.random.default_rng(seed)
+    levels = np.floor(-np.log(1.0 - rng.random(n)) / math.log(m)).astype(np.int32)
+    upper_start = _hnsw_upper_start(levels)
+    layer0 = np.full((n, 2 * m), -1, dtype=np.int32)
+    upper = np.full((int(levels.sum()), m), -1, dtype=np.int32)
+    counts0 = np.zeros((n,), dtype=np.int32)
+    counts_up = np.zeros((upper.shape[0],), dtype=np.int32)
+    visited = np.zeros((n,), dtype=np.int32)
+    stamp = 0
+
+    def links(node: int, layer: int) -> NDArray[np.int32]:
+        return _hnsw_links(layer0, upper, upper_start, node, layer)
+
+    def connect(node: int, layer: int, nbr: int) -> None:
+        row = links(node, layer)
+        if layer == 0:
+            count, slot = counts0, node
+        else:
+            count, slot = counts_up, int(upper_start[node]) + layer - 1
+        if count[slot] < row.shape[0]:
+            row[count[slot]] = nbr
+            count[slot] += 1
+            return
+        pool = np.append(row, np.int32(nbr))
+        sims = vectors[pool] @ vectors[node]
+        kept = _hnsw_select(vectors, list(zip(sims.tolist(), pool.tolist())), row.shape[0])
+        row[:] = -1
+        row[: len(kept)] = kept
+        count[slot] = len(kept)
+
+    entry, top = -1, -1
+    for i in range(n):
+        level = int(levels[i])
+        if entry < 0:
+            entry, top = i, level
+            continue
+        qv = vectors[i]
+        ep = [(float(vectors[entry] @ qv), entry)]
+        for layer in range(top, level, -1):
+            stamp += 1
+            ep = [max(_hnsw_search_layer(vectors, links, qv, ep, 1, layer, visited, stamp))]
+        for layer in range(min(level, top), -1, -1):
+            stamp += 1
+            found = _hnsw_search_layer(
+                vectors, links, qv, ep, ef_construction, layer, visited, stamp
+            )
+            nbrs = _hnsw_select(vectors, found, m)
+            row = links(i, layer)
+            row[: len(nbrs)] = nbrs
+            if layer == 0:
+                counts0[i] = len(nbrs)
+            else:
+                counts_up[int(upper_start[i]) + layer - 1] = len(nbrs)
+            for e in nbrs:
+                connect(e, layer, i)
+            ep = found
+        if level > top:
+            entry, top = i, level
+    return levels, layer0, upper, entry
+
+
+@dataclass(frozen=True, slots=True)
+class HnswCosineIndex:
+    """Hierarchical navigable small-world graph over unit vectors (cosine).
+
+    Neighbour lists are fixed-width int32 rows padded with -1: ``layer0`` holds ``2*m`` links
+    per node, ``upper`` packs ``m`` links for each (node, layer >= 1) pair in node order, so the
+    whole graph is memory-mappable. Builds are deterministic for a given ``seed``.
+    """
+
+    chunks: ChunkTable
+    vectors: NDArray[np.float32]
+    spec: EmbeddingSpec
+    levels: NDArray[np.int32]
+    layer0: NDArray[np.int32]
+    upper: NDArray[np.int32]
+    entry_point: int
+    m: int = 16
+    ef_construction: int = 100
+    ef: int = 64
+    _upper_start: NDArray[np.int64] = field(init=False, repr=False, compare=False)
+    _fingerprint: str | None = field(init=False, default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.chunks, ChunkTable):
+            table = ChunkTable.from_chunks(self.chunks, embedding_spec=self.spec)
+            object.__setattr__(self, "chunks", table)
+        if self.ef < 1:
+            raise ValueError("ef must be >= 1")
+        object.__setattr__(self, "_upper_start", _hnsw_upper_start(self.levels))
+
+    @property
+    def backend(self) -> str:
+        return "hnsw-cosine"
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            object.__setattr__(self, "_fingerprint", self._compute_fingerprint())
+        return self._fingerprint
+
+    def _compute_fingerprint(self) -> str:
+        meta = {
+            "schema": SCHEMA_VERSION,
+            "backend": self.backend,
+            "spec": _spec_payload(self.spec),
+            "m": self.m,
+            "ef_construction": self.ef_construction,
+            "ef": self.ef,
+            "entry_point": self.entry_point,
+            "chunk_ids": self.chunks.chunk_ids(),
+        }
+        return _fingerprint_bytes(
+            _json_dumps(meta),
+            self.vectors.tobytes(),
+            self.levels.tobytes(),
+            self.layer0.tobytes(),
+            self.upper.tobytes(),
+        )
+
+    def _links(self, node: int, layer: int) -> NDArray[np.int32]:
+        return _hnsw_links(self.layer0, self.upper, self._upper_start, node, layer)
 
     def retrieve(
         self,
@@ -108,230 +1710,465 @@ class NumpyCosineIndex:
         top_k: int,
         filters: Mapping[str, str] | None = None,
         embedder: Embedder | None = None,
+        ef: int | None = None,
     ) -> list[Candidate]:
-        if embedder is None:
-            raise ValueError("embedder is required for dense retrieval")
-        if embedder.spec.model != self.spec.model:
-            raise ValueError(f"embedder model mismatch: {embedder.spec.model} != {self.spec.model}")
-
-        q = embedder.embed_texts([query])
-        qv = q[0]
-        if self.spec.normalized:
-            qv = _l2_normalize(q)[0]
-        # vectors are already normalized when built.
-        scores = (self.vectors @ qv).astype(np.float32)
-
-        # Apply metadata filters.
-        idxs = np.arange(len(self.chunks))
-        if filters:
-            keep: list[int] = []
-            for i in idxs.tolist():
-                c = self.chunks[i]
-                md = dict(c.metadata)
-                ok = True
-                for k, v in filters.items():
-                    if k == "doc_id" and c.doc_id != v:
-                        ok = False
-                        break
-                    if k not in md:
-                        ok = False
-                        break
-                    if str(md.get(k)) != v:
-                        ok = False
-                        break
-                if ok:
-                    keep.append(i)
-            idxs = np.asarray(keep, dtype=int)
-
-        if idxs.size == 0:
-            return []
+        qv = _embed_query(self.spec, embedder, query)
+        return self._search(qv, top_k=top_k, filters=filters, ef=ef)
 
-        # Partial argpartition for top-k.
-        k = min(int(top_k), int(idxs.size))
-        sub_scores = scores[idxs]
-        top_local = np.argpartition(-sub_scores, kth=k - 1)[:k]
-        top_idxs = idxs[top_local]
-        top_idxs = top_idxs[np.argsort(-scores[top_idxs])]
+    def retrieve_many(
+        self,
+        *,
+        queries: Sequence[str],
+        top_k: int,
+        filters: Mapping[str, str] | None = None,
+        embedder: Embedder | None = None,
+        ef: int | None = None,
+    ) -> list[list[Candidate]]:
+        """`retrieve` for a batch of queries, embedded in one call."""
 
-        out: list[Candidate] = []
-        for i in top_idxs.tolist():
-            out.append(
-                Candidate(
-                    chunk=self.chunks[i], score=float(scores[i]), metadata={"backend": self.backend}
-                )
+        qs = _embed_queries(self.spec, embedder, queries)
+        return [self._search(qv, top_k=top_k, filters=filters, ef=ef) for qv in qs]
+
+    def _search(
+        self,
+        qv: NDArray[np.float32],
+        *,
+        top_k: int,
+        filters: Mapping[str, str] | None,
+        ef: int | None,
+    ) -> list[Candidate]:
+        n = len(self.chunks)
+        if n == 0 or top_k <= 0:
+            return []
+        width = max(int(ef if ef is not None else self.ef), int(top_k))
+        allowed = None
+        if filters:
+            ids = self.chunks.filter_ids(filters)
+            # Graph walks degrade when few nodes qualify; score a small subset exactly.
+            if ids.size <= width or ids.size * 8 <= n:
+                return self._exact(ids, qv, int(top_k))
+            allowed = np.zeros((n,), dtype=np.bool_)
+            allowed[ids] = True
+
+        visited = np.zeros((n,), dtype=np.int32)
+        ep = [(float(self.vectors[self.entry_point] @ qv), self.entry_point)]
+        top = int(self.levels[self.entry_point])
+        for layer in range(top, 0, -1):
+            ep = [
+                max(_hnsw_search_layer(self.vectors, self._links, qv, ep, 1, layer, visited, layer))
+            ]
+        found = _hnsw_search_layer(
+            self.vectors, self._links, qv, ep, width, 0, visited, top + 1, allowed
+        )
+        rows = np.sort(np.array([i for _, i in found], dtype=np.int64))
+        return self._exact(rows, qv, int(top_k))
+
+    def _exact(self, rows: NDArray[Any], qv: NDArray[np.float32], top_k: int) -> list[Candidate]:
+        if rows.size == 0:
+            return []
+        scores = (self.vectors[rows] @ qv).astype(np.float32)
+        top = _top_k_desc(scores, top_k)
+        return [
+            Candidate(
+                chunk=self._chunk(int(rows[i])), score=float(s), metadata={"backend": self.backend}
             )
-        return out
+            for i, s in zip(top.tolist(), scores[top].tolist())
+        ]
 
-    def save(self, path: str) -> None:
-        payload: dict[str, Any] = {
-            "schema_version": SCHEMA_VERSION,
+    def _chunk(self, i: int) -> Chunk:
+        embedding = tuple(self.vectors[i].tolist())
+        return self.chunks.chunk(i, embedding=embedding)
+
+    def _container(self) -> dict[str, Any]:
+        return {
             "backend": self.backend,
-            "spec": {
-                "model": self.spec.model,
-                "dim": self.spec.dim,
-                "metric": self.spec.metric,
-                "normalized": self.spec.normalized,
+            "schema_version": SCHEMA_VERSION,
+            "meta": {
+                "spec": _spec_payload(self.spec),
+                "m": self.m,
+                "ef_construction": self.ef_construction,
+                "ef": self.ef,
+                "entry_point": self.entry_point,
+                "fingerprint": self.fingerprint,
             },
-            "chunks": [
-                {
-                    "doc_id": c.doc_id,
-                    "text": c.text,
-                    "start": c.start,
-                    "end": c.end,
-                    "metadata": dict(c.metadata),
-                    "chunk_id": c.chunk_id,
-                }
-                for c in self.chunks
-            ],
-            "vectors": {
-                "dtype": "float32",
-                "shape": list(self.vectors.shape),
-                "data": self.vectors.tobytes(),
+            "sections": {
+                "vectors": np.asarray(self.vectors, dtype=np.float32),
+                "hnsw.levels": np.asarray(self.levels, dtype=np.int32),
+                "hnsw.layer0": np.asarray(self.layer0, dtype=np.int32),
+                "hnsw.upper": np.asarray(self.upper, dtype=np.int32),
+                **self.chunks.to_sections(),
             },
         }
-        with open(path, "wb") as f:
-            f.write(msgpack.packb(payload, use_bin_type=True))
+
+    def save(self, path: str) -> None:
+        write_index(path, **self._container())
 
     def to_bytes(self) -> bytes:
-        payload: dict[str, Any] = {
-            "schema_version": SCHEMA_VERSION,
-            "backend": self.backend,
-            "spec": {
-                "model": self.spec.model,
-                "dim": self.spec.dim,
-                "metric": self.spec.metric,
-                "normalized": self.spec.normalized,
-            },
-            "chunks": [
-                {
-                    "doc_id": c.doc_id,
-                    "text": c.text,
-                    "start": c.start,
-                    "end": c.end,
-                    "metadata": dict(c.metadata),
-                    "chunk_id": c.chunk_id,
-                }
-                for c in self.chunks
-            ],
-            "vectors": {
-                "dtype": "float32",
-                "shape": list(self.vectors.shape),
-                "data": self.vectors.tobytes(),
-            },
-        }
-        return msgpack.packb(payload, use_bin_type=True)
+        return encode_index(**self._container())
 
     @staticmethod
-    def load(path: str) -> "NumpyCosineIndex":
-        with open(path, "rb") as f:
-            payload = msgpack.unpackb(f.read(), raw=False)
-        if payload.get("schema_version") != SCHEMA_VERSION:
-            raise ValueError("unsupported index schema version")
-        if payload.get("backend") != "numpy-cosine":
-            raise ValueError("not a numpy-cosine index")
-        spec_raw = payload["spec"]
-        spec = EmbeddingSpec(
-            model=spec_raw["model"],
-            dim=int(spec_raw["dim"]),
-            metric=spec_raw.get("metric", "cosine"),
-            normalized=bool(spec_raw.get("normalized", True)),
-        )
-        chunks_list = []
-        for c in payload["chunks"]:
-            chk = Chunk(
-                doc_id=c["doc_id"],
-                text=c["text"],
-                start=int(c["start"]),
-                end=int(c["end"]),
-                metadata=c.get("metadata", {}),
-                embedding=(),
-                embedding_spec=spec,
-            )
-            stored_id = c.get("chunk_id")
-            if stored_id is not None and chk.chunk_id != stored_id:
-                raise ValueError("chunk_id mismatch on load (possible corruption)")
-            chunks_list.append(chk)
-        chunks = tuple(chunks_list)
-        vec = payload["vectors"]
-        shape = tuple(int(x) for x in vec["shape"])
-        arr = np.frombuffer(vec["data"], dtype=np.float32).reshape(shape)
-        return NumpyCosineIndex(chunks=chunks, vectors=arr, spec=spec)
+    def load(path: str, *, verify: VerifyMode = "full") -> "HnswCosineIndex":
+        return HnswCosineIndex._from_source(_read_source(path), verify=verify)
 
     @classmethod
-    def load_bytes(cls, blob: bytes) -> "NumpyCosineIndex":
-        payload = msgpack.unpackb(blob, raw=False)
-        if payload.get("schema_version") != SCHEMA_VERSION:
+    def load_bytes(cls, blob: bytes, *, verify: VerifyMode = "none") -> "HnswCosineIndex":
+        return cls._from_source(_read_blob(blob), verify=verify)
+
+    @classmethod
+    def _from_source(
+        cls, source: IndexReader | Mapping[str, Any], *, verify: VerifyMode
+    ) -> "HnswCosineIndex":
+        verify_ids = _verify_source(source, verify)
+        if not isinstance(source, IndexReader):
+            raise ValueError("hnsw-cosine indexes are only stored in the v2 container format")
+        header = source.header
+        if header.schema_version != SCHEMA_VERSION:
             raise ValueError("unsupported index schema version")
-        if payload.get("backend") != "numpy-cosine":
-            raise ValueError("not a numpy-cosine index")
-        spec_raw = payload["spec"]
-        spec = EmbeddingSpec(
-            model=spec_raw["model"],
-            dim=int(spec_raw["dim"]),
-            metric=spec_raw.get("metric", "cosine"),
-            normalized=bool(spec_raw.get("normalized", True)),
-        )
-        chunks = tuple(
-            Chunk(
-                doc_id=c["doc_id"],
-                text=c["text"],
-                start=int(c["start"]),
-                end=int(c["end"]),
-                metadata=c.get("metadata", {}),
-                embedding=(),
-                embedding_spec=spec,
-            )
-            for c in payload["chunks"]
+        if header.backend != "hnsw-cosine":
+            raise ValueError("not an hnsw-cosine index")
+        meta = header.meta
+        spec = _spec_from_payload(meta["spec"])
+        chunks = ChunkTable.from_reader(source, embedding_spec=spec)
+        if verify_ids:
+            chunks.verify_ids()
+        index = cls(
+            chunks=chunks,
+            vectors=source.array("vectors"),
+            spec=spec,
+            levels=source.array("hnsw.levels"),
+            layer0=source.array("hnsw.layer0"),
+            upper=source.array("hnsw.upper"),
+            entry_point=int(meta["entry_point"]),
+            m=int(meta["m"]),
+            ef_construction=int(meta["ef_construction"]),
+            ef=int(meta["ef"]),
         )
-        vec = payload["vectors"]
-        shape = tuple(int(x) for x in vec["shape"])
-        arr = np.frombuffer(vec["data"], dtype=np.float32).reshape(shape)
-        return cls(chunks=chunks, vectors=arr, spec=spec)
+        _adopt_fingerprint(index, source, verify_ids)
+        return index
 
 
 @dataclass(frozen=True, slots=True)
 class BM25Index:
-    """Hashed-token BM25 index.
+    """BM25 index over hashed token buckets or an exact term vocabulary.
 
     This is a practical, CI-friendly retrieval baseline:
     - deterministic
     - no large model downloads
     - supports metadata filters
+
+    With a ``vocab`` (`TermDictionary`) every distinct term is its own "bucket": bucket ``t``
+    is the term of rank ``t`` and ``buckets`` is the vocabulary size. Without one, tokens are
+    hashed into ``buckets`` shared slots.
+
+    ``postings_codec`` picks the persisted layout: ``"raw"`` writes the CSR arrays, ``"packed"``
+    bit-packs them (`PackedPostings`). Either is memory-mapped on load; packed postings are
+    served as is, each query decoding only the blocks it reaches.
     """
 
-    chunks: tuple[Chunk, ...]
+    chunks: ChunkTable
     buckets: int
     df: NDArray[np.int32]
-    tfs: tuple[tuple[tuple[int, int], ...], ...]  # per-chunk sparse (bucket,count)
+    # Per-chunk sparse (bucket, count) rows. Only needed to build postings; when postings are
+    # given this may be None and is derived from them on demand (see `term_frequencies`).
+    tfs: tuple[tuple[tuple[int, int], ...], ...] | None
     doc_len: NDArray[np.int32]
     avg_dl: float
     k1: float = 1.2
     b: float = 0.75
+    postings: BM25Postings | PackedPostings | None = None
+    vocab: TermDictionary | None = None
+    postings_codec: str = field(default="raw", compare=False)
+    # Corpus statistics to score against instead of this index's own (see `with_stats`);
+    # never persisted and not part of the fingerprint.
+    stats: BM25Stats | None = field(default=None, repr=False, compare=False)
+    # Derived at construction (build or load); never persisted.
+    idf: NDArray[np.float64] = field(init=False, repr=False, compare=False)
+    len_norm: NDArray[np.float64] = field(init=False, repr=False, compare=False)
+    _block_max: BM25BlockMax | None = field(init=False, default=None, repr=False, compare=False)
+    _fingerprint: str | None = field(init=False, default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.chunks, ChunkTable):
+            object.__setattr__(self, "chunks", ChunkTable.from_chunks(self.chunks))
+        if self.postings is None:
+            if self.tfs is None:
+                raise ValueError("BM25Index needs postings or tfs")
+            # Indexes persisted before postings existed only carry `tfs`.
+            object.__setattr__(
+                self, "postings", BM25Postings.from_tfs(self.tfs, buckets=self.buckets)
+            )
+        if self.vocab is not None and len(self.vocab) != self.buckets:
+            raise ValueError("BM25 vocabulary size does not match the bucket count")
+        if self.postings_codec not in POSTINGS_CODECS:
+            raise ValueError(f"unknown postings codec: {self.postings_codec!r}")
+        if self.stats is None:
+            idf = _bm25_idf(len(self.chunks), self.df)
+        else:
+            if self.stats.df.size != self.buckets:
+                raise ValueError("BM25Stats bucket count does not match the index")
+            idf = self.stats.idf
+        object.__setattr__(self, "idf", idf)
+        object.__setattr__(self, "len_norm", self._length_norm(self.doc_len))
+
+    def _length_norm(self, lengths: NDArray[Any]) -> NDArray[np.float64]:
+        """BM25's ``k1 * (1 - b + b * len / avg_dl)`` for chunk lengths ``lengths``."""
+
+        avg_dl = self.avg_dl if self.stats is None else self.stats.avg_dl
+        avg_dl = avg_dl if avg_dl > 0.0 else 1.0
+        return self.k1 * (1.0 - self.b + self.b * (lengths.astype(np.float64) / avg_dl))
+
+    def _impacts(
+        self, bucket: int, doc_ids: NDArray[np.int32], tfs: NDArray[np.int32]
+    ) -> NDArray[np.float64]:
+        tf = tfs.astype(np.float64)
+        return self.idf[bucket] * (tf * (self.k1 + 1.0)) / (tf + self.len_norm[doc_ids])
+
+    def _csr_postings(self) -> BM25Postings:
+        """The postings as CSR arrays, decoding packed ones in full (merges, not queries)."""
+
+        postings = self.postings
+        if isinstance(postings, PackedPostings):
+            doc_ids, tfs = postings.decode()
+            return BM25Postings(indptr=postings.indptr, doc_ids=doc_ids, tfs=tfs)
+        return postings
 
     @property
     def backend(self) -> str:
         return "bm25"
 
+    @property
+    def vocab_mode(self) -> str:
+        return "hashed" if self.vocab is None else "exact"
+
+    def with_stats(self, stats: BM25Stats | None) -> "BM25Index":
+        """This index scoring against ``stats`` (``None``: its own); postings are shared."""
+
+        if stats is not None and stats.terms is not None:
+            if self.vocab is None:
+                raise ValueError("exact-vocabulary statistics need an exact-vocabulary index")
+            stats = stats.project(self.vocab)
+        view = replace(self, stats=stats)
+        object.__setattr__(view, "_fingerprint", self._fingerprint)
+        return view
+
+    def term_frequencies(self) -> tuple[tuple[tuple[int, int], ...], ...]:
+        """Per-chunk sparse ``(bucket, count)`` rows."""
+
+        if self.tfs is not None:
+            return self.tfs
+        return self._csr_postings().to_tfs(len(self.chunks))
+
     @property
     def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            object.__setattr__(self, "_fingerprint", self._compute_fingerprint())
+        return self._fingerprint
+
+    def _compute_fingerprint(self) -> str:
         meta = {
             "schema": SCHEMA_VERSION,
             "backend": self.backend,
             "buckets": self.buckets,
             "k1": self.k1,
             "b": self.b,
-            "chunk_ids": [c.chunk_id for c in self.chunks],
+            "chunk_ids": self.chunks.chunk_ids(),
         }
+        if self.vocab is not None:
+            meta["vocab"] = self.vocab_mode
         parts = [_json_dumps(meta), self.df.tobytes(), self.doc_len.tobytes()]
+        if self.vocab is not None:
+            parts.append(np.asarray(self.vocab.data).tobytes())
         # Include sparse tf payload deterministically.
-        tf_bytes = msgpack.packb(self.tfs, use_bin_type=True)
+        tf_bytes = msgpack.packb(self.term_frequencies(), use_bin_type=True)
         parts.append(tf_bytes)
         return _fingerprint_bytes(*parts)
 
-    def _idf(self, bucket: int) -> float:
+    def _query_buckets(self, query: str) -> list[int]:
+        # Unique buckets in first-occurrence order; query term frequency is not used.
+        tokens = _tokenize(query)
+        if self.vocab is None:
+            return list(
+                dict.fromkeys(_stable_token_bucket(t, buckets=self.buckets) for t in tokens)
+            )
+        # Terms outside the vocabulary match no chunk.
+        ids = map(self.vocab.lookup, tokens)
+        return list(dict.fromkeys(i for i in ids if i is not None))
+
+    @property
+    def block_max(self) -> BM25BlockMax:
+        """Block-max impact table, built on first use."""
+
+        if self._block_max is None:
+            block_size = BM25_BLOCK_SIZE
+            if isinstance(self.postings, PackedPostings):
+                block_size = self.postings.block_size
+            object.__setattr__(self, "_block_max", BM25BlockMax.build(self, block_size=block_size))
+        return self._block_max
+
+    def _score_buckets(self, buckets: Sequence[int]) -> NDArray[np.float64]:
+        """Exhaustive BM25 scores for all chunks as one scatter-add over the query postings."""
+
+        postings = self.postings
+        los = postings.indptr[buckets]
+        lens = postings.indptr[np.asarray(buckets, dtype=np.int64) + 1] - los
+        # Concatenating in query order keeps each chunk's float summation order stable.
+        doc_ids, tfs = postings.take(los, los + lens)
+        tf = tfs.astype(np.float64)
+        idf = np.repeat(self.idf[buckets], lens)
+        contrib = idf * (tf * (self.k1 + 1.0)) / (tf + self.len_norm[doc_ids])
+        return np.bincount(doc_ids, weights=contrib, minlength=len(self.chunks))
+
+    def _score_ids(self, buckets: Sequence[int], ids: NDArray[np.int64]) -> NDArray[np.float64]:
+        """Exact BM25 scores for sorted chunk ids, summed in the same order as `_score_buckets`."""
+
+        postings = self.postings
+        pos_parts: list[NDArray[np.int64]] = []
+        contrib_parts: list[NDArray[np.float64]] = []
+        for bucket in buckets:
+            doc_ids, tfs = postings.probe(bucket, ids)
+            if doc_ids.size == 0:
+                continue
+            at = np.searchsorted(doc_ids, ids)
+            hit = at < doc_ids.size
+            hit[hit] = doc_ids[at[hit]] == ids[hit]
+            pos_parts.append(np.flatnonzero(hit))
+            contrib_parts.append(self._impacts(bucket, doc_ids[at[hit]], tfs[at[hit]]))
+        if not pos_parts:
+            return np.zeros((ids.size,), dtype=np.float64)
+        return np.bincount(
+            np.concatenate(pos_parts), weights=np.concatenate(contrib_parts), minlength=ids.size
+        )
+
+    def _top_k_exhaustive(
+        self, buckets: Sequence[int], k: int, filters: Mapping[str, str] | None
+    ) -> tuple[NDArray[np.int64], NDArray[np.float64]]:
+        scores = self._score_buckets(buckets)
+        idxs = np.flatnonzero(scores > 0.0)
+        if filters:
+            idxs = idxs[self.chunks.filter_mask(filters)[idxs]]
+        top = idxs[_top_k_desc(scores[idxs], k)]
+        return top, scores[top]
+
+    def _top_k_maxscore(
+        self,
+        buckets: Sequence[int],
+        k: int,
+        filters: Mapping[str, str] | None,
+        *,
+        block_max: BM25BlockMax | None = None,
+    ) -> tuple[NDArray[np.int64], NDArray[np.float64], BM25PruningStats]:
+        """Exact top-k with MaxScore term partitioning and block-max skipping.
+
+        Buckets are processed by decreasing maximum impact. While the remaining buckets could
+        still lift an unseen chunk into the top-k they are scored in full ("essential").
+        Afterwards only chunks already holding a partial score are followed, and a posting
+        block is decoded only if its block-max impact can still push one of them past the
+        current k-th best score. Survivors are re-scored exactly in query order, so results and
+        scores match exhaustive evaluation.
+
+        Filters are resolved through the chunk table's inverted metadata index first; when few
+        rows survive, those rows are scored directly and the postings walk is skipped.
+        """
+
+        bm = self.block_max if block_max is None else block_max
+        postings = self.postings
         n = len(self.chunks)
-        df = int(self.df[bucket])
-        return math.log((n - df + 0.5) / (df + 0.5) + 1.0)
+        terms = [t for t in buckets if postings.indptr[t + 1] > postings.indptr[t]]
+        terms.sort(key=lambda t: -bm.bucket_max[t])
+        ub = np.zeros((len(terms) + 1,), dtype=np.float64)
+        ub[:-1] = np.cumsum(bm.bucket_max[terms][::-1])[::-1]
+        total = int(sum(int(postings.indptr[t + 1] - postings.indptr[t]) for t in terms))
+
+        allowed = None
+        if filters:
+            ids = self.chunks.filter_ids(filters).astype(np.int64)
+            if ids.size * len(terms) < total:
+                # Selective filter: score the surviving rows directly instead of walking postings.
+                exact = self._score_ids(buckets, ids)
+                ids, exact = ids[exact > 0.0], exact[exact > 0.0]
+                top_local = _top_k_desc(exact, k)
+                stats = BM25PruningStats(total, 0, total, 0, 0)
+                return ids[top_local], exact[top_local], stats
+            allowed = ids
+
+        acc = np.zeros((n,), dtype=np.float64)
+        theta = -np.inf
+        scored = 0
+        blocks_skipped = 0
+
+        def kth_best(ids: NDArray[np.int64]) -> float:
+            if ids.size < k:
+                return -np.inf
+            return float(-np.partition(-acc[ids], k - 1)[k - 1])
+
+        def slack(value: float) -> float:
+            # Bounds are summed in a different order than final scores; never prune on ulps.
+            return value - 1e-9 * max(1.0, abs(value))
+
+        j = 0
+        cand = np.zeros((0,), dtype=np.int64)
+        while j < len(terms):
+            if ub[j] < slack(theta):
+                break
+            doc_ids, tfs = postings.bucket(terms[j])
+            acc[doc_ids] += self._impacts(terms[j], doc_ids, tfs)
+            scored += int(doc_ids.size)
+            # Impacts are positive, so the candidates are exactly the rows seen so far.
+            if allowed is not None:
+                doc_ids = doc_ids[_isin_sorted(doc_ids, allowed)]
+            cand = np.union1d(cand, doc_ids)
+            theta = kth_best(cand)
+            j += 1
+        essential = j
+        cand = cand[acc[cand] + ub[j] >= slack(theta)]
+
+        for t in terms[essential:]:
+            j += 1
+            b0, b1 = int(bm.block_ptr[t]), int(bm.block_ptr[t + 1])
+            blk = b0 + np.searchsorted(bm.block_last[b0:b1], cand)
+            in_range = blk < b1
+            in_range[in_range] = bm.block_first[blk[in_range]] <= cand[in_range]
+            bound = np.zeros((cand.size,), dtype=np.float64)
+            bound[in_range] = bm.block_max[blk[in_range]]
+            keep = acc[cand] + bound + ub[j] >= slack(theta)
+            cand, blk, in_range = cand[keep], blk[keep], in_range[keep]
+
+            needed = np.unique(blk[in_range])
+            blocks_skipped += (b1 - b0) - int(needed.size)
+            if needed.size:
+                doc_ids, tfs = postings.take(bm.block_start[needed], bm.block_end[needed])
+                scored += int(doc_ids.size)
+                hit = _isin_sorted(doc_ids, cand)
+                acc[doc_ids[hit]] += self._impacts(t, doc_ids[hit], tfs[hit])
+            theta = max(theta, kth_best(cand))
+
+        exact = self._score_ids(buckets, cand)
+        top_local = _top_k_desc(exact, k)
+        stats = BM25PruningStats(
+            postings_total=total,
+            postings_scored=scored,
+            postings_skipped=total - scored,
+            blocks_skipped=blocks_skipped,
+            essential_buckets=essential,
+        )
+        return cand[top_local], exact[top_local], stats
+
+    def retrieve_with_stats(
+        self, *, query: str, top_k: int, filters: Mapping[str, str] | None = None
+    ) -> tuple[list[Candidate], BM25PruningStats]:
+        """Retrieve with dynamic pruning and report how many postings were skipped."""
+
+        q_buckets = self._query_buckets(query)
+        if not q_buckets or top_k <= 0:
+            return [], BM25PruningStats(0, 0, 0, 0, 0)
+        top_idxs, top_scores, stats = self._top_k_maxscore(q_buckets, int(top_k), filters)
+        return self._candidates(top_idxs, top_scores), stats
+
+    def _candidates(self, idxs: NDArray[np.int64], scores: NDArray[np.float64]) -> list[Candidate]:
+        return [
+            Candidate(chunk=self.chunks[i], score=float(s), metadata={"backend": self.backend})
+            for i, s in zip(idxs.tolist(), scores.tolist())
+        ]
 
     def retrieve(
         self,
@@ -342,173 +2179,502 @@ class BM25Index:
         embedder: Embedder | None = None,
     ) -> list[Candidate]:
         # embedder unused; lexical.
-        toks = _tokenize(query)
-        if not toks:
-            return []
-        q_counts: dict[int, int] = {}
-        for t in toks:
-            b = _stable_token_bucket(t, buckets=self.buckets)
-            q_counts[b] = q_counts.get(b, 0) + 1
+        return self.retrieve_with_stats(query=query, top_k=top_k, filters=filters)[0]
 
-        idxs = range(len(self.chunks))
-        if filters:
-            filt: list[int] = []
-            for i in idxs:
-                c = self.chunks[i]
-                md = dict(c.metadata)
-                ok = True
-                for k, v in filters.items():
-                    if k == "doc_id" and c.doc_id != v:
-                        ok = False
-                        break
-                    if k not in md:
-                        ok = False
-                        break
-                    if str(md.get(k)) != v:
-                        ok = False
-                        break
-                if ok:
-                    filt.append(i)
-            idxs = filt
-
-        scores: list[tuple[int, float]] = []
-        for i in idxs:
-            dl = float(self.doc_len[i])
-            denom_norm = self.k1 * (1.0 - self.b + self.b * (dl / self.avg_dl))
-            tf_sparse = dict(self.tfs[i])
-            s = 0.0
-            for bucket, _qtf in q_counts.items():
-                tf = float(tf_sparse.get(bucket, 0))
-                if tf <= 0.0:
-                    continue
-                idf = self._idf(bucket)
-                s += idf * (tf * (self.k1 + 1.0)) / (tf + denom_norm)
-            if s > 0.0:
-                scores.append((i, s))
-
-        scores.sort(key=lambda x: x[1], reverse=True)
-        out: list[Candidate] = []
-        for i, s in scores[: max(0, int(top_k))]:
-            out.append(
-                Candidate(chunk=self.chunks[i], score=float(s), metadata={"backend": self.backend})
-            )
-        return out
+    def retrieve_many(
+        self,
+        *,
+        queries: Sequence[str],
+        top_k: int,
+        filters: Mapping[str, str] | None = None,
+        embedder: Embedder | None = None,
+    ) -> list[list[Candidate]]:
+        """`retrieve` for a batch of queries.
 
-    def save(self, path: str) -> None:
-        payload: dict[str, Any] = {
-            "schema_version": SCHEMA_VERSION,
+        Lexical scoring is sparse per query, so this runs the pruned search query by query;
+        it exists so callers can batch against any backend.
+        """
+
+        return [self.retrieve(query=q, top_k=top_k, filters=filters) for q in queries]
+
+    def _container(self) -> dict[str, Any]:
+        return {
             "backend": self.backend,
-            "buckets": self.buckets,
-            "k1": self.k1,
-            "b": self.b,
-            "chunks": [
-                {
-                    "doc_id": c.doc_id,
-                    "text": c.text,
-                    "start": c.start,
-                    "end": c.end,
-                    "metadata": dict(c.metadata),
-                    "chunk_id": c.chunk_id,
-                }
-                for c in self.chunks
-            ],
-            "df": self.df.tobytes(),
-            "doc_len": self.doc_len.tobytes(),
-            "tfs": self.tfs,
-            "avg_dl": self.avg_dl,
+            "schema_version": SCHEMA_VERSION,
+            "meta": {**self._meta(), "fingerprint": self.fingerprint},
+            "sections": {**self.chunks.to_sections(), **self._sections()},
         }
-        with open(path, "wb") as f:
-            f.write(msgpack.packb(payload, use_bin_type=True))
 
-    def to_bytes(self) -> bytes:
-        payload: dict[str, Any] = {
-            "schema_version": SCHEMA_VERSION,
-            "backend": self.backend,
-            "buckets": self.buckets,
-            "k1": self.k1,
-            "b": self.b,
-            "chunks": [
-                {
-                    "doc_id": c.doc_id,
-                    "text": c.text,
-                    "start": c.start,
-                    "end": c.end,
-                    "metadata": dict(c.metadata),
-                    "chunk_id": c.chunk_id,
-                }
-                for c in self.chunks
-            ],
-            "df": self.df.tobytes(),
-            "doc_len": self.doc_len.tobytes(),
-            "tfs": self.tfs,
-            "avg_dl": self.avg_dl,
+    def _meta(self) -> dict[str, Any]:
+        meta = {"buckets": self.buckets, "k1": self.k1, "b": self.b, "avg_dl": self.avg_dl}
+        if self.vocab is not None:
+            meta.update(vocab=self.vocab_mode, vocab_block=self.vocab.block_size)
+        if self.postings_codec == "packed":
+            block_size = PACKED_BLOCK_SIZE
+            if isinstance(self.postings, PackedPostings):
+                block_size = self.postings.block_size
+            meta.update(postings=self.postings_codec, postings_block=block_size)
+        return meta
+
+    def _sections(self) -> dict[str, Any]:
+        """Persisted arrays other than the chunk table."""
+
+        postings: BM25Postings | PackedPostings | None = self.postings
+        if self.postings_codec != "packed":
+            postings = self._csr_postings()
+        elif not isinstance(postings, PackedPostings):
+            postings = PackedPostings.encode(
+                postings.indptr, postings.doc_ids, postings.tfs, lengths=self.doc_len
+            )
+        return {
+            "df": np.asarray(self.df, dtype=np.int32),
+            "doc_len": np.asarray(self.doc_len, dtype=np.int32),
+            **postings.to_sections(),
+            **({} if self.vocab is None else self.vocab.to_sections()),
         }
-        return msgpack.packb(payload, use_bin_type=True)
+
+    def save(self, path: str) -> None:
+        write_index(path, **self._container())
+
+    def to_bytes(self) -> bytes:
+        return encode_index(**self._container())
 
     @staticmethod
-    def load(path: str) -> "BM25Index":
-        with open(path, "rb") as f:
-            payload = msgpack.unpackb(f.read(), raw=False)
-        if payload.get("schema_version") != SCHEMA_VERSION:
+    def load(path: str, *, verify: VerifyMode = "full") -> "BM25Index":
+        return BM25Index._from_source(_read_source(path), verify=verify)
+
+    @classmethod
+    def load_bytes(cls, blob: bytes, *, verify: VerifyMode = "none") -> "BM25Index":
+        return cls._from_source(_read_blob(blob), verify=verify)
+
+    @classmethod
+    def _from_source(
+        cls, source: IndexReader | Mapping[str, Any], *, verify: VerifyMode
+    ) -> "BM25Index":
+        verify_ids = _verify_source(source, verify)
+        if isinstance(source, IndexReader):
+            index = cls._from_reader(source, verify_ids=verify_ids)
+        else:
+            index = cls._from_payload(source, verify_ids=verify_ids)
+        _adopt_fingerprint(index, source, verify_ids)
+        return index
+
+    @classmethod
+    def _from_reader(cls, reader: IndexReader, *, verify_ids: bool) -> "BM25Index":
+        header = reader.header
+        if header.schema_version != SCHEMA_VERSION:
             raise ValueError("unsupported index schema version")
-        if payload.get("backend") != "bm25":
+        if header.backend != "bm25":
             raise ValueError("not a bm25 index")
+        chunks = ChunkTable.from_reader(reader)
+        if verify_ids:
+            chunks.verify_ids()
+        return cls._from_sections(reader, chunks)
 
-        chunks_list = []
-        for c in payload["chunks"]:
-            chk = Chunk(
-                doc_id=c["doc_id"],
-                text=c["text"],
-                start=int(c["start"]),
-                end=int(c["end"]),
-                metadata=c.get("metadata", {}),
-                embedding=(),
+    @classmethod
+    def _from_sections(cls, reader: IndexReader, chunks: ChunkTable) -> "BM25Index":
+        meta = reader.header.meta
+        vocab = None
+        if meta.get("vocab", "hashed") == "exact":
+            vocab = TermDictionary.from_reader(
+                reader, size=int(meta["buckets"]), block_size=int(meta["vocab_block"])
             )
-            stored_id = c.get("chunk_id")
-            if stored_id is not None and chk.chunk_id != stored_id:
-                raise ValueError("chunk_id mismatch on load (possible corruption)")
-            chunks_list.append(chk)
-        chunks = tuple(chunks_list)
-        buckets = int(payload["buckets"])
-        n = len(chunks)
-        df = np.frombuffer(payload["df"], dtype=np.int32, count=buckets).copy()
-        doc_len = np.frombuffer(payload["doc_len"], dtype=np.int32, count=n).copy()
-        tfs = tuple(tuple((int(a), int(b)) for a, b in row) for row in payload["tfs"])
-        avg_dl = float(payload["avg_dl"])
-        return BM25Index(
-            chunks=chunks, buckets=buckets, df=df, tfs=tfs, doc_len=doc_len, avg_dl=avg_dl
+        codec = meta.get("postings", "raw")
+        postings: BM25Postings | PackedPostings
+        if codec == "packed":
+            postings = PackedPostings.from_reader(reader, block_size=int(meta["postings_block"]))
+        else:
+            postings = BM25Postings.from_reader(reader)
+        return cls(
+            chunks=chunks,
+            buckets=int(meta["buckets"]),
+            df=reader.array("df"),
+            tfs=None,
+            doc_len=reader.array("doc_len"),
+            avg_dl=float(meta["avg_dl"]),
+            k1=float(meta["k1"]),
+            b=float(meta["b"]),
+            postings=postings,
+            vocab=vocab,
+            postings_codec=codec,
         )
 
     @classmethod
-    def load_bytes(cls, blob: bytes) -> "BM25Index":
-        payload = msgpack.unpackb(blob, raw=False)
+    def _from_payload(cls, payload: Mapping[str, Any], *, verify_ids: bool) -> "BM25Index":
+        # Format v1: a single msgpack document.
         if payload.get("schema_version") != SCHEMA_VERSION:
             raise ValueError("unsupported index schema version")
         if payload.get("backend") != "bm25":
             raise ValueError("not a bm25 index")
-
-        chunks = tuple(
-            Chunk(
-                doc_id=c["doc_id"],
-                text=c["text"],
-                start=int(c["start"]),
-                end=int(c["end"]),
-                metadata=c.get("metadata", {}),
-                embedding=(),
-            )
-            for c in payload["chunks"]
-        )
+        chunks = ChunkTable.from_records(payload["chunks"], verify_ids=verify_ids)
         buckets = int(payload["buckets"])
         n = len(chunks)
-        df = np.frombuffer(payload["df"], dtype=np.int32, count=buckets).copy()
-        doc_len = np.frombuffer(payload["doc_len"], dtype=np.int32, count=n).copy()
-        tfs = tuple(tuple((int(a), int(b)) for a, b in row) for row in payload["tfs"])
-        avg_dl = float(payload["avg_dl"])
-        return cls(chunks=chunks, buckets=buckets, df=df, tfs=tfs, doc_len=doc_len, avg_dl=avg_dl)
+        postings_raw = payload.get("postings")
+        return cls(
+            chunks=chunks,
+            buckets=buckets,
+            df=np.frombuffer(payload["df"], dtype=np.int32, count=buckets).copy(),
+            tfs=None if postings_raw else _tfs_from_payload(payload["tfs"]),
+            doc_len=np.frombuffer(payload["doc_len"], dtype=np.int32, count=n).copy(),
+            avg_dl=float(payload["avg_dl"]),
+            k1=float(payload.get("k1", 1.2)),
+            b=float(payload.get("b", 0.75)),
+            postings=(
+                BM25Postings.from_payload(postings_raw, buckets=buckets) if postings_raw else None
+            ),
+        )
+
+
+def _fuse(
+    arms: Sequence[tuple[Sequence[Candidate], float]],
+    *,
+    fusion: str,
+    rrf_k: int,
+    top_k: int,
+) -> list[Candidate]:
+    """Fuse ranked lists by reciprocal rank or by min-max normalized score.
 
+    ``rrf``: a hit at 1-based rank ``r`` of an arm with weight ``w`` adds ``w / (rrf_k + r)``.
+    ``normalized``: scores are min-max scaled to [0, 1] per arm and query (all 1.0 when they
+    are equal) and added with the arm weights. Ties break by chunk id.
+    """
+
+    fused: dict[str, float] = {}
+    chunks: dict[str, Chunk] = {}
+    for cands, weight in arms:
+        if not cands:
+            continue
+        if fusion == "rrf":
+            parts = [weight / (rrf_k + rank) for rank in range(1, len(cands) + 1)]
+        else:
+            lo = min(c.score for c in cands)
+            span = max(c.score for c in cands) - lo
+            parts = [weight * ((c.score - lo) / span if span > 0 else 1.0) for c in cands]
+        for c, part in zip(cands, parts):
+            cid = c.chunk.chunk_id
+            fused[cid] = fused.get(cid, 0.0) + part
+            chunks.setdefault(cid, c.chunk)
+    ranked = sorted(fused, key=lambda cid: (-fused[cid], cid))[:top_k]
+    return [
+        Candidate(chunk=chunks[cid], score=fused[cid], metadata={"backend": "hybrid"})
+        for cid in ranked
+    ]
+
+
+@dataclass(frozen=True, slots=True)
+class _FusionPlan:
+    """Resolved fusion options of one `HybridIndex` query batch."""
+
+    fusion: str
+    rrf_k: int
+    top_k: int
+    lexical_k: int
+    dense_k: int
+    lexical_weight: float
+    dense_weight: float
+
+    def fuse(
+        self, lexical: Sequence[Sequence[Candidate]], dense: Sequence[Sequence[Candidate]]
+    ) -> list[list[Candidate]]:
+        arms = zip(lexical, dense, strict=True)
+        return [
+            [
+                _without_embedding(c)
+                for c in _fuse(
+                    ((lex, self.lexical_weight), (den, self.dense_weight)),
+                    fusion=self.fusion,
+                    rrf_k=self.rrf_k,
+                    top_k=self.top_k,
+                )
+            ]
+            for lex, den in arms
+        ]
+
+
+@dataclass(frozen=True, slots=True)
+class HybridIndex:
+    """BM25 and exact-capable dense retrieval over one shared `ChunkTable`, fused per query.
+
+    Each query runs the lexical arm (top ``lexical_k``) on the scoring pool while the dense
+    arm (top ``dense_k``) runs in the caller, then fuses both lists (`FUSION_MODES`: ``rrf``,
+    or ``normalized`` min-max scores) with ``lexical_weight`` / ``dense_weight``. The fields
+    are defaults that every query may override. Both arms are stored in one container with a
+    single copy of the chunk table. Returned chunks carry no embedding.
+    """
+
+    lexical: BM25Index
+    dense: NumpyCosineIndex
+    fusion: str = "rrf"
+    rrf_k: int = 60
+    lexical_k: int = 50
+    dense_k: int = 50
+    lexical_weight: float = 1.0
+    dense_weight: float = 1.0
+    _fingerprint: str | None = field(init=False, default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        a, b = self.lexical.chunks, self.dense.chunks
+        if a is not b and (len(a) != len(b) or not np.array_equal(a.digests, b.digests)):
+            raise ValueError("lexical and dense arms must index the same chunk table")
+        _check_fusion(self.fusion, self.rrf_k)
+        if self.lexical_k < 1 or self.dense_k < 1:
+            raise ValueError("lexical_k and dense_k must be >= 1")
+
+    @property
+    def backend(self) -> str:
+        return "hybrid"
+
+    @property
+    def chunks(self) -> ChunkTable:
+        return self.dense.chunks
+
+    @property
+    def spec(self) -> EmbeddingSpec:
+        return self.dense.spec
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            object.__setattr__(self, "_fingerprint", self._compute_fingerprint())
+        return self._fingerprint
+
+    def _compute_fingerprint(self) -> str:
+        meta = {"schema": SCHEMA_VERSION, "backend": self.backend, **self._fusion_meta()}
+        return _fingerprint_bytes(
+            _json_dumps(meta),
+            self.lexical.fingerprint.encode("ascii"),
+            self.dense.fingerprint.encode("ascii"),
+        )
+
+    def _fusion_meta(self) -> dict[str, Any]:
+        return {
+            "fusion": self.fusion,
+            "rrf_k": self.rrf_k,
+            "lexical_k": self.lexical_k,
+            "dense_k": self.dense_k,
+            "lexical_weight": self.lexical_weight,
+            "dense_weight": self.dense_weight,
+        }
+
+    def retrieve(
+        self,
+        *,
+        query: str,
+        top_k: int,
+        filters: Mapping[str, str] | None = None,
+        embedder: Embedder | None = None,
+        **options: Any,
+    ) -> list[Candidate]:
+        """Fused top-k for one query; see `retrieve_many` for ``options``."""
+
+        return self.retrieve_many(
+            queries=[query], top_k=top_k, filters=filters, embedder=embedder, **options
+        )[0]
+
+    def retrieve_many(
+        self,
+        *,
+        queries: Sequence[str],
+        top_k: int,
+        filters: Mapping[str, str] | None = None,
+        embedder: Embedder | None = None,
+        fusion: str | None = None,
+        rrf_k: int | None = None,
+        lexical_k: int | None = None,
+        dense_k: int | None = None,
+        lexical_weight: float | None = None,
+        dense_weight: float | None = None,
+        **search: Any,
+    ) -> list[list[Candidate]]:
+        """Fused top-k for a batch of queries.
+
+        The fusion arguments override this index's defaults; each arm fetches at least
+        ``top_k`` rows. ``search`` carries dense query knobs (``mode``, ``workers``, ...) to the
+        dense arm, which embeds the whole batch in one call.
+        """
+
+        plan = self._plan(
+            top_k,
+            fusion=fusion,
+            rrf_k=rrf_k,
+            lexical_k=lexical_k,
+            dense_k=dense_k,
+            lexical_weight=lexical_weight,
+            dense_weight=dense_weight,
+        )
+        if plan.top_k <= 0 or not queries:
+            return [[] for _ in queries]
+        lexical, dense = self.retrieve_arms(
+            queries=queries,
+            lexical_k=plan.lexical_k,
+            dense_k=plan.dense_k,
+            filters=filters,
+            embedder=embedder,
+            **search,
+        )
+        return plan.fuse(lexical, dense)
+
+    def _plan(
+        self,
+        top_k: int,
+        *,
+        fusion: str | None = None,
+        rrf_k: int | None = None,
+        lexical_k: int | None = None,
+        dense_k: int | None = None,
+        lexical_weight: float | None = None,
+        dense_weight: float | None = None,
+    ) -> "_FusionPlan":
+        """This index's fusion defaults with the given per-query overrides applied."""
+
+        fusion = self.fusion if fusion is None else fusion
+        rrf_k = self.rrf_k if rrf_k is None else int(rrf_k)
+        _check_fusion(fusion, rrf_k)
+        top_k = int(top_k)
+        return _FusionPlan(
+            fusion=fusion,
+            rrf_k=rrf_k,
+            top_k=top_k,
+            lexical_k=max(top_k, self.lexical_k if lexical_k is None else int(lexical_k)),
+            dense_k=max(top_k, self.dense_k if dense_k is None else int(dense_k)),
+            lexical_weight=self.lexical_weight if lexical_weight is None else float(lexical_weight),
+            dense_weight=self.dense_weight if dense_weight is None else float(dense_weight),
+        )
+
+    def retrieve_arms(
+        self,
+        *,
+        queries: Sequence[str],
+        lexical_k: int,
+        dense_k: int,
+        filters: Mapping[str, str] | None = None,
+        embedder: Embedder | None = None,
+        **search: Any,
+    ) -> tuple[list[list[Candidate]], list[list[Candidate]]]:
+        """Unfused lexical (top ``lexical_k``) and dense (top ``dense_k``) results per query."""
+
+        # The lexical arm runs on the scoring pool while the dense arm embeds and scores here;
+        # numpy releases the GIL in the dense matrix products, so the arms overlap.
+        lexical = _shared_pool("score").submit(
+            self.lexical.retrieve_many, queries=queries, top_k=lexical_k, filters=filters
+        )
+        dense = self.dense.retrieve_many(
+            queries=queries, top_k=dense_k, filters=filters, embedder=embedder, **search
+        )
+        return lexical.result(), dense
+
+    def with_stats(self, stats: BM25Stats | None) -> "HybridIndex":
+        """This index with its lexical arm scoring against ``stats`` (see `BM25Index`)."""
+
+        view = replace(self, lexical=self.lexical.with_stats(stats))
+        object.__setattr__(view, "_fingerprint", self._fingerprint)
+        return view
+
+    def _container(self) -> dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "schema_version": SCHEMA_VERSION,
+            "meta": {
+                **self.lexical._meta(),
+                **self.dense._meta(),
+                **self._fusion_meta(),
+                "fingerprint": self.fingerprint,
+            },
+            "sections": {
+                **self.chunks.to_sections(),
+                **self.lexical._sections(),
+                **self.dense._sections(),
+            },
+        }
+
+    def save(self, path: str) -> None:
+        write_index(path, **self._container())
+
+    def to_bytes(self) -> bytes:
+        return encode_index(**self._container())
+
+    @staticmethod
+    def load(path: str, *, verify: VerifyMode = "full") -> "HybridIndex":
+        return HybridIndex._from_source(_read_source(path), verify=verify)
+
+    @classmethod
+    def load_bytes(cls, blob: bytes, *, verify: VerifyMode = "none") -> "HybridIndex":
+        return cls._from_source(_read_blob(blob), verify=verify)
 
-def build_numpy_cosine_index(*, chunks: Sequence[Chunk], embedder: Embedder) -> NumpyCosineIndex:
-    """Build a dense index from chunk texts."""
+    @classmethod
+    def _from_source(
+        cls, source: IndexReader | Mapping[str, Any], *, verify: VerifyMode
+    ) -> "HybridIndex":
+        if not isinstance(source, IndexReader):
+            raise ValueError("hybrid indexes exist only in the v2 container format")
+        verify_ids = _verify_source(source, verify)
+        header = source.header
+        if header.schema_version != SCHEMA_VERSION:
+            raise ValueError("unsupported index schema version")
+        if header.backend != "hybrid":
+            raise ValueError("not a hybrid index")
+        meta = header.meta
+        spec = _spec_from_payload(meta["spec"])
+        chunks = ChunkTable.from_reader(source, embedding_spec=spec)
+        if verify_ids:
+            chunks.verify_ids()
+        index = cls(
+            lexical=BM25Index._from_sections(source, chunks),
+            dense=NumpyCosineIndex._from_sections(source, chunks, spec),
+            fusion=str(meta["fusion"]),
+            rrf_k=int(meta["rrf_k"]),
+            lexical_k=int(meta["lexical_k"]),
+            dense_k=int(meta["dense_k"]),
+            lexical_weight=float(meta["lexical_weight"]),
+            dense_weight=float(meta["dense_weight"]),
+        )
+        _adopt_fingerprint(index, source, verify_ids)
+        return index
+
+
+def _check_fusion(fusion: str, rrf_k: int) -> None:
+    if fusion not in FUSION_MODES:
+        raise ValueError(f"fusion must be one of: {', '.join(FUSION_MODES)}")
+    if rrf_k < 1:
+        raise ValueError("rrf_k must be >= 1")
+
+
+def _without_embedding(c: Candidate) -> Candidate:
+    if not c.chunk.embedding:
+        return c
+    return replace(c, chunk=replace(c.chunk, embedding=()))
+
+
+def build_numpy_cosine_index(
+    *,
+    chunks: Sequence[Chunk],
+    embedder: Embedder,
+    pq_subvectors: int | None = None,
+    pq_ksub: int = 256,
+    storage_dtype: StorageDtype = "float32",
+    binary: bool = False,
+    coarse_dim: int | None = None,
+    oversample: int = 4,
+    seed: int = 0,
+) -> NumpyCosineIndex:
+    """Build a dense index from chunk texts.
+
+    Args:
+        chunks: Chunks to index.
+        embedder: Embedder for chunk texts (and later queries).
+        pq_subvectors: If set, also train a product quantizer with this many sub-vectors (must
+            divide the dimension) and score queries by ADC over its uint8 codes.
+        pq_ksub: Centroids per PQ sub-space (at most 256).
+        storage_dtype: ``"float16"`` or ``"int8"`` scores queries over a half- or quarter-size
+            copy of the vectors (recorded in ``spec.storage_dtype``); exclusive with PQ.
+        binary: Also store packed sign bits of the mean-centred vectors (``dim / 8`` bytes per
+            vector, rounded up to 64-bit words) so queries default to ``binary-rescore``. Sign
+            bits are coarse: use a larger ``oversample``.
+        coarse_dim: Store the leading dimensions as a renormalized matrix for the ``truncated``
+            two-pass mode (default: ``embedder.spec.coarse_dim``).
+        oversample: Shortlist factor for exact float32 re-scoring of compressed candidates.
+        seed: Seed for PQ codebook training.
+    """
 
     if not chunks:
         raise ValueError("cannot build index from empty chunk list")
@@ -526,83 +2692,395 @@ def build_numpy_cosine_index(*, chunks: Sequence[Chunk], embedder: Embedder) ->
         spec = EmbeddingSpec(
             model=spec.model, dim=int(vecs.shape[1]), metric=spec.metric, normalized=spec.normalized
         )
+    coarse_dim = embedder.spec.coarse_dim if coarse_dim is None else int(coarse_dim)
     arr = np.asarray(vecs, dtype=np.float32)
     if spec.normalized:
         arr = _l2_normalize(arr)
-    out_chunks = tuple(
-        Chunk(
-            doc_id=c.doc_id,
-            text=c.text,
-            start=c.start,
-            end=c.end,
-            metadata=c.metadata,
-            embedding=tuple(float(x) for x in arr[i].tolist()),
-            embedding_spec=spec,
-        )
-        for i, c in enumerate(ordered_chunks)
+    return _numpy_cosine_from_vectors(
+        ordered_chunks,
+        arr,
+        spec,
+        pq_subvectors=pq_subvectors,
+        pq_ksub=pq_ksub,
+        storage_dtype=storage_dtype,
+        binary=binary,
+        coarse_dim=coarse_dim,
+        oversample=oversample,
+        seed=seed,
+    )
+
+
+def _numpy_cosine_from_vectors(
+    ordered_chunks: Sequence[Chunk],
+    arr: NDArray[np.float32],
+    spec: EmbeddingSpec,
+    *,
+    pq_subvectors: int | None,
+    pq_ksub: int,
+    storage_dtype: StorageDtype,
+    binary: bool,
+    coarse_dim: int | None,
+    oversample: int,
+    seed: int,
+) -> NumpyCosineIndex:
+    """Index already-embedded (and, if ``spec.normalized``, normalized) rows in chunk id order."""
+
+    codec, codes = _train_codec(
+        arr, pq_subvectors=pq_subvectors, pq_ksub=pq_ksub, storage_dtype=storage_dtype, seed=seed
+    )
+    if (spec.storage_dtype, spec.coarse_dim) != (storage_dtype, coarse_dim):
+        spec = replace(spec, storage_dtype=storage_dtype, coarse_dim=coarse_dim)
+    chunks_table = ChunkTable.from_chunks(ordered_chunks, embedding_spec=spec)
+    quantizer = BinaryQuantizer.train(arr) if binary else None
+    return NumpyCosineIndex(
+        chunks=chunks_table,
+        vectors=arr,
+        spec=spec,
+        codec=codec,
+        codes=codes,
+        oversample=int(oversample),
+        binary=quantizer,
+        bits=None if quantizer is None else quantizer.encode(arr),
+        coarse=None
+        if coarse_dim is None
+        else _l2_normalize(np.ascontiguousarray(arr[:, :coarse_dim])),
+    )
+
+
+def build_ivf_cosine_index(
+    *,
+    chunks: Sequence[Chunk],
+    embedder: Embedder,
+    nlist: int | None = None,
+    nprobe: int = 8,
+    iters: int = 20,
+    seed: int = 0,
+    train_size: int | None = 100_000,
+    pq_subvectors: int | None = None,
+    pq_ksub: int = 256,
+    storage_dtype: StorageDtype = "float32",
+    oversample: int = 4,
+) -> IvfCosineIndex:
+    """Build an IVF dense index.
+
+    Args:
+        chunks: Chunks to index.
+        embedder: Embedder for chunk texts (and later queries).
+        nlist: Number of k-means lists; defaults to ``round(sqrt(n))``.
+        nprobe: Lists probed per query unless overridden at query time.
+        iters: Maximum k-means iterations.
+        seed: Seed for k-means initialization and training sample (builds are deterministic).
+        train_size: Train centroids on at most this many vectors; ``None`` uses all.
+        pq_subvectors: If set, score probed rows by ADC over product-quantized codes.
+        pq_ksub: Centroids per PQ sub-space (at most 256).
+        storage_dtype: Score probed rows over a float16/int8 copy of the vectors.
+        oversample: Shortlist factor for exact float32 re-scoring of compressed candidates.
+    """
+
+    dense = build_numpy_cosine_index(
+        chunks=chunks,
+        embedder=embedder,
+        pq_subvectors=pq_subvectors,
+        pq_ksub=pq_ksub,
+        storage_dtype=storage_dtype,
+        seed=seed,
+    )
+    n = len(dense.chunks)
+    k = int(nlist) if nlist is not None else max(1, int(round(math.sqrt(n))))
+    if k < 1:
+        raise ValueError("nlist must be >= 1")
+    vectors = dense.vectors if dense.spec.normalized else _l2_normalize(dense.vectors)
+    centroids = kmeans(vectors, k, iters=iters, seed=seed, sample=train_size)
+    labels, _ = assign(vectors, centroids)
+    return IvfCosineIndex(
+        chunks=dense.chunks,
+        vectors=dense.vectors,
+        spec=dense.spec,
+        centroids=centroids,
+        lists=CodePostings.build(labels, n_codes=int(centroids.shape[0])),
+        nprobe=int(nprobe),
+        codec=dense.codec,
+        codes=dense.codes,
+        oversample=int(oversample),
+    )
+
+
+def build_hnsw_cosine_index(
+    *,
+    chunks: Sequence[Chunk],
+    embedder: Embedder,
+    m: int = 16,
+    ef_construction: int = 100,
+    ef: int = 64,
+    seed: int = 0,
+) -> HnswCosineIndex:
+    """Build an HNSW dense index.
+
+    Args:
+        chunks: Chunks to index.
+        embedder: Embedder for chunk texts (and later queries).
+        m: Links per node on upper layers (``2*m`` on the base layer).
+        ef_construction: Candidate-list width while inserting.
+        ef: Default candidate-list width at query time (overridable per query).
+        seed: Seed for the level draws; equal inputs and seed give byte-identical graphs.
+    """
+
+    if m < 2:
+        raise ValueError("m must be >= 2")
+    if ef_construction < 1:
+        raise ValueError("ef_construction must be >= 1")
+    dense = build_numpy_cosine_index(chunks=chunks, embedder=embedder)
+    vectors = dense.vectors if dense.spec.normalized else _l2_normalize(dense.vectors)
+    levels, layer0, upper, entry = _hnsw_build(
+        vectors, m=int(m), ef_construction=int(ef_construction), seed=int(seed)
     )
-    return NumpyCosineIndex(chunks=out_chunks, vectors=arr, spec=spec)
+    return HnswCosineIndex(
+        chunks=dense.chunks,
+        vectors=dense.vectors,
+        spec=dense.spec,
+        levels=levels,
+        layer0=layer0,
+        upper=upper,
+        entry_point=int(entry),
+        m=int(m),
+        ef_construction=int(ef_construction),
+        ef=int(ef),
+    )
+
+
+def _bm25_partition(
+    texts: Sequence[str], buckets: int | None
+) -> tuple[NDArray[np.int32], BM25Postings, list[str] | None]:
+    """Doc lengths and postings (rows numbered from 0) for one run of chunk texts.
+
+    With ``buckets`` None the run gets its own exact vocabulary: postings are keyed by rank in
+    the returned sorted term list.
+    """
+
+    doc_len = np.zeros((len(texts),), dtype=np.int32)
+    counted: list[Counter[str]] = []
+    for i, text in enumerate(texts):
+        toks = _tokenize(text)
+        doc_len[i] = len(toks)
+        counted.append(Counter(toks))
+    if buckets is None:
+        terms = sorted(set().union(*counted))
+        ids = {t: i for i, t in enumerate(terms)}
+        tfs = [tuple(sorted((ids[t], n) for t, n in c.items())) for c in counted]
+        return doc_len, BM25Postings.from_tfs(tfs, buckets=len(terms)), terms
+    tfs = []
+    # Each distinct token of a chunk is hashed once (and repeats hit the `_token_hash` cache).
+    for c in counted:
+        counts: dict[int, int] = {}
+        for t, n in c.items():
+            bucket = _token_hash(t) % buckets
+            counts[bucket] = counts.get(bucket, 0) + n
+        tfs.append(tuple(sorted(counts.items())))
+    return doc_len, BM25Postings.from_tfs(tfs, buckets=buckets), None
 
 
 def build_bm25_index(
-    *, chunks: Sequence[Chunk], buckets: int = 2048, k1: float = 1.2, b: float = 0.75
+    *,
+    chunks: Sequence[Chunk],
+    buckets: int = 2048,
+    k1: float = 1.2,
+    b: float = 0.75,
+    workers: int = 1,
+    vocab: str = "hashed",
+    postings_codec: str = "raw",
 ) -> BM25Index:
-    """Build a hashed-token BM25 index."""
+    """Build a BM25 index over hashed token buckets or, with ``vocab="exact"``, exact terms.
+
+    An exact vocabulary ignores ``buckets``: every distinct term gets its own postings and is
+    looked up in a `TermDictionary` at query time, so unrelated terms never share a bucket.
+
+    With ``workers`` > 1 the chunks are split into that many contiguous runs, tokenized and
+    counted in a process pool, and the partial postings are stacked in run order: the index
+    is identical to the serial build. ``postings_codec`` picks the on-disk postings layout
+    (see `BM25Index`).
+    """
 
     if not chunks:
         raise ValueError("cannot build index from empty chunk list")
-    n = len(chunks)
-    df = np.zeros((buckets,), dtype=np.int32)
-    tfs: list[tuple[tuple[int, int], ...]] = []
-    doc_len = np.zeros((n,), dtype=np.int32)
-
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    if vocab not in BM25_VOCABS:
+        raise ValueError(f"unknown BM25 vocabulary: {vocab!r}")
+    if postings_codec not in POSTINGS_CODECS:
+        raise ValueError(f"unknown postings codec: {postings_codec!r}")
+    exact = vocab == "exact"
     ordered_chunks = sorted(chunks, key=lambda c: c.chunk_id)
+    texts = [c.text for c in ordered_chunks]
+    workers = min(int(workers), len(texts))
+    if workers == 1:
+        doc_len, postings, terms = _bm25_partition(texts, None if exact else buckets)
+    else:
+        edges = np.linspace(0, len(texts), workers + 1).astype(np.int64).tolist()
+        runs = [texts[lo:hi] for lo, hi in zip(edges[:-1], edges[1:])]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_bm25_partition, runs, [None if exact else buckets] * workers))
+        doc_len = np.concatenate([part[0] for part in parts])
+        terms = remap = None
+        if exact:
+            terms = sorted(set().union(*(part[2] for part in parts)))
+            remap = _term_remap(terms, [part[2] for part in parts])
+        postings = BM25Postings.concat(
+            [part[1] for part in parts],
+            rows=[len(run) for run in runs],
+            remap=remap,
+            buckets=None if terms is None else len(terms),
+        )
 
-    # Compute per-chunk term counts and bucket doc-frequencies.
-    for i, c in enumerate(ordered_chunks):
-        toks = _tokenize(c.text)
-        doc_len[i] = np.int32(len(toks))
-        counts: dict[int, int] = {}
-        seen: set[int] = set()
-        for t in toks:
-            bucket = _stable_token_bucket(t, buckets=buckets)
-            counts[bucket] = counts.get(bucket, 0) + 1
-            seen.add(bucket)
-        for bkt in seen:
-            df[bkt] += 1
-        tfs.append(tuple(sorted(counts.items())))
-
-    avg_dl = float(doc_len.mean()) if n else 0.0
+    # A chunk appears at most once per bucket, so posting counts are document frequencies.
+    df = np.diff(postings.indptr).astype(np.int32)
     return BM25Index(
-        chunks=tuple(ordered_chunks),
-        buckets=buckets,
+        chunks=ChunkTable.from_chunks(ordered_chunks),
+        buckets=buckets if terms is None else len(terms),
         df=df,
-        tfs=tuple(tfs),
+        tfs=None,
         doc_len=doc_len,
-        avg_dl=avg_dl,
+        avg_dl=float(doc_len.mean()),
         k1=float(k1),
         b=float(b),
+        postings=postings,
+        vocab=None if terms is None else TermDictionary.build(terms),
+        postings_codec=postings_codec,
     )
 
 
-def load_index(path: str) -> NumpyCosineIndex | BM25Index:
-    """Load an index from disk."""
+def build_hybrid_index(
+    *,
+    chunks: Sequence[Chunk],
+    embedder: Embedder,
+    buckets: int = 2048,
+    k1: float = 1.2,
+    b: float = 0.75,
+    workers: int = 1,
+    vocab: str = "hashed",
+    postings_codec: str = "raw",
+    fusion: str = "rrf",
+    rrf_k: int = 60,
+    lexical_k: int = 50,
+    dense_k: int = 50,
+    lexical_weight: float = 1.0,
+    dense_weight: float = 1.0,
+    pq_subvectors: int | None = None,
+    storage_dtype: StorageDtype = "float32",
+    binary: bool = False,
+    coarse_dim: int | None = None,
+    oversample: int = 4,
+) -> HybridIndex:
+    """Build BM25 and dense arms over one chunk table (see `HybridIndex`).
+
+    The lexical options (``buckets``, ``k1``, ``b``, ``workers``, ``vocab``,
+    ``postings_codec``) are those of `build_bm25_index`, the dense ones those of
+    `build_numpy_cosine_index`; the fusion options become the index's query defaults.
+    """
 
-    with open(path, "rb") as f:
-        payload = msgpack.unpackb(f.read(), raw=False)
-    backend = payload.get("backend")
+    dense = build_numpy_cosine_index(
+        chunks=chunks,
+        embedder=embedder,
+        pq_subvectors=pq_subvectors,
+        storage_dtype=storage_dtype,
+        binary=binary,
+        coarse_dim=coarse_dim,
+        oversample=oversample,
+    )
+    lexical = build_bm25_index(
+        chunks=chunks,
+        buckets=buckets,
+        k1=k1,
+        b=b,
+        workers=workers,
+        vocab=vocab,
+        postings_codec=postings_codec,
+    )
+    return HybridIndex(
+        # Both arms order rows by chunk id, so the BM25 arm can adopt the dense table.
+        lexical=replace(lexical, chunks=dense.chunks),
+        dense=dense,
+        fusion=fusion,
+        rrf_k=int(rrf_k),
+        lexical_k=int(lexical_k),
+        dense_k=int(dense_k),
+        lexical_weight=float(lexical_weight),
+        dense_weight=float(dense_weight),
+    )
+
+
+AnyIndex = NumpyCosineIndex | IvfCosineIndex | HnswCosineIndex | BM25Index | HybridIndex
+
+
+def _from_source(source: IndexReader | Mapping[str, Any], *, verify: VerifyMode) -> AnyIndex:
+    backend = _source_backend(source)
     if backend == "bm25":
-        return BM25Index.load(path)
+        return BM25Index._from_source(source, verify=verify)
     if backend == "numpy-cosine":
-        return NumpyCosineIndex.load(path)
+        return NumpyCosineIndex._from_source(source, verify=verify)
+    if backend == "ivf-cosine":
+        return IvfCosineIndex._from_source(source, verify=verify)
+    if backend == "hnsw-cosine":
+        return HnswCosineIndex._from_source(source, verify=verify)
+    if backend == "hybrid":
+        return HybridIndex._from_source(source, verify=verify)
     raise ValueError(f"unknown index backend: {backend}")
 
 
+def load_index(path: str, *, verify: VerifyMode = "full") -> AnyIndex:
+    """Load an index from disk.
+
+    The backend is taken from the container header (or the v1 document) and the file is decoded
+    once by the matching loader. A directory is loaded as a `ShardedIndex` or a `SegmentedIndex`,
+    as its manifest says.
+
+    Args:
+        path: Index file (v2 container or legacy v1 msgpack), or a sharded or segmented index
+            directory.
+        verify: ``"full"`` checks section checksums and recomputes every chunk id;
+            ``"blocks"`` checks section checksums only (fast, still catches corruption);
+            ``"none"`` trusts the file.
+    """
+
+    if os.path.isdir(path):
+        from bijux_rag.rag.segments import SegmentedIndex
+        from bijux_rag.rag.shards import ShardedIndex, is_sharded
+
+        if is_sharded(path):
+            return ShardedIndex.load(path, verify=verify)
+        return SegmentedIndex.load(path, verify=verify)
+    return _from_source(_read_source(path), verify=verify)
+
+
+def load_index_bytes(blob: bytes, *, verify: VerifyMode = "none") -> AnyIndex:
+    """Load an index from an in-memory blob (v2 sections are zero-copy views)."""
+
+    return _from_source(_read_blob(blob), verify=verify)
+
+
 __all__ = [
+    "AnyIndex",
+    "BM25BlockMax",
     "BM25Index",
+    "BM25Postings",
+    "BM25PruningStats",
+    "BM25Stats",
+    "BM25_BLOCK_SIZE",
+    "BM25_VOCABS",
+    "DENSE_BLOCK_ROWS",
+    "DENSE_MODES",
+    "FUSION_MODES",
+    "QUERY_BLOCK_BYTES",
+    "HnswCosineIndex",
+    "HybridIndex",
+    "IvfCosineIndex",
     "NumpyCosineIndex",
+    "POSTINGS_CODECS",
     "SCHEMA_VERSION",
     "build_bm25_index",
+    "build_hnsw_cosine_index",
+    "build_hybrid_index",
+    "build_ivf_cosine_index",
     "build_numpy_cosine_index",
     "load_index",
+    "load_index_bytes",
 ]
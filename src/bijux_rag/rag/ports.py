@@ -108,6 +108,15 @@ class Index(Protocol):
         embedder: Embedder | None = None,
     ) -> list[Candidate]: ...
 
+    def retrieve_many(
+        self,
+        *,
+        queries: Sequence[str],
+        top_k: int,
+        filters: Mapping[str, str] | None = None,
+        embedder: Embedder | None = None,
+    ) -> list[list[Candidate]]: ...
+
     def save(self, path: str) -> None: ...
 
 
@@ -0,0 +1,305 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+"""Bit-packed, delta-encoded storage for CSR postings (``indptr``/``doc_ids``/``tfs``).
+
+Each bucket's postings are cut into blocks of ``block_size`` postings (the last one may be
+shorter). A block stores
+
+* its first and last chunk ids in ``first`` and ``last`` (int32): ``first`` is the delta base,
+  and together they are the skip pointers that tell which chunk ids a block covers without
+  decoding it;
+* its bit offset into ``data`` in ``offset`` (int64), so any block decodes on its own;
+* two bit widths in ``bits`` (uint8): one for the chunk-id gaps, one for the term frequencies;
+* in ``bound`` (int32), its largest term frequency and the smallest ``lengths`` value of its
+  chunks, from which BM25 bounds a block's impact without decoding it.
+
+The payload of a block is ``n`` gaps (``doc[i] - doc[i - 1] - 1``, ``0`` for the first posting)
+followed by ``n`` values ``tf - 1``, each packed LSB-first at the block's width. Most term
+frequencies are 1, so most blocks spend no bits on them at all.
+
+Encoding and decoding are vectorized: values are grouped by width and moved one bit plane at
+a time, so the Python-level loop runs at most ``max(width)`` (< 32) times, whatever the size.
+``indptr`` is stored as is; chunk ids and frequencies decode back to the exact int32 arrays.
+
+All arrays are plain sections, so loaded postings stay memory-mapped: `bucket`, `take` and
+`probe` decode only the blocks they reach, and nothing is decoded up front.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from bijux_rag.rag.index_format import IndexReader
+
+PACKED_BLOCK_SIZE = 128
+
+# bit_length(v) == number of powers of two <= v.
+_POWERS = np.left_shift(np.int64(1), np.arange(63, dtype=np.int64))
+
+
+def _bit_width(values: NDArray[np.int64]) -> NDArray[np.uint8]:
+    return np.searchsorted(_POWERS, values, side="right").astype(np.uint8)
+
+
+def _block_bounds(
+    indptr: NDArray[np.int64], block_size: int
+) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """Start and end posting of every block, buckets in order."""
+
+    lens = np.diff(indptr)
+    nblocks = (lens + block_size - 1) // block_size
+    block_ptr = np.zeros((lens.size + 1,), dtype=np.int64)
+    np.cumsum(nblocks, out=block_ptr[1:])
+    block_bucket = np.repeat(np.arange(lens.size, dtype=np.int64), nblocks)
+    rank = np.arange(int(block_ptr[-1]), dtype=np.int64) - block_ptr[block_bucket]
+    start = indptr[block_bucket] + rank * block_size
+    return start, np.minimum(start + block_size, indptr[block_bucket + 1])
+
+
+def _concat_ranges(starts: NDArray[np.int64], ends: NDArray[np.int64]) -> NDArray[np.int64]:
+    """Concatenate ``arange(starts[i], ends[i])`` for all i without a Python loop."""
+
+    lens = ends - starts
+    total = int(lens.sum())
+    if total == 0:
+        return np.zeros((0,), dtype=np.int64)
+    shift: NDArray[np.int64] = np.repeat(starts - (np.cumsum(lens) - lens), lens)
+    return np.arange(total, dtype=np.int64) + shift
+
+
+def _by_width(
+    pos: NDArray[np.int64], width: NDArray[np.uint8]
+) -> tuple[NDArray[np.int64], NDArray[np.int64], list[int]]:
+    """Order values by decreasing width; ``counts[j]`` of them have more than ``j`` bits."""
+
+    order = np.argsort(-width.astype(np.int64), kind="stable")
+    hist = np.bincount(width, minlength=1)
+    counts = np.cumsum(hist[::-1])[::-1][1:].tolist()  # values with width > j
+    return order, pos[order], counts
+
+
+@dataclass(frozen=True, slots=True)
+class PackedPostings:
+    """Compressed postings; see the module docstring for the layout."""
+
+    block_size: int
+    indptr: NDArray[np.int64]
+    first: NDArray[np.int32]
+    last: NDArray[np.int32]
+    offset: NDArray[np.int64]
+    bits: NDArray[np.uint8]
+    bound: NDArray[np.int32]
+    data: NDArray[np.uint8]
+    # Per-bucket block pointer and per-block posting ranges, derived from `indptr` on first use.
+    _blocks: tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.int64]] | None = field(
+        init=False, default=None, repr=False, compare=False
+    )
+
+    @classmethod
+    def encode(
+        cls,
+        indptr: NDArray[np.int64],
+        doc_ids: NDArray[np.int32],
+        tfs: NDArray[np.int32],
+        *,
+        lengths: NDArray[np.integer[Any]],
+        block_size: int = PACKED_BLOCK_SIZE,
+    ) -> "PackedPostings":
+        """Pack CSR postings; ``lengths[d]`` is chunk ``d``'s length, bounded per block."""
+
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        indptr = np.asarray(indptr, dtype=np.int64)
+        doc = np.asarray(doc_ids, dtype=np.int64)
+        start, end = _block_bounds(indptr, block_size)
+        sizes = end - start
+        gap = np.empty_like(doc)
+        gap[1:] = doc[1:] - doc[:-1] - 1
+        gap[start] = 0
+        tf1 = np.asarray(tfs, dtype=np.int64) - 1
+        if start.size:
+            if (gap < 0).any() or (tf1 < 0).any():
+                raise ValueError("postings need ascending chunk ids and positive frequencies")
+            max_tf1 = np.maximum.reduceat(tf1, start)
+            bits = np.stack(
+                [_bit_width(np.maximum.reduceat(gap, start)), _bit_width(max_tf1)], axis=1
+            )
+            min_len = np.minimum.reduceat(np.asarray(lengths, dtype=np.int64)[doc], start)
+            bound = np.stack([max_tf1 + 1, min_len], axis=1)
+        else:
+            bits = np.zeros((0, 2), dtype=np.uint8)
+            bound = np.zeros((0, 2), dtype=np.int64)
+        block_bits = sizes * (bits[:, 0].astype(np.int64) + bits[:, 1])
+        offset = np.zeros((start.size,), dtype=np.int64)
+        np.cumsum(block_bits[:-1], out=offset[1:])
+        total = int(block_bits.sum())
+
+        pos, width = cls._positions(start, sizes, offset, bits)
+        values = np.concatenate([gap, tf1])
+        order, pos, counts = _by_width(pos, width)
+        values = values[order]
+        plane = np.zeros((total,), dtype=np.uint8)
+        for j, m in enumerate(counts):
+            plane[pos[:m] + j] = (values[:m] >> j) & 1
+        return cls(
+            block_size=int(block_size),
+            indptr=indptr,
+            first=doc[start].astype(np.int32),
+            last=doc[end - 1].astype(np.int32),
+            offset=offset,
+            bits=bits.astype(np.uint8),
+            bound=bound.astype(np.int32),
+            data=np.packbits(plane, bitorder="little"),
+        )
+
+    @staticmethod
+    def _positions(
+        start: NDArray[np.int64],
+        sizes: NDArray[np.int64],
+        offset: NDArray[np.int64],
+        bits: NDArray[np.uint8],
+    ) -> tuple[NDArray[np.int64], NDArray[np.uint8]]:
+        """Bit position and width of every gap, then of every ``tf - 1``, in posting order."""
+
+        block_of = np.repeat(np.arange(start.size, dtype=np.int64), sizes)
+        k = np.arange(block_of.size, dtype=np.int64) - start[block_of]  # rank within block
+        doc_bits = bits[:, 0].astype(np.int64)[block_of]
+        tf_bits = bits[:, 1].astype(np.int64)[block_of]
+        gap_pos = offset[block_of] + k * doc_bits
+        tf_pos = offset[block_of] + sizes[block_of] * doc_bits + k * tf_bits
+        width = np.concatenate([doc_bits, tf_bits]).astype(np.uint8)
+        return np.concatenate([gap_pos, tf_pos]), width
+
+    @property
+    def num_blocks(self) -> int:
+        return int(self.first.size)
+
+    def block_layout(self) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.int64]]:
+        """``block_ptr`` (bucket -> its blocks, CSR) and each block's posting ``start``/``end``."""
+
+        if self._blocks is None:
+            start, end = _block_bounds(self.indptr, self.block_size)
+            lens = np.diff(self.indptr)
+            block_ptr = np.zeros((lens.size + 1,), dtype=np.int64)
+            np.cumsum((lens + self.block_size - 1) // self.block_size, out=block_ptr[1:])
+            object.__setattr__(self, "_blocks", (block_ptr, start, end))
+        assert self._blocks is not None
+        return self._blocks
+
+    def decode_blocks(
+        self, blocks: NDArray[np.int64]
+    ) -> tuple[NDArray[np.int32], NDArray[np.int32]]:
+        """Chunk ids and term frequencies of ``blocks``, concatenated in the given order."""
+
+        blocks = np.asarray(blocks, dtype=np.int64)
+        _, block_start, block_end = self.block_layout()
+        sizes = block_end[blocks] - block_start[blocks]
+        start = np.zeros((blocks.size,), dtype=np.int64)
+        np.cumsum(sizes[:-1], out=start[1:])
+        pos, width = self._positions(start, sizes, self.offset[blocks], self.bits[blocks])
+        order, pos, counts = _by_width(pos, width)
+        data = np.asarray(self.data)
+        values = np.zeros((pos.size,), dtype=np.int64)
+        for j, m in enumerate(counts):
+            p = pos[:m] + j
+            values[:m] |= ((data[p >> 3] >> (p & 7)) & 1).astype(np.int64) << j
+        out = np.empty_like(values)
+        out[order] = values
+        n = out.size // 2
+        gap, tf1 = out[:n], out[n:]
+        # Chunk id = block's first id + running sum of (gap + 1) since the block start.
+        steps = np.cumsum(gap + 1)
+        block_of = np.repeat(np.arange(blocks.size, dtype=np.int64), sizes)
+        doc = self.first[blocks].astype(np.int64)[block_of] + steps - steps[start][block_of]
+        return doc.astype(np.int32), (tf1 + 1).astype(np.int32)
+
+    def decode(self) -> tuple[NDArray[np.int32], NDArray[np.int32]]:
+        """Chunk ids and term frequencies, as the CSR arrays they were encoded from."""
+
+        return self.decode_blocks(np.arange(self.num_blocks, dtype=np.int64))
+
+    def take(
+        self, starts: NDArray[np.int64], ends: NDArray[np.int64]
+    ) -> tuple[NDArray[np.int32], NDArray[np.int32]]:
+        """Postings ``[starts[i], ends[i])`` concatenated, decoding only the blocks they touch."""
+
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        keep = ends > starts
+        starts, ends = starts[keep], ends[keep]
+        _, block_start, block_end = self.block_layout()
+        lo = np.searchsorted(block_start, starts, side="right") - 1
+        hi = np.searchsorted(block_start, ends, side="left")
+        blocks = _concat_ranges(lo, hi)
+        doc, tf = self.decode_blocks(blocks)
+        # Range i decodes to one run starting at posting block_start[lo[i]].
+        run = block_end[hi - 1] - block_start[lo]
+        base = np.zeros((run.size,), dtype=np.int64)
+        np.cumsum(run[:-1], out=base[1:])
+        sel = _concat_ranges(base + starts - block_start[lo], base + ends - block_start[lo])
+        return doc[sel], tf[sel]
+
+    def bucket(self, bucket: int) -> tuple[NDArray[np.int32], NDArray[np.int32]]:
+        return self.take(self.indptr[bucket : bucket + 1], self.indptr[bucket + 1 : bucket + 2])
+
+    def probe(
+        self, bucket: int, ids: NDArray[np.int64]
+    ) -> tuple[NDArray[np.int32], NDArray[np.int32]]:
+        """Postings of ``bucket`` from the blocks whose ``[first, last]`` holds one of ``ids``.
+
+        Every posting of the bucket whose chunk id is in ``ids`` is returned (ascending); blocks
+        the skip pointers rule out are not decoded.
+        """
+
+        block_ptr = self.block_layout()[0]
+        b0, b1 = int(block_ptr[bucket]), int(block_ptr[bucket + 1])
+        ids = np.asarray(ids, dtype=np.int64)
+        blk = b0 + np.searchsorted(self.last[b0:b1], ids)
+        hit = blk < b1
+        hit[hit] = self.first[blk[hit]] <= ids[hit]
+        return self.decode_blocks(np.unique(blk[hit]))
+
+    @property
+    def nbytes(self) -> int:
+        return int(
+            self.indptr.nbytes
+            + self.first.nbytes
+            + self.last.nbytes
+            + self.offset.nbytes
+            + self.bits.nbytes
+            + self.bound.nbytes
+            + self.data.nbytes
+        )
+
+    # ------------- Persistence -------------
+    def to_sections(self) -> dict[str, NDArray[np.generic]]:
+        return {
+            "postings.indptr": self.indptr,
+            "postings.packed.first": self.first,
+            "postings.packed.last": self.last,
+            "postings.packed.offset": self.offset,
+            "postings.packed.bits": self.bits,
+            "postings.packed.bound": self.bound,
+            "postings.packed.data": self.data,
+        }
+
+    @classmethod
+    def from_reader(cls, reader: IndexReader, *, block_size: int) -> "PackedPostings":
+        return cls(
+            block_size=int(block_size),
+            indptr=reader.array("postings.indptr"),
+            first=reader.array("postings.packed.first"),
+            last=reader.array("postings.packed.last"),
+            offset=reader.array("postings.packed.offset"),
+            bits=reader.array("postings.packed.bits"),
+            bound=reader.array("postings.packed.bound"),
+            data=reader.array("postings.packed.data"),
+        )
+
+
+__all__ = ["PACKED_BLOCK_SIZE", "PackedPostings"]
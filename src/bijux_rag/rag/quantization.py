@@ -0,0 +1,378 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+"""Vector quantizers shared by the dense index backends.
+
+* `kmeans`: deterministic (seeded) Lloyd iterations, Euclidean or spherical; used for IVF coarse
+  lists and for PQ codebooks.
+* `ProductQuantizer`: splits vectors into ``m`` sub-vectors and encodes each as the id of its
+  nearest of ``ksub`` (<= 256) sub-centroids, i.e. ``m`` bytes per vector. Queries are scored
+  by asymmetric distance computation (ADC): one ``(m, ksub)`` table of sub-inner-products per
+  query, then ``m`` table lookups per row.
+* `ScalarQuantizer`: a float16 copy, or int8 codes with a per-dimension scale/offset
+  (``2 * dim`` or ``dim`` bytes per vector: a half or a quarter of float32).
+* `BinaryQuantizer`: one sign bit per (mean-centred) dimension packed into whole 64-bit words
+  (`pack_signs`) and compared by XOR + popcount (`hamming`); a cheap first stage whose candidate
+  pool is re-scored exactly.
+
+Both codecs expose ``prepare(query)`` and ``scores(codes, prepared)`` so indexes can rank rows
+in the compressed domain without caring which codec they hold. Everything is plain NumPy, so
+codebooks, scales and codes persist as ordinary array sections.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from bijux_rag.core.rag_types import StorageDtype
+
+SCORE_BLOCK = 16384
+
+# Per-byte popcount table for NumPy < 2.0, which lacks ``np.bitwise_count``.
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+_bitwise_count = getattr(np, "bitwise_count", None)
+
+
+def _l2_normalize(x: NDArray[np.float32]) -> NDArray[np.float32]:
+    denom = np.linalg.norm(x, axis=1, keepdims=True)
+    denom = np.maximum(denom, np.float32(1e-12))
+    return np.asarray(x / denom, dtype=np.float32)
+
+
+def assign(
+    x: NDArray[np.float32],
+    centroids: NDArray[np.float32],
+    *,
+    spherical: bool = True,
+    block: int = 65536,
+) -> tuple[NDArray[np.int32], NDArray[np.float32]]:
+    """Nearest centroid per row, row-blocked to bound the score matrix.
+
+    Returns the labels and the matching fit: the inner product for ``spherical`` (larger is
+    better), otherwise ``x·c - |c|²/2`` (larger is better; ranks centroids by L2 distance).
+    """
+
+    bias = None if spherical else -0.5 * np.einsum("ij,ij->i", centroids, centroids)
+    labels = np.empty((x.shape[0],), dtype=np.int32)
+    best = np.empty((x.shape[0],), dtype=np.float32)
+    for lo in range(0, x.shape[0], block):
+        sims = x[lo : lo + block] @ centroids.T
+        if bias is not None:
+            sims += bias
+        labels[lo : lo + block] = np.argmax(sims, axis=1)
+        best[lo : lo + block] = sims[np.arange(sims.shape[0]), labels[lo : lo + block]]
+    return labels, best
+
+
+def kmeans(
+    x: NDArray[np.float32],
+    k: int,
+    *,
+    iters: int = 20,
+    seed: int = 0,
+    sample: int | None = None,
+    spherical: bool = True,
+) -> NDArray[np.float32]:
+    """Deterministic k-means; spherical mode keeps centroids unit-norm.
+
+    Trains on at most ``sample`` rows (a seeded subset). Empty clusters are re-seeded with the
+    rows that fit their current centroid worst.
+    """
+
+    rng = np.random.default_rng(seed)
+    if sample is not None and x.shape[0] > sample:
+        x = x[np.sort(rng.choice(x.shape[0], size=sample, replace=False))]
+    n = x.shape[0]
+    k = max(1, min(int(k), n))
+    centroids = np.array(x[np.sort(rng.choice(n, size=k, replace=False))], dtype=np.float32)
+    labels = np.full((n,), -1, dtype=np.int32)
+    for _ in range(iters):
+        new_labels, fit = assign(x, centroids, spherical=spherical)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=k)
+        order = np.argsort(labels, kind="stable")
+        nonempty = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+        sums = np.zeros_like(centroids)
+        sums[nonempty] = np.add.reduceat(x[order], starts, axis=0)
+        if not spherical:
+            # Squared distance to the assigned centroid, negated: worst fit sorts first.
+            fit = 2.0 * fit - np.einsum("ij,ij->i", x, x)
+            sums[nonempty] /= counts[nonempty, None].astype(np.float32)
+        empty = np.flatnonzero(counts == 0)
+        if empty.size:
+            sums[empty] = x[np.argsort(fit, kind="stable")[: empty.size]]
+        centroids = _l2_normalize(sums) if spherical else sums.astype(np.float32)
+    return centroids
+
+
+@dataclass(frozen=True, slots=True)
+class ProductQuantizer:
+    """Product quantizer with ``codebooks`` of shape ``(m, ksub, dim // m)``."""
+
+    codebooks: NDArray[np.float32]
+
+    def __post_init__(self) -> None:
+        if self.codebooks.ndim != 3 or self.codebooks.shape[0] < 1:
+            raise ValueError("codebooks must have shape (m, ksub, dsub) with m >= 1")
+        if not 1 <= self.ksub <= 256:
+            raise ValueError("ksub must be in [1, 256] so codes fit in uint8")
+
+    @property
+    def m(self) -> int:
+        return int(self.codebooks.shape[0])
+
+    @property
+    def ksub(self) -> int:
+        return int(self.codebooks.shape[1])
+
+    @property
+    def dsub(self) -> int:
+        return int(self.codebooks.shape[2])
+
+    @property
+    def dim(self) -> int:
+        return self.m * self.dsub
+
+    @classmethod
+    def train(
+        cls,
+        x: NDArray[np.float32],
+        *,
+        m: int,
+        ksub: int = 256,
+        iters: int = 20,
+        seed: int = 0,
+        sample: int | None = 32_768,
+    ) -> "ProductQuantizer":
+        """Train one Euclidean k-means codebook per sub-space.
+
+        Codebooks are trained on at most ``sample`` rows (a seeded subset): ~128 points per
+        centroid is plenty for 256-entry codebooks and keeps training time flat in corpus size.
+
+        Raises:
+            ValueError: if ``m`` does not divide the vector dimension.
+        """
+
+        x = np.asarray(x, dtype=np.float32)
+        dim = int(x.shape[1])
+        if m < 1 or dim % m:
+            raise ValueError(f"pq subvectors ({m}) must divide the vector dimension ({dim})")
+        if sample is not None and x.shape[0] > sample:
+            rng = np.random.default_rng(seed)
+            x = x[np.sort(rng.choice(x.shape[0], size=sample, replace=False))]
+        dsub = dim // m
+        k = min(int(ksub), int(x.shape[0]))
+        books = np.zeros((m, k, dsub), dtype=np.float32)
+        for j in range(m):
+            sub = np.ascontiguousarray(x[:, j * dsub : (j + 1) * dsub])
+            books[j] = kmeans(sub, k, iters=iters, seed=seed + j, spherical=False)
+        return cls(codebooks=books)
+
+    def encode(self, x: NDArray[np.float32], *, block: int = 65536) -> NDArray[np.uint8]:
+        """``(n, m)`` uint8 codes."""
+
+        x = np.asarray(x, dtype=np.float32)
+        codes = np.empty((x.shape[0], self.m), dtype=np.uint8)
+        for j in range(self.m):
+            sub = x[:, j * self.dsub : (j + 1) * self.dsub]
+            codes[:, j], _ = assign(sub, self.codebooks[j], spherical=False, block=block)
+        return codes
+
+    def decode(self, codes: NDArray[np.uint8]) -> NDArray[np.float32]:
+        """Reconstruct approximate vectors from codes."""
+
+        parts = [self.codebooks[j][codes[:, j]] for j in range(self.m)]
+        return np.concatenate(parts, axis=1)
+
+    @property
+    def code_dtype(self) -> np.dtype[Any]:
+        return np.dtype(np.uint8)
+
+    @property
+    def code_width(self) -> int:
+        return self.m
+
+    def prepare(self, q: NDArray[np.float32]) -> NDArray[np.float32]:
+        return self.table(q)
+
+    def table(self, q: NDArray[np.float32]) -> NDArray[np.float32]:
+        """ADC lookup table: inner product of each query sub-vector with each sub-centroid."""
+
+        sub = np.asarray(q, dtype=np.float32).reshape(self.m, 1, self.dsub)
+        return np.asarray(np.einsum("mkd,mzd->mk", self.codebooks, sub), dtype=np.float32)
+
+    def scores(self, codes: NDArray[np.uint8], table: NDArray[np.float32]) -> NDArray[np.float32]:
+        """Approximate inner products for ``codes`` given a query `table`."""
+
+        out = np.zeros((codes.shape[0],), dtype=np.float32)
+        for j in range(self.m):
+            out += table[j].take(codes[:, j])
+        return out
+
+
+@dataclass(frozen=True, slots=True)
+class ScalarQuantizer:
+    """Per-dimension scalar codec: ``x ≈ offset + scale * code``.
+
+    ``float16`` codes are a plain cast (unit scale, zero offset). ``int8`` codes map each
+    dimension's ``[min, max]`` training range onto ``[-127, 127]``.
+    """
+
+    dtype: StorageDtype
+    scale: NDArray[np.float32]
+    offset: NDArray[np.float32]
+
+    def __post_init__(self) -> None:
+        if self.dtype not in ("float16", "int8"):
+            raise ValueError("scalar quantizer dtype must be float16 or int8")
+        if self.scale.ndim != 1 or self.scale.shape != self.offset.shape:
+            raise ValueError("scale and offset must be 1-D arrays of the vector dimension")
+
+    @property
+    def dim(self) -> int:
+        return int(self.scale.shape[0])
+
+    @property
+    def code_dtype(self) -> np.dtype[Any]:
+        return np.dtype(np.float16 if self.dtype == "float16" else np.int8)
+
+    @property
+    def code_width(self) -> int:
+        return self.dim
+
+    @classmethod
+    def train(cls, x: NDArray[np.float32], *, dtype: StorageDtype) -> "ScalarQuantizer":
+        x = np.asarray(x, dtype=np.float32)
+        dim = int(x.shape[1])
+        if dtype == "float16" or x.shape[0] == 0:
+            scale = np.ones((dim,), dtype=np.float32)
+            offset = np.zeros((dim,), dtype=np.float32)
+        else:
+            lo, hi = x.min(axis=0), x.max(axis=0)
+            offset = ((hi + lo) / 2).astype(np.float32)
+            scale = np.maximum((hi - lo) / 254, np.float32(1e-12)).astype(np.float32)
+        return cls(dtype=dtype, scale=scale, offset=offset)
+
+    def encode(self, x: NDArray[np.float32]) -> NDArray[Any]:
+        x = np.asarray(x, dtype=np.float32)
+        if self.dtype == "float16":
+            return x.astype(np.float16)
+        codes = np.clip(np.rint((x - self.offset) / self.scale), -127, 127)
+        return np.asarray(codes, dtype=np.int8)
+
+    def decode(self, codes: NDArray[Any]) -> NDArray[np.float32]:
+        return codes.astype(np.float32) * self.scale + self.offset
+
+    def prepare(self, q: NDArray[np.float32]) -> tuple[NDArray[np.float32], float]:
+        q = np.asarray(q, dtype=np.float32)
+        return (q * self.scale).astype(np.float32), float(q @ self.offset)
+
+    def scores(
+        self,
+        codes: NDArray[Any],
+        prepared: tuple[NDArray[np.float32], float],
+        *,
+        block: int = SCORE_BLOCK,
+    ) -> NDArray[np.float32]:
+        """Approximate inner products, widening ``block`` rows at a time to bound scratch."""
+
+        w, bias = prepared
+        out = np.empty((codes.shape[0],), dtype=np.float32)
+        for lo in range(0, codes.shape[0], block):
+            out[lo : lo + block] = codes[lo : lo + block].astype(np.float32) @ w
+        out += np.float32(bias)
+        return out
+
+
+Codec = ProductQuantizer | ScalarQuantizer
+
+
+def pack_signs(x: NDArray[np.float32]) -> NDArray[np.uint8]:
+    """Sign bits of each row, packed into ``(n, 8 * ceil(dim / 64))`` bytes (zero padded)."""
+
+    x = np.asarray(x, dtype=np.float32)
+    words = -(-int(x.shape[1]) // 64)
+    bits = np.zeros((x.shape[0], 8 * words), dtype=np.uint8)
+    packed = np.packbits(x > 0, axis=1)
+    bits[:, : packed.shape[1]] = packed
+    return bits
+
+
+def hamming(
+    bits: NDArray[np.uint8], qbits: NDArray[np.uint8], *, block: int = SCORE_BLOCK
+) -> NDArray[np.int32]:
+    """Hamming distance from ``qbits`` (one `pack_signs` row) to every row of ``bits``.
+
+    Rows are XORed and popcounted as uint64 words, ``block`` rows at a time.
+    """
+
+    q = np.ascontiguousarray(qbits, dtype=np.uint8).view(np.uint64)
+    out = np.empty((bits.shape[0],), dtype=np.int32)
+    for lo in range(0, bits.shape[0], block):
+        x = np.ascontiguousarray(bits[lo : lo + block]).view(np.uint64) ^ q
+        if _bitwise_count is not None:
+            out[lo : lo + block] = _bitwise_count(x).sum(axis=1, dtype=np.int32)
+        else:
+            out[lo : lo + block] = _POPCOUNT8[x.view(np.uint8)].sum(axis=1, dtype=np.int32)
+    return out
+
+
+@dataclass(frozen=True, slots=True)
+class BinaryQuantizer:
+    """Sign-bit codes of ``x - center``.
+
+    Centring on the corpus mean keeps the bits informative for embedders whose outputs share a
+    sign per dimension (e.g. non-negative hashed features); for zero-mean embeddings it is a
+    plain sign quantizer.
+    """
+
+    center: NDArray[np.float32]
+
+    def __post_init__(self) -> None:
+        if self.center.ndim != 1:
+            raise ValueError("center must be a 1-D array of the vector dimension")
+
+    @property
+    def dim(self) -> int:
+        return int(self.center.shape[0])
+
+    @property
+    def code_width(self) -> int:
+        return 8 * -(-self.dim // 64)
+
+    @classmethod
+    def train(cls, x: NDArray[np.float32]) -> "BinaryQuantizer":
+        x = np.asarray(x, dtype=np.float32)
+        if x.shape[0] == 0:
+            return cls(center=np.zeros((int(x.shape[1]),), dtype=np.float32))
+        return cls(center=x.mean(axis=0).astype(np.float32))
+
+    def encode(self, x: NDArray[np.float32]) -> NDArray[np.uint8]:
+        return pack_signs(np.asarray(x, dtype=np.float32) - self.center)
+
+    def distances(
+        self, bits: NDArray[np.uint8], q: NDArray[np.float32], *, block: int = SCORE_BLOCK
+    ) -> NDArray[np.int32]:
+        """Hamming distance from the code of query ``q`` to every row of ``bits``."""
+
+        return hamming(bits, self.encode(np.asarray(q)[None, :])[0], block=block)
+
+
+__all__ = [
+    "BinaryQuantizer",
+    "Codec",
+    "ProductQuantizer",
+    "SCORE_BLOCK",
+    "ScalarQuantizer",
+    "assign",
+    "hamming",
+    "kmeans",
+    "pack_signs",
+]
@@ -0,0 +1,801 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+"""Appendable indexes made of immutable segments plus tombstones (LSM-style).
+
+A `SegmentedIndex` is an ordered tuple of `Segment` s. Each segment wraps an ordinary,
+immutable index (``bm25`` or ``numpy-cosine``) and a boolean tombstone bitmap over its rows:
+
+* `SegmentedIndex.add_docs` builds one new segment from the added chunks only, so ingestion
+  cost is proportional to the delta. Chunks of a ``doc_id`` that is already indexed replace its
+  live rows (the old rows are tombstoned).
+* `SegmentedIndex.delete_doc_ids` flips tombstone bits; no segment is rewritten.
+* Retrieval fans out to every segment with live rows, over-fetching each until tombstoned rows
+  can no longer push live ones out of its top-k (`Segment.live_top_k`), and merges the lists
+  by ``(-score, chunk_id)`` — the order a single index over the live chunks would return.
+  BM25 segments score against corpus-wide statistics (`BM25Stats` over the live rows), so
+  lexical scores equal those of one index rebuilt from scratch.
+* The fingerprint composes each segment's fingerprint with a digest of its tombstones.
+
+On disk a segmented index is a directory: one v2 container per segment, named by its
+fingerprint (``seg-<fingerprint[:32]>.idx``, written once and never modified), and a
+``MANIFEST.json`` listing the segments, their deleted rows and the composed fingerprint. The
+manifest is replaced atomically, so readers always see a consistent set of segments.
+
+Segments accumulate, so `SegmentedIndex.merge` rewrites groups of them chosen by a tiered
+`MergePolicy` (or all of them) into one, dropping tombstoned rows and recomputing
+statistics; `compact` does this for an index directory under `writer_lock` and reports
+`MergeStats`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from functools import partial
+from typing import Any
+
+try:  # POSIX only; elsewhere `writer_lock` does not lock.
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+import numpy as np
+from numpy.typing import NDArray
+
+from bijux_rag.core.rag_types import Chunk, EmbeddingSpec
+from bijux_rag.rag.chunk_store import ChunkTable
+from bijux_rag.rag.index_format import VerifyMode, _chmod_default, check_verify_mode
+from bijux_rag.rag.indexes import (
+    SCHEMA_VERSION,
+    BM25Index,
+    BM25Postings,
+    BM25Stats,
+    NumpyCosineIndex,
+    _fingerprint_bytes,
+    _json_dumps,
+    _numpy_cosine_from_vectors,
+    _term_remap,
+    build_bm25_index,
+    build_numpy_cosine_index,
+    load_index,
+)
+from bijux_rag.rag.ports import Candidate, Embedder
+from bijux_rag.rag.quantization import ProductQuantizer
+from bijux_rag.rag.vocab import TermDictionary
+
+MANIFEST = "MANIFEST.json"
+LOCK = "LOCK"
+MANIFEST_FORMAT = "bijux-rag-segments"
+SEGMENT_BACKENDS = ("bm25", "numpy-cosine")
+
+
+@dataclass(frozen=True, slots=True)
+class Segment:
+    """One immutable index plus a tombstone bitmap over its rows (``True`` = deleted)."""
+
+    index: BM25Index | NumpyCosineIndex
+    deleted: NDArray[np.bool_] | None = None
+    deleted_ids: frozenset[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        n = len(self.index.chunks)
+        if self.deleted is None:
+            object.__setattr__(self, "deleted", np.zeros((n,), dtype=np.bool_))
+        elif self.deleted.shape != (n,) or self.deleted.dtype != np.bool_:
+            raise ValueError("tombstones must be a bool array with one entry per row")
+        chunks = self.index.chunks
+        ids = frozenset(chunks.chunk_id(i) for i in np.flatnonzero(self.tombstones).tolist())
+        object.__setattr__(self, "deleted_ids", ids)
+
+    @property
+    def tombstones(self) -> NDArray[np.bool_]:
+        """``deleted``, which construction always fills in."""
+
+        assert self.deleted is not None
+        return self.deleted
+
+    @property
+    def num_deleted(self) -> int:
+        return len(self.deleted_ids)
+
+    @property
+    def num_live(self) -> int:
+        return len(self.index.chunks) - self.num_deleted
+
+    def fetch_k(self, top_k: int) -> int:
+        """First over-fetch for a live top-k: at most ``top_k`` extra rows, at most all deleted."""
+
+        return top_k + min(self.num_deleted, top_k)
+
+    def live_top_k(
+        self,
+        search: Callable[[int], Sequence[Candidate]],
+        top_k: int,
+        *,
+        first: Sequence[Candidate] | None = None,
+    ) -> list[Candidate]:
+        """The ``top_k`` best live candidates of this segment.
+
+        ``search(k)`` returns the segment's top ``k`` (tombstoned rows included). The fetch
+        starts at `fetch_k` and doubles while tombstones leave fewer than ``top_k`` live rows,
+        up to ``top_k + num_deleted``, which always suffices. ``first`` is a result already
+        fetched with ``fetch_k(top_k)``.
+        """
+
+        limit = top_k + self.num_deleted
+        k = self.fetch_k(top_k)
+        cands = search(k) if first is None else first
+        while True:
+            live = [c for c in cands if c.chunk.chunk_id not in self.deleted_ids]
+            # Fewer than k results means the segment has no more matching rows.
+            if len(live) >= top_k or len(cands) < k or k >= limit:
+                return live[:top_k]
+            k = min(limit, 2 * k)
+            cands = search(k)
+
+    def tombstone_digest(self) -> str:
+        return _fingerprint_bytes(np.packbits(self.tombstones).tobytes())
+
+
+@dataclass(frozen=True, slots=True)
+class _EmbeddedQueries:
+    """Embedder serving query vectors computed once per call to every dense segment."""
+
+    spec: EmbeddingSpec
+    rows: Mapping[str, NDArray[np.float32]]
+
+    def embed_texts(self, texts: Sequence[str]) -> NDArray[np.float32]:
+        return np.stack([self.rows[t] for t in texts])
+
+
+def _embed_once(embedder: Embedder | None, queries: Sequence[str], fan_out: int) -> Embedder | None:
+    if embedder is None or fan_out < 2 or not queries:
+        return embedder
+    unique = list(dict.fromkeys(queries))
+    vecs = np.asarray(embedder.embed_texts(unique), dtype=np.float32)
+    return _EmbeddedQueries(spec=embedder.spec, rows=dict(zip(unique, vecs, strict=True)))
+
+
+@dataclass(frozen=True, slots=True)
+class SegmentedIndex:
+    """An index grown by appending segments; see the module docstring.
+
+    Instances are immutable: `add_docs` and `delete_doc_ids` return a new index that shares
+    the untouched segments with this one.
+    """
+
+    segments: tuple[Segment, ...]
+    _views: tuple[BM25Index | NumpyCosineIndex, ...] | None = field(
+        init=False, default=None, repr=False, compare=False
+    )
+    _fingerprint: str | None = field(init=False, default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not self.segments:
+            raise ValueError("a segmented index needs at least one segment")
+        backend = self.segments[0].index.backend
+        if backend not in SEGMENT_BACKENDS:
+            raise ValueError(f"backend cannot be segmented: {backend}")
+        if any(s.index.backend != backend for s in self.segments):
+            raise ValueError("all segments must use the same backend")
+
+    @classmethod
+    def from_index(cls, index: BM25Index | NumpyCosineIndex) -> "SegmentedIndex":
+        return cls(segments=(Segment(index=index),))
+
+    @property
+    def backend(self) -> str:
+        return self.segments[0].index.backend
+
+    @property
+    def spec(self) -> EmbeddingSpec | None:
+        """Embedding spec of dense segments (``None`` for BM25)."""
+
+        return getattr(self.segments[0].index, "spec", None)
+
+    @property
+    def num_live(self) -> int:
+        return sum(s.num_live for s in self.segments)
+
+    @property
+    def fingerprint(self) -> str:
+        fingerprint = self._fingerprint
+        if fingerprint is None:
+            fingerprint = self._compute_fingerprint()
+            object.__setattr__(self, "_fingerprint", fingerprint)
+        return fingerprint
+
+    def _compute_fingerprint(self) -> str:
+        meta = {
+            "schema": SCHEMA_VERSION,
+            "backend": f"segmented-{self.backend}",
+            "segments": [[s.index.fingerprint, s.tombstone_digest()] for s in self.segments],
+        }
+        return _fingerprint_bytes(_json_dumps(meta))
+
+    # ------------- Mutation (returns a new index) -------------
+    def add_docs(
+        self, *, chunks: Sequence[Chunk], embedder: Embedder | None = None
+    ) -> "SegmentedIndex":
+        """Append ``chunks`` as one new segment built with this index's options.
+
+        Live rows of any ``doc_id`` present in ``chunks`` are tombstoned first (upsert). Dense
+        segments need ``embedder`` and it must produce this index's embedding spec.
+        """
+
+        if not chunks:
+            return self
+        base = self.delete_doc_ids({c.doc_id for c in chunks})
+        segment = Segment(index=self._build_segment(chunks, embedder))
+        return SegmentedIndex(segments=(*base.segments, segment))
+
+    def _build_segment(
+        self, chunks: Sequence[Chunk], embedder: Embedder | None
+    ) -> BM25Index | NumpyCosineIndex:
+        first = self.segments[0].index
+        if isinstance(first, BM25Index):
+            return build_bm25_index(
+                chunks=chunks,
+                buckets=first.buckets,
+                k1=first.k1,
+                b=first.b,
+                vocab=first.vocab_mode,
+                postings_codec=first.postings_codec,
+            )
+        if embedder is None:
+            raise ValueError("adding to a dense segmented index needs an embedder")
+        index = build_numpy_cosine_index(
+            chunks=chunks, embedder=embedder, **_dense_options(self.segments)
+        )
+        if (index.spec.model, index.spec.dim) != (first.spec.model, first.spec.dim):
+            raise ValueError("embedder spec does not match the segmented index")
+        return index
+
+    def delete_doc_ids(self, doc_ids: Iterable[str]) -> "SegmentedIndex":
+        """Tombstone every row of the given documents; segments themselves are not rewritten."""
+
+        wanted = set(doc_ids)
+        if not wanted:
+            return self
+        segments: list[Segment] = []
+        changed = False
+        for seg in self.segments:
+            rows = seg.index.chunks.doc_rows(wanted)
+            if rows.size == 0 or seg.tombstones[rows].all():
+                segments.append(seg)
+                continue
+            deleted = seg.tombstones.copy()
+            deleted[rows] = True
+            segments.append(Segment(index=seg.index, deleted=deleted))
+            changed = True
+        return SegmentedIndex(segments=tuple(segments)) if changed else self
+
+    # ------------- Retrieval -------------
+    def _segment_views(self) -> tuple[BM25Index | NumpyCosineIndex, ...]:
+        """Per-segment indexes to query; BM25 ones score against corpus-wide statistics."""
+
+        views = self._views
+        if views is None:
+            views = tuple(s.index for s in self.segments)
+            clean = all(s.num_deleted == 0 for s in self.segments)
+            if self.backend == "bm25" and not (len(views) == 1 and clean):
+                lexical = _bm25_indexes(self.segments)
+                stats = BM25Stats.of(lexical, deleted=[s.tombstones for s in self.segments])
+                views = tuple(index.with_stats(stats) for index in lexical)
+            object.__setattr__(self, "_views", views)
+        return views
+
+    def _fan_out(self) -> list[tuple[Segment, BM25Index | NumpyCosineIndex]]:
+        return [
+            (seg, view)
+            for seg, view in zip(self.segments, self._segment_views(), strict=True)
+            if seg.num_live
+        ]
+
+    @staticmethod
+    def _merge(parts: Iterable[Sequence[Candidate]], top_k: int) -> list[Candidate]:
+        pooled = [c for cands in parts for c in cands]
+        pooled.sort(key=lambda c: (-c.score, c.chunk.chunk_id))
+        return pooled[:top_k]
+
+    def retrieve(
+        self,
+        *,
+        query: str,
+        top_k: int,
+        filters: Mapping[str, str] | None = None,
+        embedder: Embedder | None = None,
+        **search: Any,
+    ) -> list[Candidate]:
+        """Top-k over the live rows of all segments.
+
+        ``search`` carries backend query knobs (``mode``, ``oversample``, ``workers``, ...) to
+        every dense segment.
+        """
+
+        top_k = int(top_k)
+        if top_k <= 0:
+            return []
+        fan_out = self._fan_out()
+        embedder = _embed_once(embedder, [query], len(fan_out))
+        parts = []
+        for seg, view in fan_out:
+
+            def search_one(k: int, view: BM25Index | NumpyCosineIndex = view) -> list[Candidate]:
+                return view.retrieve(
+                    query=query, top_k=k, filters=filters, embedder=embedder, **search
+                )
+
+            parts.append(seg.live_top_k(search_one, top_k))
+        return self._merge(parts, top_k)
+
+    def retrieve_many(
+        self,
+        *,
+        queries: Sequence[str],
+        top_k: int,
+        filters: Mapping[str, str] | None = None,
+        embedder: Embedder | None = None,
+        **search: Any,
+    ) -> list[list[Candidate]]:
+        """`retrieve` for a batch of queries; each segment scores the whole batch at once.
+
+        Queries are embedded once and the vectors shared by all dense segments.
+        """
+
+        top_k = int(top_k)
+        if top_k <= 0:
+            return [[] for _ in queries]
+        fan_out = self._fan_out()
+        embedder = _embed_once(embedder, queries, len(fan_out))
+        per_segment = []
+        for seg, view in fan_out:
+            first = view.retrieve_many(
+                queries=queries,
+                top_k=seg.fetch_k(top_k),
+                filters=filters,
+                embedder=embedder,
+                **search,
+            )
+
+            def search_one(
+                k: int, q: str, view: BM25Index | NumpyCosineIndex = view
+            ) -> list[Candidate]:
+                return view.retrieve(query=q, top_k=k, filters=filters, embedder=embedder, **search)
+
+            per_segment.append(
+                [
+                    seg.live_top_k(partial(search_one, q=q), top_k, first=cands)
+                    for q, cands in zip(queries, first, strict=True)
+                ]
+            )
+        return [
+            self._merge((results[i] for results in per_segment), top_k) for i in range(len(queries))
+        ]
+
+    # ------------- Persistence -------------
+    def save(self, path: str) -> None:
+        """Write new segment files and atomically replace ``MANIFEST.json`` under ``path``."""
+
+        os.makedirs(path, exist_ok=True)
+        entries = []
+        for seg in self.segments:
+            name = f"seg-{seg.index.fingerprint[:32]}.idx"
+            target = os.path.join(path, name)
+            # Segment files are content-addressed and immutable: never rewrite one.
+            if not os.path.exists(target):
+                seg.index.save(target)
+            entries.append(
+                {
+                    "file": name,
+                    "fingerprint": seg.index.fingerprint,
+                    "deleted": np.flatnonzero(seg.tombstones).tolist(),
+                }
+            )
+        manifest = {
+            "format": MANIFEST_FORMAT,
+            "schema_version": SCHEMA_VERSION,
+            "backend": self.backend,
+            "fingerprint": self.fingerprint,
+            "segments": entries,
+        }
+        _write_manifest(path, manifest)
+
+    @staticmethod
+    def load(path: str, *, verify: VerifyMode = "full") -> "SegmentedIndex":
+        """Load the segments listed in ``path/MANIFEST.json``.
+
+        ``verify`` applies to every segment file; the composed fingerprint is always checked
+        against the manifest. If a listed segment file has vanished because a compaction
+        swapped the manifest meanwhile, the new manifest is read instead.
+        """
+
+        check_verify_mode(verify)
+        manifest = _read_manifest(path)
+        while True:
+            try:
+                return SegmentedIndex._from_manifest(path, manifest, verify=verify)
+            except FileNotFoundError:
+                latest = _read_manifest(path)
+                if latest == manifest:
+                    raise
+                manifest = latest
+
+    @staticmethod
+    def _from_manifest(
+        path: str, manifest: Mapping[str, Any], *, verify: VerifyMode
+    ) -> "SegmentedIndex":
+        if manifest.get("format") != MANIFEST_FORMAT:
+            raise ValueError("not a segmented index manifest")
+        if manifest.get("schema_version") != SCHEMA_VERSION:
+            raise ValueError("unsupported index schema version")
+        segments = []
+        for entry in manifest["segments"]:
+            index = load_index(os.path.join(path, entry["file"]), verify=verify)
+            if not isinstance(index, (BM25Index, NumpyCosineIndex)):
+                raise ValueError(f"backend cannot be segmented: {index.backend}")
+            if index.fingerprint != entry["fingerprint"]:
+                raise ValueError(f"segment fingerprint mismatch: {entry['file']}")
+            deleted = np.zeros((len(index.chunks),), dtype=np.bool_)
+            deleted[np.asarray(entry["deleted"], dtype=np.int64)] = True
+            segments.append(Segment(index=index, deleted=deleted))
+        out = SegmentedIndex(segments=tuple(segments))
+        if out.backend != manifest.get("backend") or out.fingerprint != manifest.get("fingerprint"):
+            raise ValueError("segmented index fingerprint mismatch on load (possible corruption)")
+        return out
+
+    # ------------- Compaction -------------
+    def merge(
+        self, policy: MergePolicy | None = None, *, force: bool = False
+    ) -> tuple["SegmentedIndex", MergeStats]:
+        """Merge segments chosen by ``policy`` (default `MergePolicy()`), or all with ``force``.
+
+        Each merge rewrites the live rows of its segments as one new segment whose statistics
+        (BM25 ``df``/``avg_dl``, codecs) are recomputed from those rows; tombstoned rows are
+        dropped, as are segments without live rows. Merged segments take the place of the
+        first segment they replace. ``bytes_rewritten`` is left 0 (see `compact`).
+        """
+
+        t0 = time.perf_counter()
+        policy = MergePolicy() if policy is None else policy
+        groups: tuple[tuple[int, ...], ...]
+        if force:
+            live = [i for i, seg in enumerate(self.segments) if seg.num_live]
+            needed = len(live) > 1 or any(self.segments[i].num_deleted for i in live)
+            groups = (tuple(live),) if needed else ()
+        else:
+            groups = policy.plan(self.segments)
+        merged_at = {group[0]: group for group in groups}
+        in_group = {i for group in groups for i in group}
+        segments: list[Segment] = []
+        rows_merged = rows_dropped = 0
+        for i, seg in enumerate(self.segments):
+            if i in merged_at:
+                parts = [self.segments[j] for j in merged_at[i]]
+                segments.append(Segment(index=_merge_segments(parts, self.segments)))
+                rows_merged += sum(p.num_live for p in parts)
+                rows_dropped += sum(p.num_deleted for p in parts)
+            elif i not in in_group:
+                if seg.num_live == 0:
+                    rows_dropped += seg.num_deleted
+                    continue
+                segments.append(seg)
+        if not segments:
+            # Everything is deleted: keep one (empty) segment so the index stays well-formed.
+            segments.append(self.segments[-1])
+            rows_dropped -= self.segments[-1].num_deleted
+        if not groups and len(segments) == len(self.segments):
+            out = self
+        else:
+            out = SegmentedIndex(segments=tuple(segments))
+        return out, MergeStats(
+            segments_before=len(self.segments),
+            segments_after=len(out.segments),
+            merges=len(groups),
+            rows_merged=rows_merged,
+            rows_dropped=rows_dropped,
+            bytes_rewritten=0,
+            seconds=time.perf_counter() - t0,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class MergePolicy:
+    """Tiered merge policy.
+
+    Segments are bucketed by live row count into tiers: tier 0 holds segments below
+    ``floor_rows``, tier ``t`` those with ``floor_rows * factor**(t - 1)`` up to
+    ``floor_rows * factor**t`` rows. A tier holding ``factor`` or more segments is merged into
+    one (which lands a tier up), so each row is rewritten about ``log_factor(n)`` times and
+    the segment count stays logarithmic. A segment whose tombstoned fraction exceeds
+    ``max_deleted_ratio`` is rewritten on its own to expunge deletes.
+    """
+
+    factor: int = 4
+    floor_rows: int = 1000
+    max_deleted_ratio: float = 0.25
+
+    def __post_init__(self) -> None:
+        if self.factor < 2:
+            raise ValueError("factor must be >= 2")
+        if self.floor_rows < 1:
+            raise ValueError("floor_rows must be >= 1")
+        if not 0.0 < self.max_deleted_ratio <= 1.0:
+            raise ValueError("max_deleted_ratio must be in (0, 1]")
+
+    def tier(self, live_rows: int) -> int:
+        tier = 0
+        bound = self.floor_rows
+        while live_rows >= bound:
+            tier += 1
+            bound *= self.factor
+        return tier
+
+    def plan(self, segments: Sequence[Segment]) -> tuple[tuple[int, ...], ...]:
+        """Groups of segment positions to merge (each group becomes one segment)."""
+
+        tiers: dict[int, list[int]] = {}
+        for i, seg in enumerate(segments):
+            if seg.num_live:
+                tiers.setdefault(self.tier(seg.num_live), []).append(i)
+        groups = [tuple(members) for members in tiers.values() if len(members) >= self.factor]
+        grouped = {i for group in groups for i in group}
+        for i, seg in enumerate(segments):
+            total = len(seg.index.chunks)
+            if (
+                i not in grouped
+                and seg.num_live
+                and seg.num_deleted > self.max_deleted_ratio * total
+            ):
+                groups.append((i,))
+        return tuple(sorted(groups))
+
+
+@dataclass(frozen=True, slots=True)
+class MergeStats:
+    """What one `SegmentedIndex.merge` / `compact` pass did."""
+
+    segments_before: int
+    segments_after: int
+    merges: int
+    rows_merged: int
+    rows_dropped: int
+    bytes_rewritten: int
+    seconds: float
+
+
+def _live_order(segments: Sequence[Segment]) -> tuple[list[NDArray[np.int64]], NDArray[np.int64]]:
+    """Live rows per segment and, for each, its position in the merged chunk id order."""
+
+    live = [np.flatnonzero(~seg.tombstones) for seg in segments]
+    digests = np.concatenate(
+        [np.ascontiguousarray(seg.index.chunks.digests[rows]) for seg, rows in zip(segments, live)]
+    )
+    # Raw sha256 digests sort like their hex chunk ids (the order builders use).
+    order = np.argsort(digests.view("S32").ravel(), kind="stable")
+    position = np.empty_like(order)
+    position[order] = np.arange(order.size)
+    return live, position
+
+
+def _bm25_indexes(segments: Sequence[Segment]) -> list[BM25Index]:
+    return [seg.index for seg in segments if isinstance(seg.index, BM25Index)]
+
+
+def _dense_indexes(segments: Sequence[Segment]) -> list[NumpyCosineIndex]:
+    return [seg.index for seg in segments if isinstance(seg.index, NumpyCosineIndex)]
+
+
+def _dense_options(segments: Sequence[Segment]) -> dict[str, Any]:
+    """`build_numpy_cosine_index` options that reproduce the segments' layout."""
+
+    dense = _dense_indexes(segments)
+    first = dense[0]
+    codec = first.codec
+    pq_ksub = 256
+    if isinstance(codec, ProductQuantizer):
+        # Codebooks are capped at the rows they were trained on; a segment trained below its
+        # row count shows the configured ``pq_ksub``.
+        capped = [
+            index.codec.ksub
+            for index in dense
+            if isinstance(index.codec, ProductQuantizer) and index.codec.ksub < len(index.chunks)
+        ]
+        pq_ksub = capped[0] if capped else pq_ksub
+    return {
+        "pq_subvectors": codec.m if isinstance(codec, ProductQuantizer) else None,
+        "pq_ksub": pq_ksub,
+        "storage_dtype": first.spec.storage_dtype,
+        "binary": first.binary is not None,
+        "coarse_dim": first.spec.coarse_dim,
+        "oversample": first.oversample,
+    }
+
+
+def _merge_segments(
+    segments: Sequence[Segment], siblings: Sequence[Segment]
+) -> BM25Index | NumpyCosineIndex:
+    """One index over the live rows of ``segments``, equal to a rebuild from their chunks.
+
+    BM25 postings are remapped and concatenated rather than re-tokenized; dense vectors are
+    copied rather than re-embedded, and codecs are retrained on the merged rows with the
+    options of all ``siblings`` (the index's segments).
+    """
+
+    live, position = _live_order(segments)
+    pooled = [seg.index.chunks[i] for seg, rows in zip(segments, live) for i in rows.tolist()]
+    # Pooled chunk j lands at position[j].
+    ordered = [pooled[j] for j in np.argsort(position).tolist()]
+    if isinstance(segments[0].index, BM25Index):
+        return _merge_bm25(segments, live, position, ordered)
+    dense = _dense_indexes(segments)
+    first = dense[0]
+    vectors = np.empty((len(ordered), first.vectors.shape[1]), dtype=np.float32)
+    vectors[position] = np.concatenate(
+        [np.asarray(index.vectors[rows]) for index, rows in zip(dense, live)]
+    )
+    return _numpy_cosine_from_vectors(
+        ordered, vectors, first.spec, seed=0, **_dense_options(siblings)
+    )
+
+
+def _merge_bm25(
+    segments: Sequence[Segment],
+    live: Sequence[NDArray[np.int64]],
+    position: NDArray[np.int64],
+    ordered: Sequence[Chunk],
+) -> BM25Index:
+    lexical = _bm25_indexes(segments)
+    first = lexical[0]
+    buckets = first.buckets
+    terms: list[str] | None = None
+    remap: list[NDArray[np.int64]] | None = None
+    if first.vocab is not None:
+        # Exact vocabularies: renumber every segment's terms into their sorted union.
+        local = [index.vocab.terms() for index in lexical if index.vocab is not None]
+        terms = sorted(set().union(*local))
+        remap = _term_remap(terms, local)
+        buckets = len(terms)
+    doc_len = np.empty((position.size,), dtype=np.int32)
+    parts_bucket, parts_row, parts_tf = [], [], []
+    offset = 0
+    for i, (index, rows) in enumerate(zip(lexical, live)):
+        row_map = np.full((len(index.chunks),), -1, dtype=np.int64)
+        row_map[rows] = position[offset : offset + rows.size]
+        offset += rows.size
+        doc_len[row_map[rows]] = index.doc_len[rows]
+        postings = index._csr_postings()
+        ids = np.arange(buckets, dtype=np.int64) if remap is None else remap[i]
+        bucket_of = np.repeat(ids, np.diff(postings.indptr))
+        new_rows = row_map[postings.doc_ids]
+        keep = new_rows >= 0
+        parts_bucket.append(bucket_of[keep])
+        parts_row.append(new_rows[keep])
+        parts_tf.append(np.asarray(postings.tfs)[keep])
+    bucket = np.concatenate(parts_bucket)
+    row = np.concatenate(parts_row)
+    order = np.lexsort((row, bucket))
+    # A row appears at most once per bucket, so posting counts are document frequencies.
+    df = np.bincount(bucket, minlength=buckets).astype(np.int32)
+    vocab = None
+    if terms is not None:
+        # Drop terms that only occurred in deleted rows, as a rebuild would. They have no
+        # postings, so `order` and the remaining counts are unaffected.
+        used = df > 0
+        terms = [t for t, u in zip(terms, used.tolist()) if u]
+        df, buckets = df[used], len(terms)
+        vocab = TermDictionary.build(terms)
+    indptr = np.zeros((buckets + 1,), dtype=np.int64)
+    np.cumsum(df, out=indptr[1:])
+    return BM25Index(
+        chunks=ChunkTable.from_chunks(ordered),
+        buckets=buckets,
+        df=df,
+        tfs=None,
+        doc_len=doc_len,
+        avg_dl=float(doc_len.mean()),
+        k1=first.k1,
+        b=first.b,
+        postings=BM25Postings(
+            indptr=indptr,
+            doc_ids=row[order].astype(np.int32),
+            tfs=np.concatenate(parts_tf)[order].astype(np.int32),
+        ),
+        vocab=vocab,
+        postings_codec=first.postings_codec,
+    )
+
+
+def _read_manifest(path: str) -> dict[str, Any]:
+    with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+        manifest: dict[str, Any] = json.load(f)
+    return manifest
+
+
+def _write_manifest(path: str, manifest: Mapping[str, Any]) -> None:
+    """Replace ``path/MANIFEST.json`` atomically."""
+
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-manifest-", dir=path)
+    try:
+        _chmod_default(fd)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp, os.path.join(path, MANIFEST))
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+@contextmanager
+def writer_lock(path: str) -> Iterator[None]:
+    """Serialize load-modify-save cycles (add, delete, compact) on one index directory.
+
+    Readers never need it: they only follow the atomically replaced manifest. On platforms
+    without ``fcntl`` this is a no-op.
+    """
+
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, LOCK), "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def compact(
+    path: str,
+    policy: MergePolicy | None = None,
+    *,
+    force: bool = False,
+    verify: VerifyMode = "none",
+) -> MergeStats:
+    """Merge the segments of the index directory ``path`` in place.
+
+    Merged segments are written to new files before the manifest is swapped, so concurrent
+    readers see either the old or the new segment set, never a mix. Segment files no longer
+    listed are then deleted (readers that already mapped them keep their view on POSIX).
+    """
+
+    t0 = time.perf_counter()
+    with writer_lock(path):
+        index = SegmentedIndex.load(path, verify=verify)
+        merged, stats = index.merge(policy, force=force)
+        if merged is index:
+            return stats
+        before = set(os.listdir(path))
+        merged.save(path)
+        written = set(os.listdir(path)) - before
+        listed = {entry["file"] for entry in _read_manifest(path)["segments"]}
+        for name in before:
+            if name.startswith("seg-") and name not in listed:
+                os.unlink(os.path.join(path, name))
+        return replace(
+            stats,
+            bytes_rewritten=sum(
+                os.path.getsize(os.path.join(path, n)) for n in written if n in listed
+            ),
+            seconds=time.perf_counter() - t0,
+        )
+
+
+__all__ = [
+    "MANIFEST",
+    "SEGMENT_BACKENDS",
+    "MergePolicy",
+    "MergeStats",
+    "Segment",
+    "SegmentedIndex",
+    "compact",
+    "writer_lock",
+]
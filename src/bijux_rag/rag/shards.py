@@ -0,0 +1,437 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+"""Indexes partitioned into shards by a stable hash of ``doc_id``.
+
+A `ShardedIndex` holds N ordinary indexes. `build_sharded_index` sends every chunk to shard
+`shard_of` ``(doc_id, N)``, so all chunks of a document live in one shard and a document's
+shard never depends on the rest of the corpus. Retrieval asks each shard for its top-k
+and merges the lists by ``(-score, chunk_id)``. Shards hold disjoint rows, so the merged list
+is the top-k of the whole corpus:
+
+* BM25 shards score against corpus-wide statistics (`BM25Stats` over all shards), so lexical
+  scores equal those of one index built over every chunk.
+* Exact dense shards (``numpy-cosine`` over float32 vectors) return the same scores as one
+  index; compressed or approximate shards (PQ, IVF, HNSW) keep their per-shard accuracy.
+* Hybrid shards are not fused one by one: each arm is fetched from every shard (the lexical
+  arm against corpus-wide statistics), merged across shards, and the two merged lists are
+  fused once, so rankings match one hybrid index.
+
+Shards are queried concurrently. By default they run on a thread pool in this process (numpy
+releases the GIL while scoring). An index loaded from disk can instead be served by a pool
+of worker processes (`ShardedIndex.load` with ``processes=N``); each worker memory-maps every
+shard file once at start-up, so page-cache memory is shared, and returns plain tuples that
+are turned back into candidates here. Queries are embedded once, in the calling process.
+
+On disk a sharded index is a directory of v2 containers (``shard-0000.idx``, ...; empty
+shards have no file) plus a ``MANIFEST.json`` with the shard count, the per-shard
+fingerprints and the composed fingerprint.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any
+
+import numpy as np
+
+from bijux_rag.core.rag_types import Chunk, EmbeddingSpec
+from bijux_rag.rag.index_format import VerifyMode, check_verify_mode
+from bijux_rag.rag.indexes import (
+    SCHEMA_VERSION,
+    AnyIndex,
+    BM25Index,
+    BM25Stats,
+    HybridIndex,
+    _fingerprint_bytes,
+    _json_dumps,
+    _shared_pool,
+    load_index,
+)
+from bijux_rag.rag.ports import Candidate, Embedder
+from bijux_rag.rag.segments import MANIFEST, _EmbeddedQueries, _read_manifest, _write_manifest
+
+SHARDS_FORMAT = "bijux-rag-shards"
+_FUSION_OPTIONS = ("fusion", "rrf_k", "lexical_k", "dense_k", "lexical_weight", "dense_weight")
+
+
+def shard_of(doc_id: str, shards: int) -> int:
+    """Shard of ``doc_id`` among ``shards``: SHA-256 of the id, first 8 bytes, modulo."""
+
+    digest = hashlib.sha256(doc_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % int(shards)
+
+
+def build_sharded_index(
+    *, chunks: Sequence[Chunk], shards: int, build: Callable[[Sequence[Chunk]], AnyIndex]
+) -> "ShardedIndex":
+    """Partition ``chunks`` by `shard_of` and build each non-empty part with ``build``."""
+
+    shards = int(shards)
+    if shards < 1:
+        raise ValueError("shards must be >= 1")
+    if not chunks:
+        raise ValueError("cannot build a sharded index without chunks")
+    parts: list[list[Chunk]] = [[] for _ in range(shards)]
+    for c in chunks:
+        parts[shard_of(c.doc_id, shards)].append(c)
+    return ShardedIndex(shards=tuple(build(part) if part else None for part in parts))
+
+
+# ------------- Worker processes -------------
+_WORKER_SHARDS: dict[int, AnyIndex] = {}
+
+# Candidates carry read-only mappings, so they cross process boundaries as plain tuples:
+# (doc_id, text, start, end, chunk metadata, embedding, score, candidate metadata).
+_Wire = tuple[str, str, int, int, dict, tuple, float, dict]
+
+
+def _with_stats(index: AnyIndex, stats: BM25Stats | None) -> AnyIndex:
+    """``index`` with its BM25 scoring (a hybrid's lexical arm) against ``stats``."""
+
+    if stats is not None and isinstance(index, (BM25Index, HybridIndex)):
+        return index.with_stats(stats)
+    return index
+
+
+def _init_worker(
+    path: str, files: Sequence[tuple[int, str]], stats: tuple[Any, ...] | None
+) -> None:
+    shared = None if stats is None else BM25Stats(*stats)
+    for i, name in files:
+        _WORKER_SHARDS[i] = _with_stats(load_index(os.path.join(path, name), verify="none"), shared)
+
+
+def _worker_call(shard: int, method: str, kwargs: Mapping[str, Any]) -> Any:
+    """Run ``retrieve_many`` (or a hybrid shard's ``retrieve_arms``) on a worker's shard."""
+
+    results = getattr(_WORKER_SHARDS[shard], method)(**kwargs)
+    return _map_results(results, _to_wire)
+
+
+def _map_results(results: Any, fn: Callable[[Any], Any]) -> Any:
+    """Apply ``fn`` to every candidate of per-query lists, or of a tuple of such (arms)."""
+
+    if isinstance(results, tuple):
+        return tuple(_map_results(r, fn) for r in results)
+    return [[fn(c) for c in cands] for cands in results]
+
+
+def _merge(per_shard: Sequence[Sequence[Sequence[Candidate]]], k: int) -> list[list[Candidate]]:
+    """Per query, the top ``k`` of all shards' lists by ``(-score, chunk_id)``."""
+
+    out = []
+    for i in range(len(per_shard[0])):
+        pooled = [c for results in per_shard for c in results[i]]
+        pooled.sort(key=lambda c: (-c.score, c.chunk.chunk_id))
+        out.append(pooled[:k])
+    return out
+
+
+def _to_wire(c: Candidate) -> _Wire:
+    ch = c.chunk
+    return (
+        ch.doc_id,
+        ch.text,
+        ch.start,
+        ch.end,
+        dict(ch.metadata),
+        ch.embedding,
+        float(c.score),
+        dict(c.metadata),
+    )
+
+
+def _from_wire(w: _Wire, spec: EmbeddingSpec | None) -> Candidate:
+    doc_id, text, start, end, metadata, embedding, score, cand_meta = w
+    chunk = Chunk(
+        doc_id=doc_id,
+        text=text,
+        start=start,
+        end=end,
+        metadata=metadata,
+        embedding=embedding,
+        embedding_spec=spec,
+    )
+    return Candidate(chunk=chunk, score=score, metadata=cand_meta)
+
+
+@dataclass(frozen=True, slots=True)
+class ShardedIndex:
+    """N indexes over disjoint documents, queried together; see the module docstring.
+
+    ``shards[i]`` is the index of shard ``i`` (``None`` when no document hashes to it).
+    ``processes`` > 0 serves queries from worker processes that load the shard files under
+    ``path``; call `close` (or use the index as a context manager) to stop them.
+    """
+
+    shards: tuple[AnyIndex | None, ...]
+    processes: int = 0
+    path: str | None = field(default=None, compare=False)
+    _views: tuple[AnyIndex | None, ...] | None = field(
+        init=False, default=None, repr=False, compare=False
+    )
+    _fingerprint: str | None = field(init=False, default=None, repr=False, compare=False)
+    _pool: list[ProcessPoolExecutor] = field(
+        init=False, default_factory=list, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        live = [s for s in self.shards if s is not None]
+        if not live:
+            raise ValueError("a sharded index needs at least one non-empty shard")
+        if any(s.backend != live[0].backend for s in live):
+            raise ValueError("all shards must use the same backend")
+        first = live[0]
+        if isinstance(first, HybridIndex):
+            meta = first._fusion_meta()
+            if any(isinstance(s, HybridIndex) and s._fusion_meta() != meta for s in live):
+                raise ValueError("all hybrid shards must use the same fusion options")
+        if self.processes < 0:
+            raise ValueError("processes must be >= 0")
+        if self.processes and self.path is None:
+            raise ValueError("worker processes need a saved index (load it with a path)")
+
+    @property
+    def num_shards(self) -> int:
+        return len(self.shards)
+
+    @property
+    def backend(self) -> str:
+        return self._live()[0][1].backend
+
+    @property
+    def spec(self) -> EmbeddingSpec | None:
+        """Embedding spec of dense shards (``None`` for BM25)."""
+
+        return getattr(self._live()[0][1], "spec", None)
+
+    @property
+    def fingerprint(self) -> str:
+        fingerprint = self._fingerprint
+        if fingerprint is None:
+            fingerprint = self._compute_fingerprint()
+            object.__setattr__(self, "_fingerprint", fingerprint)
+        return fingerprint
+
+    def _compute_fingerprint(self) -> str:
+        meta = {
+            "schema": SCHEMA_VERSION,
+            "backend": f"sharded-{self.backend}",
+            "shards": [None if s is None else s.fingerprint for s in self.shards],
+        }
+        return _fingerprint_bytes(_json_dumps(meta))
+
+    def _live(self) -> list[tuple[int, AnyIndex]]:
+        return [(i, s) for i, s in enumerate(self.shards) if s is not None]
+
+    def _stats(self) -> BM25Stats | None:
+        live = [s for _, s in self._live()]
+        if len(live) == 1:
+            return None
+        if self.backend == "bm25":
+            return BM25Stats.of([s for s in live if isinstance(s, BM25Index)])
+        if self.backend == "hybrid":
+            return BM25Stats.of([s.lexical for s in live if isinstance(s, HybridIndex)])
+        return None
+
+    def _shard_views(self) -> tuple[AnyIndex | None, ...]:
+        """Shards to query in this process; BM25 (and hybrid lexical) arms score against
+        corpus-wide statistics."""
+
+        views = self._views
+        if views is None:
+            stats = self._stats()
+            views = tuple(None if s is None else _with_stats(s, stats) for s in self.shards)
+            object.__setattr__(self, "_views", views)
+        return views
+
+    # ------------- Retrieval -------------
+    def retrieve(
+        self,
+        *,
+        query: str,
+        top_k: int,
+        filters: Mapping[str, str] | None = None,
+        embedder: Embedder | None = None,
+        **search: Any,
+    ) -> list[Candidate]:
+        """Top-k over all shards; ``search`` knobs (``ef``, ``workers``, ...) go to every shard."""
+
+        return self.retrieve_many(
+            queries=[query], top_k=top_k, filters=filters, embedder=embedder, **search
+        )[0]
+
+    def retrieve_many(
+        self,
+        *,
+        queries: Sequence[str],
+        top_k: int,
+        filters: Mapping[str, str] | None = None,
+        embedder: Embedder | None = None,
+        **search: Any,
+    ) -> list[list[Candidate]]:
+        """`retrieve` for a batch of queries; each shard scores the whole batch at once.
+
+        Hybrid shards take the fusion overrides of `HybridIndex.retrieve_many` too.
+        """
+
+        queries = list(queries)
+        top_k = int(top_k)
+        plan = None
+        first = self._live()[0][1]
+        if isinstance(first, HybridIndex):
+            options = {k: search.pop(k) for k in _FUSION_OPTIONS if k in search}
+            plan = first._plan(top_k, **options)
+        if top_k <= 0 or not queries:
+            return [[] for _ in queries]
+        if embedder is not None:
+            unique = list(dict.fromkeys(queries))
+            vecs = np.asarray(embedder.embed_texts(unique), dtype=np.float32)
+            embedder = _EmbeddedQueries(
+                spec=embedder.spec, rows=dict(zip(unique, vecs, strict=True))
+            )
+        if plan is None:
+            per_shard = self._per_shard(
+                "retrieve_many",
+                dict(queries=queries, top_k=top_k, filters=filters, embedder=embedder, **search),
+            )
+            return _merge(per_shard, top_k)
+        per_shard = self._per_shard(
+            "retrieve_arms",
+            dict(
+                queries=queries,
+                lexical_k=plan.lexical_k,
+                dense_k=plan.dense_k,
+                filters=filters,
+                embedder=embedder,
+                **search,
+            ),
+        )
+        lexical = _merge([arms[0] for arms in per_shard], plan.lexical_k)
+        dense = _merge([arms[1] for arms in per_shard], plan.dense_k)
+        return plan.fuse(lexical, dense)
+
+    def _per_shard(self, method: str, kwargs: dict[str, Any]) -> list[Any]:
+        """``method(**kwargs)`` on every non-empty shard, in threads or worker processes."""
+
+        if self.processes:
+            pool = self._process_pool()
+            futures = [(s, pool.submit(_worker_call, i, method, kwargs)) for i, s in self._live()]
+            return [
+                _map_results(f.result(), partial(_from_wire, spec=getattr(s, "spec", None)))
+                for s, f in futures
+            ]
+        views = [v for v in self._shard_views() if v is not None]
+
+        def run(view: AnyIndex) -> Any:
+            return getattr(view, method)(**kwargs)
+
+        if len(views) == 1:
+            return [run(views[0])]
+        # Kept apart from the scoring pool: a shard query may itself wait on scoring tasks
+        # (``numpy-cosine`` with ``workers``), so sharing one bounded pool could deadlock.
+        return list(_shared_pool("shard").map(run, views))
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        if not self._pool:
+            # __post_init__ only allows worker processes for an index loaded from a path.
+            assert self.path is not None
+            stats = self._stats()
+            files = [(i, _shard_file(i)) for i, _ in self._live()]
+            init = None if stats is None else (stats.n, stats.df, stats.avg_dl, stats.terms)
+            self._pool.append(
+                ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    initializer=_init_worker,
+                    initargs=(self.path, files, init),
+                )
+            )
+        return self._pool[0]
+
+    def close(self) -> None:
+        """Stop worker processes, if any were started."""
+
+        while self._pool:
+            self._pool.pop().shutdown()
+
+    def __enter__(self) -> "ShardedIndex":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    # ------------- Persistence -------------
+    def save(self, path: str) -> None:
+        """Write one file per non-empty shard and ``MANIFEST.json`` under ``path``."""
+
+        os.makedirs(path, exist_ok=True)
+        entries: list[dict[str, str | None]] = []
+        for i, s in enumerate(self.shards):
+            if s is None:
+                entries.append({"file": None, "fingerprint": None})
+                continue
+            s.save(os.path.join(path, _shard_file(i)))
+            entries.append({"file": _shard_file(i), "fingerprint": s.fingerprint})
+        manifest = {
+            "format": SHARDS_FORMAT,
+            "schema_version": SCHEMA_VERSION,
+            "backend": self.backend,
+            "fingerprint": self.fingerprint,
+            "shards": entries,
+        }
+        _write_manifest(path, manifest)
+
+    @staticmethod
+    def load(path: str, *, verify: VerifyMode = "full", processes: int = 0) -> "ShardedIndex":
+        """Load the shards listed in ``path/MANIFEST.json``.
+
+        ``verify`` applies to every shard file; per-shard and composed fingerprints are always
+        checked against the manifest. ``processes`` > 0 serves queries from that many workers.
+        """
+
+        check_verify_mode(verify)
+        manifest = _read_manifest(path)
+        if manifest.get("format") != SHARDS_FORMAT:
+            raise ValueError("not a sharded index manifest")
+        if manifest.get("schema_version") != SCHEMA_VERSION:
+            raise ValueError("unsupported index schema version")
+        shards: list[AnyIndex | None] = []
+        for entry in manifest["shards"]:
+            if entry["file"] is None:
+                shards.append(None)
+                continue
+            index = load_index(os.path.join(path, entry["file"]), verify=verify)
+            if index.fingerprint != entry["fingerprint"]:
+                raise ValueError(f"shard fingerprint mismatch: {entry['file']}")
+            shards.append(index)
+        out = ShardedIndex(shards=tuple(shards), processes=int(processes), path=path)
+        if out.backend != manifest.get("backend") or out.fingerprint != manifest.get("fingerprint"):
+            raise ValueError("sharded index fingerprint mismatch on load (possible corruption)")
+        return out
+
+
+def _shard_file(i: int) -> str:
+    return f"shard-{i:04d}.idx"
+
+
+def is_sharded(path: str) -> bool:
+    """Whether the directory ``path`` holds a sharded (not segmented) index."""
+
+    return os.path.exists(os.path.join(path, MANIFEST)) and (
+        _read_manifest(path).get("format") == SHARDS_FORMAT
+    )
+
+
+__all__ = [
+    "SHARDS_FORMAT",
+    "ShardedIndex",
+    "build_sharded_index",
+    "is_sharded",
+    "shard_of",
+]
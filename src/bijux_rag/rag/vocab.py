@@ -0,0 +1,176 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+"""Sorted, front-coded term dictionary for exact-vocabulary BM25.
+
+Terms are sorted by their UTF-8 bytes (which is code point order, i.e. `str` order) and cut
+into blocks of ``block_size`` terms. A block starts with its head term in full; every later
+term keeps only the length of the prefix it shares with its predecessor plus the rest:
+
+* head: ``varint(len) bytes``
+* term: ``varint(shared) varint(len(suffix)) suffix``
+
+``data`` holds the blocks back to back and ``offsets`` (int64, one entry per block) where
+each one starts. A lookup binary-searches the block heads through ``offsets`` and then decodes
+at most one block; a term's id is its rank in sorted order. Both are plain buffers, so a
+dictionary loaded from a v2 container is memory-mapped like the postings it indexes.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+import numpy as np
+from numpy.typing import NDArray
+
+from bijux_rag.rag.index_format import IndexReader
+
+VOCAB_BLOCK_SIZE = 16
+
+
+def _put_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(buf: memoryview, pos: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _shared_prefix(a: bytes, b: bytes) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+@dataclass(frozen=True, slots=True)
+class TermDictionary:
+    """Term -> id mapping over a sorted, front-coded string block (see module docstring)."""
+
+    size: int
+    block_size: int
+    data: NDArray[np.uint8]
+    offsets: NDArray[np.int64]
+    _buf: memoryview = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.block_size <= 0:
+            raise ValueError("block_size must be positive")
+        if self.offsets.size != -(-self.size // self.block_size):
+            raise ValueError("term dictionary offsets do not match its size")
+        object.__setattr__(self, "_buf", np.ascontiguousarray(self.data).data)
+
+    @classmethod
+    def build(cls, terms: Iterable[str], *, block_size: int = VOCAB_BLOCK_SIZE) -> "TermDictionary":
+        """Dictionary of the distinct ``terms``; ids follow sorted order."""
+
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        encoded = sorted({t.encode("utf-8") for t in terms})
+        data = bytearray()
+        offsets: list[int] = []
+        prev = b""
+        for i, term in enumerate(encoded):
+            if i % block_size == 0:
+                offsets.append(len(data))
+                _put_varint(data, len(term))
+                data += term
+            else:
+                shared = _shared_prefix(prev, term)
+                _put_varint(data, shared)
+                _put_varint(data, len(term) - shared)
+                data += term[shared:]
+            prev = term
+        return cls(
+            size=len(encoded),
+            block_size=int(block_size),
+            data=np.frombuffer(bytes(data), dtype=np.uint8),
+            offsets=np.asarray(offsets, dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes + self.offsets.nbytes)
+
+    def _head(self, block: int) -> tuple[bytes, int]:
+        """Head term of ``block`` and the position just past it."""
+
+        n, pos = _get_varint(self._buf, int(self.offsets[block]))
+        return bytes(self._buf[pos : pos + n]), pos + n
+
+    def lookup(self, term: str) -> int | None:
+        """Id of ``term``, or ``None`` if it is not in the dictionary."""
+
+        if not self.size:
+            return None
+        key = term.encode("utf-8")
+        # Last block whose head is <= key.
+        lo, hi = 0, int(self.offsets.size)
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self._head(mid)[0] <= key:
+                lo = mid
+            else:
+                hi = mid
+        cur, pos = self._head(lo)
+        rank = lo * self.block_size
+        end = min(rank + self.block_size, self.size)
+        while True:
+            if cur == key:
+                return rank
+            if cur > key:
+                return None
+            rank += 1
+            if rank == end:
+                return None
+            shared, pos = _get_varint(self._buf, pos)
+            n, pos = _get_varint(self._buf, pos)
+            cur = cur[:shared] + bytes(self._buf[pos : pos + n])
+            pos += n
+
+    def terms(self) -> list[str]:
+        """Every term, in id order."""
+
+        out: list[str] = []
+        for block in range(int(self.offsets.size)):
+            cur, pos = self._head(block)
+            out.append(cur.decode("utf-8"))
+            count = min(self.block_size, self.size - block * self.block_size)
+            for _ in range(count - 1):
+                shared, pos = _get_varint(self._buf, pos)
+                n, pos = _get_varint(self._buf, pos)
+                cur = cur[:shared] + bytes(self._buf[pos : pos + n])
+                pos += n
+                out.append(cur.decode("utf-8"))
+        return out
+
+    # ------------- Persistence -------------
+    def to_sections(self) -> dict[str, NDArray[np.generic]]:
+        return {"vocab.data": self.data, "vocab.offsets": self.offsets}
+
+    @classmethod
+    def from_reader(cls, reader: IndexReader, *, size: int, block_size: int) -> "TermDictionary":
+        return cls(
+            size=int(size),
+            block_size=int(block_size),
+            data=reader.array("vocab.data"),
+            offsets=reader.array("vocab.offsets"),
+        )
+
+
+__all__ = ["TermDictionary", "VOCAB_BLOCK_SIZE"]
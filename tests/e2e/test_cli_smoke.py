@@ -143,3 +143,177 @@ def test_cli_overrides_apply(
     assert lines
     # verify that at least one chunk reflects the override (no chunk should exceed override chunk_size + overlap)
     assert all(len(c["text"]) <= chunk_size + overlap for c in lines)
+
+
+@pytest.mark.e2e
+def test_cli_segmented_index_add_delete_retrieve(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    index = tmp_path / "seg"
+    first = _write_csv(
+        tmp_path,
+        [
+            {
+                "doc_id": "d1",
+                "title": "Mito",
+                "abstract": "Mitochondria power the cell.",
+                "categories": "bio",
+            },
+            {
+                "doc_id": "d2",
+                "title": "Chloro",
+                "abstract": "Chloroplasts run photosynthesis.",
+                "categories": "bio",
+            },
+        ],
+    )
+    assert cli_main(["index", "add", "--index", str(index), "--input", str(first)]) == 0
+    second = _write_csv(
+        tmp_path,
+        [
+            {
+                "doc_id": "d3",
+                "title": "Ribo",
+                "abstract": "Ribosomes translate mRNA.",
+                "categories": "bio",
+            }
+        ],
+    )
+    assert cli_main(["index", "add", "--index", str(index), "--input", str(second)]) == 0
+    added = json.loads(capsys.readouterr().out.splitlines()[-1])
+    assert (added["segments"], added["live_chunks"]) == (2, 3)
+
+    assert cli_main(["index", "delete", "--index", str(index), "--doc-id", "d1"]) == 0
+    assert json.loads(capsys.readouterr().out)["live_chunks"] == 2
+    assert cli_main(["retrieve", "--index", str(index), "--query", "cell ribosomes mRNA"]) == 0
+    got = [c["doc_id"] for c in json.loads(capsys.readouterr().out)["candidates"]]
+    assert got[0] == "d3" and "d1" not in got
+
+    assert cli_main(["index", "compact", "--index", str(index), "--force"]) == 0
+    merged = json.loads(capsys.readouterr().out)
+    assert (merged["segments_before"], merged["segments_after"]) == (2, 1)
+    assert (merged["rows_merged"], merged["rows_dropped"]) == (2, 1)
+    assert merged["bytes_rewritten"] > 0
+    assert cli_main(["retrieve", "--index", str(index), "--query", "cell ribosomes mRNA"]) == 0
+    again = [c["doc_id"] for c in json.loads(capsys.readouterr().out)["candidates"]]
+    assert again == got
+
+
+@pytest.mark.e2e
+def test_cli_sharded_build_matches_single_index(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    docs = [
+        {
+            "doc_id": f"d{i}",
+            "title": f"Topic {i}",
+            "abstract": f"Cells divide by mitosis; organelle number {i} "
+            + ("ribosomes translate mRNA." if i % 2 else "chloroplasts capture light."),
+            "categories": "bio",
+        }
+        for i in range(12)
+    ]
+    csv = _write_csv(tmp_path, docs)
+    single, sharded = tmp_path / "one.idx", tmp_path / "sharded"
+    assert cli_main(["index", "build", "--input", str(csv), "--out", str(single)]) == 0
+    args = ["index", "build", "--input", str(csv), "--out", str(sharded), "--shards", "3"]
+    assert cli_main(args) == 0
+    capsys.readouterr()
+    assert len(list(sharded.glob("shard-*.idx"))) == 3
+
+    payloads = []
+    for index in (single, sharded):
+        assert cli_main(["retrieve", "--index", str(index), "--query", "ribosomes mRNA"]) == 0
+        payloads.append(json.loads(capsys.readouterr().out)["candidates"])
+    assert payloads[0] == payloads[1]
+
+    suite = tmp_path / "suite"
+    suite.mkdir()
+    (suite / "queries.jsonl").write_text(
+        json.dumps({"query": "chloroplasts capture light", "relevant_doc_ids": ["d0", "d2"]})
+        + "\n",
+        encoding="utf-8",
+    )
+    args = ["eval", "--index", str(sharded), "--suite", str(suite), "--processes", "2"]
+    assert cli_main(args) == 0
+    assert json.loads(capsys.readouterr().out)["metrics"]["recall_at_k"] == 1.0
+
+
+@pytest.mark.e2e
+def test_cli_parallel_bm25_build_matches_serial(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    docs = [
+        {
+            "doc_id": f"d{i}",
+            "title": f"Topic {i}",
+            "abstract": f"Enzymes catalyse reaction {i} in the cytoplasm.",
+            "categories": "bio",
+        }
+        for i in range(9)
+    ]
+    csv = _write_csv(tmp_path, docs)
+    fingerprints = []
+    for workers in ("1", "3"):
+        out = tmp_path / f"w{workers}.idx"
+        args = ["index", "build", "--input", str(csv), "--out", str(out), "--workers", workers]
+        assert cli_main(args) == 0
+        fingerprints.append(json.loads(capsys.readouterr().out)["fingerprint"])
+    assert fingerprints[0] == fingerprints[1]
+    assert (tmp_path / "w1.idx").read_bytes() == (tmp_path / "w3.idx").read_bytes()
+
+
+@pytest.mark.e2e
+def test_cli_exact_vocab_packed_postings_build_and_retrieve(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    docs = [
+        {
+            "doc_id": "d0",
+            "title": "Kinases",
+            "abstract": "Kinases phosphorylate proteins.",
+            "categories": "bio",
+        },
+        {
+            "doc_id": "d1",
+            "title": "Ligases",
+            "abstract": "Ligases join DNA strands.",
+            "categories": "bio",
+        },
+    ]
+    csv = _write_csv(tmp_path, docs)
+    out = tmp_path / "exact.idx"
+    args = ["index", "build", "--input", str(csv), "--out", str(out), "--bm25-vocab", "exact"]
+    assert cli_main([*args, "--postings-codec", "packed"]) == 0
+    capsys.readouterr()
+    assert cli_main(["retrieve", "--index", str(out), "--query", "ligases dna"]) == 0
+    got = json.loads(capsys.readouterr().out)["candidates"]
+    assert [c["doc_id"] for c in got] == ["d1"]
+
+
+@pytest.mark.e2e
+def test_cli_hybrid_backend_build_and_retrieve(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    docs = [
+        {
+            "doc_id": "d1",
+            "title": "Mito",
+            "abstract": "Mitochondria power the cell.",
+            "categories": "bio",
+        },
+        {
+            "doc_id": "d2",
+            "title": "Ribo",
+            "abstract": "Ribosomes translate mRNA.",
+            "categories": "bio",
+        },
+    ]
+    csv = _write_csv(tmp_path, docs)
+    index = tmp_path / "hybrid.idx"
+    args = ["index", "build", "--input", str(csv), "--out", str(index), "--backend", "hybrid"]
+    assert cli_main([*args, "--fusion", "rrf", "--rrf-k", "10", "--lexical-k", "5"]) == 0
+    assert json.loads(capsys.readouterr().out)["backend"] == "hybrid"
+    assert cli_main(["retrieve", "--index", str(index), "--query", "ribosomes mRNA"]) == 0
+    got = json.loads(capsys.readouterr().out)["candidates"]
+    assert got[0]["doc_id"] == "d2"
@@ -39,6 +39,11 @@ def test_real_rag_smoke_build_retrieve_ask(tmp_path: Path) -> None:
     assert is_ok(r)
     got = [c.chunk.doc_id for c in r.value]
     assert got and got[0] == "d1"
+    many = app.retrieve_many(
+        index=idx_loaded, queries=["powerhouse of the cell", "photosynthesis"], top_k=3
+    )
+    assert is_ok(many)
+    assert [cands[0].chunk.doc_id for cands in many.value] == ["d1", "d2"]
     a = app.ask(
         index=idx_loaded,
         query="What is the powerhouse of the cell?",
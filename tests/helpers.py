@@ -3,15 +3,20 @@
 
 from __future__ import annotations
 
+import json
 from collections import Counter
 from collections.abc import AsyncIterator, Callable
-from typing import TypeVar
+from pathlib import Path
+from typing import Any, TypeVar
 
+from bijux_rag.core.rag_types import Chunk
 from bijux_rag.domain.effects.async_ import AsyncGen
 from bijux_rag.result.types import Err, ErrInfo, Ok, Result
 
 T = TypeVar("T")
 
+_EVAL_DIR = Path(__file__).resolve().parent / "eval"
+
 
 def attempt_norm(trace: list[tuple[str, str]]) -> Counter[tuple[str, str]]:
     return Counter(trace)
@@ -41,3 +46,33 @@ def key_for_result(item: Result[T, ErrInfo], key_ok: Callable[[T], str]) -> str:
             return str(item.error.path[0])
         return item.error.code
     raise AssertionError("unreachable")
+
+
+def eval_chunks() -> list[Chunk]:
+    rows = [
+        json.loads(line)
+        for line in (_EVAL_DIR / "corpus.jsonl").read_text(encoding="utf-8").splitlines()
+        if line.strip()
+    ]
+    return [
+        Chunk(
+            doc_id=r["doc_id"],
+            text=f"{r['title']} {r['abstract']}",
+            start=0,
+            end=len(r["abstract"]),
+            metadata={"category": r["categories"]},
+        )
+        for r in rows
+    ]
+
+
+def eval_queries() -> list[str]:
+    return [
+        json.loads(line)["query"]
+        for line in (_EVAL_DIR / "queries.jsonl").read_text(encoding="utf-8").splitlines()
+        if line.strip()
+    ]
+
+
+def ids_scores(cands: list[Any]) -> list[tuple[str, float]]:
+    return [(c.chunk_id, c.score) for c in cands]
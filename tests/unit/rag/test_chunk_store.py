@@ -0,0 +1,101 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+
+import numpy as np
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from bijux_rag.core.rag_types import Chunk
+from bijux_rag.rag.chunk_store import ChunkTable
+from bijux_rag.rag.index_format import IndexReader, encode_index
+
+_values = st.one_of(st.sampled_from(["a", "b", "1"]), st.integers(0, 2), st.booleans())
+_metadata = st.dictionaries(st.sampled_from(["category", "lang", "doc_id"]), _values, max_size=3)
+_chunks = st.lists(
+    st.builds(
+        lambda doc, text, md: Chunk(doc_id=doc, text=text, start=0, end=len(text), metadata=md),
+        st.sampled_from(["d1", "d2", "1"]),
+        st.text(max_size=12),
+        _metadata,
+    ),
+    min_size=1,
+    max_size=25,
+)
+_filters = st.dictionaries(
+    st.sampled_from(["category", "lang", "doc_id", "missing"]),
+    st.sampled_from(["a", "b", "1", "0", "True", "d1"]),
+    max_size=2,
+)
+
+
+def _matches(chunk: Chunk, filters: Mapping[str, str]) -> bool:
+    for k, v in filters.items():
+        if k == "doc_id" and chunk.doc_id != v:
+            return False
+        if k not in chunk.metadata or str(chunk.metadata[k]) != v:
+            return False
+    return True
+
+
+def _same(a: Chunk, b: Chunk) -> bool:
+    return (
+        a == b
+        and a.chunk_id == b.chunk_id
+        and dict(a.metadata) == dict(b.metadata)
+        and {k: type(v) for k, v in a.metadata.items()}
+        == {k: type(v) for k, v in b.metadata.items()}
+    )
+
+
+@settings(max_examples=60, deadline=None)
+@given(chunks=_chunks, filters=_filters)
+def test_chunk_table_roundtrips_and_filters(chunks: list[Chunk], filters: dict[str, str]) -> None:
+    table = ChunkTable.from_chunks(chunks)
+    assert len(table) == len(chunks)
+    assert all(_same(a, b) for a, b in zip(table, chunks, strict=True))
+    assert table.chunk_ids() == [c.chunk_id for c in chunks]
+    expected = [_matches(c, filters) for c in chunks]
+    assert table.filter_mask(filters).tolist() == expected
+    wanted = {"d1", "1", "absent"}
+    rows = [i for i, c in enumerate(chunks) if c.doc_id in wanted]
+    assert table.doc_rows(wanted).tolist() == rows
+
+
+def test_chunk_table_sections_are_views() -> None:
+    chunks = [
+        Chunk(doc_id="d1", text="héllo wörld", start=0, end=11, metadata={"tags": ["x", "y"]}),
+        Chunk(doc_id="d2", text="", start=3, end=3),
+    ]
+    table = ChunkTable.from_chunks(chunks)
+    blob = encode_index(backend="t", schema_version=1, meta={}, sections=table.to_sections())
+    loaded = ChunkTable.from_reader(IndexReader.from_bytes(blob))
+    assert not loaded.text.flags.owndata
+    assert [c.text for c in loaded] == ["héllo wörld", ""]
+    assert loaded[0].metadata["tags"] == ["x", "y"]
+    assert loaded[-1].doc_id == "d2"
+    loaded.verify_ids()
+    assert loaded.filter_ids({"tags": "['x', 'y']"}).tolist() == [0]
+
+
+def test_chunk_table_verify_ids_detects_tampering() -> None:
+    table = ChunkTable.from_chunks([Chunk(doc_id="d", text="abc", start=0, end=3)])
+    digests = np.array(table.digests)
+    digests[0, 0] ^= 1
+    tampered = ChunkTable(
+        doc_dict=table.doc_dict,
+        doc_codes=table.doc_codes,
+        starts=table.starts,
+        ends=table.ends,
+        text=table.text,
+        text_offsets=table.text_offsets,
+        digests=digests,
+    )
+    with pytest.raises(ValueError, match="chunk_id"):
+        tampered.verify_ids()
+    with pytest.raises(IndexError):
+        table[1]
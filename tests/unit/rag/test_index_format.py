@@ -0,0 +1,105 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import msgpack
+import numpy as np
+import pytest
+
+from bijux_rag.rag.index_format import (
+    ALIGNMENT,
+    IndexReader,
+    encode_index,
+    is_container,
+    parse_header,
+    read_header,
+    write_index,
+)
+
+
+def _sections() -> dict[str, object]:
+    return {
+        "ints": np.arange(7, dtype=np.int32),
+        "matrix": np.arange(12, dtype=np.float32).reshape(3, 4),
+        "records": msgpack.packb([{"a": 1}, {"b": "x"}], use_bin_type=True),
+        "empty": np.zeros((0, 4), dtype=np.float32),
+    }
+
+
+def test_container_roundtrip_file_and_bytes(tmp_path: Path) -> None:
+    path = tmp_path / "c.idx"
+    kwargs = {"backend": "demo", "schema_version": 1, "meta": {"k": "v"}, "sections": _sections()}
+    write_index(str(path), **kwargs)
+    blob = encode_index(**kwargs)
+    assert path.read_bytes() == blob
+    assert is_container(blob)
+
+    for reader in (IndexReader.open(str(path)), IndexReader.from_bytes(blob)):
+        assert reader.header.backend == "demo"
+        assert dict(reader.header.meta) == {"k": "v"}
+        assert reader.array("ints").tolist() == list(range(7))
+        assert reader.array("matrix").shape == (3, 4)
+        assert reader.array("empty").shape == (0, 4)
+        assert reader.unpack("records") == [{"a": 1}, {"b": "x"}]
+        for name in reader.header.sections:
+            assert reader.header.span(name)[0] % ALIGNMENT == 0
+
+
+def test_header_reads_without_body(tmp_path: Path) -> None:
+    path = tmp_path / "c.idx"
+    write_index(str(path), backend="demo", schema_version=1, meta={}, sections=_sections())
+    with path.open("rb") as f:
+        header = read_header(f)
+        consumed = f.tell()
+    assert header.backend == "demo"
+    assert consumed < header.data_offset
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX file modes")
+def test_write_index_uses_umask_default_mode(tmp_path: Path) -> None:
+    old = os.umask(0o022)
+    try:
+        path = tmp_path / "c.idx"
+        write_index(str(path), backend="demo", schema_version=1, meta={}, sections=_sections())
+    finally:
+        os.umask(old)
+    assert path.stat().st_mode & 0o777 == 0o644
+
+
+def test_parse_header_rejects_foreign_bytes() -> None:
+    with pytest.raises(ValueError):
+        parse_header(msgpack.packb({"backend": "bm25"}, use_bin_type=True) + b"\0" * 16)
+
+
+def test_verify_detects_corrupt_and_truncated_sections(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr("bijux_rag.rag.index_format.CHECKSUM_BLOCK", 16)
+    path = tmp_path / "c.idx"
+    write_index(str(path), backend="demo", schema_version=1, meta={}, sections=_sections())
+    reader = IndexReader.open(str(path))
+    assert len(reader.header.sections["matrix"].crc32) == 3
+    reader.verify()
+
+    raw = bytearray(path.read_bytes())
+    start, _ = reader.header.span("matrix")
+    raw[start + 20] ^= 0xFF
+    corrupt = IndexReader.from_bytes(bytes(raw))
+    corrupt.verify("ints", "records")
+    with pytest.raises(ValueError, match="corrupt"):
+        corrupt.verify()
+
+    truncated = tmp_path / "t.idx"
+    truncated.write_bytes(path.read_bytes()[: reader.header.span("records")[1] - 1])
+    with pytest.raises(ValueError):
+        IndexReader.open(str(truncated)).verify()
+
+
+def test_header_checksum_mismatch_is_rejected() -> None:
+    blob = bytearray(encode_index(backend="demo", schema_version=1, meta={}, sections={}))
+    blob[20] ^= 0xFF
+    with pytest.raises(ValueError, match="checksum"):
+        parse_header(bytes(blob))
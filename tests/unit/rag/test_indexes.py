@@ -0,0 +1,1094 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+from __future__ import annotations
+
+import hashlib
+import math
+from collections import Counter
+from pathlib import Path
+
+import msgpack
+import numpy as np
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from bijux_rag.core.rag_types import Chunk, EmbeddingSpec
+from bijux_rag.rag import indexes as indexes_mod
+from bijux_rag.rag.embedders import HashEmbedder
+from bijux_rag.rag.index_format import ALIGNMENT, IndexReader, write_index
+from bijux_rag.rag.indexes import (
+    BM25BlockMax,
+    BM25Index,
+    BM25Postings,
+    HnswCosineIndex,
+    HybridIndex,
+    IvfCosineIndex,
+    NumpyCosineIndex,
+    _isin_sorted,
+    _sharded_top_k,
+    _stable_token_bucket,
+    _stream_top_k,
+    _tokenize,
+    _top_k_desc,
+    _top_k_desc_rows,
+    build_bm25_index,
+    build_hnsw_cosine_index,
+    build_hybrid_index,
+    build_ivf_cosine_index,
+    build_numpy_cosine_index,
+    load_index,
+    load_index_bytes,
+)
+from bijux_rag.rag.postings import PackedPostings
+from bijux_rag.rag.quantization import ProductQuantizer
+from tests.helpers import eval_chunks, eval_queries, ids_scores
+
+word_strategy = st.sampled_from(
+    ["bm25", "index", "vector", "query", "token", "chunk", "score", "rank", "cell", "dna"]
+)
+text_strategy = st.lists(word_strategy, min_size=0, max_size=30).map(" ".join)
+
+
+def _reference_key(idx: BM25Index):
+    """Token -> bucket: the stable hash, or the token's rank in the corpus vocabulary."""
+
+    if idx.vocab is None:
+        return lambda t: _stable_token_bucket(t, buckets=idx.buckets)
+    terms = sorted({t for c in idx.chunks for t in _tokenize(c.text)})
+    rank = {t: i for i, t in enumerate(terms)}
+    return lambda t: rank.get(t, -1)
+
+
+def _reference_tfs(idx: BM25Index) -> tuple[tuple[tuple[int, int], ...], ...]:
+    key = _reference_key(idx)
+    rows = []
+    for c in idx.chunks:
+        counts = Counter(key(t) for t in _tokenize(c.text))
+        rows.append(tuple(sorted(counts.items())))
+    return tuple(rows)
+
+
+def _linear_scan(idx: BM25Index, query: str, top_k: int) -> list[tuple[str, float]]:
+    """Reference scorer: chunk-at-a-time BM25 over sparse per-chunk term counts."""
+
+    q_buckets = dict.fromkeys(_reference_key(idx)(t) for t in _tokenize(query))
+    n = len(idx.chunks)
+    rows = _reference_tfs(idx)
+    out: list[tuple[int, float]] = []
+    for i in range(n):
+        tf_sparse = dict(rows[i])
+        s = 0.0
+        for bucket in q_buckets:
+            tf = float(tf_sparse.get(bucket, 0))
+            if tf <= 0.0:
+                continue
+            dl = float(idx.doc_len[i])
+            denom_norm = idx.k1 * (1.0 - idx.b + idx.b * (dl / idx.avg_dl))
+            df = int(idx.df[bucket])
+            idf = math.log((n - df + 0.5) / (df + 0.5) + 1.0)
+            s += idf * (tf * (idx.k1 + 1.0)) / (tf + denom_norm)
+        if s > 0.0:
+            out.append((i, s))
+    out.sort(key=lambda x: x[1], reverse=True)
+    return [(idx.chunks[i].chunk_id, s) for i, s in out[:top_k]]
+
+
+def test_bm25_postings_invert_tfs() -> None:
+    idx = build_bm25_index(chunks=eval_chunks(), buckets=64)
+    postings = idx.postings
+    rows = _reference_tfs(idx)
+    assert postings is not None
+    assert postings.indptr.shape == (65,)
+    assert int(postings.indptr[-1]) == sum(len(row) for row in rows)
+    assert idx.term_frequencies() == rows
+    for bucket in range(idx.buckets):
+        doc_ids, tfs = postings.bucket(bucket)
+        assert np.all(np.diff(doc_ids) > 0)
+        expected = [(i, dict(row)[bucket]) for i, row in enumerate(rows) if bucket in dict(row)]
+        assert list(zip(doc_ids.tolist(), tfs.tolist())) == expected
+        assert len(expected) == int(idx.df[bucket])
+
+
+@pytest.mark.parametrize("vocab", ["hashed", "exact"])
+def test_bm25_postings_match_linear_scan_on_eval_corpus(vocab: str) -> None:
+    idx = build_bm25_index(chunks=eval_chunks(), vocab=vocab)
+    assert idx.term_frequencies() == _reference_tfs(idx)
+    for query in eval_queries():
+        assert ids_scores(idx.retrieve(query=query, top_k=10)) == _linear_scan(idx, query, 10)
+
+
+@pytest.mark.parametrize("vocab", ["hashed", "exact"])
+@settings(max_examples=50, deadline=None)
+@given(texts=st.lists(text_strategy, min_size=1, max_size=25), query=text_strategy)
+def test_bm25_postings_match_linear_scan_synthetic(
+    vocab: str, texts: list[str], query: str
+) -> None:
+    chunks = [Chunk(doc_id=f"d{i}", text=t, start=0, end=len(t)) for i, t in enumerate(texts)]
+    idx = build_bm25_index(chunks=chunks, buckets=16, vocab=vocab)
+    top_k = 5
+    assert ids_scores(idx.retrieve(query=query, top_k=top_k)) == _linear_scan(idx, query, top_k)
+
+
+@pytest.mark.parametrize("vocab", ["hashed", "exact"])
+def test_parallel_bm25_build_matches_serial(vocab: str) -> None:
+    blank = [Chunk(doc_id=f"blank{i}", text="--", start=0, end=2) for i in range(3)]
+    chunks = eval_chunks() + blank
+    serial = build_bm25_index(chunks=chunks, buckets=256, vocab=vocab)
+    parallel = build_bm25_index(chunks=chunks, buckets=256, workers=3, vocab=vocab)
+    assert parallel.fingerprint == serial.fingerprint
+    assert np.array_equal(parallel.df, serial.df)
+    assert np.array_equal(parallel.doc_len, serial.doc_len)
+    assert parallel.term_frequencies() == serial.term_frequencies()
+    with pytest.raises(ValueError, match="workers"):
+        build_bm25_index(chunks=chunks, workers=0)
+
+
+@settings(max_examples=50, deadline=None)
+@given(
+    texts=st.lists(text_strategy, min_size=1, max_size=25),
+    cuts=st.lists(st.integers(min_value=0, max_value=25), max_size=4),
+)
+def test_bm25_postings_concat_matches_from_tfs(texts: list[str], cuts: list[int]) -> None:
+    edges = [0, *sorted(min(c, len(texts)) for c in cuts), len(texts)]
+    runs = [texts[lo:hi] for lo, hi in zip(edges[:-1], edges[1:])]
+    parts = [indexes_mod._bm25_partition(run, 16)[1] for run in runs]
+    merged = BM25Postings.concat(parts, rows=[len(run) for run in runs])
+    whole = indexes_mod._bm25_partition(texts, 16)[1]
+    for name in ("indptr", "doc_ids", "tfs"):
+        assert np.array_equal(getattr(merged, name), getattr(whole, name))
+        assert getattr(merged, name).dtype == getattr(whole, name).dtype
+
+
+def test_exact_vocab_bm25_persists_dictionary(tmp_path: Path) -> None:
+    chunks = eval_chunks()
+    hashed = build_bm25_index(chunks=chunks)
+    exact = build_bm25_index(chunks=chunks, vocab="exact")
+    terms = sorted({t for c in chunks for t in _tokenize(c.text)})
+    assert (hashed.vocab_mode, exact.vocab_mode) == ("hashed", "exact")
+    assert exact.vocab.terms() == terms
+    assert exact.buckets == len(terms) == int(exact.postings.indptr.size - 1)
+    assert exact.fingerprint != hashed.fingerprint
+    assert exact.retrieve(query="zzzunseen qqqnothing", top_k=5) == []
+
+    path = tmp_path / "exact.idx"
+    exact.save(str(path))
+    loaded = load_index(str(path))
+    assert isinstance(loaded, BM25Index)
+    assert isinstance(loaded.vocab.data, np.memmap)
+    assert loaded.fingerprint == exact.fingerprint
+    assert loaded.vocab.terms() == terms
+    for query in eval_queries():
+        assert ids_scores(loaded.retrieve(query=query, top_k=10)) == ids_scores(
+            exact.retrieve(query=query, top_k=10)
+        )
+    with pytest.raises(ValueError, match="vocabulary"):
+        build_bm25_index(chunks=chunks, vocab="stemmed")
+
+
+@pytest.mark.parametrize("vocab", ["hashed", "exact"])
+def test_packed_postings_codec_roundtrip(tmp_path: Path, vocab: str) -> None:
+    chunks = eval_chunks()
+    raw = build_bm25_index(chunks=chunks, vocab=vocab)
+    packed = build_bm25_index(chunks=chunks, vocab=vocab, postings_codec="packed")
+    assert packed.fingerprint == raw.fingerprint
+    raw.save(str(tmp_path / "raw.idx"))
+    packed.save(str(tmp_path / "packed.idx"))
+    reader = IndexReader.open(str(tmp_path / "packed.idx"))
+    assert reader.has("postings.packed.data") and not reader.has("postings.doc_ids")
+
+    for verify in ("full", "blocks", "none"):
+        loaded = load_index(str(tmp_path / "packed.idx"), verify=verify)
+        assert loaded.postings_codec == "packed"
+        # Served straight from the mapped sections; nothing is decoded on load.
+        assert isinstance(loaded.postings, PackedPostings)
+        assert isinstance(loaded.postings.data, np.memmap)
+        assert loaded.fingerprint == raw.fingerprint
+        assert np.array_equal(loaded._csr_postings().doc_ids, raw.postings.doc_ids)
+        assert np.array_equal(loaded._csr_postings().tfs, raw.postings.tfs)
+    for query in eval_queries():
+        assert ids_scores(loaded.retrieve(query=query, top_k=10)) == ids_scores(
+            raw.retrieve(query=query, top_k=10)
+        )
+    with pytest.raises(ValueError, match="postings codec"):
+        build_bm25_index(chunks=chunks, postings_codec="zstd")
+
+
+def test_hybrid_index_packs_its_lexical_arm(tmp_path: Path) -> None:
+    emb = HashEmbedder()
+    hybrid = build_hybrid_index(chunks=eval_chunks(), embedder=emb, postings_codec="packed")
+    path = tmp_path / "hybrid.idx"
+    hybrid.save(str(path))
+    loaded = load_index(str(path))
+    assert isinstance(loaded, HybridIndex)
+    assert loaded.lexical.postings_codec == "packed"
+    assert loaded.fingerprint == hybrid.fingerprint
+    query = eval_queries()[0]
+    assert ids_scores(loaded.retrieve(query=query, top_k=5, embedder=emb)) == ids_scores(
+        hybrid.retrieve(query=query, top_k=5, embedder=emb)
+    )
+
+
+def _reference_tokenize(text: str) -> list[str]:
+    # The original character-by-character tokenizer.
+    out: list[str] = []
+    cur: list[str] = []
+    for ch in text.lower():
+        if ch.isalnum():
+            cur.append(ch)
+        elif cur:
+            out.append("".join(cur))
+            cur = []
+    if cur:
+        out.append("".join(cur))
+    return out
+
+
+@settings(max_examples=500)
+@given(
+    text=st.text()
+    | st.text(alphabet=st.sampled_from("aZ9_ -'\u0130\u00df\u0660\u00b2\u2167\u0301\u4e2d"))
+)
+def test_tokenize_matches_reference_tokenizer(text: str) -> None:
+    assert _tokenize(text) == _reference_tokenize(text)
+
+
+def test_token_bucket_is_cached_sha256_prefix() -> None:
+    for token in ("bm25", "index", "\u4e2d\u6587", "x" * 300):
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        expected = int.from_bytes(digest[:8], "big") % 2048
+        assert _stable_token_bucket(token, buckets=2048) == expected
+    info = indexes_mod._token_hash.cache_info()
+    assert info.maxsize == indexes_mod.TOKEN_HASH_CACHE
+    assert _stable_token_bucket("bm25", buckets=7) == int(
+        int.from_bytes(hashlib.sha256(b"bm25").digest()[:8], "big") % 7
+    )
+    assert indexes_mod._token_hash.cache_info().hits > info.hits
+
+
+def test_bm25_precomputed_idf_and_length_norms() -> None:
+    idx = build_bm25_index(chunks=eval_chunks(), buckets=128)
+    n = len(idx.chunks)
+    for bucket in range(idx.buckets):
+        df = int(idx.df[bucket])
+        assert idx.idf[bucket] == math.log((n - df + 0.5) / (df + 0.5) + 1.0)
+    for i in range(n):
+        dl = float(idx.doc_len[i])
+        assert idx.len_norm[i] == idx.k1 * (1.0 - idx.b + idx.b * (dl / idx.avg_dl))
+
+
+@given(
+    scores=st.lists(st.sampled_from([0.0, 0.5, 1.0, 2.0]), min_size=1, max_size=40),
+    k=st.integers(min_value=0, max_value=45),
+)
+def test_top_k_desc_matches_stable_sort(scores: list[float], k: int) -> None:
+    expected = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:k]
+    assert _top_k_desc(np.asarray(scores), k).tolist() == expected
+
+
+@settings(deadline=None)
+@given(
+    levels=st.lists(st.integers(min_value=0, max_value=3), min_size=2, max_size=120),
+    k=st.integers(min_value=1, max_value=12),
+    block=st.integers(min_value=1, max_value=9),
+)
+def test_top_k_streams_keep_ties_on_lower_rows(levels: list[int], k: int, block: int) -> None:
+    # Tie-heavy scores: one query, one-dimensional rows, four distinct values.
+    matrix = np.asarray(levels, dtype=np.float32).reshape(-1, 1)
+    qs = np.ones((2, 1), dtype=np.float32)
+    expected = np.argsort(-matrix[:, 0], kind="stable")[:k].tolist()
+    assert _top_k_desc_rows(np.tile(matrix[:, 0], (2, 1)), k).tolist() == [expected] * 2
+    ids, scores = _stream_top_k(matrix, qs, None, k, block=block)
+    assert ids.tolist() == [expected] * 2
+    ids, _ = _sharded_top_k(matrix, qs, None, k, block=block, workers=3)
+    assert ids.tolist() == [expected] * 2
+    assert scores[0].tolist() == matrix[expected, 0].tolist()
+    rows = np.arange(0, len(levels), 2, dtype=np.int64)
+    sub = np.argsort(-matrix[rows, 0], kind="stable")[:k]
+    assert _stream_top_k(matrix, qs, rows, k, block=block)[0][0].tolist() == rows[sub].tolist()
+
+
+def _maxscore_equals_exhaustive(
+    idx: BM25Index, query: str, k: int, filters: dict[str, str] | None, block_size: int
+) -> int:
+    buckets = idx._query_buckets(query)
+    if not buckets:
+        return 0
+    bm = BM25BlockMax.build(idx, block_size=block_size)
+    ids_e, scores_e = idx._top_k_exhaustive(buckets, k, filters)
+    ids_p, scores_p, stats = idx._top_k_maxscore(buckets, k, filters, block_max=bm)
+    assert ids_p.tolist() == ids_e.tolist()
+    assert scores_p.tolist() == scores_e.tolist()
+    assert stats.postings_scored + stats.postings_skipped == stats.postings_total
+    return stats.postings_skipped
+
+
+def test_bm25_maxscore_matches_exhaustive_on_eval_corpus() -> None:
+    idx = build_bm25_index(chunks=eval_chunks(), buckets=64)
+    for query in eval_queries():
+        for k in (1, 3, 5, 20):
+            for block_size in (1, 2, 128):
+                _maxscore_equals_exhaustive(idx, query, k, None, block_size)
+                _maxscore_equals_exhaustive(idx, query, k, {"category": "api"}, block_size)
+
+
+@settings(max_examples=75, deadline=None)
+@given(
+    texts=st.lists(text_strategy, min_size=1, max_size=40),
+    query=text_strategy,
+    k=st.integers(min_value=1, max_value=8),
+    block_size=st.integers(min_value=1, max_value=6),
+)
+def test_bm25_maxscore_matches_exhaustive_synthetic(
+    texts: list[str], query: str, k: int, block_size: int
+) -> None:
+    chunks = [
+        Chunk(
+            doc_id=f"d{i}",
+            text=t,
+            start=0,
+            end=len(t),
+            metadata={"parity": str(i % 2), "doc_id": f"d{i}"},
+        )
+        for i, t in enumerate(texts)
+    ]
+    idx = build_bm25_index(chunks=chunks, buckets=8)
+    _maxscore_equals_exhaustive(idx, query, k, None, block_size)
+    _maxscore_equals_exhaustive(idx, query, k, {"parity": "1"}, block_size)
+    # Selective filters take the direct-scoring path.
+    _maxscore_equals_exhaustive(idx, query, k, {"doc_id": "d1"}, block_size)
+    _maxscore_equals_exhaustive(idx, query, k, {"doc_id": "d1", "parity": "0"}, block_size)
+
+
+@settings(max_examples=100, deadline=None)
+@given(
+    values=st.lists(st.integers(min_value=0, max_value=50), max_size=40),
+    ids=st.sets(st.integers(min_value=0, max_value=50), max_size=40),
+)
+def test_isin_sorted_matches_numpy_isin(values: list[int], ids: set[int]) -> None:
+    v = np.asarray(values, dtype=np.int32)
+    sorted_ids = np.asarray(sorted(ids), dtype=np.int64)
+    assert _isin_sorted(v, sorted_ids).tolist() == np.isin(v, sorted_ids).tolist()
+
+
+def _zipf_chunks(n: int) -> list[Chunk]:
+    rng = np.random.default_rng(7)
+    vocab = [f"t{i}" for i in range(400)]
+    chunks = []
+    for i in range(n):
+        ranks = np.minimum(rng.zipf(1.3, size=int(rng.integers(5, 40))), len(vocab)) - 1
+        text = " ".join(vocab[r] for r in ranks.tolist())
+        chunks.append(Chunk(doc_id=f"d{i}", text=text, start=0, end=len(text)))
+    return chunks
+
+
+def test_bm25_maxscore_skips_postings_on_skewed_corpus() -> None:
+    idx = build_bm25_index(chunks=_zipf_chunks(600), buckets=256)
+    skipped = sum(
+        _maxscore_equals_exhaustive(idx, f"t0 t1 t{q} t{q + 50}", 5, None, 16) for q in range(2, 40)
+    )
+    assert skipped > 0
+    cands, stats = idx.retrieve_with_stats(query="t0 t1 t7 t99", top_k=5)
+    assert len(cands) == 5
+    assert stats.postings_skipped > 0
+
+
+def test_packed_index_decodes_only_the_blocks_a_query_reaches(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    chunks = _zipf_chunks(4000)
+    raw = build_bm25_index(chunks=chunks, buckets=256)
+    path = tmp_path / "packed.idx"
+    build_bm25_index(chunks=chunks, buckets=256, postings_codec="packed").save(str(path))
+    loaded = load_index(str(path), verify="none")
+    assert isinstance(loaded, BM25Index) and isinstance(loaded.postings, PackedPostings)
+
+    decoded: list[int] = []
+    decode_blocks = PackedPostings.decode_blocks
+
+    def counting(self: PackedPostings, blocks: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        decoded.extend(np.asarray(blocks).tolist())
+        return decode_blocks(self, blocks)
+
+    monkeypatch.setattr(PackedPostings, "decode_blocks", counting)
+    query = "t0 t1 t2 t3 t377"
+    block_ptr = loaded.postings.block_layout()[0]
+    reachable = sum(int(block_ptr[t + 1] - block_ptr[t]) for t in loaded._query_buckets(query))
+    cands, stats = loaded.retrieve_with_stats(query=query, top_k=5)
+    assert ids_scores(cands) == ids_scores(raw.retrieve(query=query, top_k=5))
+    assert stats.blocks_skipped > 0
+    # Scoring plus the exact re-score of the survivors still leaves blocks untouched.
+    assert 0 < len(set(decoded)) < reachable
+    assert len(set(decoded)) < loaded.postings.num_blocks
+
+
+def _bm25_v1_payload(idx: BM25Index, *, postings: bool) -> dict[str, object]:
+    payload: dict[str, object] = {
+        "schema_version": 1,
+        "backend": "bm25",
+        "buckets": idx.buckets,
+        "k1": idx.k1,
+        "b": idx.b,
+        "avg_dl": idx.avg_dl,
+        "df": np.asarray(idx.df, dtype=np.int32).tobytes(),
+        "doc_len": np.asarray(idx.doc_len, dtype=np.int32).tobytes(),
+        "tfs": [list(map(list, row)) for row in idx.term_frequencies()],
+        "chunks": [
+            {
+                "doc_id": c.doc_id,
+                "text": c.text,
+                "start": c.start,
+                "end": c.end,
+                "metadata": dict(c.metadata),
+                "chunk_id": c.chunk_id,
+            }
+            for c in idx.chunks
+        ],
+    }
+    if postings:
+        payload["postings"] = idx.postings.to_payload()
+    return payload
+
+
+def test_bm25_v2_file_maps_postings(tmp_path: Path) -> None:
+    idx = build_bm25_index(chunks=eval_chunks(), buckets=256)
+    path = tmp_path / "bm25.idx"
+    idx.save(str(path))
+    loaded = load_index(str(path))
+    assert isinstance(loaded, BM25Index)
+    assert loaded.fingerprint == idx.fingerprint
+    assert isinstance(loaded.postings.doc_ids, np.memmap)
+    assert np.array_equal(loaded.postings.doc_ids, idx.postings.doc_ids)
+    assert np.array_equal(loaded.postings.tfs, idx.postings.tfs)
+    query = "FASTQ quality encoding"
+    assert ids_scores(loaded.retrieve(query=query, top_k=5)) == ids_scores(
+        idx.retrieve(query=query, top_k=5)
+    )
+    from_blob = load_index_bytes(idx.to_bytes())
+    assert isinstance(from_blob, BM25Index)
+    assert from_blob.fingerprint == idx.fingerprint
+
+
+def test_bm25_v1_payload_loads_with_and_without_postings(tmp_path: Path) -> None:
+    idx = build_bm25_index(chunks=eval_chunks(), buckets=256, k1=1.5, b=0.5)
+    query = "FASTQ quality encoding"
+    for postings in (True, False):
+        path = tmp_path / f"bm25-{postings}.msgpack"
+        path.write_bytes(msgpack.packb(_bm25_v1_payload(idx, postings=postings)))
+        loaded = load_index(str(path))
+        assert isinstance(loaded, BM25Index)
+        assert (loaded.k1, loaded.b) == (1.5, 0.5)
+        assert loaded.fingerprint == idx.fingerprint
+        assert np.array_equal(loaded.postings.indptr, idx.postings.indptr)
+        assert ids_scores(loaded.retrieve(query=query, top_k=5)) == ids_scores(
+            idx.retrieve(query=query, top_k=5)
+        )
+
+
+def test_load_index_decodes_v1_payload_once(tmp_path: Path, monkeypatch) -> None:
+    idx = build_bm25_index(chunks=eval_chunks(), buckets=256)
+    path = tmp_path / "bm25.msgpack"
+    path.write_bytes(msgpack.packb(_bm25_v1_payload(idx, postings=True)))
+
+    calls = []
+    real = indexes_mod.msgpack.unpackb
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(indexes_mod.msgpack, "unpackb", counting)
+    assert isinstance(load_index(str(path)), BM25Index)
+    assert len(calls) == 1
+
+
+def test_bm25_filters_apply_to_matched_postings() -> None:
+    idx = build_bm25_index(chunks=eval_chunks())
+    cands = idx.retrieve(query="format reads", top_k=10, filters={"category": "bioinformatics"})
+    assert cands
+    assert all(c.chunk.metadata["category"] == "bioinformatics" for c in cands)
+
+
+def test_numpy_cosine_filters_score_only_surviving_rows() -> None:
+    emb = HashEmbedder()
+    idx = build_numpy_cosine_index(chunks=eval_chunks(), embedder=emb)
+    filters = {"category": "bioinformatics"}
+    rows = idx.chunks.filter_ids(filters)
+    assert rows.tolist() == [
+        i for i, c in enumerate(idx.chunks) if c.metadata.get("category") == "bioinformatics"
+    ]
+
+    query = "FASTQ quality encoding"
+    qv = emb.embed_texts([query])[0]
+    qv = qv / np.linalg.norm(qv)
+    expected = sorted(rows.tolist(), key=lambda i: -float(idx.vectors[i] @ qv))[:5]
+    got = idx.retrieve(query=query, top_k=5, filters=filters, embedder=emb)
+    assert [c.chunk.chunk_id for c in got] == [idx.chunks.chunk_id(i) for i in expected]
+    assert idx.retrieve(query=query, top_k=5, filters={"category": "none"}, embedder=emb) == []
+
+
+def test_numpy_cosine_v2_file_is_memory_mapped(tmp_path: Path) -> None:
+    emb = HashEmbedder()
+    idx = build_numpy_cosine_index(chunks=eval_chunks(), embedder=emb)
+    path = tmp_path / "dense.idx"
+    idx.save(str(path))
+
+    reader = IndexReader.open(str(path))
+    start, end = reader.header.span("vectors")
+    assert start % ALIGNMENT == 0
+    assert end - start == idx.vectors.nbytes
+
+    loaded = load_index(str(path))
+    assert isinstance(loaded, NumpyCosineIndex)
+    assert isinstance(loaded.vectors, np.memmap)
+    assert not loaded.vectors.flags.writeable
+    assert loaded.fingerprint == idx.fingerprint
+    query = "FASTQ quality encoding"
+    assert ids_scores(loaded.retrieve(query=query, top_k=5, embedder=emb)) == ids_scores(
+        idx.retrieve(query=query, top_k=5, embedder=emb)
+    )
+
+
+def test_numpy_cosine_bytes_roundtrip_is_zero_copy() -> None:
+    idx = build_numpy_cosine_index(chunks=eval_chunks(), embedder=HashEmbedder())
+    blob = idx.to_bytes()
+    loaded = NumpyCosineIndex.load_bytes(blob)
+    assert loaded.vectors.base is not None
+    assert not loaded.vectors.flags.owndata
+    assert np.array_equal(loaded.vectors, idx.vectors)
+    assert loaded.fingerprint == idx.fingerprint
+
+
+def test_load_index_verify_modes(tmp_path: Path) -> None:
+    idx = build_numpy_cosine_index(chunks=eval_chunks(), embedder=HashEmbedder())
+    container = idx._container()
+    digests = np.array(container["sections"]["chunks.chunk_id"])
+    digests[0] = 0
+    container["sections"]["chunks.chunk_id"] = digests
+    path = tmp_path / "dense.idx"
+    write_index(str(path), **container)
+
+    # Checksums are consistent, so only the full check recomputes the chunk ids.
+    with pytest.raises(ValueError, match="chunk_id"):
+        load_index(str(path))
+    assert load_index(str(path), verify="blocks").fingerprint == idx.fingerprint
+
+    raw = bytearray(path.read_bytes())
+    start, _ = IndexReader.open(str(path)).header.span("vectors")
+    raw[start] ^= 0xFF
+    path.write_bytes(bytes(raw))
+    with pytest.raises(ValueError, match="corrupt"):
+        load_index(str(path), verify="blocks")
+    assert isinstance(load_index(str(path), verify="none"), NumpyCosineIndex)
+    with pytest.raises(ValueError, match="verify"):
+        load_index(str(path), verify="fast")
+
+
+def _synthetic_chunks(n: int) -> list[Chunk]:
+    return [
+        Chunk(
+            doc_id=f"d{i % 50}",
+            text=f"synthetic chunk {i}",
+            start=0,
+            end=1,
+            metadata={"parity": str(i % 2)},
+        )
+        for i in range(n)
+    ]
+
+
+def test_ivf_full_probe_matches_exact_index() -> None:
+    emb = HashEmbedder()
+    chunks = _synthetic_chunks(600)
+    exact = build_numpy_cosine_index(chunks=chunks, embedder=emb)
+    ivf = build_ivf_cosine_index(chunks=chunks, embedder=emb, nlist=12, nprobe=2)
+    assert ivf.nlist == 12
+    assert sorted(ivf.lists.rows.tolist()) == list(range(600))
+    assert np.allclose(np.linalg.norm(ivf.centroids, axis=1), 1.0, atol=1e-5)
+
+    for query in ("alpha", "synthetic chunk 7", "FASTQ quality"):
+        full = ivf.retrieve(query=query, top_k=10, embedder=emb, nprobe=12)
+        assert ids_scores(full) == ids_scores(exact.retrieve(query=query, top_k=10, embedder=emb))
+        filtered = ivf.retrieve(
+            query=query, top_k=10, embedder=emb, nprobe=12, filters={"parity": "1"}
+        )
+        assert ids_scores(filtered) == ids_scores(
+            exact.retrieve(query=query, top_k=10, embedder=emb, filters={"parity": "1"})
+        )
+
+
+def test_ivf_partial_probe_recall_and_subset() -> None:
+    emb = HashEmbedder()
+    chunks = _synthetic_chunks(2000)
+    exact = build_numpy_cosine_index(chunks=chunks, embedder=emb)
+    ivf = build_ivf_cosine_index(chunks=chunks, embedder=emb, nlist=20, nprobe=5)
+    hits = 0
+    for q in range(40):
+        query = f"query {q}"
+        truth = {c.chunk_id for c in exact.retrieve(query=query, top_k=10, embedder=emb)}
+        got = ivf.retrieve(query=query, top_k=10, embedder=emb, filters={"parity": "0"})
+        assert all(c.chunk.metadata["parity"] == "0" for c in got)
+        approx = ivf.retrieve(query=query, top_k=10, embedder=emb)
+        assert len(approx) == 10
+        hits += len(truth & {c.chunk_id for c in approx})
+    assert hits / 400 >= 0.6
+
+
+def test_ivf_persistence_roundtrip(tmp_path: Path) -> None:
+    emb = HashEmbedder()
+    ivf = build_ivf_cosine_index(chunks=_synthetic_chunks(300), embedder=emb, nlist=8, nprobe=3)
+    rebuilt = build_ivf_cosine_index(chunks=_synthetic_chunks(300), embedder=emb, nlist=8, nprobe=3)
+    assert rebuilt.fingerprint == ivf.fingerprint
+
+    path = tmp_path / "ivf.idx"
+    ivf.save(str(path))
+    loaded = load_index(str(path))
+    assert isinstance(loaded, IvfCosineIndex)
+    assert isinstance(loaded.vectors, np.memmap)
+    assert loaded.fingerprint == ivf.fingerprint == loaded._compute_fingerprint()
+    assert loaded.nprobe == 3
+    assert ids_scores(loaded.retrieve(query="q", top_k=5, embedder=emb)) == ids_scores(
+        ivf.retrieve(query="q", top_k=5, embedder=emb)
+    )
+    from_bytes = load_index_bytes(ivf.to_bytes())
+    assert isinstance(from_bytes, IvfCosineIndex)
+    assert from_bytes.fingerprint == ivf.fingerprint
+    with pytest.raises(ValueError, match="embedder"):
+        loaded.retrieve(query="q", top_k=5)
+
+
+def test_hnsw_graph_shape_and_recall() -> None:
+    emb = HashEmbedder()
+    chunks = _synthetic_chunks(800)
+    exact = build_numpy_cosine_index(chunks=chunks, embedder=emb)
+    hnsw = build_hnsw_cosine_index(chunks=chunks, embedder=emb, m=8, ef_construction=64)
+    assert hnsw.layer0.shape == (800, 16)
+    assert hnsw.layer0.dtype == np.int32
+    assert hnsw.upper.shape == (int(hnsw.levels.sum()), 8)
+    assert int(hnsw.levels[hnsw.entry_point]) == int(hnsw.levels.max())
+    # Every node is reachable from somewhere on the base layer.
+    assert np.unique(hnsw.layer0[hnsw.layer0 >= 0]).size == 800
+
+    hits = 0
+    for q in range(30):
+        query = f"query {q}"
+        truth = ids_scores(exact.retrieve(query=query, top_k=10, embedder=emb))
+        got = ids_scores(hnsw.retrieve(query=query, top_k=10, embedder=emb, ef=200))
+        # Returned rows are scored exactly, so every hit carries the exact score.
+        assert set(got) <= set(ids_scores(exact.retrieve(query=query, top_k=800, embedder=emb)))
+        hits += len(set(truth) & set(got))
+    assert hits / 300 >= 0.9
+
+
+def test_hnsw_filters_fall_back_to_exact_for_selective_filters() -> None:
+    emb = HashEmbedder()
+    chunks = _synthetic_chunks(400)
+    exact = build_numpy_cosine_index(chunks=chunks, embedder=emb)
+    hnsw = build_hnsw_cosine_index(chunks=chunks, embedder=emb, m=8, ef_construction=32)
+    narrow = {"doc_id": "d3"}
+    assert ids_scores(hnsw.retrieve(query="q", top_k=5, embedder=emb, filters=narrow)) == (
+        ids_scores(exact.retrieve(query="q", top_k=5, embedder=emb, filters=narrow))
+    )
+    wide = hnsw.retrieve(query="q", top_k=5, embedder=emb, filters={"parity": "1"})
+    assert len(wide) == 5
+    assert all(c.chunk.metadata["parity"] == "1" for c in wide)
+
+
+def test_hnsw_is_deterministic_and_persists(tmp_path: Path) -> None:
+    emb = HashEmbedder()
+    chunks = _synthetic_chunks(300)
+    hnsw = build_hnsw_cosine_index(chunks=chunks, embedder=emb, m=6, ef_construction=40, ef=20)
+    again = build_hnsw_cosine_index(chunks=chunks, embedder=emb, m=6, ef_construction=40, ef=20)
+    assert again.fingerprint == hnsw.fingerprint
+    other = build_hnsw_cosine_index(chunks=chunks, embedder=emb, m=6, ef_construction=40, seed=1)
+    assert other.fingerprint != hnsw.fingerprint
+
+    path = tmp_path / "hnsw.idx"
+    hnsw.save(str(path))
+    loaded = load_index(str(path))
+    assert isinstance(loaded, HnswCosineIndex)
+    assert isinstance(loaded.layer0, np.memmap)
+    assert (loaded.m, loaded.ef_construction, loaded.ef) == (6, 40, 20)
+    assert loaded.fingerprint == hnsw.fingerprint == loaded._compute_fingerprint()
+    for ef in (None, 5, 100):
+        assert ids_scores(loaded.retrieve(query="q", top_k=5, embedder=emb, ef=ef)) == (
+            ids_scores(hnsw.retrieve(query="q", top_k=5, embedder=emb, ef=ef))
+        )
+    assert load_index_bytes(hnsw.to_bytes()).fingerprint == hnsw.fingerprint
+
+
+def test_pq_index_rescored_shortlist_matches_exact(tmp_path: Path) -> None:
+    emb = HashEmbedder()
+    chunks = _synthetic_chunks(1500)
+    exact = build_numpy_cosine_index(chunks=chunks, embedder=emb)
+    pq = build_numpy_cosine_index(chunks=chunks, embedder=emb, pq_subvectors=4, oversample=20)
+    assert pq.codes.shape == (1500, 4)
+    assert pq.codes.nbytes * 16 == exact.vectors.nbytes
+    assert pq.fingerprint != exact.fingerprint
+
+    hits = 0
+    for q in range(30):
+        query = f"query {q}"
+        truth = ids_scores(exact.retrieve(query=query, top_k=10, embedder=emb))
+        got = ids_scores(pq.retrieve(query=query, top_k=10, embedder=emb))
+        # Re-scored candidates carry exact scores, in exact order.
+        assert got == sorted(got, key=lambda t: -t[1])
+        assert set(got) <= set(ids_scores(exact.retrieve(query=query, top_k=1500, embedder=emb)))
+        hits += len(set(truth) & set(got))
+    assert hits / 300 >= 0.9
+    # A shortlist covering every row is exact.
+    assert ids_scores(pq.retrieve(query="q", top_k=5, embedder=emb, oversample=300)) == (
+        ids_scores(exact.retrieve(query="q", top_k=5, embedder=emb))
+    )
+    approx = pq.retrieve(query="q", top_k=5, embedder=emb, rescore=False)
+    assert len(approx) == 5
+    filtered = pq.retrieve(query="q", top_k=5, embedder=emb, filters={"parity": "1"})
+    assert all(c.chunk.metadata["parity"] == "1" for c in filtered)
+
+    path = tmp_path / "pq.idx"
+    pq.save(str(path))
+    loaded = load_index(str(path))
+    assert isinstance(loaded, NumpyCosineIndex)
+    assert isinstance(loaded.codes, np.memmap)
+    assert loaded.oversample == 20
+    assert loaded.fingerprint == pq.fingerprint == loaded._compute_fingerprint()
+    assert ids_scores(loaded.retrieve(query="q", top_k=5, embedder=emb)) == ids_scores(
+        pq.retrieve(query="q", top_k=5, embedder=emb)
+    )
+
+
+def test_ivf_pq_roundtrip(tmp_path: Path) -> None:
+    emb = HashEmbedder()
+    chunks = _synthetic_chunks(600)
+    ivf = build_ivf_cosine_index(
+        chunks=chunks, embedder=emb, nlist=8, nprobe=8, pq_subvectors=2, oversample=600
+    )
+    exact = build_numpy_cosine_index(chunks=chunks, embedder=emb)
+    assert ids_scores(ivf.retrieve(query="q", top_k=5, embedder=emb)) == ids_scores(
+        exact.retrieve(query="q", top_k=5, embedder=emb)
+    )
+    path = tmp_path / "ivfpq.idx"
+    ivf.save(str(path))
+    loaded = load_index(str(path))
+    assert isinstance(loaded.codec, ProductQuantizer)
+    assert loaded.fingerprint == ivf.fingerprint == loaded._compute_fingerprint()
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_scalar_storage_rescored_matches_exact(tmp_path: Path, dtype: str) -> None:
+    emb = HashEmbedder()
+    chunks = _synthetic_chunks(800)
+    exact = build_numpy_cosine_index(chunks=chunks, embedder=emb)
+    sq = build_numpy_cosine_index(chunks=chunks, embedder=emb, storage_dtype=dtype)
+    assert sq.spec.storage_dtype == dtype
+    assert sq.codes.nbytes * (2 if dtype == "float16" else 4) == exact.vectors.nbytes
+    assert sq.fingerprint != exact.fingerprint
+    for q in range(10):
+        query = f"query {q}"
+        assert ids_scores(sq.retrieve(query=query, top_k=5, embedder=emb)) == (
+            ids_scores(exact.retrieve(query=query, top_k=5, embedder=emb))
+        )
+    approx = sq.retrieve(query="q", top_k=5, embedder=emb, rescore=False)
+    assert [c.score for c in approx] == sorted((c.score for c in approx), reverse=True)
+
+    path = tmp_path / "sq.idx"
+    sq.save(str(path))
+    loaded = load_index(str(path))
+    assert isinstance(loaded, NumpyCosineIndex)
+    assert isinstance(loaded.codes, np.memmap)
+    assert loaded.spec == sq.spec
+    assert loaded.chunks.embedding_spec == sq.spec
+    assert loaded.fingerprint == sq.fingerprint == loaded._compute_fingerprint()
+    ivf = build_ivf_cosine_index(
+        chunks=chunks, embedder=emb, nlist=4, nprobe=4, storage_dtype=dtype
+    )
+    assert ivf.spec.storage_dtype == dtype
+    assert ids_scores(ivf.retrieve(query="q", top_k=5, embedder=emb)) == (
+        ids_scores(exact.retrieve(query="q", top_k=5, embedder=emb))
+    )
+
+
+def test_binary_rescore_mode(tmp_path: Path) -> None:
+    emb = HashEmbedder()
+    chunks = _synthetic_chunks(1000)
+    exact = build_numpy_cosine_index(chunks=chunks, embedder=emb)
+    binary = build_numpy_cosine_index(chunks=chunks, embedder=emb, binary=True, oversample=20)
+    assert binary.bits.shape == (1000, 8)
+    assert binary.fingerprint != exact.fingerprint
+    hits = 0
+    for q in range(20):
+        query = f"query {q}"
+        truth = ids_scores(exact.retrieve(query=query, top_k=10, embedder=emb))
+        got = ids_scores(binary.retrieve(query=query, top_k=10, embedder=emb))
+        assert got == sorted(got, key=lambda t: -t[1])
+        hits += len(set(truth) & set(got))
+    assert hits / 200 >= 0.8
+    # A pool covering every row is exact; "exact" mode ignores the bits.
+    for kwargs in ({"oversample": 100}, {"mode": "exact"}):
+        assert ids_scores(binary.retrieve(query="q", top_k=10, embedder=emb, **kwargs)) == (
+            ids_scores(exact.retrieve(query="q", top_k=10, embedder=emb))
+        )
+    filtered = binary.retrieve(query="q", top_k=5, embedder=emb, filters={"parity": "1"})
+    assert all(c.chunk.metadata["parity"] == "1" for c in filtered)
+    with pytest.raises(ValueError, match="binary-rescore"):
+        exact.retrieve(query="q", top_k=5, embedder=emb, mode="binary-rescore")
+    with pytest.raises(ValueError, match="mode must be"):
+        binary.retrieve(query="q", top_k=5, embedder=emb, mode="hamming")
+
+    path = tmp_path / "binary.idx"
+    binary.save(str(path))
+    loaded = load_index(str(path))
+    assert isinstance(loaded.bits, np.memmap)
+    assert loaded.fingerprint == binary.fingerprint == loaded._compute_fingerprint()
+    assert ids_scores(loaded.retrieve(query="q", top_k=5, embedder=emb)) == (
+        ids_scores(binary.retrieve(query="q", top_k=5, embedder=emb))
+    )
+
+
+def test_truncated_two_pass_mode(tmp_path: Path) -> None:
+    emb = HashEmbedder()
+    chunks = _synthetic_chunks(600)
+    exact = build_numpy_cosine_index(chunks=chunks, embedder=emb)
+    two_pass = build_numpy_cosine_index(chunks=chunks, embedder=emb, coarse_dim=8, oversample=30)
+    assert two_pass.spec.coarse_dim == 8
+    assert two_pass.coarse.shape == (600, 8) and two_pass.coarse.flags.c_contiguous
+    assert np.allclose(np.linalg.norm(two_pass.coarse, axis=1), 1.0, atol=1e-5)
+    assert two_pass.fingerprint != exact.fingerprint
+
+    truth = ids_scores(exact.retrieve(query="q", top_k=10, embedder=emb))
+    # A pool covering every row is exact, whichever prefix ranks it.
+    for coarse_dim in (None, 4, 12):
+        got = two_pass.retrieve(
+            query="q", top_k=10, embedder=emb, coarse_dim=coarse_dim, oversample=60
+        )
+        assert ids_scores(got) == truth
+    # Per-query truncation also works on an index without a stored coarse matrix.
+    assert ids_scores(exact.retrieve(query="q", top_k=10, embedder=emb, coarse_dim=8)) == (
+        ids_scores(two_pass.retrieve(query="q", top_k=10, embedder=emb, oversample=4))
+    )
+    filtered = two_pass.retrieve(query="q", top_k=5, embedder=emb, filters={"parity": "0"})
+    assert all(c.chunk.metadata["parity"] == "0" for c in filtered)
+    with pytest.raises(ValueError, match="coarse_dim"):
+        exact.retrieve(query="q", top_k=5, embedder=emb, mode="truncated")
+    with pytest.raises(ValueError, match="coarse_dim"):
+        two_pass.retrieve(query="q", top_k=5, embedder=emb, coarse_dim=16)
+
+    path = tmp_path / "two_pass.idx"
+    two_pass.save(str(path))
+    loaded = load_index(str(path))
+    assert loaded.spec == two_pass.spec
+    assert isinstance(loaded.coarse, np.memmap)
+    assert loaded.fingerprint == two_pass.fingerprint == loaded._compute_fingerprint()
+    assert ids_scores(loaded.retrieve(query="q", top_k=5, embedder=emb)) == (
+        ids_scores(two_pass.retrieve(query="q", top_k=5, embedder=emb))
+    )
+    with pytest.raises(ValueError, match="coarse_dim"):
+        EmbeddingSpec(model="m", dim=4, coarse_dim=4)
+
+
+def test_retrieve_many_matches_single_queries(monkeypatch: pytest.MonkeyPatch) -> None:
+    emb = HashEmbedder()
+    chunks = _synthetic_chunks(400)
+    queries = [f"query {q}" for q in range(12)]
+    # Force several query blocks through the batched GEMM path.
+    monkeypatch.setattr(indexes_mod, "QUERY_BLOCK_BYTES", 4 * 400 * 5)
+    indexes = [
+        build_numpy_cosine_index(chunks=chunks, embedder=emb),
+        build_numpy_cosine_index(chunks=chunks, embedder=emb, binary=True, oversample=8),
+        build_ivf_cosine_index(chunks=chunks, embedder=emb, nlist=6, nprobe=2),
+        build_hnsw_cosine_index(chunks=chunks, embedder=emb, m=6, ef_construction=40),
+        build_bm25_index(chunks=chunks),
+        build_hybrid_index(chunks=chunks, embedder=emb, lexical_k=10, dense_k=10),
+    ]
+    for idx in indexes:
+        for filters in (None, {"parity": "1"}, {"parity": "none"}):
+            batch = idx.retrieve_many(queries=queries, top_k=7, filters=filters, embedder=emb)
+            assert len(batch) == len(queries)
+            for query, got in zip(queries, batch):
+                want = idx.retrieve(query=query, top_k=7, filters=filters, embedder=emb)
+                assert [c.chunk.chunk_id for c in got] == [c.chunk.chunk_id for c in want]
+                assert [c.score for c in got] == pytest.approx([c.score for c in want], abs=1e-5)
+        assert idx.retrieve_many(queries=[], top_k=3, embedder=emb) == []
+
+
+def test_blocked_exact_scoring_matches_full_scan(tmp_path: Path) -> None:
+    emb = HashEmbedder()
+    idx = build_numpy_cosine_index(chunks=_synthetic_chunks(500), embedder=emb)
+    path = tmp_path / "dense.idx"
+    idx.save(str(path))
+    loaded = load_index(str(path))
+    assert isinstance(loaded.vectors, np.memmap)
+    qv = indexes_mod._embed_query(idx.spec, emb, "q")
+    full = np.asarray(idx.vectors) @ qv
+    want = np.lexsort((np.arange(full.size), -full))[:9].tolist()
+    for block_rows in (1, 7, 64, 10_000):
+        for filters in (None, {"parity": "0"}):
+            got = loaded.retrieve(
+                query="q", top_k=9, embedder=emb, filters=filters, block_rows=block_rows
+            )
+            ref = idx.retrieve(query="q", top_k=9, embedder=emb, filters=filters)
+            # Single-row blocks may round differently in BLAS; ids must match exactly.
+            assert [c.chunk.chunk_id for c in got] == [c.chunk.chunk_id for c in ref]
+            assert [c.score for c in got] == pytest.approx([c.score for c in ref], abs=1e-6)
+        got = loaded.retrieve(query="q", top_k=9, embedder=emb, block_rows=block_rows)
+        assert [idx.chunks.chunk_ids()[i] for i in want] == [c.chunk.chunk_id for c in got]
+        many = loaded.retrieve_many(
+            queries=["q", "r"], top_k=9, embedder=emb, block_rows=block_rows
+        )
+        assert [c.chunk.chunk_id for c in many[0]] == [c.chunk.chunk_id for c in got]
+    for block_rows in (0, -5):
+        with pytest.raises(ValueError, match="block_rows"):
+            idx.retrieve(query="q", top_k=3, embedder=emb, block_rows=block_rows)
+        with pytest.raises(ValueError, match="block_rows"):
+            idx.retrieve_many(
+                queries=["q"], top_k=3, embedder=emb, workers=4, block_rows=block_rows
+            )
+
+
+def test_sharded_scoring_matches_single_thread(tmp_path: Path) -> None:
+    emb = HashEmbedder()
+    idx = build_numpy_cosine_index(chunks=_synthetic_chunks(300), embedder=emb)
+    path = tmp_path / "dense.idx"
+    idx.save(str(path))
+    loaded = load_index(str(path))
+    queries = [f"query {q}" for q in range(5)]
+    for filters in (None, {"parity": "1"}):
+        want = idx.retrieve_many(queries=queries, top_k=8, filters=filters, embedder=emb)
+        for workers in (2, 3, 16):
+            for index in (idx, loaded):
+                got = index.retrieve_many(
+                    queries=queries, top_k=8, filters=filters, embedder=emb, workers=workers
+                )
+                for a, b in zip(got, want, strict=True):
+                    assert [c.chunk.chunk_id for c in a] == [c.chunk.chunk_id for c in b]
+                    assert [c.score for c in a] == pytest.approx([c.score for c in b], abs=1e-6)
+                one = index.retrieve(
+                    query=queries[0], top_k=8, filters=filters, embedder=emb, workers=workers
+                )
+                assert [c.chunk.chunk_id for c in one] == [c.chunk.chunk_id for c in want[0]]
+
+
+def test_scoring_pool_survives_larger_requests() -> None:
+    idx = build_numpy_cosine_index(chunks=eval_chunks(), embedder=HashEmbedder())
+    pool = indexes_mod._shared_pool("score")
+    idx.retrieve(query="index", top_k=3, embedder=HashEmbedder(), workers=64)
+    assert indexes_mod._shared_pool("score") is pool
+    assert pool.submit(sum, [1, 2]).result() == 3
+    for workers in (0, -2):
+        with pytest.raises(ValueError, match="workers"):
+            idx.retrieve(query="index", top_k=3, embedder=HashEmbedder(), workers=workers)
+        with pytest.raises(ValueError, match="workers"):
+            idx.retrieve_many(queries=["index"], top_k=3, embedder=HashEmbedder(), workers=workers)
+
+
+def test_storage_dtype_and_pq_are_exclusive() -> None:
+    with pytest.raises(ValueError, match="storage_dtype"):
+        build_numpy_cosine_index(
+            chunks=eval_chunks(), embedder=HashEmbedder(), pq_subvectors=4, storage_dtype="int8"
+        )
+    with pytest.raises(ValueError, match="storage_dtype"):
+        EmbeddingSpec(model="m", dim=4, storage_dtype="bfloat16")  # type: ignore[arg-type]
+
+
+def test_numpy_cosine_v1_msgpack_still_loads(tmp_path: Path) -> None:
+    idx = build_numpy_cosine_index(chunks=eval_chunks(), embedder=HashEmbedder())
+    payload = {
+        "schema_version": 1,
+        "backend": "numpy-cosine",
+        "spec": {"model": "hash16", "dim": 16, "metric": "cosine", "normalized": True},
+        "chunks": [
+            {
+                "doc_id": c.doc_id,
+                "text": c.text,
+                "start": c.start,
+                "end": c.end,
+                "metadata": dict(c.metadata),
+                "chunk_id": c.chunk_id,
+            }
+            for c in idx.chunks
+        ],
+        "vectors": {
+            "dtype": "float32",
+            "shape": [len(idx.chunks), 16],
+            "data": idx.vectors.tobytes(),
+        },
+    }
+    path = tmp_path / "legacy.msgpack"
+    path.write_bytes(msgpack.packb(payload, use_bin_type=True))
+    loaded = load_index(str(path))
+    assert isinstance(loaded, NumpyCosineIndex)
+    assert loaded.fingerprint == idx.fingerprint
+
+
+def _rrf(arms: list[list[str]], k: int) -> list[tuple[str, float]]:
+    fused: dict[str, float] = {}
+    for ids in arms:
+        for rank, cid in enumerate(ids, start=1):
+            fused[cid] = fused.get(cid, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda kv: (-kv[1], kv[0]))
+
+
+def test_hybrid_rrf_fuses_bm25_and_dense_over_one_chunk_table(tmp_path: Path) -> None:
+    emb = HashEmbedder()
+    chunks = eval_chunks()
+    hybrid = build_hybrid_index(chunks=chunks, embedder=emb, lexical_k=8, dense_k=6)
+    assert hybrid.lexical.chunks is hybrid.dense.chunks
+    lexical = build_bm25_index(chunks=chunks)
+    dense = build_numpy_cosine_index(chunks=chunks, embedder=emb)
+    category = chunks[2].metadata["category"]
+    for query in eval_queries():
+        for filters in (None, {"category": category}):
+            got = hybrid.retrieve(query=query, top_k=5, filters=filters, embedder=emb)
+            arms = [
+                [c.chunk_id for c in lexical.retrieve(query=query, top_k=8, filters=filters)],
+                [
+                    c.chunk_id
+                    for c in dense.retrieve(query=query, top_k=6, filters=filters, embedder=emb)
+                ],
+            ]
+            want = _rrf(arms, 60)[:5]
+            assert [c.chunk_id for c in got] == [cid for cid, _ in want]
+            assert [c.score for c in got] == pytest.approx([s for _, s in want])
+            assert all(c.chunk.embedding == () for c in got)
+            assert {c.metadata["backend"] for c in got} <= {"hybrid"}
+
+    # One container holds both arms with a single copy of the chunk table.
+    hybrid.save(str(tmp_path / "hybrid.idx"))
+    lexical.save(str(tmp_path / "bm25.idx"))
+    dense.save(str(tmp_path / "dense.idx"))
+    size = (tmp_path / "hybrid.idx").stat().st_size
+    assert size < (tmp_path / "bm25.idx").stat().st_size + (tmp_path / "dense.idx").stat().st_size
+    for verify in ("full", "none"):
+        loaded = load_index(str(tmp_path / "hybrid.idx"), verify=verify)
+        assert isinstance(loaded, HybridIndex)
+        assert loaded.fingerprint == hybrid.fingerprint
+        assert loaded.lexical.chunks is loaded.dense.chunks
+        query = eval_queries()[0]
+        assert [c.chunk_id for c in loaded.retrieve(query=query, top_k=5, embedder=emb)] == [
+            c.chunk_id for c in hybrid.retrieve(query=query, top_k=5, embedder=emb)
+        ]
+
+
+def test_hybrid_normalized_fusion_and_query_overrides() -> None:
+    emb = HashEmbedder()
+    chunks = eval_chunks()
+    hybrid = build_hybrid_index(chunks=chunks, embedder=emb, fusion="normalized")
+    query = eval_queries()[3]
+    lexical_only = hybrid.retrieve(query=query, top_k=5, embedder=emb, dense_weight=0.0)
+    bm25 = hybrid.lexical.retrieve(query=query, top_k=5)
+    assert [c.chunk_id for c in lexical_only] == [c.chunk_id for c in bm25]
+    assert lexical_only[0].score == pytest.approx(1.0)
+    dense_only = hybrid.retrieve(query=query, top_k=5, embedder=emb, lexical_weight=0.0)
+    cosine = hybrid.dense.retrieve(query=query, top_k=5, embedder=emb)
+    assert [c.chunk_id for c in dense_only] == [c.chunk_id for c in cosine]
+    fused = hybrid.retrieve(query=query, top_k=5, embedder=emb)
+    assert all(0.0 <= c.score <= 2.0 for c in fused)
+    rrf = hybrid.retrieve(query=query, top_k=5, embedder=emb, fusion="rrf", rrf_k=1)
+    assert rrf[0].score <= 1.0
+    # A query without lexical tokens still gets dense hits.
+    assert len(hybrid.retrieve(query="!!!", top_k=3, embedder=emb)) == 3
+    with pytest.raises(ValueError, match="fusion"):
+        hybrid.retrieve(query=query, top_k=5, embedder=emb, fusion="max")
+    with pytest.raises(ValueError, match="same chunk table"):
+        HybridIndex(lexical=build_bm25_index(chunks=chunks[1:]), dense=hybrid.dense)
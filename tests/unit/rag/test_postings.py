@@ -0,0 +1,124 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from bijux_rag.rag.postings import PackedPostings
+
+
+@st.composite
+def csr_postings(draw: st.DrawFn) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    n_docs = draw(st.integers(min_value=1, max_value=5000))
+    rows = draw(
+        st.lists(
+            st.lists(st.integers(min_value=0, max_value=n_docs - 1), unique=True, max_size=300),
+            min_size=1,
+            max_size=12,
+        )
+    )
+    lens = np.array([len(r) for r in rows], dtype=np.int64)
+    indptr = np.concatenate([[0], np.cumsum(lens)]).astype(np.int64)
+    doc_ids = np.array([d for r in rows for d in sorted(r)], dtype=np.int32)
+    tfs = np.array(
+        draw(st.lists(st.integers(1, 1 << 20), min_size=doc_ids.size, max_size=doc_ids.size)),
+        dtype=np.int32,
+    )
+    lengths = np.array(
+        draw(st.lists(st.integers(1, 500), min_size=n_docs, max_size=n_docs)), dtype=np.int32
+    )
+    return indptr, doc_ids, tfs, lengths
+
+
+@settings(max_examples=100, deadline=None)
+@given(postings=csr_postings(), block_size=st.sampled_from([1, 3, 128]))
+def test_packed_postings_roundtrip(postings, block_size: int) -> None:
+    indptr, doc_ids, tfs, lengths = postings
+    packed = PackedPostings.encode(indptr, doc_ids, tfs, lengths=lengths, block_size=block_size)
+    got_ids, got_tfs = packed.decode()
+    assert got_ids.dtype == np.int32 and got_tfs.dtype == np.int32
+    assert np.array_equal(got_ids, doc_ids)
+    assert np.array_equal(got_tfs, tfs)
+    assert packed.first.size == int(np.sum((np.diff(indptr) + block_size - 1) // block_size))
+
+    _, start, end = packed.block_layout()
+    for blk, (lo, hi) in enumerate(zip(start.tolist(), end.tolist(), strict=True)):
+        assert (packed.first[blk], packed.last[blk]) == (doc_ids[lo], doc_ids[hi - 1])
+        assert packed.bound[blk].tolist() == [tfs[lo:hi].max(), lengths[doc_ids[lo:hi]].min()]
+    for b in range(indptr.size - 1):
+        lo, hi = int(indptr[b]), int(indptr[b + 1])
+        got_ids, got_tfs = packed.bucket(b)
+        assert got_ids.tolist() == doc_ids[lo:hi].tolist()
+        assert got_tfs.tolist() == tfs[lo:hi].tolist()
+        ids = doc_ids[lo:hi:3].astype(np.int64)
+        got_ids, got_tfs = packed.probe(b, np.union1d(ids, ids + 1))
+        assert set(ids.tolist()) <= set(got_ids.tolist())
+        assert set(zip(got_ids.tolist(), got_tfs.tolist())) <= set(
+            zip(doc_ids[lo:hi].tolist(), tfs[lo:hi].tolist())
+        )
+    starts = indptr[:-1] + np.diff(indptr) // 3
+    ends = indptr[1:] - np.diff(indptr) // 4
+    sel = np.concatenate([np.arange(a, b) for a, b in zip(starts, ends)]).astype(np.int64)
+    got_ids, got_tfs = packed.take(starts, ends)
+    assert got_ids.tolist() == doc_ids[sel].tolist()
+    assert got_tfs.tolist() == tfs[sel].tolist()
+
+
+def test_packed_postings_decode_only_the_blocks_asked_for() -> None:
+    doc_ids = np.arange(0, 2000, 2, dtype=np.int32)
+    indptr = np.array([0, doc_ids.size], dtype=np.int64)
+    tfs = np.ones(doc_ids.size, dtype=np.int32)
+    packed = PackedPostings.encode(
+        indptr, doc_ids, tfs, lengths=np.ones(2000, np.int32), block_size=100
+    )
+    decoded: list[int] = []
+    decode_blocks = PackedPostings.decode_blocks
+
+    def counting(self: PackedPostings, blocks: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        decoded.extend(np.asarray(blocks).tolist())
+        return decode_blocks(self, blocks)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(PackedPostings, "decode_blocks", counting)
+        # Blocks hold ids [200b, 200b + 198]; 1999 is past the last one, so only 2 and 7 qualify.
+        got, _ = packed.probe(0, np.array([400, 1401, 1420, 1999], dtype=np.int64))
+        assert decoded == [2, 7]
+        assert 400 in got.tolist() and 1420 in got.tolist()
+        decoded.clear()
+        got, _ = packed.take(np.array([250]), np.array([260]))
+        assert decoded == [2] and got.tolist() == doc_ids[250:260].tolist()
+
+
+def test_packed_postings_shrink_dense_lists() -> None:
+    rng = np.random.default_rng(0)
+    lists = [np.sort(rng.choice(100_000, size=n, replace=False)) for n in (50_000, 5000, 300)]
+    indptr = np.concatenate([[0], np.cumsum([x.size for x in lists])]).astype(np.int64)
+    doc_ids = np.concatenate(lists).astype(np.int32)
+    tfs = np.minimum(rng.geometric(0.8, size=doc_ids.size), 50).astype(np.int32)
+    packed = PackedPostings.encode(indptr, doc_ids, tfs, lengths=np.ones(100_000, np.int32))
+    raw = indptr.nbytes + doc_ids.nbytes + tfs.nbytes
+    assert raw / packed.nbytes > 3
+    # Each block's first id is its skip pointer: blocks cover ascending id ranges.
+    first = packed.first[: (50_000 + 127) // 128]
+    assert np.all(np.diff(first) > 0)
+
+
+def test_packed_postings_reject_unsorted_or_zero_frequencies() -> None:
+    indptr = np.array([0, 2], dtype=np.int64)
+    lengths = np.ones(6, np.int32)
+    with pytest.raises(ValueError, match="ascending"):
+        PackedPostings.encode(
+            indptr, np.array([5, 5], np.int32), np.array([1, 1], np.int32), lengths=lengths
+        )
+    with pytest.raises(ValueError, match="positive"):
+        PackedPostings.encode(
+            indptr, np.array([1, 5], np.int32), np.array([1, 0], np.int32), lengths=lengths
+        )
+    with pytest.raises(ValueError, match="block_size"):
+        PackedPostings.encode(
+            indptr, np.array([1, 5], np.int32), np.ones(2, np.int32), lengths=lengths, block_size=0
+        )
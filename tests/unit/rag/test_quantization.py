@@ -0,0 +1,92 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from bijux_rag.rag import quantization
+from bijux_rag.rag.quantization import (
+    ProductQuantizer,
+    ScalarQuantizer,
+    assign,
+    hamming,
+    kmeans,
+    pack_signs,
+)
+
+
+def _blobs(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((8, dim)).astype(np.float32) * 4
+    return (centres[rng.integers(0, 8, size=n)] + rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def test_kmeans_is_deterministic_and_fills_every_cluster() -> None:
+    x = _blobs(500, 6)
+    a = kmeans(x, 8, spherical=False, seed=3)
+    b = kmeans(x, 8, spherical=False, seed=3)
+    assert np.array_equal(a, b)
+    labels, _ = assign(x, a, spherical=False)
+    assert np.bincount(labels, minlength=8).min() > 0
+    # Euclidean assignment really picks the closest centroid.
+    d = ((x[:, None, :] - a[None, :, :]) ** 2).sum(axis=2)
+    assert np.array_equal(labels, d.argmin(axis=1))
+
+    unit = kmeans(x / np.linalg.norm(x, axis=1, keepdims=True), 8, seed=3)
+    assert np.allclose(np.linalg.norm(unit, axis=1), 1.0, atol=1e-5)
+
+
+def test_product_quantizer_codes_tables_and_scores() -> None:
+    x = _blobs(2000, 16)
+    pq = ProductQuantizer.train(x, m=4, ksub=64, seed=0)
+    assert (pq.m, pq.ksub, pq.dsub, pq.dim) == (4, 64, 4, 16)
+    codes = pq.encode(x)
+    assert codes.shape == (2000, 4) and codes.dtype == np.uint8
+
+    recon = pq.decode(codes)
+    assert np.mean((recon - x) ** 2) < 0.5 * np.mean((x - x.mean(axis=0)) ** 2)
+
+    q = x[7]
+    # ADC scores are exact inner products with the reconstructed vectors.
+    assert np.allclose(pq.scores(codes, pq.table(q)), recon @ q, rtol=1e-4, atol=1e-3)
+
+
+def test_product_quantizer_rejects_bad_shapes() -> None:
+    with pytest.raises(ValueError, match="divide"):
+        ProductQuantizer.train(_blobs(100, 10), m=3)
+    with pytest.raises(ValueError, match="ksub"):
+        ProductQuantizer(codebooks=np.zeros((2, 300, 4), dtype=np.float32))
+
+
+@pytest.mark.parametrize(("dtype", "itemsize", "tol"), [("float16", 2, 1e-2), ("int8", 1, 0.1)])
+def test_scalar_quantizer_codes_and_scores(dtype: str, itemsize: int, tol: float) -> None:
+    x = _blobs(1000, 16)
+    sq = ScalarQuantizer.train(x, dtype=dtype)  # type: ignore[arg-type]
+    codes = sq.encode(x)
+    assert codes.dtype.itemsize == itemsize and codes.shape == x.shape
+    recon = sq.decode(codes)
+    assert np.max(np.abs(recon - x)) < tol * np.max(np.abs(x))
+
+    q = x[3]
+    # Blocked compressed-domain scores equal inner products with the reconstruction.
+    scores = sq.scores(codes, sq.prepare(q), block=64)
+    assert np.allclose(scores, recon @ q, rtol=1e-4, atol=1e-2)
+    with pytest.raises(ValueError, match="float16 or int8"):
+        ScalarQuantizer.train(x, dtype="float32")
+
+
+@pytest.mark.parametrize("native", [True, False])
+def test_sign_bits_hamming_matches_bruteforce(
+    monkeypatch: pytest.MonkeyPatch, native: bool
+) -> None:
+    if not native:
+        monkeypatch.setattr(quantization, "_bitwise_count", None)
+    x = _blobs(300, 70)
+    bits = pack_signs(x)
+    assert bits.shape == (300, 16) and bits.dtype == np.uint8
+    assert not bits[:, 9:].any()  # 70 bits fill 9 bytes; the rest of the second word is padding
+    signs = x > 0
+    expected = (signs != signs[5]).sum(axis=1)
+    assert hamming(bits, bits[5], block=64).tolist() == expected.tolist()
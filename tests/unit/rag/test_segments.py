@@ -0,0 +1,277 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from bijux_rag.core.rag_types import Chunk
+from bijux_rag.rag.embedders import HashEmbedder
+from bijux_rag.rag.indexes import (
+    BM25Stats,
+    build_bm25_index,
+    build_numpy_cosine_index,
+    load_index,
+)
+from bijux_rag.rag.segments import MANIFEST, MergePolicy, SegmentedIndex, compact
+from tests.helpers import eval_chunks, eval_queries, ids_scores
+
+
+def _segmented(chunks: list[Chunk], parts: int, build) -> SegmentedIndex:
+    step = -(-len(chunks) // parts)
+    seg = SegmentedIndex.from_index(build(chunks[:step]))
+    for lo in range(step, len(chunks), step):
+        seg = seg.add_docs(chunks=chunks[lo : lo + step], embedder=HashEmbedder())
+    return seg
+
+
+def test_bm25_stats_of_segments_equal_monolithic_stats() -> None:
+    chunks = eval_chunks()
+    whole = build_bm25_index(chunks=chunks)
+    halves = [build_bm25_index(chunks=chunks[:20]), build_bm25_index(chunks=chunks[20:])]
+    stats = BM25Stats.of(halves)
+    assert stats.n == len(chunks)
+    assert stats.df.tolist() == whole.df.tolist()
+    assert stats.avg_dl == whole.avg_dl
+    assert stats.idf.tolist() == whole.idf.tolist()
+
+
+@pytest.mark.parametrize("vocab", ["hashed", "exact"])
+def test_segmented_bm25_matches_rebuilt_index_after_adds_and_deletes(vocab: str) -> None:
+    chunks = eval_chunks()
+    seg = _segmented(chunks, 3, lambda cs: build_bm25_index(chunks=cs, vocab=vocab))
+    assert len(seg.segments) == 3
+    assert {s.index.vocab_mode for s in seg.segments} == {vocab}
+    dropped = {chunks[1].doc_id, chunks[-2].doc_id}
+    seg = seg.delete_doc_ids(dropped)
+    live = [c for c in chunks if c.doc_id not in dropped]
+    whole = build_bm25_index(chunks=live, vocab=vocab)
+    assert seg.num_live == len(live)
+    for q in eval_queries():
+        got = seg.retrieve(query=q, top_k=7)
+        assert ids_scores(got) == ids_scores(whole.retrieve(query=q, top_k=7))
+        assert not {c.doc_id for c in got} & dropped
+    queries = eval_queries()[:5]
+    assert [ids_scores(r) for r in seg.retrieve_many(queries=queries, top_k=4)] == [
+        ids_scores(whole.retrieve(query=q, top_k=4)) for q in queries
+    ]
+
+
+def test_exact_vocab_segments_merge_into_rebuilt_index() -> None:
+    chunks = eval_chunks()
+    seg = _segmented(chunks, 3, lambda cs: build_bm25_index(chunks=cs, vocab="exact"))
+    with pytest.raises(ValueError, match="hashed and exact"):
+        BM25Stats.of([seg.segments[0].index, build_bm25_index(chunks=chunks[:3])])
+    dropped = {chunks[0].doc_id, chunks[7].doc_id}
+    merged, _ = seg.delete_doc_ids(dropped).merge(force=True)
+    whole = build_bm25_index(chunks=[c for c in chunks if c.doc_id not in dropped], vocab="exact")
+    (segment,) = merged.segments
+    # Terms that only occurred in the deleted rows are dropped from the dictionary.
+    assert segment.index.vocab.terms() == whole.vocab.terms()
+    assert segment.index.fingerprint == whole.fingerprint
+
+
+def test_segments_keep_the_postings_codec(tmp_path: Path) -> None:
+    chunks = eval_chunks()
+    seg = _segmented(chunks, 3, lambda cs: build_bm25_index(chunks=cs, postings_codec="packed"))
+    assert {s.index.postings_codec for s in seg.segments} == {"packed"}
+    merged, _ = seg.merge(force=True)
+    assert merged.segments[0].index.postings_codec == "packed"
+    seg.save(str(tmp_path / "seg"))
+    loaded = load_index(str(tmp_path / "seg"))
+    assert {s.index.postings_codec for s in loaded.segments} == {"packed"}
+    for q in eval_queries()[:5]:
+        assert ids_scores(loaded.retrieve(query=q, top_k=5)) == ids_scores(
+            seg.retrieve(query=q, top_k=5)
+        )
+
+
+def test_segmented_dense_matches_rebuilt_index_with_filters() -> None:
+    chunks = eval_chunks()
+    emb = HashEmbedder()
+    seg = _segmented(chunks, 4, lambda cs: build_numpy_cosine_index(chunks=cs, embedder=emb))
+    seg = seg.delete_doc_ids([chunks[0].doc_id])
+    whole = build_numpy_cosine_index(chunks=chunks[1:], embedder=emb)
+    category = chunks[3].metadata["category"]
+    for q in eval_queries()[:10]:
+        for filters in (None, {"category": category}):
+            got = seg.retrieve(query=q, top_k=6, filters=filters, embedder=emb)
+            want = whole.retrieve(query=q, top_k=6, filters=filters, embedder=emb)
+            assert [c.chunk_id for c in got] == [c.chunk_id for c in want]
+            assert [c.score for c in got] == pytest.approx([c.score for c in want], abs=1e-6)
+
+
+def test_add_docs_upserts_and_builds_only_the_delta() -> None:
+    chunks = eval_chunks()
+    seg = SegmentedIndex.from_index(build_bm25_index(chunks=chunks))
+    doc_id = chunks[5].doc_id
+    replacement = Chunk(doc_id=doc_id, text="zebra quagga okapi", start=0, end=18)
+    updated = seg.add_docs(chunks=[replacement])
+    assert len(updated.segments) == 2
+    assert updated.segments[0].index is seg.segments[0].index
+    assert len(updated.segments[1].index.chunks) == 1
+    assert updated.num_live == seg.num_live - 1 + 1
+    top = updated.retrieve(query="zebra okapi", top_k=3)
+    assert [c.chunk_id for c in top] == [replacement.chunk_id]
+    assert updated.fingerprint != seg.fingerprint
+    assert seg.delete_doc_ids(["no-such-doc"]) is seg
+
+
+def test_fingerprint_composes_segments_and_tombstones() -> None:
+    chunks = eval_chunks()
+    a = SegmentedIndex.from_index(build_bm25_index(chunks=chunks[:10]))
+    b = a.add_docs(chunks=chunks[10:20])
+    again = SegmentedIndex.from_index(build_bm25_index(chunks=chunks[:10])).add_docs(
+        chunks=chunks[10:20]
+    )
+    assert b.fingerprint == again.fingerprint
+    deleted = b.delete_doc_ids([chunks[12].doc_id])
+    assert deleted.fingerprint not in {a.fingerprint, b.fingerprint}
+    assert deleted.segments[0] is b.segments[0]
+
+
+def test_segmented_index_persists_as_directory(tmp_path: Path) -> None:
+    chunks = eval_chunks()
+    emb = HashEmbedder()
+    seg = _segmented(chunks, 2, lambda cs: build_numpy_cosine_index(chunks=cs, embedder=emb))
+    seg = seg.delete_doc_ids([chunks[-1].doc_id])
+    out = tmp_path / "segidx"
+    seg.save(str(out))
+    files = sorted(p.name for p in out.iterdir())
+    assert MANIFEST in files and len(files) == 3
+
+    for verify in ("full", "none"):
+        loaded = load_index(str(out), verify=verify)
+        assert isinstance(loaded, SegmentedIndex)
+        assert loaded.fingerprint == seg.fingerprint
+        assert loaded.spec == seg.spec
+        q = eval_queries()[0]
+        assert ids_scores(loaded.retrieve(query=q, top_k=5, embedder=emb)) == ids_scores(
+            seg.retrieve(query=q, top_k=5, embedder=emb)
+        )
+
+    # Appending rewrites only the manifest plus the new segment's file.
+    before = {p.name: p.stat().st_mtime_ns for p in out.iterdir() if p.name != MANIFEST}
+    seg.add_docs(chunks=chunks[-1:], embedder=emb).save(str(out))
+    after = {p.name: p.stat().st_mtime_ns for p in out.iterdir() if p.name != MANIFEST}
+    assert len(after) == 3
+    assert all(after[name] == mtime for name, mtime in before.items())
+
+    manifest = json.loads((out / MANIFEST).read_text(encoding="utf-8"))
+    manifest["segments"][0]["deleted"] = [0]
+    (out / MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+    with pytest.raises(ValueError, match="fingerprint"):
+        load_index(str(out))
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX file modes")
+def test_segmented_index_files_use_umask_default_mode(tmp_path: Path) -> None:
+    seg = SegmentedIndex.from_index(build_bm25_index(chunks=eval_chunks()))
+    old = os.umask(0o022)
+    try:
+        seg.save(str(tmp_path / "segidx"))
+    finally:
+        os.umask(old)
+    assert {p.stat().st_mode & 0o777 for p in (tmp_path / "segidx").iterdir()} == {0o644}
+
+
+def test_segmented_index_rejects_mixed_or_unsupported_backends() -> None:
+    chunks = eval_chunks()[:5]
+    bm25 = SegmentedIndex.from_index(build_bm25_index(chunks=chunks))
+    dense = build_numpy_cosine_index(chunks=chunks, embedder=HashEmbedder())
+    with pytest.raises(ValueError, match="same backend"):
+        SegmentedIndex(segments=(*bm25.segments, *SegmentedIndex.from_index(dense).segments))
+    with pytest.raises(ValueError, match="embedder"):
+        SegmentedIndex.from_index(dense).add_docs(chunks=chunks)
+    assert np.array_equal(bm25.segments[0].deleted, np.zeros(len(chunks), dtype=bool))
+
+
+def test_merge_policy_groups_segments_by_tier() -> None:
+    chunks = eval_chunks()
+    seg = SegmentedIndex.from_index(build_bm25_index(chunks=chunks[:12]))
+    for i in range(12, 17):
+        seg = seg.add_docs(chunks=[chunks[i]])
+    policy = MergePolicy(factor=4, floor_rows=2)
+    assert [policy.tier(n) for n in (0, 1, 2, 7, 8, 32)] == [0, 0, 1, 1, 2, 3]
+    # Five single-row segments share tier 0; the 12-row segment is alone in its tier.
+    assert policy.plan(seg.segments) == ((1, 2, 3, 4, 5),)
+    seg = seg.delete_doc_ids([c.doc_id for c in chunks[:4]])
+    assert policy.plan(seg.segments) == ((0,), (1, 2, 3, 4, 5))
+    with pytest.raises(ValueError, match="factor"):
+        MergePolicy(factor=1)
+
+
+@pytest.mark.parametrize("backend", ["bm25", "numpy-cosine"])
+def test_merge_equals_rebuild_of_live_chunks(backend: str) -> None:
+    chunks = eval_chunks()
+    emb = HashEmbedder()
+
+    def build(cs: list[Chunk]):
+        if backend == "bm25":
+            return build_bm25_index(chunks=cs)
+        return build_numpy_cosine_index(chunks=cs, embedder=emb, pq_subvectors=4, pq_ksub=4)
+
+    seg = _segmented(chunks, 5, build).delete_doc_ids([chunks[2].doc_id, chunks[9].doc_id])
+    live = [c for i, c in enumerate(chunks) if i not in (2, 9)]
+    merged, stats = seg.merge(force=True)
+    assert len(merged.segments) == 1
+    assert merged.segments[0].index.fingerprint == build(live).fingerprint
+    assert (stats.segments_before, stats.segments_after, stats.merges) == (5, 1, 1)
+    assert (stats.rows_merged, stats.rows_dropped) == (len(live), 2)
+    for q in eval_queries()[:5]:
+        assert [c.chunk_id for c in merged.retrieve(query=q, top_k=5, embedder=emb)] == [
+            c.chunk_id for c in seg.retrieve(query=q, top_k=5, embedder=emb)
+        ]
+    assert merged.merge(force=True)[0] is merged
+
+
+def test_compact_swaps_directory_atomically(tmp_path: Path) -> None:
+    chunks = eval_chunks()
+    out = tmp_path / "segidx"
+    seg = SegmentedIndex.from_index(build_bm25_index(chunks=chunks[:1]))
+    for c in chunks[1:8]:
+        seg = seg.add_docs(chunks=[c])
+    seg = seg.delete_doc_ids([chunks[3].doc_id])
+    seg.save(str(out))
+    stale = load_index(str(out))
+
+    stats = compact(str(out), MergePolicy(factor=4, floor_rows=100))
+    assert (stats.segments_before, stats.segments_after, stats.merges) == (8, 1, 1)
+    assert stats.bytes_rewritten == sum(p.stat().st_size for p in out.glob("seg-*.idx"))
+    assert len(list(out.glob("seg-*.idx"))) == 1
+    compacted = load_index(str(out))
+    for q in eval_queries()[:5]:
+        assert ids_scores(compacted.retrieve(query=q, top_k=4)) == ids_scores(
+            stale.retrieve(query=q, top_k=4)
+        )
+    # Nothing left to merge: the directory is untouched.
+    again = compact(str(out), MergePolicy(factor=4, floor_rows=100))
+    assert (again.merges, again.bytes_rewritten) == (0, 0)
+
+
+def test_live_top_k_refetches_past_many_tombstones() -> None:
+    chunks = eval_chunks()
+    seg = _segmented(chunks, 2, lambda cs: build_bm25_index(chunks=cs))
+    dropped = {c.doc_id for c in chunks[:11]}
+    seg = seg.delete_doc_ids(dropped)
+    whole = build_bm25_index(chunks=[c for c in chunks if c.doc_id not in dropped])
+    calls: list[int] = []
+    view = seg._segment_views()[0]
+
+    def search(k: int) -> list:
+        calls.append(k)
+        return view.retrieve(query="format sequence reads", top_k=k)
+
+    live = seg.segments[0].live_top_k(search, 2)
+    assert calls[0] == 4 and all(b == min(2 * a, 13) for a, b in zip(calls, calls[1:]))
+    assert all(c.chunk.doc_id not in dropped for c in live)
+    for q in eval_queries():
+        assert ids_scores(seg.retrieve(query=q, top_k=2)) == ids_scores(
+            whole.retrieve(query=q, top_k=2)
+        )
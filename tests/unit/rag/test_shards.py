@@ -0,0 +1,174 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+from __future__ import annotations
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from bijux_rag.rag import indexes as indexes_mod
+from bijux_rag.rag.embedders import HashEmbedder
+from bijux_rag.rag.indexes import (
+    build_bm25_index,
+    build_hybrid_index,
+    build_numpy_cosine_index,
+    load_index,
+)
+from bijux_rag.rag.segments import MANIFEST
+from bijux_rag.rag.shards import ShardedIndex, build_sharded_index, shard_of
+from tests.helpers import eval_chunks, eval_queries, ids_scores
+
+
+def test_shard_of_is_stable_and_keeps_documents_together() -> None:
+    assert shard_of("doc-1", 8) == shard_of("doc-1", 8)
+    assert {shard_of(f"doc-{i}", 4) for i in range(64)} == {0, 1, 2, 3}
+    chunks = eval_chunks()
+    sharded = build_sharded_index(
+        chunks=chunks, shards=3, build=lambda cs: build_bm25_index(chunks=cs)
+    )
+    for i, shard in enumerate(sharded.shards):
+        assert shard is not None
+        assert {shard_of(d, 3) for d in shard.chunks.doc_dict} == {i}
+    assert sum(len(s.chunks) for s in sharded.shards) == len(chunks)
+
+
+@pytest.mark.parametrize("vocab", ["hashed", "exact"])
+def test_sharded_bm25_scores_equal_single_index(vocab: str) -> None:
+    chunks = eval_chunks()
+    whole = build_bm25_index(chunks=chunks, vocab=vocab)
+    sharded = build_sharded_index(
+        chunks=chunks, shards=4, build=lambda cs: build_bm25_index(chunks=cs, vocab=vocab)
+    )
+    queries = eval_queries()
+    for q in queries:
+        got = sharded.retrieve(query=q, top_k=7)
+        assert ids_scores(got) == ids_scores(whole.retrieve(query=q, top_k=7))
+    assert [ids_scores(r) for r in sharded.retrieve_many(queries=queries, top_k=3)] == [
+        ids_scores(whole.retrieve(query=q, top_k=3)) for q in queries
+    ]
+
+
+def test_sharded_dense_matches_single_index_with_filters() -> None:
+    chunks = eval_chunks()
+    emb = HashEmbedder()
+    whole = build_numpy_cosine_index(chunks=chunks, embedder=emb)
+    sharded = build_sharded_index(
+        chunks=chunks, shards=3, build=lambda cs: build_numpy_cosine_index(chunks=cs, embedder=emb)
+    )
+    assert sharded.spec == whole.spec
+    category = chunks[3].metadata["category"]
+    for q in eval_queries()[:10]:
+        for filters in (None, {"category": category}):
+            got = sharded.retrieve(query=q, top_k=6, filters=filters, embedder=emb, workers=2)
+            want = whole.retrieve(query=q, top_k=6, filters=filters, embedder=emb)
+            assert [c.chunk_id for c in got] == [c.chunk_id for c in want]
+            assert [c.score for c in got] == pytest.approx([c.score for c in want], abs=1e-6)
+
+
+def test_sharded_hybrid_ranks_like_single_index(tmp_path: Path) -> None:
+    chunks = eval_chunks()
+    emb = HashEmbedder()
+    whole = build_hybrid_index(chunks=chunks, embedder=emb, lexical_k=8, dense_k=8)
+    sharded = build_sharded_index(
+        chunks=chunks,
+        shards=4,
+        build=lambda cs: build_hybrid_index(chunks=cs, embedder=emb, lexical_k=8, dense_k=8),
+    )
+    out = tmp_path / "sharded"
+    sharded.save(str(out))
+    queries = eval_queries()
+    for options in ({}, {"fusion": "normalized", "dense_weight": 0.5}):
+        want = whole.retrieve_many(queries=queries, top_k=5, embedder=emb, **options)
+        got = sharded.retrieve_many(queries=queries, top_k=5, embedder=emb, **options)
+        for a, b in zip(got, want, strict=True):
+            assert [c.chunk_id for c in a] == [c.chunk_id for c in b]
+            assert [c.score for c in a] == pytest.approx([c.score for c in b], abs=1e-6)
+    with ShardedIndex.load(str(out), verify="none", processes=2) as served:
+        got = served.retrieve_many(queries=queries, top_k=5, embedder=emb)
+    want = whole.retrieve_many(queries=queries, top_k=5, embedder=emb)
+    assert [[c.chunk_id for c in r] for r in got] == [[c.chunk_id for c in r] for r in want]
+
+
+def test_concurrent_fan_outs_of_different_widths_share_one_pool() -> None:
+    chunks = eval_chunks()
+    indexes = [
+        build_sharded_index(chunks=chunks, shards=n, build=lambda cs: build_bm25_index(chunks=cs))
+        for n in (2, 8, 40)
+    ]
+    pool = indexes_mod._shared_pool("shard")
+    queries = eval_queries()
+    with ThreadPoolExecutor(max_workers=6) as callers:
+        results = list(
+            callers.map(
+                lambda job: ids_scores(job[0].retrieve(query=job[1], top_k=5)),
+                [(idx, q) for q in queries[:4] for idx in indexes],
+            )
+        )
+    whole = build_bm25_index(chunks=chunks)
+    expected = [ids_scores(whole.retrieve(query=q, top_k=5)) for q in queries[:4]]
+    assert results == [e for e in expected for _ in indexes]
+    assert indexes_mod._shared_pool("shard") is pool
+    assert pool.submit(sum, [1, 2]).result() == 3
+
+
+def test_sharded_index_persists_and_serves_from_worker_processes(tmp_path: Path) -> None:
+    chunks = eval_chunks()
+    sharded = build_sharded_index(
+        chunks=chunks, shards=32, build=lambda cs: build_bm25_index(chunks=cs)
+    )
+    assert None in sharded.shards  # 25 documents cannot fill 32 shards
+    out = tmp_path / "sharded"
+    sharded.save(str(out))
+    assert len(list(out.glob("shard-*.idx"))) == sum(s is not None for s in sharded.shards)
+
+    loaded = load_index(str(out))
+    assert isinstance(loaded, ShardedIndex)
+    assert loaded.fingerprint == sharded.fingerprint
+    queries = eval_queries()[:8]
+    want = [ids_scores(r) for r in sharded.retrieve_many(queries=queries, top_k=5)]
+    with ShardedIndex.load(str(out), verify="none", processes=2) as served:
+        got = served.retrieve_many(queries=queries, top_k=5)
+        assert [ids_scores(r) for r in got] == want
+        assert dict(got[0][0].chunk.metadata) == dict(
+            sharded.retrieve(query=queries[0], top_k=1)[0].chunk.metadata
+        )
+
+    manifest = json.loads((out / MANIFEST).read_text(encoding="utf-8"))
+    live = next(e for e in manifest["shards"] if e["file"] is not None)
+    live["fingerprint"] = "0" * 24
+    (out / MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+    with pytest.raises(ValueError, match="fingerprint"):
+        load_index(str(out))
+
+
+def test_exact_vocab_shards_serve_from_worker_processes(tmp_path: Path) -> None:
+    chunks = eval_chunks()
+    whole = build_bm25_index(chunks=chunks, vocab="exact")
+    sharded = build_sharded_index(
+        chunks=chunks, shards=3, build=lambda cs: build_bm25_index(chunks=cs, vocab="exact")
+    )
+    out = tmp_path / "sharded"
+    sharded.save(str(out))
+    queries = eval_queries()[:8]
+    with ShardedIndex.load(str(out), verify="none", processes=2) as served:
+        got = served.retrieve_many(queries=queries, top_k=5)
+    assert [ids_scores(r) for r in got] == [
+        ids_scores(whole.retrieve(query=q, top_k=5)) for q in queries
+    ]
+
+
+def test_sharded_index_rejects_bad_layouts() -> None:
+    chunks = eval_chunks()
+    bm25 = build_bm25_index(chunks=chunks)
+    dense = build_numpy_cosine_index(chunks=chunks, embedder=HashEmbedder())
+    with pytest.raises(ValueError, match="same backend"):
+        ShardedIndex(shards=(bm25, dense))
+    with pytest.raises(ValueError, match="non-empty"):
+        ShardedIndex(shards=(None, None))
+    with pytest.raises(ValueError, match="saved index"):
+        ShardedIndex(shards=(bm25,), processes=2)
+    with pytest.raises(ValueError, match="shards"):
+        build_sharded_index(chunks=chunks, shards=0, build=lambda cs: build_bm25_index(chunks=cs))
@@ -0,0 +1,42 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 Bijan Mousavi
+
+from __future__ import annotations
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from bijux_rag.rag.vocab import TermDictionary
+
+term_strategy = st.text(alphabet=st.sampled_from("abczé中0"), min_size=1, max_size=8)
+
+
+@settings(max_examples=200, deadline=None)
+@given(
+    terms=st.lists(term_strategy, max_size=60),
+    probes=st.lists(term_strategy, max_size=20),
+    block_size=st.integers(min_value=1, max_value=8),
+)
+def test_term_dictionary_matches_sorted_list(
+    terms: list[str], probes: list[str], block_size: int
+) -> None:
+    vocab = TermDictionary.build(terms, block_size=block_size)
+    expected = sorted(set(terms))
+    assert len(vocab) == len(expected)
+    assert vocab.terms() == expected
+    rank = {t: i for i, t in enumerate(expected)}
+    for term in [*expected, *probes, ""]:
+        assert vocab.lookup(term) == rank.get(term)
+
+
+def test_term_dictionary_front_codes_shared_prefixes() -> None:
+    terms = [f"retrieval{i:03d}" for i in range(64)]
+    vocab = TermDictionary.build(terms, block_size=16)
+    assert vocab.offsets.tolist()[0] == 0 and vocab.offsets.size == 4
+    # Only block heads are stored in full; other terms keep a few suffix bytes.
+    assert vocab.data.nbytes < sum(len(t) for t in terms) // 2
+    assert vocab.lookup("retrieval063") == 63
+    assert vocab.lookup("retrieval064") is None
+    with pytest.raises(ValueError, match="block_size"):
+        TermDictionary.build(terms, block_size=0)